@@ -0,0 +1,340 @@
+"""
+========================================================================
+FastBits.py
+========================================================================
+Pure-Python Bits with fast paths for simulation. Select it by setting
+PYMTL_BITS=fast before importing pymtl3.
+
+Compared to PythonBits, this implementation
+- interns the results of operators: all values of Bits1-Bits8 and the
+  values below 16 of wider types are allocated once on the first use of
+  the width, so e.g. comparisons, single-bit indexing and narrow
+  arithmetic never allocate,
+- handles the common case of an operator (operands of the same width,
+  or an in-range non-negative int) inline without re-checking, and falls
+  back to the checked PythonBits implementation for everything else so
+  that the error messages are the same,
+- constructs the fixed-width BitsN types from an in-range int without
+  going through the generic constructor.
+
+The interned objects are shared, so they cannot be modified in place.
+@= and <<= on them return a fresh copy (the augmented assignment rebinds
+the variable, so update blocks behave as usual), but setting a bit/slice
+of a shared temporary like "x = a & b; x[0] = 1" raises an error. Use
+x = (a & b).clone() or construct it with BitsN(...) instead. Objects
+created by constructors, e.g. the values of signals, are never shared.
+
+Date   : Oct 18, 2026
+"""
+from .PythonBits import Bits as _Bits
+from .PythonBits import _upper
+
+object_new = object.__new__
+
+class Bits( _Bits ):
+  __slots__ = ()
+
+  # Fast paths. Anything that doesn't pass the fast path check is handled
+  # by the PythonBits implementation which also raises the errors.
+
+  def __ilshift__( self, v ):
+    nbits = self._nbits
+    if v.__class__ is int:
+      if 0 <= v <= _upper[nbits]:
+        self._next = v
+        return self
+    else:
+      try:
+        if v._nbits == nbits:
+          self._next = v._uint
+          return self
+      except AttributeError:
+        pass
+    return _Bits.__ilshift__( self, v )
+
+  def __imatmul__( self, v ):
+    nbits = self._nbits
+    if v.__class__ is int:
+      if 0 <= v <= _upper[nbits]:
+        self._uint = v
+        return self
+    else:
+      try:
+        if v._nbits == nbits:
+          self._uint = v._uint
+          return self
+      except AttributeError:
+        pass
+    return _Bits.__imatmul__( self, v )
+
+  def clone( self ):
+    ret = object_new( Bits )
+    ret._nbits = self._nbits
+    ret._uint  = self._uint
+    return ret
+
+  def __copy__( self ):
+    return self.clone()
+
+  def __deepcopy__( self, memo ):
+    return self.clone()
+
+  def __getitem__( self, idx ):
+    nbits = self._nbits
+    if idx.__class__ is int:
+      if 0 <= idx < nbits:
+        return _b1[ (self._uint >> idx) & 1 ]
+    elif idx.__class__ is slice:
+      start, stop = idx.start, idx.stop
+      if start.__class__ is int and stop.__class__ is int and idx.step is None and \
+         0 <= start < stop <= nbits:
+        return _new( stop - start, (self._uint >> start) & _upper[stop - start] )
+    return _to_fast( _Bits.__getitem__( self, idx ) )
+
+  def __setitem__( self, idx, v ):
+    nbits = self._nbits
+    if idx.__class__ is int:
+      if 0 <= idx < nbits:
+        if v.__class__ is int:
+          if 0 <= v <= 1:
+            self._uint = (self._uint & ~(1 << idx)) | (v << idx)
+            return
+        elif getattr( v, "_nbits", 0 ) == 1:
+          self._uint = (self._uint & ~(1 << idx)) | (v._uint << idx)
+          return
+    elif idx.__class__ is slice:
+      start, stop = idx.start, idx.stop
+      if start.__class__ is int and stop.__class__ is int and idx.step is None and \
+         0 <= start < stop <= nbits:
+        width = stop - start
+        if v.__class__ is int:
+          uint = v if 0 <= v <= _upper[width] else -1
+        else:
+          uint = v._uint if getattr( v, "_nbits", 0 ) == width else -1
+        if uint >= 0:
+          self._uint = (self._uint & ~(_upper[width] << start)) | (uint << start)
+          return
+    _Bits.__setitem__( self, idx, v )
+
+  def __add__( self, other ):
+    nbits = self._nbits
+    if other.__class__ is int:
+      if 0 <= other <= _upper[nbits]:
+        return _new( nbits, (self._uint + other) & _upper[nbits] )
+    elif getattr( other, "_nbits", 0 ) == nbits:
+      return _new( nbits, (self._uint + other._uint) & _upper[nbits] )
+    return _to_fast( _Bits.__add__( self, other ) )
+
+  def __radd__( self, other ):
+    return self.__add__( other )
+
+  def __sub__( self, other ):
+    nbits = self._nbits
+    if other.__class__ is int:
+      if 0 <= other <= _upper[nbits]:
+        return _new( nbits, (self._uint - other) & _upper[nbits] )
+    elif getattr( other, "_nbits", 0 ) == nbits:
+      return _new( nbits, (self._uint - other._uint) & _upper[nbits] )
+    return _to_fast( _Bits.__sub__( self, other ) )
+
+  def __rsub__( self, other ):
+    return _to_fast( _Bits.__rsub__( self, other ) )
+
+  def __mul__( self, other ):
+    return _to_fast( _Bits.__mul__( self, other ) )
+
+  def __rmul__( self, other ):
+    return _to_fast( _Bits.__mul__( self, other ) )
+
+  def __and__( self, other ):
+    nbits = self._nbits
+    if other.__class__ is int:
+      if 0 <= other <= _upper[nbits]:
+        return _new( nbits, self._uint & other )
+    elif getattr( other, "_nbits", 0 ) == nbits:
+      return _new( nbits, self._uint & other._uint )
+    return _to_fast( _Bits.__and__( self, other ) )
+
+  def __rand__( self, other ):
+    return self.__and__( other )
+
+  def __or__( self, other ):
+    nbits = self._nbits
+    if other.__class__ is int:
+      if 0 <= other <= _upper[nbits]:
+        return _new( nbits, self._uint | other )
+    elif getattr( other, "_nbits", 0 ) == nbits:
+      return _new( nbits, self._uint | other._uint )
+    return _to_fast( _Bits.__or__( self, other ) )
+
+  def __ror__( self, other ):
+    return self.__or__( other )
+
+  def __xor__( self, other ):
+    nbits = self._nbits
+    if other.__class__ is int:
+      if 0 <= other <= _upper[nbits]:
+        return _new( nbits, self._uint ^ other )
+    elif getattr( other, "_nbits", 0 ) == nbits:
+      return _new( nbits, self._uint ^ other._uint )
+    return _to_fast( _Bits.__xor__( self, other ) )
+
+  def __rxor__( self, other ):
+    return self.__xor__( other )
+
+  def __floordiv__( self, other ):
+    return _to_fast( _Bits.__floordiv__( self, other ) )
+
+  def __rfloordiv__( self, other ):
+    return _to_fast( _Bits.__rfloordiv__( self, other ) )
+
+  def __mod__( self, other ):
+    return _to_fast( _Bits.__mod__( self, other ) )
+
+  def __rmod__( self, other ):
+    return _to_fast( _Bits.__rmod__( self, other ) )
+
+  def __invert__( self ):
+    nbits = self._nbits
+    return _new( nbits, ~self._uint & _upper[nbits] )
+
+  def __lshift__( self, other ):
+    nbits = self._nbits
+    if other.__class__ is int:
+      if 0 <= other < nbits:
+        return _new( nbits, (self._uint << other) & _upper[nbits] )
+    elif getattr( other, "_nbits", 0 ) == nbits:
+      if other._uint < nbits:
+        return _new( nbits, (self._uint << other._uint) & _upper[nbits] )
+    return _to_fast( _Bits.__lshift__( self, other ) )
+
+  def __rshift__( self, other ):
+    nbits = self._nbits
+    if other.__class__ is int:
+      if 0 <= other <= _upper[nbits]:
+        return _new( nbits, self._uint >> other )
+    elif getattr( other, "_nbits", 0 ) == nbits:
+      return _new( nbits, self._uint >> other._uint )
+    return _to_fast( _Bits.__rshift__( self, other ) )
+
+  def __eq__( self, other ):
+    if other.__class__ is int:
+      if 0 <= other <= _upper[self._nbits]:
+        return _b1[ self._uint == other ]
+    elif getattr( other, "_nbits", 0 ) == self._nbits:
+      return _b1[ self._uint == other._uint ]
+    return _to_fast( _Bits.__eq__( self, other ) )
+
+  def __ne__( self, other ):
+    if other.__class__ is int:
+      if 0 <= other <= _upper[self._nbits]:
+        return _b1[ self._uint != other ]
+    elif getattr( other, "_nbits", 0 ) == self._nbits:
+      return _b1[ self._uint != other._uint ]
+    return _to_fast( _Bits.__ne__( self, other ) )
+
+  def __lt__( self, other ):
+    if other.__class__ is int:
+      if 0 <= other <= _upper[self._nbits]:
+        return _b1[ self._uint < other ]
+    elif getattr( other, "_nbits", 0 ) == self._nbits:
+      return _b1[ self._uint < other._uint ]
+    return _to_fast( _Bits.__lt__( self, other ) )
+
+  def __le__( self, other ):
+    if other.__class__ is int:
+      if 0 <= other <= _upper[self._nbits]:
+        return _b1[ self._uint <= other ]
+    elif getattr( other, "_nbits", 0 ) == self._nbits:
+      return _b1[ self._uint <= other._uint ]
+    return _to_fast( _Bits.__le__( self, other ) )
+
+  def __gt__( self, other ):
+    if other.__class__ is int:
+      if 0 <= other <= _upper[self._nbits]:
+        return _b1[ self._uint > other ]
+    elif getattr( other, "_nbits", 0 ) == self._nbits:
+      return _b1[ self._uint > other._uint ]
+    return _to_fast( _Bits.__gt__( self, other ) )
+
+  def __ge__( self, other ):
+    if other.__class__ is int:
+      if 0 <= other <= _upper[self._nbits]:
+        return _b1[ self._uint >= other ]
+    elif getattr( other, "_nbits", 0 ) == self._nbits:
+      return _b1[ self._uint >= other._uint ]
+    return _to_fast( _Bits.__ge__( self, other ) )
+
+  # Defining __eq__ resets __hash__
+  __hash__ = _Bits.__hash__
+
+#-------------------------------------------------------------------------
+# Interned values
+#-------------------------------------------------------------------------
+
+class _SharedBits( Bits ):
+  """ An interned value. It is immutable because it may be referenced by
+  any number of expressions. """
+  __slots__ = ()
+
+  def __ilshift__( self, v ):
+    return self.clone().__ilshift__( v )
+
+  def __imatmul__( self, v ):
+    return self.clone().__imatmul__( v )
+
+  def __setitem__( self, idx, v ):
+    raise ValueError( f"Cannot modify {self!r} in place because it is the shared result "
+                      f"of an operator.\n"
+                      f"- Suggestion: use a copy of the value, e.g. x = (a & b).clone(), "
+                      f"or construct it with Bits{self._nbits}( ... )" )
+
+  def __reduce__( self ):
+    return _new, (self._nbits, self._uint)
+
+# Widths up to this many bits have all values interned
+SHARED_ALL_NBITS = 8
+# Wider widths only have the values below this interned
+SHARED_WIDE_VALUES = 16
+
+def _mk_shared( nbits, uint ):
+  ret = object_new( _SharedBits )
+  ret._nbits = nbits
+  ret._uint  = uint
+  return ret
+
+class _SharedTable( dict ):
+  """ nbits -> interned values, created on the first use of a width """
+  __slots__ = ()
+
+  def __missing__( self, nbits ):
+    n = (1 << nbits) if nbits <= SHARED_ALL_NBITS else SHARED_WIDE_VALUES
+    ret = self[ nbits ] = tuple( _mk_shared( nbits, v ) for v in range(n) )
+    _nshared[ nbits ] = n
+    return ret
+
+class _SharedCount( dict ):
+  """ nbits -> number of interned values """
+  __slots__ = ()
+
+  def __missing__( self, nbits ):
+    return len( _shared[ nbits ] )
+
+_nshared = _SharedCount()
+_shared  = _SharedTable()
+
+_b1 = _shared[1]
+
+def _new( nbits, uint ):
+  if uint < _nshared[nbits]:
+    return _shared[nbits][uint]
+  ret = object_new( Bits )
+  ret._nbits = nbits
+  ret._uint  = uint
+  return ret
+
+def _to_fast( x ):
+  # Convert the result of the PythonBits implementation
+  if x.__class__ is _Bits:
+    return _new( x._nbits, x._uint )
+  return x
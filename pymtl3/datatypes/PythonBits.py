@@ -8,13 +8,26 @@ Author : Shunning Jiang
 Date   : Oct 31, 2017
 """
 
-# lower <= value <= upper
-_upper = [ 0,  1 ]
-_lower = [ 0, -1 ]
+# Support the same maximum width as Verilator
+MAX_NBITS = 65536
+
+class _MaskTable( dict ):
+  """ nbits -> bound. The bounds of wide types are computed on first use
+  so that we don't keep the huge integers of all widths around. """
+  __slots__ = ( "f", )
+
+  def __init__( self, f, n ):
+    self.f = f
+    for i in range(n):
+      self[i] = f(i)
 
-for i in range(2, 1024):
-  _upper.append( (_upper[i-1] << 1) + 1 )
-  _lower.append(  _lower[i-1] << 1      )
+  def __missing__( self, nbits ):
+    ret = self[ nbits ] = self.f( nbits )
+    return ret
+
+# lower <= value <= upper
+_upper = _MaskTable( lambda n: (1 << n) - 1, 1024 )
+_lower = _MaskTable( lambda n: -(1 << n >> 1), 1024 )
 
 object_new = object.__new__
 def _new_valid_bits( nbits, uint ):
@@ -32,7 +45,7 @@ class Bits:
 
   def __init__( self, nbits, v=0, trunc_int=False ):
     nbits = int(nbits)
-    if nbits < 1 or nbits >= 1024: raise ValueError(f"Only support 1 <= nbits < 1024, not {nbits}")
+    if nbits < 1 or nbits > MAX_NBITS: raise ValueError(f"Only support 1 <= nbits <= {MAX_NBITS}, not {nbits}")
 
     self._nbits = nbits
 
@@ -2,11 +2,13 @@
 ========================================================================
 bits_import.py
 ========================================================================
-Import RPython Bits from PyPy mamba module if the environment variable
-that forces the use of Python Bits is set, and there is actually an
-importable Bits in mamba module. Otherwise import the Pure-Python
-implementation in Bits.py. Then generate a bunch of fixed-width BitsN
-types for PyMTL use.
+Import RPython Bits from PyPy mamba module unless the environment
+variable that forces the use of Python Bits (PYMTL_BITS=1) is set, and
+there is actually an importable Bits in mamba module. Otherwise import
+the Pure-Python implementation in PythonBits.py. PYMTL_BITS=fast selects
+the Pure-Python implementation with interned values and fast paths in
+FastBits.py. Then generate a bunch of fixed-width BitsN types for PyMTL
+use.
 
 Author : Shunning Jiang
 Date   : Aug 23, 2018
@@ -34,6 +36,22 @@ class Bits{0}(Bits):
     return super().__init__( {0}, v, trunc_int )
 _bits_types[{0}] = b{0} = Bits{0}
 """
+elif os.getenv("PYMTL_BITS") == "fast":
+  from .FastBits import Bits
+
+  # The fixed-width types skip the generic constructor for in-range ints
+  bits_template = """
+class Bits{0}(Bits):
+  __slots__ = ()
+  nbits = {0}
+  def __init__( s, v=0, *, trunc_int=False ):
+    if v.__class__ is int and v >= 0 and not v >> {0}:
+      s._nbits = {0}
+      s._uint  = v
+    else:
+      Bits.__init__( s, {0}, v, trunc_int )
+_bits_types[{0}] = b{0} = Bits{0}
+"""
 else:
   try:
     from mamba import Bits
@@ -45,6 +45,10 @@ class Pixel:
   def __str__( self ):
     return f'({self.r},{self.g},{self.b})'
 
+Both also accept packed=True to store the whole struct as one integer,
+which makes copying and comparing structs much cheaper. See "Packed
+bitstructs" below for the differences.
+
 Author : Yanghui Ou, Shunning Jiang
   Date : Oct 19, 2019
 """
@@ -519,6 +523,233 @@ def _mk_from_bits_fns( fields, total_nbits ):
                        "other = other.to_bits()",
                        f"return cls({','.join(from_bits_strs)})" ], _globals )
 #-------------------------------------------------------------------------
+# Packed bitstructs
+#-------------------------------------------------------------------------
+# A packed bitstruct (bitstruct(packed=True)) stores the whole struct as
+# one unsigned integer in self._uint with the same layout as to_bits,
+# i.e. the first field is the most significant. Fields are properties
+# that extract/insert the field using precomputed shifts and masks, so
+# that whole-struct operations (@=, <<=, _flip, clone, ==, hash, to_bits
+# and from_bits) are O(1) integer operations regardless of the number of
+# fields and the nesting depth.
+#
+# A field is returned as a view of its bits whose updates are written
+# through to the enclosing structs, so s.out.x @= 1, s.out.x[0] @= 1 and
+# s.out.inner.y[4:8] @= 0xf work as for normal bitstructs. A Bits field
+# is an instance of a subclass of its BitsN type that reports the BitsN
+# type as its __class__ and a nested bitstruct field (which has to be
+# packed as well) an instance of its type.
+# Packed bitstructs don't support list fields.
+
+_PACKED = '__bitstruct_packed__'
+_PACKED_RESERVED = ( '_uint', '_next', '_parent', '_shift', '_mask' )
+
+_object_new = object.__new__
+
+def is_packed_bitstruct_class( cls ):
+  """Returns True if cls is a bitstruct created with packed=True."""
+  return is_bitstruct_class( cls ) and cls.__dict__.get( _PACKED, False )
+
+def _check_packed_fields( cls, fields ):
+  for name, type_ in fields.items():
+    if name in _PACKED_RESERVED:
+      raise TypeError( f"Field name '{name}' of packed BitStruct {cls.__name__} "
+                       f"is reserved for the implementation." )
+    if isinstance( type_, list ):
+      raise TypeError( "Packed BitStructs don't support list fields:\n"
+                      f"- Field '{name}' of BitStruct {cls.__name__} is annotated as {type_}." )
+    if is_bitstruct_class( type_ ) and not is_packed_bitstruct_class( type_ ):
+      raise TypeError( "A bitstruct field of a packed BitStruct has to be packed as well:\n"
+                      f"- Field '{name}' of BitStruct {cls.__name__} is annotated as "
+                      f"non-packed BitStruct {type_.__name__}." )
+
+# Returns { name: (type, lsb, nbits) }. The first field is the MSB.
+
+def _mk_packed_layout( fields ):
+  total_nbits = sum( type_.nbits for type_ in fields.values() )
+  layout = {}
+  end_bit = total_nbits
+  for name, type_ in fields.items():
+    end_bit -= type_.nbits
+    layout[ name ] = ( type_, end_bit, type_.nbits )
+  return total_nbits, layout
+
+def _packed_uint( v, type_ ):
+  if v.__class__ is not type_:
+    raise TypeError( f"Cannot assign {v!r} to a {type_.__name__} field of a packed BitStruct." )
+  return v._uint
+
+def _packed_write_back( self ):
+  # Write the value of a view of a nested field through to the enclosing
+  # structs up to the root.
+  child, parent = self, self._parent
+  while parent is not None:
+    shift = child._shift
+    parent._uint = (parent._uint & ~(child._mask << shift)) | (child._uint << shift)
+    child, parent = parent, parent._parent
+
+# Returns the view type of a BitsN field, which writes the updates of @=
+# and of bits/slices through to the enclosing structs.
+
+_packed_bits_views = {}
+
+def _mk_packed_bits_view( type_ ):
+  if type_ in _packed_bits_views:
+    return _packed_bits_views[ type_ ]
+
+  class PackedBitsView( type_ ):
+    __slots__ = ( '_parent', '_shift' )
+    _mask = (1 << type_.nbits) - 1
+
+    # Code that looks at the type of a value, e.g. the elaboration of the
+    # signals of a field, sees the type of the field
+    __class__ = property( lambda self: type_ )
+
+    def __imatmul__( self, v ):
+      super().__imatmul__( v )
+      _packed_write_back( self )
+      return self
+
+    def __setitem__( self, idx, v ):
+      super().__setitem__( idx, v )
+      _packed_write_back( self )
+
+    def __reduce__( self ):
+      return type_, ( int(self), )
+
+  _packed_bits_views[ type_ ] = PackedBitsView
+  return PackedBitsView
+
+#-------------------------------------------------------------------------
+# _mk_packed_property
+#-------------------------------------------------------------------------
+# Creates the property of a field. For example, for a Bits4 field x at
+# bit 8 and a packed bitstruct field p at bit 0 of a 12-bit struct, the
+# getters and setters look like the following:
+#
+# def get_x( self ):
+#   ret = _view((self._uint >> 8) & 15)
+#   ret._parent = self
+#   ret._shift = 8
+#   return ret
+#
+# def set_x( self, v ):
+#   if v.__class__ is not _type: v = _type(v)
+#   self._uint = (self._uint & 255) | (int(v) << 8)
+#   if self._parent is not None: self._write_back()
+#
+# def get_p( self ):
+#   ret = _new(_type)
+#   ret._uint = (self._uint >> 0) & 255
+#   ret._parent = self
+#   ret._shift = 0
+#   return ret
+#
+# def set_p( self, v ):
+#   self._uint = (self._uint & 3840) | (_packed_uint(v, _type) << 0)
+#   if self._parent is not None: self._write_back()
+
+def _mk_packed_property( name, type_, lsb, nbits, total_nbits ):
+  mask  = (1 << nbits) - 1
+  clear = ((1 << total_nbits) - 1) ^ (mask << lsb)
+  _globals = { '_type': type_, '_new': _object_new, '_packed_uint': _packed_uint }
+  if not is_bitstruct_class( type_ ):
+    _globals['_view'] = _mk_packed_bits_view( type_ )
+  write_back = 'if self._parent is not None: self._write_back()'
+
+  if is_bitstruct_class( type_ ):
+    getter = _create_fn( f'get_{name}', [ 'self' ],
+                         [ 'ret = _new(_type)',
+                           f'ret._uint = (self._uint >> {lsb}) & {mask}',
+                           'ret._parent = self',
+                           f'ret._shift = {lsb}',
+                           'return ret' ], _globals )
+    setter = _create_fn( f'set_{name}', [ 'self', 'v' ],
+                         [ f'self._uint = (self._uint & {clear}) | (_packed_uint(v, _type) << {lsb})',
+                           write_back ], _globals )
+  else:
+    getter = _create_fn( f'get_{name}', [ 'self' ],
+                         [ f'ret = _view((self._uint >> {lsb}) & {mask})',
+                           'ret._parent = self',
+                           f'ret._shift = {lsb}',
+                           'return ret' ], _globals )
+    setter = _create_fn( f'set_{name}', [ 'self', 'v' ],
+                         [ 'if v.__class__ is not _type: v = _type(v)',
+                           f'self._uint = (self._uint & {clear}) | (int(v) << {lsb})',
+                           write_back ], _globals )
+
+  return property( getter, setter )
+
+#-------------------------------------------------------------------------
+# _mk_packed_init_fn
+#-------------------------------------------------------------------------
+# Creates a __init__ function that packs all fields at once, e.g.
+#
+# def __init__( s, x = 0, p = None ):
+#   s._uint = (int(_type_x(x)) << 8) | (_packed_uint(_type_p() if p is None else p, _type_p) << 0)
+
+def _mk_packed_init_fn( self_name, layout ):
+  _globals = { '_packed_uint': _packed_uint }
+  terms = []
+  for name, (type_, lsb, _) in layout.items():
+    _globals[ f"_type_{name}" ] = type_
+    if is_bitstruct_class( type_ ):
+      terms.append( f"(_packed_uint(_type_{name}() if {name} is None else {name}, _type_{name}) << {lsb})" )
+    else:
+      terms.append( f"(int(_type_{name}({name})) << {lsb})" )
+
+  return _create_fn(
+    '__init__',
+    [ self_name ] + [ _mk_init_arg( name, type_ ) for name, (type_, _, _) in layout.items() ],
+    [ f"{self_name}._uint = {' | '.join( terms )}" ],
+    _globals = _globals,
+  )
+
+#-------------------------------------------------------------------------
+# Whole-struct methods of packed bitstructs
+#-------------------------------------------------------------------------
+
+def _packed_eq( self, other ):
+  return (other.__class__ is self.__class__) and self._uint == other._uint
+
+def _packed_hash( self ):
+  return hash( (self.__class__.__name__, self._uint) )
+
+def _packed_ilshift( self, other ):
+  if self.__class__ is not other.__class__:
+    other = self.__class__.from_bits( other.to_bits() )
+  self._next = other._uint
+  return self
+
+def _packed_flip( self ):
+  self._uint = self._next
+  if self._parent is not None: self._write_back()
+
+def _packed_imatmul( self, other ):
+  if self.__class__ is not other.__class__:
+    other = self.__class__.from_bits( other.to_bits() )
+  self._uint = other._uint
+  if self._parent is not None: self._write_back()
+  return self
+
+def _packed_clone( self ):
+  ret = _object_new( self.__class__ )
+  ret._uint = self._uint
+  return ret
+
+def _packed_deepcopy( self, memo ):
+  return self.clone()
+
+def _packed_to_bits( self ):
+  return self._bits_type( self._uint )
+
+def _packed_from_bits( cls, other ):
+  assert cls.nbits == other.nbits, f'LHS bitstruct {cls.nbits}-bit <> RHS other {other.nbits}-bit'
+  ret = _object_new( cls )
+  ret._uint = int( other.to_bits() )
+  return ret
+
+#-------------------------------------------------------------------------
 # _check_valid_array
 #-------------------------------------------------------------------------
 
@@ -590,7 +821,7 @@ def _get_self_name( fields ):
 _bitstruct_hash_cache = {}
 
 def _process_class( cls, add_init=True, add_str=True, add_repr=True,
-                    add_hash=True ):
+                    add_hash=True, packed=False ):
 
   # Get annotations of the class
   cls_annotations = cls.__dict__.get('__annotations__', {})
@@ -621,8 +852,11 @@ def _process_class( cls, add_init=True, add_str=True, add_repr=True,
     fields[ a_name ] = a_type
     hashable_fields[ a_name ] = _convert_list_to_tuple( a_type )
 
+  if packed:
+    _check_packed_fields( cls, fields )
+
   cls._hash = _hash = hash( (cls.__name__, *tuple(hashable_fields.items()),
-                             add_init, add_str, add_repr, add_hash) )
+                             add_init, add_str, add_repr, add_hash, packed) )
 
   if _hash in _bitstruct_hash_cache:
     return _bitstruct_hash_cache[ _hash ]
@@ -633,6 +867,19 @@ def _process_class( cls, add_init=True, add_str=True, add_repr=True,
   # as bit struct.
   setattr( cls, _FIELDS, fields )
 
+  assert not 'get_field_type' in cls.__dict__
+
+  def get_field_type( cls, name ):
+    if name in cls.__bitstruct_fields__:
+      return cls.__bitstruct_fields__[ name ]
+    raise AttributeError( f"{cls} has no field '{name}'" )
+
+  cls.get_field_type = classmethod(get_field_type)
+
+  if packed:
+    _add_packed_methods( cls, fields, add_init, add_str, add_repr, add_hash )
+    return cls
+
   # Add methods to the class
 
   # Create __init__. Here I follow the dataclass convention that we only
@@ -693,18 +940,68 @@ def _process_class( cls, add_init=True, add_str=True, add_repr=True,
   from_bits = _mk_from_bits_fns( fields, cls.nbits )
   cls.from_bits = classmethod(from_bits)
 
-  assert not 'get_field_type' in cls.__dict__
+  # TODO: maybe add a to_bits and from bits function.
 
-  def get_field_type( cls, name ):
-    if name in cls.__bitstruct_fields__:
-      return cls.__bitstruct_fields__[ name ]
-    raise AttributeError( f"{cls} has no field '{name}'" )
+  return cls
 
-  cls.get_field_type = classmethod(get_field_type)
+#-------------------------------------------------------------------------
+# _add_packed_methods
+#-------------------------------------------------------------------------
+# The packed counterpart of the method generation in _process_class.
 
-  # TODO: maybe add a to_bits and from bits function.
+def _add_packed_methods( cls, fields, add_init, add_str, add_repr, add_hash ):
 
-  return cls
+  total_nbits, layout = _mk_packed_layout( fields )
+
+  setattr( cls, _PACKED, True )
+  cls._uint       = 0
+  cls._parent     = None
+  cls._shift      = 0
+  cls._mask       = (1 << total_nbits) - 1
+  cls._bits_type  = mk_bits( total_nbits )
+  cls._write_back = _packed_write_back
+
+  for name, (type_, lsb, nbits) in layout.items():
+    setattr( cls, name, _mk_packed_property( name, type_, lsb, nbits, total_nbits ) )
+
+  if add_init:
+    if not '__init__' in cls.__dict__:
+      cls.__init__ = _mk_packed_init_fn( _get_self_name(fields), layout )
+
+  if add_str:
+    if not '__str__' in cls.__dict__:
+      cls.__str__ = _mk_str_fn( fields )
+
+  if add_repr:
+    if not '__repr__' in cls.__dict__:
+      cls.__repr__ = _mk_repr_fn( fields )
+
+  if not '__eq__' in cls.__dict__:
+    cls.__eq__ = _packed_eq
+  else:
+    w_msg = ( f'Overwriting {cls.__qualname__}\'s __eq__ may cause the '
+              'translated verilog behaves differently from PyMTL '
+              'simulation.')
+    warnings.warn( w_msg )
+
+  if add_hash:
+    if not '__hash__' in cls.__dict__:
+      cls.__hash__ = _packed_hash
+
+  assert not '__ilshift__' in cls.__dict__ and not '_flip' in cls.__dict__
+  cls.__ilshift__ = _packed_ilshift
+  cls._flip       = _packed_flip
+
+  assert not 'clone' in cls.__dict__ and not '__deepcopy__' in cls.__dict__
+  cls.clone        = _packed_clone
+  cls.__deepcopy__ = _packed_deepcopy
+
+  assert '__imatmul__' not in cls.__dict__ and 'to_bits' not in cls.__dict__ and \
+         'nbits' not in cls.__dict__ and 'from_bits' not in cls.__dict__
+  cls.__imatmul__ = _packed_imatmul
+  cls.nbits       = total_nbits
+  cls.to_bits     = _packed_to_bits
+  cls.from_bits   = classmethod(_packed_from_bits)
 
 #-------------------------------------------------------------------------
 # bitstruct
@@ -712,10 +1009,11 @@ def _process_class( cls, add_init=True, add_str=True, add_repr=True,
 # The actual class decorator. We add a * in the argument list so that the
 # following argument can only be used as keyword arguments.
 
-def bitstruct( _cls=None, *, add_init=True, add_str=True, add_repr=True, add_hash=True ):
+def bitstruct( _cls=None, *, add_init=True, add_str=True, add_repr=True, add_hash=True,
+               packed=False ):
 
   def wrap( cls ):
-    return _process_class( cls, add_init, add_str, add_repr )
+    return _process_class( cls, add_init, add_str, add_repr, packed=packed )
 
   # Called as @bitstruct(...)
   if _cls is None:
@@ -731,7 +1029,7 @@ def bitstruct( _cls=None, *, add_init=True, add_str=True, add_repr=True, add_has
 # TODO: should we add base parameters to support inheritence?
 
 def mk_bitstruct( cls_name, fields, *, namespace=None, add_init=True,
-                   add_str=True, add_repr=True, add_hash=True ):
+                   add_str=True, add_repr=True, add_hash=True, packed=False ):
 
   # copy namespace since  will mutate it
   namespace = {} if namespace is None else namespace.copy()
@@ -750,4 +1048,4 @@ def mk_bitstruct( cls_name, fields, *, namespace=None, add_init=True,
   namespace['__annotations__'] = annos
   cls = types.new_class( cls_name, (), {}, lambda ns: ns.update( namespace ) )
   return bitstruct( cls, add_init=add_init, add_str=add_str,
-                    add_repr=add_repr, add_hash=add_hash )
+                    add_repr=add_repr, add_hash=add_hash, packed=packed )
@@ -0,0 +1,57 @@
+#=========================================================================
+# bits_bench.py
+#=========================================================================
+# Microbenchmarks of the hot Bits operations of update blocks for the
+# Pure-Python Bits implementations. Run with
+#
+#   python -m pymtl3.datatypes.test.bits_bench [nbits ...]
+#
+# Date   : Oct 18, 2026
+
+import sys
+import timeit
+
+from .. import FastBits, PythonBits
+
+# name -> (setup, statement)
+BENCHMARKS = {
+  'add'         : ( "a = Bits(n, 3); b = Bits(n, 5)",   "a + b" ),
+  'add_int'     : ( "a = Bits(n, 3)",                   "a + 1" ),
+  'eq'          : ( "a = Bits(n, 3); b = Bits(n, 5)",   "a == b" ),
+  'getitem'     : ( "a = Bits(n, 3)",                   "a[1]" ),
+  'getslice'    : ( "a = Bits(n, 3)",                   "a[0:n//2]" ),
+  'setitem'     : ( "a = Bits(n, 3); b = Bits(1, 1)",   "a[1] = b" ),
+  'setslice'    : ( "a = Bits(n, 3); b = Bits(n//2, 1)", "a[0:n//2] = b" ),
+  'imatmul'     : ( "a = Bits(n, 3); b = Bits(n, 5)",   "a @= b" ),
+  'imatmul_int' : ( "a = Bits(n, 3)",                   "a @= 7" ),
+  'ilshift'     : ( "a = Bits(n, 3); b = Bits(n, 5)",   "a <<= b" ),
+}
+
+IMPLS = {
+  'PythonBits' : PythonBits.Bits,
+  'FastBits'   : FastBits.Bits,
+}
+
+def run_benchmarks( nbits=32, number=200000, repeat=3 ):
+  """ Return {(benchmark, impl): ns per operation}. """
+  results = {}
+  for name, (setup, stmt) in BENCHMARKS.items():
+    for impl, Bits in IMPLS.items():
+      env = { 'Bits': Bits, 'n': nbits }
+      t = min( timeit.repeat( stmt, setup, number=number, repeat=repeat, globals=env ) )
+      results[ name, impl ] = t / number * 1e9
+  return results
+
+def main( argv ):
+  widths = [ int(x) for x in argv ] or [ 8, 32, 128 ]
+  impls  = list(IMPLS)
+  for nbits in widths:
+    results = run_benchmarks( nbits )
+    print( f"\nBits{nbits} (ns/op)" )
+    print( f"{'':12}" + "".join( f"{x:>12}" for x in impls ) + f"{'speedup':>10}" )
+    for name in BENCHMARKS:
+      ts = [ results[ name, x ] for x in impls ]
+      print( f"{name:12}" + "".join( f"{t:12.1f}" for t in ts ) + f"{ts[0]/ts[-1]:9.2f}x" )
+
+if __name__ == "__main__":
+  main( sys.argv[1:] )
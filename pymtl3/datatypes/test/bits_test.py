@@ -780,3 +780,28 @@ def test_to_vcd_str():
   assert Bits(15,35).to_vcd_str() == "b000000000100011 "
   assert Bits(15,35).to_vcd_str() == "b000000000100011 "
 
+
+def test_wide_bits():
+
+  a = Bits( 4096, (1 << 4095) | 0xabc )
+  b = Bits( 4096, 1 )
+  assert (a + b)[0:12] == Bits( 12, 0xabd )
+  assert a[4095] == 1
+  assert (a >> 4092).uint() == 8
+  assert a.hex().startswith( "0x800" ) and len( a.hex() ) == 2 + 1024
+
+  a[2048:2060] = Bits( 12, 0xfff )
+  assert a[2048:2060] == 0xfff
+  with pytest.raises( ValueError ):
+    a[2048:2060] = Bits( 13, 0 )
+
+  c = Bits( 65536, -1 )
+  assert c.uint() == (1 << 65536) - 1
+  assert ~c == 0
+  assert c[65535] == 1
+  assert c.int() == -1
+
+  with pytest.raises( ValueError ):
+    Bits( 65537, 0 )
+  with pytest.raises( ValueError ):
+    Bits( 4096, 1 << 4096 )
@@ -8,6 +8,8 @@ Author : Yanghui Ou
   Date : July 27, 2019
 """
 
+from copy import deepcopy
+
 import pytest
 
 from pymtl3.dsl import Component, InPort, OutPort, update
@@ -19,6 +21,7 @@ from ..bitstructs import (
     get_bitstruct_inst_all_classes,
     is_bitstruct_class,
     is_bitstruct_inst,
+    is_packed_bitstruct_class,
     mk_bitstruct,
 )
 
@@ -604,3 +607,129 @@ def test_imatmul_ilshift():
   assert c == B(0x1234567890abcd0f,[A(2),A(3),A(4)], A(5) )
   c._flip()
   assert c.to_bits() == Bits164(0xf0dcba09876543210005000400030002)
+
+#-------------------------------------------------------------------------
+# Packed bitstructs
+#-------------------------------------------------------------------------
+
+@bitstruct( packed=True )
+class PackedPoint:
+  x : Bits4
+  y : Bits8
+
+PackedNested = mk_bitstruct( "PackedNested", {
+    'a'  : Bits3,
+    'pt0': PackedPoint,
+    'pt1': PackedPoint,
+  }, packed=True )
+
+@bitstruct
+class UnpackedPoint:
+  x : Bits4
+  y : Bits8
+
+UnpackedNested = mk_bitstruct( "UnpackedNested", {
+    'a'  : Bits3,
+    'pt0': UnpackedPoint,
+    'pt1': UnpackedPoint,
+  })
+
+def test_packed_same_as_unpacked():
+  assert is_packed_bitstruct_class( PackedNested )
+  assert not is_packed_bitstruct_class( UnpackedNested )
+  assert PackedNested.nbits == UnpackedNested.nbits == 27
+
+  p = PackedNested( 5, PackedPoint( 1, 2 ), PackedPoint( 3, 4 ) )
+  u = UnpackedNested( 5, UnpackedPoint( 1, 2 ), UnpackedPoint( 3, 4 ) )
+  assert p.to_bits() == u.to_bits()
+  assert str(p) == str(u)
+  assert PackedNested.from_bits( u.to_bits() ) == p
+  assert p == PackedNested( 5, PackedPoint( 1, 2 ), PackedPoint( 3, 4 ) )
+  assert p != PackedNested()
+  assert hash(p) == hash( p.clone() )
+
+  # Updates of nested fields are written through to the whole struct
+  for x in ( p, u ):
+    x.a = Bits3(2)
+    x.pt0.y @= 0xff
+    x.pt1.x = Bits4(7)
+    x.pt1 @= x.pt0
+  assert p.to_bits() == u.to_bits()
+  assert p.pt1 == PackedPoint( 1, 0xff )
+
+  with pytest.raises( ValueError ):
+    p.a = 8
+  with pytest.raises( TypeError ):
+    p.pt0 = UnpackedPoint( 1, 2 )
+
+def test_packed_field_slices():
+  p = PackedNested( 5, PackedPoint( 1, 2 ), PackedPoint( 3, 4 ) )
+  u = UnpackedNested( 5, UnpackedPoint( 1, 2 ), UnpackedPoint( 3, 4 ) )
+
+  # Updates of bits and slices of fields are written through as well
+  for x in ( p, u ):
+    x.a[2] @= 0
+    x.pt0.x[3] @= 1
+    x.pt1.y[4:8] @= 0xf
+    x.pt1.y[0] = 1
+    y = x.pt0.y
+    y @= 0xab
+  assert p.to_bits() == u.to_bits()
+  assert p == PackedNested( 1, PackedPoint( 9, 0xab ), PackedPoint( 3, 0xf5 ) )
+
+  # The value of a field is a BitsN
+  assert p.pt0.y.__class__ is Bits8
+  assert repr( p.pt0.y ) == repr( Bits8( 0xab ) )
+  assert deepcopy( p.a ) == 1
+
+def test_packed_copy_and_ff():
+  p = PackedNested( 5, PackedPoint( 1, 2 ), PackedPoint( 3, 4 ) )
+  c = p.clone()
+  assert c == p and c is not p
+  c.pt0.x = 0
+  assert p.pt0.x == 1
+  assert deepcopy( p ) == p
+
+  c <<= p
+  assert c.pt0.x == 0
+  c._flip()
+  assert c == p
+
+  c @= Bits27(0)
+  assert c == PackedNested()
+
+def test_packed_invalid_fields():
+  with pytest.raises( TypeError ):
+    mk_bitstruct( "PackedList", { 'x': [ Bits4, Bits4 ] }, packed=True )
+  with pytest.raises( TypeError ):
+    mk_bitstruct( "PackedUnpacked", { 'x': UnpackedPoint }, packed=True )
+  with pytest.raises( TypeError ):
+    mk_bitstruct( "PackedReserved", { '_uint': Bits4 }, packed=True )
+
+def test_packed_component():
+  class A( Component ):
+    def construct( s ):
+      s.in_    =  InPort( PackedNested )
+      s.out    = OutPort( PackedNested )
+      s.out_pt = OutPort( PackedPoint  )
+      s.out_y  = OutPort( Bits8 )
+      s.out_y //= s.in_.pt1.y
+
+      @update
+      def up_bitstruct():
+        s.out @= s.in_
+        s.out.pt0.x @= 10
+        s.out.pt0.y @= 11
+        s.out.pt1.x[0] @= 1
+        s.out.pt1.y[4:8] @= 0xf
+        s.out_pt @= s.in_.pt1
+
+  dut = A()
+  dut.elaborate()
+  dut.apply( simple_sim_pass )
+  dut.in_ = PackedNested( 1, PackedPoint(2,3), PackedPoint(4,5) )
+  dut.tick()
+  assert dut.out == PackedNested( 1, PackedPoint(10,11), PackedPoint(5,0xf5) )
+  assert dut.out_pt == PackedPoint(4,5)
+  assert dut.out_y == 5
+  assert dut.in_ == PackedNested( 1, PackedPoint(2,3), PackedPoint(4,5) )
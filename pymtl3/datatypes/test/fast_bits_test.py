@@ -0,0 +1,98 @@
+#=========================================================================
+# fast_bits_test.py
+#=========================================================================
+# Tests for the Bits implementation with interned values and fast
+# paths, checked against the reference Pure-Python Bits.
+#
+# Date   : Oct 18, 2026
+
+import operator
+import pickle
+import random
+from copy import deepcopy
+
+import pytest
+
+from .. import PythonBits
+from ..FastBits import Bits
+from .bits_bench import run_benchmarks
+
+_binops = [ operator.add, operator.sub, operator.mul, operator.and_, operator.or_,
+            operator.xor, operator.floordiv, operator.mod, operator.lshift,
+            operator.rshift, operator.eq, operator.ne, operator.lt, operator.le,
+            operator.gt, operator.ge ]
+
+def _result( f, *args ):
+  try:
+    ret = f( *args )
+  except (ValueError, IndexError, ZeroDivisionError) as e:
+    return type(e)
+  if isinstance( ret, PythonBits.Bits ):
+    return (ret.nbits, ret.uint())
+  return ret
+
+def test_same_as_python_bits():
+  rng = random.Random( 0xfa57 )
+  for nbits in [ 1, 2, 7, 8, 9, 32, 100 ]:
+    for _ in range(200):
+      x, y = rng.randrange( 1 << nbits ), rng.randrange( 1 << nbits )
+      other_nbits = nbits if rng.random() < 0.8 else nbits + 1
+      y2 = rng.choice( [ y, y & 7, -1, 1 << nbits ] )
+      fa, fb = Bits( nbits, x ), Bits( other_nbits, y )
+      pa, pb = PythonBits.Bits( nbits, x ), PythonBits.Bits( other_nbits, y )
+
+      for f in _binops:
+        assert _result( f, fa, fb ) == _result( f, pa, pb )
+        assert _result( f, fa, y2 ) == _result( f, pa, y2 )
+      assert _result( operator.invert, fa ) == _result( operator.invert, pa )
+
+      i, j = sorted( rng.sample( range(nbits + 2), 2 ) )
+      for idx in [ i, slice(i, j), slice(Bits(8, i), j) ]:
+        assert _result( operator.getitem, fa, idx ) == _result( operator.getitem, pa, idx )
+
+        fv, pv = Bits( fa.nbits, fa.uint() ), PythonBits.Bits( pa.nbits, pa.uint() )
+        value = rng.choice( [ 0, 1, y2, fb ] )
+        pvalue = pb if value is fb else value
+        assert _result( operator.setitem, fv, idx, value ) == \
+               _result( operator.setitem, pv, idx, pvalue )
+        assert (fv.nbits, fv.uint()) == (pv.nbits, pv.uint())
+
+      fv, pv = Bits( nbits, x ), PythonBits.Bits( nbits, x )
+      assert _result( operator.imatmul, fv, y2 ) == _result( operator.imatmul, pv, y2 )
+      assert _result( operator.ilshift, fv, fb ) == _result( operator.ilshift, pv, pb )
+
+def test_interned_results():
+  a, b = Bits( 32, 3 ), Bits( 32, 4 )
+  assert (a + b) is (b + a)
+  assert (a == b) is (a < 1)
+  assert (a + 100) is not (a + 100)
+  assert type( a + b ) is not type( a + 100 )
+  assert isinstance( a + b, Bits ) and isinstance( a + b, PythonBits.Bits )
+
+  # Constructors always return new objects
+  assert Bits( 32, 3 ) is not Bits( 32, 3 )
+
+def test_shared_results_are_not_modified():
+  a, b = Bits( 8, 3 ), Bits( 8, 5 )
+  x = a & b
+  x @= 7
+  assert x == 7 and (a & b) == 1
+  x = a & b
+  x <<= Bits( 8, 7 )
+  assert (a & b) == 1
+
+  with pytest.raises( ValueError ):
+    x = a & b
+    x[0] = 0
+
+  x = (a & b).clone()
+  x[0] = 0
+  assert x == 0 and (a & b) == 1
+
+  for y in [ deepcopy( a & b ), pickle.loads( pickle.dumps( a & b ) ) ]:
+    assert y == 1
+  assert pickle.loads( pickle.dumps( a & b ) ) is (a & b)
+
+def test_bits_bench():
+  results = run_benchmarks( 16, number=10, repeat=1 )
+  assert all( t > 0 for t in results.values() )
@@ -0,0 +1,128 @@
+"""
+========================================================================
+AstCache.py
+========================================================================
+Persistent cache of the metadata that ComponentLevel2._cache_func_meta
+extracts from update blocks: the source, the parsed AST, and the
+read/write/call name lists produced by AstHelper. The in-class cache of
+_cache_func_meta only helps within one process; this cache lets a new
+process skip inspect.getsourcelines, ast.parse and the AST traversal
+for every function whose source file hasn't changed. The RTLIR
+behavioral passes get the AST through get_update_block_info, so they
+share the cached trees as well.
+
+There is one pickled entry per source file, keyed by the path and the
+hash of the file, the pymtl3 version and the Python version. Inside an
+entry, functions are identified by their qualified name and first line
+number. Entries are loaded lazily and the new functions are written
+back at the end of elaboration.
+
+The cache is turned on with PYMTL_AST_CACHE (see OptInCache).
+
+Date : Oct 18, 2026
+"""
+import os
+import sys
+
+from pymtl3.extra.disk_cache import (
+    OptInCache,
+    PickleDiskCache,
+    default_cache_dir,
+    hash_file,
+    hash_strings,
+)
+from pymtl3.version import __version__
+
+# Bump this when the format of the entries or the output of
+# AstHelper.extract_reads_writes_calls changes
+CACHE_FORMAT = 1
+
+class AstCache( OptInCache ):
+
+  env_var = "PYMTL_AST_CACHE"
+  _store  = None
+
+  # path -> [ key, {(qualname, lineno): meta}, dirty ]
+  _files = {}
+
+  @classmethod
+  def enable( cls, path=None ):
+    super().enable( path )
+    cls._store = None
+    cls._files = {}
+
+  @classmethod
+  def disable( cls ):
+    cls.flush()
+    super().disable()
+
+  @classmethod
+  def _get_store( cls ):
+    if cls._store is None:
+      cls._store = PickleDiskCache( "ast", cls._path or default_cache_dir() )
+    return cls._store
+
+  @classmethod
+  def _get_file( cls, path ):
+    try:
+      return cls._files[ path ]
+    except KeyError:
+      pass
+
+    try:
+      key = hash_strings( [ f"format{CACHE_FORMAT}", __version__, sys.version,
+                            os.path.abspath( path ), hash_file( path ) ] )
+    except OSError:
+      entry = None
+    else:
+      funcs = cls._get_store().get( key )
+      if not isinstance( funcs, dict ):
+        funcs = {}
+      entry = [ key, funcs, False ]
+
+    cls._files[ path ] = entry
+    return entry
+
+  @classmethod
+  def get( cls, func ):
+    """ Return the cached (src, line, file, ast, rd, wr, fc) of func, or
+    None if func is not cached. """
+    if not cls.is_enabled():
+      return None
+    code  = func.__code__
+    entry = cls._get_file( code.co_filename )
+    if entry is None:
+      return None
+    return entry[1].get( (func.__qualname__, code.co_firstlineno) )
+
+  @classmethod
+  def put( cls, func, meta ):
+    if not cls.is_enabled():
+      return
+    code  = func.__code__
+    entry = cls._get_file( code.co_filename )
+    if entry is None:
+      return
+    entry[1][ (func.__qualname__, code.co_firstlineno) ] = meta
+    entry[2] = True
+
+  @classmethod
+  def flush( cls ):
+    """ Write back the entries with new functions. Functions cached by
+    other processes in the meantime are merged in. """
+    if not cls._enabled:
+      return
+    store = cls._get_store()
+    for entry in cls._files.values():
+      if entry is None or not entry[2]:
+        continue
+      key, funcs, _ = entry
+      old = store.get( key )
+      if isinstance( old, dict ):
+        for k, v in old.items():
+          funcs.setdefault( k, v )
+      try:
+        store.put( key, funcs )
+      except Exception: # e.g. unpicklable constants in the AST
+        store.invalidate( key )
+      entry[2] = False
@@ -8,6 +8,7 @@ Author : Yanghui Ou
   Date : Apr 6, 2019
 """
 
+from .AstCache import AstCache
 from .ComponentLevel1 import ComponentLevel1
 from .ComponentLevel7 import ComponentLevel7
 from .Connectable import (
@@ -108,8 +109,7 @@ class Component( ComponentLevel7 ):
 
   def _flush_pending_value_connections( s ):
     if s._dsl._has_pending_value_connections:
-      s._dsl.all_value_nets = s._resolve_value_connections()
-      s._dsl._has_pending_value_connections = False
+      s._update_value_nets()
 
   def _flush_pending_method_connections( s ):
     if s._dsl._has_pending_method_connections:
@@ -127,6 +127,12 @@ class Component( ComponentLevel7 ):
     except AttributeError:
       raise NotElaboratedError()
 
+    top._dsl.elab_cache = None
+
+    registry = top._dsl.object_registry
+    registry.is_open = True
+    registry.journal = []
+
     NamedObject._elaborate_stack = [ parent ]
 
     # Check if we are adding obj to a list of to a component
@@ -186,6 +192,7 @@ class Component( ComponentLevel7 ):
 
       obj._dsl.elaborate_top = top
       obj._dsl.NamedObject_fields = set()
+      registry.add( obj )
 
       NamedObject._elaborate_stack.append( obj )
       NamedObject.__setattr__ = NamedObject.__setattr_for_elaborate__
@@ -194,23 +201,14 @@ class Component( ComponentLevel7 ):
 
       NamedObject._elaborate_stack.pop()
 
-    added_components = obj._collect_all_single( lambda x: isinstance( x, Component ) )
+    added_components = { x for x in registry.journal if isinstance( x, Component ) }
 
     # First elaborate all functions to spawn more named objects
     for c in added_components:
       c._elaborate_read_write_func()
+    AstCache.flush()
 
-    added_signals, added_method_ports = \
-      obj._collect_all( [ lambda x: isinstance( x, Signal ), \
-                          lambda x: isinstance( x, MethodPort ) ] )
-
-    top._dsl.all_components    |= added_components
-    top._dsl.all_signals       |= added_signals
-    top._dsl.all_method_ports  |= added_method_ports
-
-    top._dsl.all_named_objects |= added_components
-    top._dsl.all_named_objects |= added_signals
-    top._dsl.all_named_objects |= added_method_ports
+    top._dsl.all_components |= added_components
 
     for c in added_components:
       top._collect_vars( c )
@@ -225,6 +223,7 @@ class Component( ComponentLevel7 ):
     for (x, y) in provided_connections:
       connection_pairs.append( x )
       connection_pairs.append( eval(y) )
+      top._mark_dirty_signals( connection_pairs[-2:] )
       if not top._dsl._has_pending_value_connections and isinstance( x, Signal ):
         top._dsl._has_pending_value_connections = True
       if not top._dsl._has_pending_method_connections and isinstance( x, MethodPort ):
@@ -252,6 +251,20 @@ class Component( ComponentLevel7 ):
     for func, obj_name in provided_func_calls:
       parent._dsl.func_calls[func].add( eval(obj_name) )
 
+    # All named objects spawned by obj, including slices that are created
+    # by the provided connections and metadata above, were registered
+    added_signals      = { x for x in registry.journal if isinstance( x, Signal ) }
+    added_method_ports = { x for x in registry.journal if isinstance( x, MethodPort ) }
+    registry.is_open = False
+    registry.journal = None
+
+    top._dsl.all_signals       |= added_signals
+    top._dsl.all_method_ports  |= added_method_ports
+
+    # Only the nets of the new signals and the signals they are connected
+    # to have to be resolved again
+    top._mark_dirty_signals( added_signals )
+
     del NamedObject._elaborate_stack
 
   def _delete_component( top, obj ):
@@ -267,6 +280,7 @@ class Component( ComponentLevel7 ):
 
     def _delete_component_internal( top, foo ):
       assert obj._dsl.elaborate_top is top
+      top._dsl.elab_cache = None
 
       # First make sure we flush pending connections
       value_nets  = top.get_all_value_nets()
@@ -301,10 +315,13 @@ class Component( ComponentLevel7 ):
       top._dsl.all_signals       -= removed_signals
       top._dsl.all_method_ports  -= removed_method_ports
 
-      top._dsl.all_named_objects -= removed_components
+      registry = top._dsl.object_registry
+      for x in removed_components:
+        registry.remove( x )
 
       removed_connectables = removed_signals | removed_method_ports
-      top._dsl.all_named_objects -= removed_connectables
+      for x in removed_connectables:
+        registry.remove( x )
 
       removed_consts = set()
       if isinstance( foo, Placeholder ):
@@ -415,7 +432,11 @@ class Component( ComponentLevel7 ):
         del y._dsl.parent_obj
 
       # We don't break nets anymore. Instead, we set the flags to true so
-      # that the next get_xxx_net will immediately recollect nets.
+      # that the next get_xxx_net will immediately recollect nets. Only
+      # the nets of the removed signals and their outside neighbors are
+      # resolved again.
+      top._mark_dirty_signals( removed_signals )
+      top._mark_dirty_signals( [ x for x, _ in saved_connections ] )
       top._dsl._has_pending_value_connections = True
       top._dsl._has_pending_method_connections = True
 
@@ -582,6 +603,14 @@ class Component( ComponentLevel7 ):
   """ Metadata APIs that should only be called at elaborated top"""
 
   def get_all_object_filter( s, filt ):
+    # A class or a tuple of classes is looked up in the object registry
+    # instead of calling filt on every named object
+    if isinstance( filt, (type, tuple) ):
+      try:
+        return s._dsl.object_registry.get_objects_of_type( filt )
+      except AttributeError:
+        return s._collect_all_single( lambda x: isinstance( x, filt ) )
+
     assert callable( filt )
     try:
       return { x for x in s._dsl.all_named_objects if filt(x) }
@@ -725,6 +754,7 @@ class Component( ComponentLevel7 ):
 
   def add_value_port( top, parent, name, o ):
     top._check_called_at_elaborate_top( "add_port" )
+    top._dsl.elab_cache = None
 
     assert isinstance( o, (InPort, OutPort) )
     # If we are adding field parent.x, we simply reuse the setattr hook
@@ -737,13 +767,13 @@ class Component( ComponentLevel7 ):
     del NamedObject._elaborate_stack
 
     top._dsl.all_signals.add( o )
-    top._dsl.all_named_objects.add( o )
 
   def add_connection( top, o1, o2 ):
 
     # Currently only support connecting signals
 
     top._check_called_at_elaborate_top( "add_connection" )
+    top._dsl.elab_cache = None
     if isinstance( o2, Connectable ): o1, o2 = o2, o1
 
     assert isinstance( o1, Connectable ), "Cannot connect two non-connectable objects"
@@ -829,6 +859,7 @@ class Component( ComponentLevel7 ):
 
       top._dsl.all_adjacency[o1].add(o2)
       top._dsl.all_adjacency[o2].add(o1)
+      top._mark_dirty_signals( (o1, o2) )
       top._dsl._has_pending_value_connections = True
 
   def add_connections( s, *args ):
@@ -124,10 +124,9 @@ class ComponentLevel1( NamedObject ):
     s._dsl.all_components = set()
 
   def _elaborate_collect_all_vars( s ):
-    for c in s._dsl.all_named_objects:
-      if isinstance( c, ComponentLevel1 ):
-        s._dsl.all_components.add( c )
-        s._collect_vars( c )
+    for c in s._dsl.object_registry.get_objects_of_type( ComponentLevel1 ):
+      s._dsl.all_components.add( c )
+      s._collect_vars( c )
 
   def elaborate( s ):
     # Directly use the base class elaborate
@@ -21,6 +21,7 @@ from collections import defaultdict
 from pymtl3.datatypes import Bits, is_bitstruct_class
 
 from . import AstHelper
+from .AstCache import AstCache
 from .ComponentLevel1 import ComponentLevel1
 from .Connectable import Connectable, Const, InPort, Interface, OutPort, Signal, Wire
 from .ConstraintTypes import RD, WR, U, ValueConstraint
@@ -100,15 +101,28 @@ class ComponentLevel2( ComponentLevel1 ):
       AstHelper.extract_reads_writes_calls( s, func, _ast, _rd, _wr, _fc )
 
     elif name not in name_info:
+      # The functions of different classes and processes with the same
+      # source share the persistent cache
+      meta = AstCache.get( func )
+      if meta is not None:
+        _src, _line, _file, _ast, _rd, _wr, _fc = meta
+        name_info[ name ] = (False, _src, _line, _file, _ast )
+        name_rd[ name ]   = _rd
+        name_wr[ name ]   = _wr
+        name_fc[ name ]   = _fc
+        return
+
       _src, _line = inspect.getsourcelines( func )
       _src = "".join( _src )
       _ast = ast.parse( compiled_re.sub( r'\2', _src ) )
+      _file = inspect.getsourcefile( func )
 
-      name_info[ name ] = (False, _src, _line, inspect.getsourcefile( func ), _ast )
+      name_info[ name ] = (False, _src, _line, _file, _ast )
       name_rd[ name ]   = _rd   = []
       name_wr[ name ]   = _wr   = []
       name_fc[ name ]   = _fc   = []
       AstHelper.extract_reads_writes_calls( s, func, _ast, _rd, _wr, _fc )
+      AstCache.put( func, (_src, _line, _file, _ast, _rd, _wr, _fc) )
 
   def _elaborate_read_write_func( s ):
 
@@ -604,12 +618,11 @@ class ComponentLevel2( ComponentLevel1 ):
 
   # Override
   def _elaborate_collect_all_vars( s ):
-    for c in s._dsl.all_named_objects:
-      if isinstance( c, Signal ):
-        s._dsl.all_signals.add( c )
-      elif isinstance( c, ComponentLevel1 ):
-        s._dsl.all_components.add( c )
-        s._collect_vars( c )
+    registry = s._dsl.object_registry
+    s._dsl.all_signals |= registry.get_objects_of_type( Signal )
+    for c in registry.get_objects_of_type( ComponentLevel1 ):
+      s._dsl.all_components.add( c )
+      s._collect_vars( c )
 
   # Override
   def elaborate( s ):
@@ -617,7 +630,7 @@ class ComponentLevel2( ComponentLevel1 ):
     s._elaborate_construct()
 
     # First elaborate all functions to spawn more named objects
-    for c in s._collect_all_single( lambda s: isinstance( s, ComponentLevel2 ) ):
+    for c in s._dsl.object_registry.get_objects_of_type( ComponentLevel2 ):
       c._elaborate_read_write_func()
 
     s._elaborate_collect_all_named_objects()
@@ -627,6 +640,8 @@ class ComponentLevel2( ComponentLevel1 ):
 
     s._check_valid_dsl_code()
 
+    AstCache.flush()
+
   #-----------------------------------------------------------------------
   # Post-elaborate public APIs (can only be called after elaboration)
   #-----------------------------------------------------------------------
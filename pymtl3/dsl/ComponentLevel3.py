@@ -32,6 +32,7 @@ from .Connectable import (
     Wire,
     _connect_check,
 )
+from .ElaborationCache import ElaborationCache
 from .errors import (
     InvalidConnectionError,
     InvalidPlaceholderError,
@@ -398,7 +399,13 @@ class ComponentLevel3( ComponentLevel2 ):
 
     nets = s._floodfill_nets( s._dsl.all_signals, s._dsl.all_adjacency )
 
-    # Then figure out writers: all writes in upblks and their nest objects
+    return s._resolve_net_writers( nets )
+
+  def _resolve_net_writers( s, nets ):
+    """ Figure out the writer of each net in nets (see
+    _resolve_value_connections). Return a list of (writer, net). """
+
+    # Figure out writers: all writes in upblks and their nest objects
 
     writer_prop = {}
 
@@ -518,6 +525,95 @@ class ComponentLevel3( ComponentLevel2 ):
 
     return headed + [ (None, x) for x in headless ]
 
+  @staticmethod
+  def _value_net_root( x ):
+    # Inlined get_top_level_signal; constants are their own root
+    try:
+      return x._dsl.top_level_signal or x
+    except AttributeError:
+      return x
+
+  def _build_value_net_index( s ):
+    # top level signal -> { id(net): net } of all nets that contain the
+    # top level signal or one of its fields/slices
+    index = defaultdict(dict)
+    for net in s._dsl.all_value_nets:
+      for x in net[1]:
+        index[ s._value_net_root( x ) ][ id(net) ] = net
+    return index
+
+  def _resolve_value_connections_incremental( s ):
+    """ Re-resolve only the nets that are affected by the mutations since
+    the last resolution, which are recorded as dirty signals.
+
+    The writer of a net may be inferred from the writer of an ancestor
+    field or an overlapping sibling slice in another net, so we invalidate
+    every net that contains a signal under the same top level signal as a
+    dirty signal, and repeat until no more nets are invalidated. Then
+    we floodfill from the remaining signals of the invalidated nets and
+    resolve the writers of the new nets only. """
+
+    index = s._dsl._value_net_index
+    if index is None:
+      index = s._dsl._value_net_index = s._build_value_net_index()
+
+    all_signals = s._dsl.all_signals
+    root_of     = s._value_net_root
+
+    dirty    = s._dsl._dirty_signals
+    roots    = { root_of( x ) for x in dirty }
+    worklist = list( roots )
+    invalid  = {}
+
+    while worklist:
+      for key, net in index.pop( worklist.pop(), {} ).items():
+        if key not in invalid:
+          invalid[ key ] = net
+          for x in net[1]:
+            r = root_of( x )
+            if r not in roots:
+              roots.add( r )
+              worklist.append( r )
+
+    seeds = { x for x in dirty if x in all_signals }
+    for _, net in invalid.values():
+      seeds.update( x for x in net if x in all_signals )
+
+    new_nets = s._resolve_net_writers( s._floodfill_nets( seeds, s._dsl.all_adjacency ) )
+
+    # Keep the unaffected nets in their original order
+    nets = [ net for net in s._dsl.all_value_nets if id(net) not in invalid ]
+    nets.extend( new_nets )
+
+    for net in new_nets:
+      for x in net[1]:
+        index[ root_of( x ) ][ id(net) ] = net
+
+    return nets
+
+  def _update_value_nets( s ):
+    if s._dsl._dirty_signals is None:
+      s._dsl.all_value_nets   = s._resolve_value_connections()
+      s._dsl._value_net_index = None
+    else:
+      s._dsl.all_value_nets   = s._resolve_value_connections_incremental()
+
+    s._dsl._dirty_signals = set()
+    s._dsl._has_pending_value_connections = False
+
+  def _mark_dirty_signals( s, objs ):
+    # Record the signals whose nets are changed by a mutation. Anything
+    # else (e.g. an interface) falls back to resolving all nets.
+    if s._dsl._dirty_signals is None:
+      return
+    for x in objs:
+      if isinstance( x, Signal ):
+        s._dsl._dirty_signals.add( x )
+      elif not isinstance( x, (Const, int) ) and not is_bitstruct_inst( x ) and \
+           not isinstance( x, Bits ):
+        s._dsl._dirty_signals = None
+        return
+
   def _check_port_in_nets( s ):
     nets = s._dsl.all_value_nets
 
@@ -673,6 +769,7 @@ class ComponentLevel3( ComponentLevel2 ):
   def _disconnect_signal_int( s, o1, o2 ):
 
     nets = s.get_all_value_nets()
+    s._dsl._value_net_index = None
 
     for i, net in enumerate( nets ):
       writer, signals = net
@@ -698,6 +795,7 @@ class ComponentLevel3( ComponentLevel2 ):
   def _disconnect_signal_signal( s, o1, o2 ):
 
     nets = s.get_all_value_nets()
+    s._dsl._value_net_index = None
 
     assert o1 in s._dsl.all_adjacency[o2] and o2 in s._dsl.all_adjacency[o1]
     # I don't remove it from m._adjacency since they are not used later
@@ -776,10 +874,26 @@ class ComponentLevel3( ComponentLevel2 ):
     super()._elaborate_declare_vars()
     s._dsl.all_adjacency = defaultdict(set)
 
+    # Signals whose nets are affected by mutations after elaboration, or
+    # None if all nets have to be resolved again
+    s._dsl._dirty_signals   = set()
+    s._dsl._value_net_index = None
+
+  def _resolve_value_connections_cached( s ):
+    # Reuse the nets from a previous elaboration of the same model if the
+    # elaboration cache is enabled
+    s._dsl.elab_cache = cache = ElaborationCache.create( s )
+    nets = None if cache is None else cache.load_value_nets( s )
+    if nets is None:
+      nets = s._resolve_value_connections()
+      if cache is not None:
+        cache.store_value_nets( s, nets )
+    return nets
+
   # Override
   def _elaborate_collect_all_vars( s ):
     super()._elaborate_collect_all_vars()
-    s._dsl.all_value_nets = s._resolve_value_connections()
+    s._dsl.all_value_nets = s._resolve_value_connections_cached()
     s._dsl._has_pending_value_connections = False
 
     s._check_valid_dsl_code()
@@ -793,7 +907,8 @@ class ComponentLevel3( ComponentLevel2 ):
   def get_all_value_nets( s ):
 
     if s._dsl._has_pending_value_connections:
-      s._dsl.all_value_nets = s._resolve_value_connections()
-      s._dsl._has_pending_value_connections = False
+      s._update_value_nets()
+      # The model has been mutated so the cached results no longer apply
+      s._dsl.elab_cache = None
 
     return s._dsl.all_value_nets
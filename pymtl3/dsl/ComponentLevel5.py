@@ -143,17 +143,15 @@ class ComponentLevel5( ComponentLevel4 ):
   # to add some fine-grained functionalities to avoid reduntant isinstance
   # Override
   def _elaborate_collect_all_vars( s ):
-    for c in s._dsl.all_named_objects:
-      if isinstance( c, Signal ):
-        s._dsl.all_signals.add( c )
-      elif isinstance( c, ComponentLevel1 ):
-        s._dsl.all_components.add( c )
-        s._collect_vars( c )
-      # Added here
-      elif isinstance( c, MethodPort ):
-        s._dsl.all_method_ports.add( c )
-
-    s._dsl.all_value_nets  = s._resolve_value_connections()
+    registry = s._dsl.object_registry
+    s._dsl.all_signals |= registry.get_objects_of_type( Signal )
+    for c in registry.get_objects_of_type( ComponentLevel1 ):
+      s._dsl.all_components.add( c )
+      s._collect_vars( c )
+    # Added here
+    s._dsl.all_method_ports |= registry.get_objects_of_type( MethodPort )
+
+    s._dsl.all_value_nets  = s._resolve_value_connections_cached()
     # Added here
     s._dsl.all_method_nets = s._resolve_method_connections()
     s._dsl._has_pending_value_connections = False
@@ -239,6 +239,10 @@ class Signal( NamedObject, Connectable ):
             xd._my_name    = name
             xd._my_indices = indices
 
+          registry = xd.elaborate_top._dsl.object_registry
+          if registry.is_open:
+            registry.add( x )
+
         if parent_is_list:
           parent.append( x )
         else:
@@ -291,6 +295,10 @@ class Signal( NamedObject, Connectable ):
       xd.slice       = slice( start, stop )
       top_signal.__dict__[ sl_tuple ] = sd.slices[ sl_tuple ] = x
 
+      registry = xd.elaborate_top._dsl.object_registry
+      if registry.is_open:
+        registry.add( x )
+
     return top_signal.__dict__[ sl_tuple ]
 
   def default_value( s ):
@@ -333,12 +341,13 @@ class Signal( NamedObject, Connectable ):
 
     leaf_signals = []
     def recursive_getattr( m, instance ):
-      for x in instance.__dict__:
+      # Packed bitstructs don't keep the fields in __dict__
+      for x in instance.__bitstruct_fields__:
         signal = getattr( m, x )
         if signal.is_leaf_signal():
           leaf_signals.append( signal )
         else:
-          recursive_getattr( signal, instance.__dict__[x] )
+          recursive_getattr( signal, getattr( instance, x ) )
 
     # OK now it's not Bits or int, let's instantiate it if it's never
     # accessed
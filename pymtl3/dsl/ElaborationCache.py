@@ -0,0 +1,271 @@
+"""
+========================================================================
+ElaborationCache.py
+========================================================================
+Persistent cache of the expensive graph computations done during
+elaboration and scheduling: the value nets resolved by
+_resolve_value_connections, the update block constraint graph built by
+GenDAGPass, and the intra-cycle schedules. A warm start still constructs
+the components and regenerates all closures, but replaces the graph
+algorithms with a lookup.
+
+An entry is keyed by a hash of the source files that define the classes
+in the hierarchy, the constructor parameters of every component, the
+names/types of all named objects, and the pymtl3 version. Everything is
+stored by name and resolved against the newly constructed model; an
+entry that fails to resolve or to validate is discarded and recomputed.
+
+The key doesn't cover everything the graphs depend on. For example, a
+constant imported from another module may select the signal that an
+update block writes. So the nets are validated against the adjacency
+graph, and the constraint graph and the schedules are stored together
+with a hash of their inputs (the signals read and written by each block,
+or the graph being scheduled) which must match the fresh model.
+
+The cache is turned on with PYMTL_ELAB_CACHE (see OptInCache).
+
+Date : Oct 18, 2026
+"""
+from pymtl3.extra.disk_cache import (
+    DiskCache,
+    OptInCache,
+    default_cache_dir,
+    hash_strings,
+    source_file_key,
+    strip_addresses,
+)
+from pymtl3.version import __version__
+
+from .Connectable import Const
+
+# Bump this when the format of the entries changes
+CACHE_FORMAT = 2
+
+class ElaborationCache( OptInCache ):
+
+  env_var = "PYMTL_ELAB_CACHE"
+
+  @classmethod
+  def create( cls, top ):
+    """ Return the cache of the elaborated top, or None if the cache is
+    disabled or the model cannot be hashed reliably. """
+    if not cls.is_enabled():
+      return None
+    key = cls.compute_key( top )
+    if key is None:
+      return None
+    return cls( key, cls._path )
+
+  def __init__( s, key, path=None ):
+    s.key   = key
+    s.store = DiskCache( "elab", path or default_cache_dir() )
+
+  #-----------------------------------------------------------------------
+  # Key
+  #-----------------------------------------------------------------------
+
+  @staticmethod
+  def compute_key( top ):
+    parts = [ f"format{CACHE_FORMAT}", __version__ ]
+
+    components = sorted( top._dsl.all_components, key=repr )
+
+    # The source files of all classes in the hierarchy
+    files = set()
+    for c in components:
+      for cls in type(c).__mro__:
+        if cls is not object:
+          files.add( source_file_key( cls ) )
+    if None in files:
+      return None
+    parts.extend( sorted( files ) )
+
+    # Constructor parameters. Object addresses are not stable across
+    # processes so we strip them; different objects with the same repr
+    # are caught by the structural check and the net validation.
+    for c in components:
+      tree = c._dsl.param_tree
+      leaf = None if tree is None else tree.leaf
+      parts.append( strip_addresses( f"{c!r}:{type(c).__module__}.{type(c).__qualname__}:"
+                                         f"{c._dsl.args!r}:{sorted(c._dsl.kwargs.items())!r}:{leaf!r}" ) )
+
+    # Names and types of all named objects
+    parts.extend( sorted( f"{x!r}:{type(x).__name__}" for x in top._dsl.all_named_objects ) )
+
+    return hash_strings( parts )
+
+  #-----------------------------------------------------------------------
+  # Value nets
+  #-----------------------------------------------------------------------
+  # A Const has exactly one neighbor in the adjacency graph, so we refer
+  # to it by its neighbor.
+
+  def load_value_nets( s, top ):
+    data = s.store.get( s.key + "-nets" )
+    if data is None:
+      return None
+
+    adjacency = top._dsl.all_adjacency
+    signals   = { repr(x): x for x in top._dsl.all_signals }
+
+    def resolve( ref ):
+      if isinstance( ref, str ):
+        return signals[ ref ]
+      for x in adjacency[ signals[ ref[1] ] ]:
+        if isinstance( x, Const ):
+          return x
+      raise KeyError( ref[1] )
+
+    try:
+      nets = []
+      members = set()
+      for writer, net in data:
+        net = { resolve( x ) for x in net }
+        nets.append( ( None if writer is None else resolve( writer ), net ) )
+        members |= net
+    except (KeyError, TypeError, ValueError):
+      s.store.invalidate( s.key + "-nets" )
+      return None
+
+    # Cheap validation: the nets must be exactly the connected components
+    # of the adjacency graph.
+    connected = { x for x, adjs in adjacency.items() if adjs }
+    if members != connected or \
+       any( not adjacency[x] <= net for _, net in nets for x in net ):
+      s.store.invalidate( s.key + "-nets" )
+      return None
+
+    return nets
+
+  def store_value_nets( s, top, nets ):
+    adjacency = top._dsl.all_adjacency
+
+    def ref( x ):
+      if isinstance( x, Const ):
+        return [ "const", repr( next( iter( adjacency[x] ) ) ) ]
+      return repr(x)
+
+    s.store.put( s.key + "-nets", [ [ None if writer is None else ref( writer ),
+                                      [ ref(x) for x in net ] ] for writer, net in nets ] )
+
+  #-----------------------------------------------------------------------
+  # Update blocks and constraints
+  #-----------------------------------------------------------------------
+
+  @staticmethod
+  def blk_ref( top, blk ):
+    """ Return the name-based reference of an update block or a net block
+    generated by GenDAGPass, or None for anything else. """
+    if blk in top._dsl.all_upblks:
+      return [ repr( top.get_update_block_host_component( blk ) ), blk.__name__ ]
+    if blk in getattr( top._dag, "genblks", () ):
+      return blk.__name__
+    return None
+
+  @staticmethod
+  def blk_resolver( top ):
+    components = { repr(x): x for x in top._dsl.all_components }
+    genblks    = { x.__name__: x for x in getattr( top._dag, "genblks", () ) }
+
+    def resolve( ref ):
+      if isinstance( ref, str ):
+        return genblks[ ref ]
+      blk = components[ ref[0] ]._dsl.name_upblk[ ref[1] ]
+      if blk not in top._dsl.all_upblks:
+        raise KeyError( ref[1] )
+      return blk
+
+    return resolve
+
+  def hash_constraint_inputs( s, top ):
+    """ Return a hash of everything GenDAGPass computes the constraint
+    graph of value signals from: the signals read and written by each
+    update block and net block, the update_ff blocks, and the explicit
+    constraints. """
+    ref = lambda x: repr( s.blk_ref( top, x ) )
+
+    update_ff = top.get_all_update_ff()
+    upblk_reads, upblk_writes, _ = top.get_all_upblk_metadata()
+    U_U, RD_U, WR_U, _ = top.get_all_explicit_constraints()
+
+    parts = []
+    for reads, writes in [ ( upblk_reads, upblk_writes ),
+                           ( top._dag.genblk_reads, top._dag.genblk_writes ) ]:
+      for blk in reads.keys() | writes.keys():
+        parts.append( f"{ref(blk)}{'ff' if blk in update_ff else ''}:"
+                      f"{sorted( map( repr, reads.get( blk, () ) ) )}:"
+                      f"{sorted( map( repr, writes.get( blk, () ) ) )}" )
+    parts.extend( f"{ref(x)}<{ref(y)}" for x, y in U_U )
+    for typ, constraints in [ ( "rd", RD_U ), ( "wr", WR_U ) ]:
+      for obj, blks in constraints.items():
+        parts.extend( f"{typ}({obj!r}){sign}{ref(blk)}" for sign, blk in blks )
+
+    return hash_strings( sorted( parts ) )
+
+  def load_constraints( s, top, inputs ):
+    data = s.store.get( s.key + "-constraints" )
+    if data is None:
+      return None
+
+    resolve = s.blk_resolver( top )
+    signals = { repr(x): x for x in top._dsl.all_signals }
+    try:
+      if data[ 'inputs' ] != inputs:
+        raise ValueError( "stale constraints" )
+      all_constraints = { ( resolve(x), resolve(y) ) for x, y in data[ 'all' ] }
+      constraint_objs = { ( resolve(x), resolve(y) ): { signals[o] for o in objs }
+                          for x, y, objs in data[ 'objs' ] }
+    except (KeyError, TypeError, ValueError):
+      s.store.invalidate( s.key + "-constraints" )
+      return None
+    return all_constraints, constraint_objs
+
+  def store_constraints( s, top, inputs, all_constraints, constraint_objs ):
+    ref = lambda x: s.blk_ref( top, x )
+
+    data = { 'inputs': inputs,
+             'all':  [ [ ref(x), ref(y) ] for x, y in all_constraints ],
+             'objs': [ [ ref(x), ref(y), [ repr(o) for o in objs ] ]
+                       for (x, y), objs in constraint_objs.items() ] }
+
+    if any( r is None for x in data[ 'all' ] for r in x ) or \
+       any( x is None or y is None for x, y, _ in data[ 'objs' ] ):
+      return
+    s.store.put( s.key + "-constraints", data )
+
+  #-----------------------------------------------------------------------
+  # Schedules
+  #-----------------------------------------------------------------------
+  # A schedule is a list of entries, each of which is a list of update
+  # blocks plus a list of signals. How to interpret them is up to the
+  # schedule pass that stores it. The schedule pass also provides the hash
+  # of the inputs of the schedule, e.g. with hash_graph.
+
+  def hash_graph( s, top, V, E ):
+    """ Return a hash of the graph of update blocks V and edges E. """
+    ref = lambda x: repr( s.blk_ref( top, x ) )
+    return hash_strings( sorted( ref(x) for x in V ) +
+                         sorted( f"{ref(x)}<{ref(y)}" for x, y in E ) )
+
+  def load_schedule( s, top, name, inputs ):
+    data = s.store.get( f"{s.key}-{name}" )
+    if data is None:
+      return None
+
+    resolve = s.blk_resolver( top )
+    signals = { repr(x): x for x in top._dsl.all_signals }
+    try:
+      if data[ 'inputs' ] != inputs:
+        raise ValueError( "stale schedule" )
+      return [ ( [ resolve(x) for x in blks ], [ signals[x] for x in objs ] )
+               for blks, objs in data[ 'schedule' ] ]
+    except (KeyError, TypeError, ValueError):
+      s.store.invalidate( f"{s.key}-{name}" )
+      return None
+
+  def store_schedule( s, top, name, inputs, schedule ):
+    data = [ ( [ s.blk_ref( top, x ) for x in blks ], [ repr(x) for x in objs ] )
+             for blks, objs in schedule ]
+    if any( x is None for blks, _ in data for x in blks ):
+      return
+    s.store.put( f"{s.key}-{name}", { 'inputs': inputs, 'schedule': data } )
@@ -19,7 +19,7 @@ Author : Shunning Jiang, Yanghui Ou
 Date   : Nov 3, 2018
 """
 import re
-from collections import deque
+from collections import defaultdict, deque
 
 from .errors import FieldReassignError, NotElaboratedError
 
@@ -97,6 +97,79 @@ class ParamTreeNode:
   def __repr__( self ):
     return f"\nleaf:{self.leaf}\nchildren:{self.children}"
 
+# Index of the named objects of an elaborated model. The elaboration
+# hooks register every object when it gets its name, so we don't need to
+# traverse the whole hierarchy to collect or filter objects.
+class NamedObjectRegistry:
+  def __init__( self ):
+    self.objects  = set()
+    self.by_class = defaultdict(set) # exact class -> objects
+    self.by_host  = defaultdict(set) # closest ancestor component -> objects
+    self.host     = {}
+
+    # Objects are only registered when the registry is open, i.e. during
+    # elaboration and mutation APIs. Signals that are spawned later (e.g.
+    # slicing in a pass) are not part of the model.
+    self.is_open  = False
+
+    # If not None, newly registered objects are also appended here
+    self.journal  = None
+
+    self._type_cache = {}
+
+  def add( self, obj ):
+    if obj in self.objects:
+      return
+    self.objects.add( obj )
+
+    cls = obj.__class__
+    if cls not in self.by_class:
+      self._type_cache.clear()
+    self.by_class[ cls ].add( obj )
+
+    host = obj._dsl.parent_obj
+    while host is not None and not self.is_component( host ):
+      host = host._dsl.parent_obj
+    self.host[ obj ] = host
+    self.by_host[ host ].add( obj )
+
+    if self.journal is not None:
+      self.journal.append( obj )
+
+  def remove( self, obj ):
+    if obj not in self.objects:
+      return
+    self.objects.remove( obj )
+    self.by_class[ obj.__class__ ].discard( obj )
+    self.by_host[ self.host.pop( obj ) ].discard( obj )
+
+  @staticmethod
+  def is_component( obj ):
+    try:
+      return obj.is_component()
+    except NotImplementedError:
+      return False
+
+  def get_objects_of_type( self, types ):
+    """ Return the set of objects that are instances of types, which can
+    be a class or a tuple of classes like isinstance. """
+    try:
+      classes = self._type_cache[ types ]
+    except KeyError:
+      classes = self._type_cache[ types ] = [ c for c in self.by_class if issubclass( c, types ) ]
+
+    if len(classes) == 1:
+      return set( self.by_class[ classes[0] ] )
+    ret = set()
+    for c in classes:
+      ret |= self.by_class[ c ]
+    return ret
+
+  def get_objects_in_host( self, host ):
+    """ Return the set of objects whose closest ancestor component is
+    host, including its child components. """
+    return set( self.by_host.get( host, () ) )
+
 class NamedObject:
 
   def __new__( cls, *args, **kwargs ):
@@ -189,6 +262,7 @@ class NamedObject:
 
         # Point u's top to my top
         top = ud.elaborate_top = sd.elaborate_top
+        top._dsl.object_registry.add( obj )
 
         NamedObject._elaborate_stack.append( obj )
         obj._construct()
@@ -246,6 +320,7 @@ class NamedObject:
 
             # Point u's top to my top
             top = ud.elaborate_top = sd.elaborate_top
+            top._dsl.object_registry.add( u )
 
             NamedObject._elaborate_stack.append( u )
             u._construct()
@@ -373,6 +448,10 @@ class NamedObject:
     s._dsl.elaborate_top = s
     s._dsl.NamedObject_fields = set()
 
+    s._dsl.object_registry = registry = NamedObjectRegistry()
+    registry.is_open = True
+    registry.add( s )
+
     # Secret sauce for letting the child know the field name of itself
     # -- override setattr for elaboration, and remove it afterwards
     # -- and the global elaborate to enable free function as decorator
@@ -392,7 +471,10 @@ class NamedObject:
     del NamedObject._elaborate_stack
 
   def _elaborate_collect_all_named_objects( s ):
-    s._dsl.all_named_objects = s._collect_all_single()
+    # All named objects have been registered during construction
+    registry = s._dsl.object_registry
+    registry.is_open = False
+    s._dsl.all_named_objects = registry.objects
 
   def elaborate( s ):
     s._elaborate_construct()
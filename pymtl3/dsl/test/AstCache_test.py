@@ -0,0 +1,86 @@
+#=========================================================================
+# AstCache_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import glob
+import importlib.util
+import inspect
+import os
+
+from pymtl3.datatypes import Bits8
+from pymtl3.dsl import *
+from pymtl3.dsl.AstCache import AstCache
+from pymtl3.extra.test_utility import mk_cache_fixture
+
+ast_cache = mk_cache_fixture( AstCache )
+
+class Adder( Component ):
+  def construct( s, k ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.tmp = Wire( Bits8 )
+
+    @update
+    def up_add():
+      s.tmp @= s.in_ + k
+      s.out @= s.tmp[0:8]
+
+class AdderChild( Adder ):
+  pass
+
+def _forget_class_cache( *classes ):
+  for cls in classes:
+    for attr in ( '_name_info', '_name_rd', '_name_wr', '_name_fc' ):
+      if attr in cls.__dict__:
+        delattr( cls, attr )
+  AstCache._files = {}
+
+def test_persist_and_reuse( ast_cache, monkeypatch ):
+  _forget_class_cache( Adder, AdderChild )
+  a = Adder( 1 )
+  a.elaborate()
+  info = a.get_update_block_info( a.get_update_block( 'up_add' ) )
+  rd = { repr(x) for x in a._dsl.all_upblk_reads[ a.get_update_block( 'up_add' ) ] }
+  assert len( glob.glob( os.path.join( ast_cache, "ast", "*", "*.pkl" ) ) ) == 1
+
+  # A new process (simulated by dropping the in-memory caches) and
+  # another class with the same update block don't parse the source
+  _forget_class_cache( Adder, AdderChild )
+  def fail( *args ):
+    raise AssertionError( "source was parsed again" )
+  monkeypatch.setattr( inspect, "getsourcelines", fail )
+
+  b = AdderChild( 2 )
+  b.elaborate()
+  blk = b.get_update_block( 'up_add' )
+  new_info = b.get_update_block_info( blk )
+  assert new_info[:4] == info[:4]
+  assert { repr(x) for x in b._dsl.all_upblk_reads[ blk ] } == rd
+  assert { repr(x) for x in b._dsl.all_upblk_writes[ blk ] } == { "s.tmp", "s.out" }
+
+def test_invalidate_on_change( ast_cache, tmp_path ):
+  src = tmp_path / "ast_cache_model.py"
+  src.write_text( "from pymtl3.dsl import *\n"
+                  "class A( Component ):\n"
+                  "  def construct( s ):\n"
+                  "    s.out = OutPort( 8 )\n"
+                  "    @update\n"
+                  "    def up():\n"
+                  "      s.out @= 1\n" )
+  spec = importlib.util.spec_from_file_location( "ast_cache_model", str(src) )
+  mod  = importlib.util.module_from_spec( spec )
+  spec.loader.exec_module( mod )
+
+  a = mod.A()
+  a.elaborate()
+  blk = a.get_update_block( 'up' )
+  AstCache._files = {}
+  assert AstCache.get( blk ) is not None
+
+  # Any change of the file is a miss
+  with open( str(src), "a" ) as f:
+    f.write( "# changed\n" )
+  AstCache._files = {}
+  assert AstCache.get( blk ) is None
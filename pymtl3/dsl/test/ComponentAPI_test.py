@@ -364,6 +364,107 @@ def test_ctrl_dpath_connected_replaced_both():
   a.tick()
   assert a.out == 10 + 444 * 2
 
+# Incremental net resolution after mutations
+
+def _canonical_nets( nets ):
+  return sorted( ( repr(w), sorted( repr(x) for x in net ) ) for w, net in nets )
+
+def test_replace_component_incremental_nets():
+
+  class Chain( Component ):
+    def construct( s, N=8 ):
+      s.in_ = InPort ( Bits32 )
+      s.out = OutPort( Bits32 )
+
+      s.inner = [ Real_shamt( i ) for i in range(N) ]
+      s.inner[0].in_ //= s.in_
+      for i in range(N-1):
+        s.inner[i].out[0:16] //= s.inner[i+1].in_[0:16]
+        s.inner[i].out[16:32] //= s.inner[i+1].in_[16:32]
+      s.inner[N-1].out //= s.out
+
+  a = Chain()
+  a.elaborate()
+  old_nets = { id(net): net for net in a.get_all_value_nets() }
+
+  a.replace_component( a.inner[3], Real_shamt2 )
+  nets = a.get_all_value_nets()
+
+  # Only the nets around inner[3] are resolved again
+  kept = [ net for net in nets if old_nets.get( id(net) ) is net ]
+  assert 0 < len(kept) < len(nets)
+  assert not any( a.inner[3].in_ in net[1] for net in kept )
+  assert _canonical_nets( nets ) == _canonical_nets( a._resolve_value_connections() )
+
+  simple_sim_pass( a )
+  a.in_ = Bits32(1)
+  a.tick()
+  expected = 1
+  for i in range(8):
+    expected = expected + i if i == 3 else expected << i
+  assert a.out == expected
+
+def test_add_connection_incremental_nets():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort ( Bits32 )
+      s.out = OutPort( Bits32 )
+      s.w   = Wire( Bits32 )
+      s.inner = Real_shamt( 1 )
+      s.inner.in_ //= s.in_
+
+  a = Top()
+  a.elaborate()
+  a.add_connection( a.inner.out, a.w )
+  a.add_connection( a.w, a.out )
+
+  nets = a.get_all_value_nets()
+  assert _canonical_nets( nets ) == _canonical_nets( a._resolve_value_connections() )
+  writer, net = [ x for x in nets if a.out in x[1] ][0]
+  assert writer is a.inner.out and a.w in net
+
+# Object registry
+
+def test_object_registry_filters():
+
+  Msg = mk_bitstruct( "RegistryMsg", { 'a': Bits8, 'b': [ Bits4, Bits4 ] } )
+
+  class Inner( Component ):
+    def construct( s ):
+      s.in_ = InPort( Msg )
+      s.out = OutPort( Bits16 )
+      @update
+      def up():
+        s.out @= concat( s.in_.a, s.in_.b[0], s.in_.b[1] )
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( Msg )
+      s.out = [ OutPort( Bits8 ) for _ in range(2) ]
+      s.inner = [ Inner() for _ in range(2) ]
+      for i in range(2):
+        s.inner[i].in_ //= s.in_
+        s.out[i] //= s.inner[i].out[0:8]
+
+  a = Top()
+  a.elaborate()
+
+  assert a._dsl.all_named_objects == a._collect_all_single()
+  for filt in [ InPort, (Wire, OutPort), Component ]:
+    assert a.get_all_object_filter( filt ) == \
+           a.get_all_object_filter( lambda x: isinstance( x, filt ) )
+  assert a.inner[0].in_.b[1] in a.get_all_object_filter( InPort )
+  assert a.inner[1].out[0:8] in a.get_all_object_filter( OutPort )
+
+  registry = a._dsl.object_registry
+  assert registry.get_objects_in_host( a ) == { a.clk, a.reset, a.in_, *a.out, *a.inner }
+
+  # Mutations keep the registry in sync
+  a.replace_component( a.inner[0], Inner )
+  assert a._dsl.all_named_objects == a._collect_all_single()
+  assert a.get_all_object_filter( Inner ) == set( a.inner )
+
 # Test orders
 
 def test_connect_upblk_orders():
@@ -200,3 +200,17 @@ def test_set_param():
   assert Z.animals[0].dinner == "poisoned onion"
   assert Z.animals[1].dinner == "poisoned onion"
   assert Z.animals[2].dinner == "bamboo"
+
+def test_object_registry():
+
+  x = Human( nlunch=3, ndinner=2 )
+  x.elaborate()
+
+  # The registry built during construction has the same objects as a
+  # traversal of the hierarchy
+  registry = x._dsl.object_registry
+  assert registry.objects == x._collect_all_single()
+  assert registry.get_objects_of_type( Chicken ) == { d.chicken for d in x.dinner } | \
+                                                     { l.rooster for l in x.lunch }
+  assert registry.get_objects_of_type( (Tiger, Dog) ) == set( x.lunch ) | set( x.dinner )
+  assert len( registry.get_objects_of_type( NamedObject ) ) == 1 + 3*3 + 2*3
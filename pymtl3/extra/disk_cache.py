@@ -0,0 +1,271 @@
+"""
+========================================================================
+disk_cache.py
+========================================================================
+A small persistent key-value store for caching results across Python
+processes. Each entry is a JSON document in its own file under
+~/.cache/pymtl3/<namespace> (or $PYMTL_CACHE_DIR/<namespace>).
+PickleDiskCache stores pickles instead for values that are not JSON
+serializable, such as ASTs. Entries
+are published atomically with os.replace, so concurrent processes (e.g.
+pytest-xdist workers) never observe a partially written entry. The cache
+is best effort: any I/O error simply behaves like a miss.
+
+FileCache is a similar store for build artifacts: whole files keyed by
+a content hash, with inter-process locks so that concurrent processes
+build each artifact only once, and a size bound enforced by evicting the
+least recently used entries.
+
+OptInCache is the base class of the caches built on top of these stores
+(ElaborationCache, AstCache and TranslationCache), together with the
+helpers they use to compute their keys.
+
+Date : Oct 18, 2026
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
+
+_file_hashes = {}
+
+def default_cache_dir():
+  return os.environ.get( "PYMTL_CACHE_DIR" ) or \
+         os.path.join( os.path.expanduser( "~" ), ".cache", "pymtl3" )
+
+def hash_strings( strs ):
+  h = hashlib.sha256()
+  for x in strs:
+    h.update( x.encode( 'utf-8', 'surrogatepass' ) )
+    h.update( b'\0' )
+  return h.hexdigest()
+
+_address_re = re.compile( r" at 0x[0-9a-fA-F]+" )
+
+def strip_addresses( s ):
+  """ Remove the object addresses, which are not stable across processes,
+  from a repr. """
+  return _address_re.sub( "", s )
+
+def source_file_key( obj ):
+  """ Return "path:hash" of the source file that defines the class,
+  function or module obj, or None if it has no source file. """
+  try:
+    path = inspect.getsourcefile( obj )
+  except TypeError:
+    return None
+  if path is None:
+    return None
+  try:
+    return f"{path}:{hash_file( path )}"
+  except OSError:
+    return None
+
+def hash_file( path ):
+  """ Return the sha256 of a file. The result is memoized per process as
+  long as the mtime and size of the file don't change. """
+  st  = os.stat( path )
+  tag = (st.st_mtime_ns, st.st_size)
+  try:
+    old_tag, ret = _file_hashes[ path ]
+    if old_tag == tag:
+      return ret
+  except KeyError:
+    pass
+
+  with open( path, 'rb' ) as f:
+    ret = hashlib.sha256( f.read() ).hexdigest()
+  _file_hashes[ path ] = (tag, ret)
+  return ret
+
+class DiskCache:
+
+  suffix = ".json"
+  binary = False
+
+  def __init__( s, namespace, path=None ):
+    s.path = os.path.join( path or default_cache_dir(), namespace )
+
+  def _entry_path( s, key ):
+    return os.path.join( s.path, key[:2], key + s.suffix )
+
+  def _load( s, f ):
+    return json.load( f )
+
+  def _dump( s, data, f ):
+    json.dump( data, f, separators=(',', ':') )
+
+  def get( s, key ):
+    try:
+      with open( s._entry_path( key ), 'rb' if s.binary else 'r' ) as f:
+        data = s._load( f )
+    except OSError:
+      return None
+    except ( EOFError, UnicodeDecodeError, json.JSONDecodeError, pickle.UnpicklingError ):
+      data = None
+
+    # Invalid entries are removed so that the next put doesn't race with
+    # a reader that keeps failing on the same file.
+    if not isinstance( data, dict ) or data.get( 'key' ) != key or 'value' not in data:
+      s.invalidate( key )
+      return None
+
+    return data[ 'value' ]
+
+  def put( s, key, value ):
+    path = s._entry_path( key )
+    try:
+      os.makedirs( os.path.dirname( path ), exist_ok=True )
+      fd, tmp = tempfile.mkstemp( dir=os.path.dirname( path ), suffix=".tmp" )
+      try:
+        with os.fdopen( fd, 'wb' if s.binary else 'w' ) as f:
+          s._dump( { 'key': key, 'value': value }, f )
+        os.replace( tmp, path )
+      except BaseException:
+        os.remove( tmp )
+        raise
+    except OSError:
+      pass
+
+  def invalidate( s, key ):
+    try:
+      os.remove( s._entry_path( key ) )
+    except OSError:
+      pass
+
+class PickleDiskCache( DiskCache ):
+
+  suffix = ".pkl"
+  binary = True
+
+  def _load( s, f ):
+    return pickle.load( f )
+
+  def _dump( s, data, f ):
+    pickle.dump( data, f, protocol=pickle.HIGHEST_PROTOCOL )
+
+class OptInCache:
+  """ Base class of a cache that is disabled by default. It is turned on
+  by calling enable() or by setting the environment variable env_var to 1
+  or to a cache directory. """
+
+  env_var  = None
+  _path    = None
+  _enabled = None
+
+  @classmethod
+  def enable( cls, path=None ):
+    cls._enabled = True
+    cls._path    = path
+
+  @classmethod
+  def disable( cls ):
+    cls._enabled = False
+
+  @classmethod
+  def is_enabled( cls ):
+    if cls._enabled is None:
+      env = os.environ.get( cls.env_var, "0" )
+      if env not in ( "", "0" ):
+        cls._enabled = True
+        cls._path    = None if env == "1" else env
+      else:
+        cls._enabled = False
+    return cls._enabled
+
+class FileCache:
+
+  def __init__( s, namespace, max_size, path=None ):
+    s.path     = os.path.join( path or default_cache_dir(), namespace )
+    s.max_size = max_size
+
+  def _entry_path( s, key ):
+    return os.path.join( s.path, key )
+
+  @contextmanager
+  def lock( s, key ):
+    """ Hold an exclusive lock on key. Other processes (and threads) that
+    try to lock the same key block until the lock is released. """
+    try:
+      os.makedirs( s.path, exist_ok=True )
+      fd = os.open( s._entry_path( key ) + ".lock", os.O_RDWR | os.O_CREAT, 0o644 )
+    except OSError:
+      yield
+      return
+
+    try:
+      if fcntl is not None:
+        fcntl.flock( fd, fcntl.LOCK_EX )
+      yield
+    finally:
+      # Closing the file releases the lock
+      os.close( fd )
+
+  def fetch( s, key, dest ):
+    """ Copy the entry to dest and return True, or return False if the
+    entry doesn't exist. dest is replaced atomically. """
+    src = s._entry_path( key )
+    tmp = None
+    try:
+      fd, tmp = tempfile.mkstemp( dir=os.path.dirname( os.path.abspath( dest ) ), suffix=".tmp" )
+      os.close( fd )
+      shutil.copyfile( src, tmp )
+      os.replace( tmp, dest )
+      # Mark the entry as recently used
+      os.utime( src )
+      return True
+    except OSError:
+      if tmp is not None and os.path.exists( tmp ):
+        os.remove( tmp )
+      return False
+
+  def publish( s, key, src ):
+    """ Copy the file src into the cache as key, then evict the least
+    recently used entries if the cache exceeds its size bound. """
+    try:
+      os.makedirs( s.path, exist_ok=True )
+      fd, tmp = tempfile.mkstemp( dir=s.path, suffix=".tmp" )
+      os.close( fd )
+      try:
+        shutil.copyfile( src, tmp )
+        os.replace( tmp, s._entry_path( key ) )
+      except BaseException:
+        os.remove( tmp )
+        raise
+    except OSError:
+      return
+    s.evict( keep=key )
+
+  def evict( s, keep=None ):
+    entries = []
+    try:
+      for name in os.listdir( s.path ):
+        if name.endswith( (".lock", ".tmp") ) or name == keep:
+          continue
+        st = os.stat( os.path.join( s.path, name ) )
+        entries.append( (st.st_mtime, st.st_size, name) )
+      total = sum( x[1] for x in entries )
+      if keep is not None:
+        total += os.stat( s._entry_path( keep ) ).st_size
+    except OSError:
+      return
+
+    for _, size, name in sorted( entries ):
+      if total <= s.max_size:
+        break
+      for x in ( name, name + ".lock" ):
+        try:
+          os.remove( os.path.join( s.path, x ) )
+        except OSError:
+          pass
+      total -= size
@@ -10,16 +10,14 @@ try:
 except:
   from pymtl3.datatypes import Bits
 
-  def read_bytearray_bits( arr, addr, nbytes ):
-    ret = 0
-    begin = int(addr)
-    addr  = begin + nbytes - 1
-
-    while addr >= begin:
-      ret = (ret << 8) + arr[addr]
-      addr -= 1
+  # Convert all bytes at once so that wide accesses (e.g. cache lines)
+  # don't loop over every byte in Python
 
-    return Bits( nbytes << 3, ret )
+  def read_bytearray_bits( arr, addr, nbytes ):
+    addr = int(addr)
+    if addr < 0 or addr + nbytes > len(arr):
+      raise IndexError( "bytearray index out of range" )
+    return Bits( nbytes << 3, int.from_bytes( arr[addr:addr+nbytes], 'little' ) )
 
 try:
   from mamba import write_bytearray_bits
@@ -28,9 +26,34 @@ except:
 
   def write_bytearray_bits( arr, addr, nbytes, data ):
     addr = int(addr)
-    end  = addr + nbytes
+    if addr < 0 or addr + nbytes > len(arr):
+      raise IndexError( "bytearray index out of range" )
+    data = int(data) & ((1 << (nbytes << 3)) - 1)
+    arr[addr:addr+nbytes] = data.to_bytes( nbytes, 'little' )
 
-    while addr < end:
-      arr[addr] = data & 255
-      data >>= 8
-      addr += 1
+# Bulk versions for a vector of nbytes-byte accesses. Each access is one
+# from_bytes/to_bytes on a memoryview slice, so wide accesses don't
+# copy the bytearray and don't loop over the bytes in Python.
+
+def read_bytearray_bits_bulk( arr, addrs, nbytes ):
+  from pymtl3.datatypes import mk_bits
+  BitsN = mk_bits( nbytes << 3 )
+  view  = memoryview( arr )
+  limit = len(arr) - nbytes
+  ret = []
+  for addr in addrs:
+    addr = int(addr)
+    if not 0 <= addr <= limit:
+      raise IndexError( "bytearray index out of range" )
+    ret.append( BitsN( int.from_bytes( view[addr:addr+nbytes], 'little' ) ) )
+  return ret
+
+def write_bytearray_bits_bulk( arr, addrs, nbytes, datas ):
+  view  = memoryview( arr )
+  limit = len(arr) - nbytes
+  mask  = (1 << (nbytes << 3)) - 1
+  for addr, data in zip( addrs, datas ):
+    addr = int(addr)
+    if not 0 <= addr <= limit:
+      raise IndexError( "bytearray index out of range" )
+    view[addr:addr+nbytes] = (int(data) & mask).to_bytes( nbytes, 'little' )
@@ -0,0 +1,104 @@
+#=========================================================================
+# disk_cache_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import os
+import threading
+import time
+
+import pytest
+
+from ..disk_cache import DiskCache, FileCache, OptInCache, PickleDiskCache, hash_strings
+
+
+def test_disk_cache( tmp_path ):
+  cache = DiskCache( "test", str(tmp_path) )
+  key = hash_strings( [ "a", "b" ] )
+  assert key != hash_strings( [ "ab" ] )
+
+  assert cache.get( key ) is None
+  cache.put( key, { 'x': [ 1, 2 ] } )
+  assert cache.get( key ) == { 'x': [ 1, 2 ] }
+
+  # A corrupted entry is a miss and is removed
+  with open( cache._entry_path( key ), 'w' ) as f:
+    f.write( "{" )
+  assert cache.get( key ) is None
+  assert not os.path.exists( cache._entry_path( key ) )
+
+def test_pickle_disk_cache_errors( tmp_path ):
+  cache = PickleDiskCache( "test", str(tmp_path) )
+  key = hash_strings( [ "a" ] )
+  cache.put( key, [ 1 ] )
+
+  # A truncated entry is a miss, but a bad key is an error of the caller
+  with open( cache._entry_path( key ), 'r+b' ) as f:
+    f.truncate( 4 )
+  assert cache.get( key ) is None
+  with pytest.raises( TypeError ):
+    cache.get( 42 )
+
+def test_opt_in_cache( monkeypatch ):
+  class Cache( OptInCache ):
+    env_var = "PYMTL_TEST_CACHE"
+
+  monkeypatch.setenv( "PYMTL_TEST_CACHE", "/tmp/foo" )
+  assert Cache.is_enabled() and Cache._path == "/tmp/foo"
+  Cache.disable()
+  assert not Cache.is_enabled()
+  Cache.enable()
+  assert Cache.is_enabled() and Cache._path is None
+
+def test_file_cache_fetch_publish( tmp_path ):
+  cache = FileCache( "test", 1 << 20, str(tmp_path / "cache") )
+  src  = tmp_path / "src.bin"
+  dest = tmp_path / "dest.bin"
+  src.write_bytes( b"\x01\x02" )
+
+  assert not cache.fetch( "k", str(dest) )
+  assert not dest.exists()
+
+  cache.publish( "k", str(src) )
+  assert cache.fetch( "k", str(dest) )
+  assert dest.read_bytes() == b"\x01\x02"
+
+def test_file_cache_lru_eviction( tmp_path ):
+  cache = FileCache( "test", 250, str(tmp_path / "cache") )
+  src = tmp_path / "src.bin"
+  src.write_bytes( b"x" * 100 )
+
+  cache.publish( "a", str(src) )
+  os.utime( cache._entry_path( "a" ), (1, 1) )
+  cache.publish( "b", str(src) )
+  os.utime( cache._entry_path( "b" ), (2, 2) )
+
+  # Using a makes b the least recently used entry
+  assert cache.fetch( "a", str(tmp_path / "dest.bin") )
+  cache.publish( "c", str(src) )
+
+  assert os.path.exists( cache._entry_path( "a" ) )
+  assert not os.path.exists( cache._entry_path( "b" ) )
+  assert os.path.exists( cache._entry_path( "c" ) )
+
+def test_file_cache_lock( tmp_path ):
+  cache = FileCache( "test", 1 << 20, str(tmp_path / "cache") )
+  events = []
+
+  def worker( i ):
+    with cache.lock( "k" ):
+      events.append( ( i, "enter" ) )
+      time.sleep( 0.05 )
+      events.append( ( i, "exit" ) )
+
+  threads = [ threading.Thread( target=worker, args=(i,) ) for i in range(3) ]
+  for t in threads:
+    t.start()
+  for t in threads:
+    t.join()
+
+  # Critical sections never overlap
+  for j in range( 0, len(events), 2 ):
+    assert events[j][0] == events[j+1][0]
+    assert events[j][1] == "enter" and events[j+1][1] == "exit"
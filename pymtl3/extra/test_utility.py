@@ -0,0 +1,20 @@
+#=========================================================================
+# test_utility.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Test utilities used by the tests of the caches."""
+
+import pytest
+
+
+def mk_cache_fixture( cache_cls, **kwargs ):
+  """Return a fixture that enables `cache_cls` with a cache directory in
+  tmp_path during a test and yields the directory."""
+
+  @pytest.fixture
+  def cache_dir( tmp_path ):
+    cache_cls.enable( str(tmp_path), **kwargs )
+    yield str(tmp_path)
+    cache_cls.disable()
+
+  return cache_dir
@@ -6,6 +6,8 @@ from .sim.PrepareSimPass import PrepareSimPass
 from .sim.SimpleSchedulePass import SimpleSchedulePass
 from .sim.SimpleTickPass import SimpleTickPass
 from .sim.WrapGreenletPass import WrapGreenletPass
+from .tracing.BinaryLineTracePass import BinaryLineTracePass
+from .tracing.BinaryWavePass import BinaryWavePass
 from .tracing.CLLineTracePass import CLLineTracePass
 from .tracing.LineTraceParamPass import LineTraceParamPass
 from .tracing.PrintTextWavePass import PrintTextWavePass
@@ -19,19 +21,25 @@ class SimpleSimPass( BasePass ):
     GenDAGPass()( top )
     WrapGreenletPass()( top )
     SimpleSchedulePass()( top )
+    if top.has_metadata( BinaryLineTracePass.line_trace_file_name ):
+      top.set_metadata( CLLineTracePass.cl_trace_snapshot, True )
     CLLineTracePass()( top )
     VcdGenerationPass()( top )
     PrintTextWavePass()( top )
+    BinaryWavePass()( top )
+    BinaryLineTracePass()( top )
 
     PrepareSimPass(print_line_trace=False)( top )
 
 class DefaultPassGroup( BasePass ):
-  def __init__( s, *, vcdwave=None, textwave=False,
-                      linetrace=False, reset_active_high=True ):
+  def __init__( s, *, vcdwave=None, textwave=False, binwave=None,
+                      linetrace=False, bintrace=None, reset_active_high=True ):
 
     s.vcdwave = vcdwave
     s.textwave = textwave
+    s.binwave = binwave
     s.linetrace = linetrace
+    s.bintrace = bintrace
     s.reset_active_high = reset_active_high
 
   def __call__( s, top ):
@@ -42,6 +50,13 @@ class DefaultPassGroup( BasePass ):
     if s.textwave:
       top.set_metadata( PrintTextWavePass.enable, True )
 
+    if s.binwave:
+      top.set_metadata( BinaryWavePass.wave_file_name, s.binwave )
+
+    if s.bintrace:
+      top.set_metadata( BinaryLineTracePass.line_trace_file_name, s.bintrace )
+      top.set_metadata( CLLineTracePass.cl_trace_snapshot, True )
+
     LineTraceParamPass()( top )
     GenDAGPass()( top )
     WrapGreenletPass()( top )
@@ -49,6 +64,8 @@ class DefaultPassGroup( BasePass ):
     DynamicSchedulePass()( top )
     VcdGenerationPass()( top )
     PrintTextWavePass()( top )
+    BinaryWavePass()( top )
+    BinaryLineTracePass()( top )
 
     PrepareSimPass(print_line_trace=s.linetrace,
                    reset_active_high=s.reset_active_high)( top )
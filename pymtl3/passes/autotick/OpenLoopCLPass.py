@@ -23,6 +23,7 @@ from ..errors import PassOrderError
 from ..sim.PrepareSimPass import PrepareSimPass
 from ..sim.SimpleSchedulePass import SimpleSchedulePass, dump_dag
 from ..sim.SimpleTickPass import SimpleTickPass
+from ..tracing.BinaryWavePass import BinaryWavePass
 from ..tracing.CLLineTracePass import CLLineTracePass
 from ..tracing.PrintTextWavePass import PrintTextWavePass
 from ..tracing.VcdGenerationPass import VcdGenerationPass
@@ -50,11 +51,9 @@ class OpenLoopCLPass( BasePass ):
     E = set()
 
     # We collect all top level callee ports/nonblocking callee interfaces
-    top_level_callee_ports = top.get_all_object_filter(
-      lambda x: isinstance(x, CalleePort) and x.get_host_component() is top )
-
-    top_level_nb_ifcs = top.get_all_object_filter(
-      lambda x: isinstance(x, CalleeIfcCL) and x.get_host_component() is top )
+    top_level_objs = top._dsl.object_registry.get_objects_in_host( top )
+    top_level_callee_ports = { x for x in top_level_objs if isinstance( x, CalleePort ) }
+    top_level_nb_ifcs      = { x for x in top_level_objs if isinstance( x, CalleeIfcCL ) }
 
     method_callee_mapping = {}
     method_guard_mapping  = {}
@@ -343,6 +342,7 @@ class OpenLoopCLPass( BasePass ):
     CLLineTracePass()( top )
     VcdGenerationPass()( top )
     PrintTextWavePass()( top )
+    BinaryWavePass()( top )
 
     # Shunning: we reuse ff and posedge schedules from SimpleSchedulePass
     simple = SimpleSchedulePass()
@@ -373,6 +373,9 @@ class OpenLoopCLPass( BasePass ):
     if top.has_metadata( PrintTextWavePass.textwave_func ):
       ffs.append( top.get_metadata( PrintTextWavePass.textwave_func ) )
 
+    if top.has_metadata( BinaryWavePass.wave_func ):
+      ffs.append( top.get_metadata( BinaryWavePass.wave_func ) )
+
     # posedge flip
     ffs.extend( top._sched.schedule_posedge_flip )
 
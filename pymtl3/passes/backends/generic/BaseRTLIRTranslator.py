@@ -11,6 +11,8 @@ class BaseRTLIRTranslator:
 
   def __init__( s, top ):
     s.top = top
+    s.tr_cache = None
+    s.tr_cache_keys = {}
 
   def clear( s, tr_top ):
     s.tr_top = tr_top
@@ -9,6 +9,7 @@ from .BaseRTLIRTranslator import TranslatorMetadata
 from .behavioral import BehavioralTranslator
 from .errors import RTLIRTranslationError
 from .structural import StructuralTranslator
+from .TranslationCache import TranslationCache
 
 
 def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
@@ -60,6 +61,11 @@ def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
         s._gen_hierarchy_metadata( 'decl_type_array', 'decl_type_array'   )
         s._gen_hierarchy_metadata( 'decl_type_struct', 'decl_type_struct' )
 
+      # Components with a key in the translation cache skip the behavioral
+      # RTLIR generation in clear() and are translated on their own
+      s.tr_cache = TranslationCache.create( s, tr_top )
+      s.tr_cache_keys = {} if s.tr_cache is None else s.tr_cache.keys
+
       # Clear all translator metadata
       s.clear( tr_top, tr_cfgs )
 
@@ -72,6 +78,8 @@ def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
 
       try:
         s.rtlir_tr_initialize()
+        if s.tr_cache is not None:
+          s.tr_cache.translate( s )
         s.translate_behavioral( s.tr_top )
         s.translate_structural( s.tr_top )
         translate_component( s.tr_top, s.hierarchy.components )
@@ -0,0 +1,320 @@
+"""
+========================================================================
+TranslationCache.py
+========================================================================
+Cache of the behavioral translation of each component: the RTLIR
+generation, type checking and translation of its update blocks, which
+dominate the translation time of a large design. The structural
+translation and the code layout are cheap and always redone, so a
+translation that hits the cache produces exactly the same result as one
+that doesn't.
+
+A component is identified by its class, its construct parameters and a
+hash of everything else its behavioral translation depends on: the
+source files of the component class, the types of its own signals and of
+the ports of its children, the simple attributes of the component, and
+the closures and globals referenced by its update blocks.
+
+Within a process, components with the same key (e.g. the tiles of a
+mesh) are translated only once, across all instances and all
+translations. The results are kept in a table that holds the component
+classes and the translator classes weakly, so they go away together
+with the classes. The persistent cache keys an entry by the hash and the
+source files of the translator.
+
+The components that miss are translated by a pool of forked processes
+and only the resulting strings and type declarations are sent back. A
+component whose result cannot be pickled, or whose translation fails in
+a worker, is translated again in the main process so that errors are
+reported as usual.
+
+The persistent cache is turned on with PYMTL_TRANSLATION_CACHE (see
+OptInCache). The pool has os.cpu_count() processes unless
+PYMTL_TRANSLATION_JOBS is set.
+
+Date : Oct 18, 2026
+"""
+import multiprocessing
+import os
+import pickle
+import types
+import weakref
+
+from pymtl3.datatypes import Bits, is_bitstruct_class
+from pymtl3.dsl import Component, Placeholder
+from pymtl3.dsl.NamedObject import NamedObject
+from pymtl3.extra.disk_cache import (
+    OptInCache,
+    PickleDiskCache,
+    default_cache_dir,
+    hash_strings,
+    source_file_key,
+    strip_addresses,
+)
+from pymtl3.passes.rtlir.util.utility import get_component_key
+from pymtl3.version import __version__
+
+# Bump this when the format of the entries changes
+CACHE_FORMAT = 1
+
+_DECL_TYPES = ( 'decl_type_vector', 'decl_type_array', 'decl_type_struct' )
+
+_simple_types = ( int, float, bool, str, Bits )
+
+#-------------------------------------------------------------------------
+# Key helpers
+#-------------------------------------------------------------------------
+
+def _type_signature( Type ):
+  if is_bitstruct_class( Type ):
+    fields = ", ".join( f"{name}:{_type_signature(T)}"
+                        for name, T in Type.__bitstruct_fields__.items() )
+    return f"{Type.__qualname__}({fields})"
+  return repr( Type )
+
+def _value_signature( v ):
+  if isinstance( v, ( Component, NamedObject ) ):
+    return "<obj>"
+  if isinstance( v, types.ModuleType ):
+    return source_file_key( v ) or v.__name__
+  if isinstance( v, ( type, types.FunctionType ) ):
+    return f"{v.__module__}.{v.__qualname__}@{source_file_key( v )}"
+  if isinstance( v, ( list, tuple ) ):
+    return "[" + ",".join( _value_signature(x) for x in v ) + "]"
+  return strip_addresses( repr(v) )
+
+def _func_signature( f ):
+  """ Return the signature of the closure and the globals referenced by
+  f (which is covered by the source file of the class). """
+  code  = f.__code__
+  parts = []
+  for name, cell in zip( code.co_freevars, f.__closure__ or () ):
+    try:
+      parts.append( f"{name}={_value_signature( cell.cell_contents )}" )
+    except ValueError: # empty cell
+      parts.append( f"{name}=" )
+  for name in code.co_names:
+    if name in f.__globals__:
+      parts.append( f"{name}={_value_signature( f.__globals__[name] )}" )
+  return ";".join( parts )
+
+#-------------------------------------------------------------------------
+# Translation of a single component
+#-------------------------------------------------------------------------
+
+def translate_component_alone( tr, m ):
+  """ Translate the behavioral part of m and return the translated
+  metadata and the type declarations created along the way. """
+  saved = { x: getattr( tr.structural, x ) for x in _DECL_TYPES if hasattr( tr.structural, x ) }
+  for x in saved:
+    setattr( tr.structural, x, {} )
+  try:
+    tr.translate_component_behavioral( m )
+    decls = { x: list( getattr( tr.structural, x ).items() ) for x in saved }
+  finally:
+    for x, d in saved.items():
+      setattr( tr.structural, x, d )
+
+  outputs = {}
+  for x in tr.translated_metadata:
+    ns = getattr( tr.behavioral, x, {} )
+    if m in ns:
+      outputs[x] = ns[m]
+  return outputs, decls
+
+_worker_state = None
+
+def _worker_translate( key ):
+  tr, components = _worker_state
+  try:
+    return key, pickle.dumps( translate_component_alone( tr, components[key] ),
+                              protocol=pickle.HIGHEST_PROTOCOL )
+  except Exception:
+    return key, None
+
+#-------------------------------------------------------------------------
+# TranslationCache
+#-------------------------------------------------------------------------
+
+class TranslationCache( OptInCache ):
+
+  env_var = "PYMTL_TRANSLATION_CACHE"
+  _nprocs = None
+
+  # Results of this process:
+  # component class -> translator class -> construct parameters -> result
+  _shared = weakref.WeakKeyDictionary()
+
+  @classmethod
+  def enable( cls, path=None, nprocs=None ):
+    super().enable( path )
+    cls._nprocs = nprocs
+
+  @classmethod
+  def clear( cls ):
+    """ Forget the results translated in this process. """
+    cls._shared.clear()
+
+  @classmethod
+  def get_nprocs( cls ):
+    if cls._nprocs is not None:
+      return cls._nprocs
+    env = os.environ.get( "PYMTL_TRANSLATION_JOBS", "" )
+    return int( env ) if env else ( os.cpu_count() or 1 )
+
+  @classmethod
+  def create( cls, tr, tr_top ):
+    """ Return the cache for translating tr_top with translator tr, or
+    None if the translator doesn't support translating components one by
+    one. """
+    if not hasattr( tr, 'translate_component_behavioral' ):
+      return None
+    if cls.is_enabled():
+      return cls( tr, tr_top, True, cls._path, cls.get_nprocs() )
+    return cls( tr, tr_top )
+
+  def __init__( s, tr, tr_top, persistent=False, path=None, nprocs=1 ):
+    s.store   = None
+    s.nprocs  = nprocs
+    s.results = {}
+
+    # Results of this process for this translator
+    s.shared = {}
+
+    # m -> key of the components that go through the cache. Components
+    # with the same class, parameters and signature have the same key.
+    s.keys = {}
+
+    # m -> key in the persistent cache
+    s.disk_keys = {}
+
+    s.tr_key = None
+    if persistent:
+      s.store = PickleDiskCache( "translation", path or default_cache_dir() )
+
+      # Translator "version"
+      files = { source_file_key( x ) for x in type(tr).__mro__ if x is not object }
+      if None not in files:
+        s.tr_key = hash_strings( [ f"format{CACHE_FORMAT}", __version__, *sorted( files ) ] )
+
+    s._gen_keys( type(tr), tr_top )
+
+    s.hits   = 0
+    s.misses = 0
+
+  def _gen_keys( s, tr_cls, m ):
+    key = None if isinstance( m, Placeholder ) else get_component_key( m )
+    if key is not None:
+      signature = s.compute_signature( m )
+      if signature is not None:
+        key = key + ( signature, )
+        s.keys[m] = key
+        if key not in s.shared:
+          s.shared[key] = s._shared.setdefault( key[0], weakref.WeakKeyDictionary() ) \
+                                   .setdefault( tr_cls, {} )
+        if s.tr_key is not None:
+          s.disk_keys[m] = hash_strings( [ s.tr_key, signature ] )
+    for child in m.get_child_components(repr):
+      s._gen_keys( tr_cls, child )
+
+  @staticmethod
+  def compute_signature( m ):
+    """ Return a hash of the inputs of the behavioral translation of m
+    other than the translator, or None if m cannot be hashed reliably. """
+    cls   = type(m)
+    parts = [ f"{cls.__module__}.{cls.__qualname__}" ]
+
+    for x in cls.__mro__:
+      if x is not object:
+        f = source_file_key( x )
+        if f is None:
+          return None
+        parts.append( f )
+
+    # Constructor parameters
+    tree = m._dsl.param_tree
+    leaf = None if tree is None else tree.leaf
+    parts.append( strip_addresses( f"{m._dsl.args!r}:{sorted(m._dsl.kwargs.items())!r}:{leaf!r}" ) )
+
+    # Signals of m and ports of its children. Names are relative to m.
+    n = len( repr(m) )
+    for x in m.get_input_value_ports(repr) + m.get_output_value_ports(repr) + m.get_wires(repr):
+      parts.append( f"{repr(x)[n:]}:{_type_signature( x._dsl.Type )}" )
+    for child in m.get_child_components(repr):
+      parts.append( f"{repr(child)[n:]}:{type(child).__qualname__}" )
+      for x in child.get_input_value_ports(repr) + child.get_output_value_ports(repr):
+        parts.append( f"{repr(x)[n:]}:{_type_signature( x._dsl.Type )}" )
+
+    # Simple attributes that update blocks may refer to as s.x
+    for name, v in sorted( vars(m).items() ):
+      if not name.startswith( '_' ) and isinstance( v, _simple_types ):
+        parts.append( f"{name}={v!r}" )
+
+    # Closures and globals of update blocks and functions
+    for name, f in sorted( m._dsl.name_upblk.items() ) + sorted( m._dsl.name_func.items() ):
+      if isinstance( f, types.FunctionType ):
+        parts.append( f"{name}:{_func_signature( f )}" )
+
+    return hash_strings( parts )
+
+  #-----------------------------------------------------------------------
+  # Translation
+  #-----------------------------------------------------------------------
+
+  def translate( s, tr ):
+    """ Look up the behavioral translation of all components that go
+    through the cache, and translate the misses. """
+    components = {}
+    for m, key in s.keys.items():
+      if key not in s.results and key not in components:
+        value = s.shared[key].get( key[1:] )
+        if value is None and m in s.disk_keys:
+          value = s.store.get( s.disk_keys[m] )
+        if value is None:
+          components[ key ] = m
+        else:
+          s._add_result( key, value )
+          s.hits += 1
+
+    s.misses = len(components)
+
+    if s.store is not None and s.nprocs > 1 and len(components) > 1 and hasattr( os, "fork" ):
+      global _worker_state
+      _worker_state = ( tr, components )
+      try:
+        ctx = multiprocessing.get_context( "fork" )
+        with ctx.Pool( min( s.nprocs, len(components) ) ) as pool:
+          for key, data in pool.imap_unordered( _worker_translate, list(components) ):
+            if data is not None:
+              m = components[ key ]
+              s._add_result( key, pickle.loads( data ) )
+              if m in s.disk_keys:
+                s.store.put( s.disk_keys[m], s.results[ key ] )
+      finally:
+        _worker_state = None
+
+    # Leftovers (or everything if there is no pool) are translated here
+
+    for key, m in components.items():
+      if key not in s.results:
+        s._add_result( key, translate_component_alone( tr, m ) )
+        if m in s.disk_keys:
+          try:
+            pickle.dumps( s.results[ key ], protocol=pickle.HIGHEST_PROTOCOL )
+          except Exception:
+            continue
+          s.store.put( s.disk_keys[m], s.results[ key ] )
+
+  def _add_result( s, key, value ):
+    s.results[ key ] = s.shared[ key ][ key[1:] ] = value
+
+  def load_behavioral( s, tr, m ):
+    """ Install the cached behavioral translation of m into tr. """
+    outputs, decls = s.results[ s.keys[m] ]
+    for x, value in outputs.items():
+      getattr( tr.behavioral, x )[m] = value
+    for x, items in decls.items():
+      d = getattr( tr.structural, x )
+      for dtype, ret in items:
+        if dtype not in d:
+          d[ dtype ] = ret
@@ -1 +1,2 @@
 from .RTLIRTranslator import RTLIRTranslator
+from .TranslationCache import TranslationCache
@@ -21,6 +21,10 @@ from .BehavioralTranslatorL0 import BehavioralTranslatorL0
 
 class BehavioralTranslatorL1( BehavioralTranslatorL0 ):
 
+  # Per-component results of translate_behavioral
+  translated_metadata = ( 'accessed', 'upblk_decls', 'upblk_srcs', 'upblk_py_srcs',
+                          'decl_freevars' )
+
   def clear( s, tr_top ):
     super().clear( tr_top )
     s.gen_behavioral_trans_metadata( tr_top )
@@ -18,6 +18,8 @@ from .BehavioralTranslatorL1 import BehavioralTranslatorL1
 
 class BehavioralTranslatorL2( BehavioralTranslatorL1 ):
 
+  translated_metadata = BehavioralTranslatorL1.translated_metadata + ( 'decl_tmpvars', )
+
   #-----------------------------------------------------------------------
   # gen_behavioral_trans_metadata
   #-----------------------------------------------------------------------
@@ -23,7 +23,7 @@ from pymtl3.passes.errors import InvalidPassOptionValue
 from pymtl3.passes.PlaceholderConfigs import expand
 from pymtl3.passes.PlaceholderPass import PlaceholderPass
 from pymtl3.passes.rtlir import RTLIRDataType as rdt
-from pymtl3.passes.rtlir import RTLIRGetter
+from pymtl3.passes.rtlir import get_rtlir_getter
 from pymtl3.passes.rtlir import RTLIRType as rt
 
 
@@ -100,7 +100,7 @@ class VerilogPlaceholderPass( PlaceholderPass ):
   def visit_placeholder( s, m ):
     c = s.__class__
     super().visit_placeholder( m )
-    irepr = RTLIRGetter(cache=False).get_component_ifc_rtlir( m )
+    irepr = get_rtlir_getter( m ).get_component_ifc_rtlir( m )
 
     s.setup_default_configs( m, irepr )
     cfg = m.get_metadata( c.placeholder_config )
@@ -17,6 +17,7 @@ from pymtl3.passes.PlaceholderConfigs import expand
 from ..util.utility import get_hash_of_lean_verilog
 from .VerilogVerilatorImportPass import VerilogVerilatorImportPass
 
+_tool_versions = {}
 
 class VerilogVerilatorImportConfigs( BasePassConfigs ):
 
@@ -91,6 +92,17 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     # Passed to verilator tracing function
     "vl_trace_timescale" : "10ps",
 
+    # Format of the waveform generated by Verilator tracing
+    # Should be one of ['vcd', 'fst']. 'fst' uses --trace-fst and produces
+    # a much smaller compressed waveform.
+    "vl_trace_format" : "vcd",
+
+    # Number of cycles between two flushes of the waveform file; 0 to only
+    # flush when the trace buffer is full and when the model is finalized.
+    # Flushing is a system call, so larger intervals make tracing faster
+    # but a crashed simulation may lose the last few cycles of waveform.
+    "vl_trace_flush_interval" : 1,
+
     # `vl_trace_cycle_time`*`vl_trace_timescale` is the cycle time of the
     # PyMTL clock that appears in the generated VCD
     # With the default options, the frequency of PyMTL clock is 1GHz
@@ -104,6 +116,15 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     # enable signal.
     "vl_trace_on_demand_portname" : "",
 
+    # Share verilated and compiled models through a machine-wide cache
+    # under ~/.cache/pymtl3 (or $PYMTL_CACHE_DIR) so that the same model
+    # is compiled only once no matter which directory we run from.
+    # The cache is keyed by the translated Verilog, the import options and
+    # the versions of verilator and the C compiler. Models that use
+    # `c_include_path` are never shared because we don't track the
+    # contents of those directories.
+    "vl_shared_cache" : True,
+
     # C-compilation options
     # These options will be passed to the C compiler to create a shared lib.
 
@@ -137,7 +158,7 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
   Checkers = {
     ("enable", "verbose", "vl_enable_assert", "vl_line_trace", "vl_W_lint", "vl_W_style",
      "vl_W_fatal", "vl_trace", "vl_coverage", "vl_line_coverage", "vl_toggle_coverage",
-     "vl_trace_on_demand"):
+     "vl_trace_on_demand", "vl_shared_cache"):
       Checker( lambda v: isinstance(v, bool), "expects a boolean" ),
 
     ("c_flags", "ld_flags", "ld_libs", "vl_trace_filename", "vl_trace_on_demand_portname"):
@@ -157,6 +178,12 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     "vl_trace_cycle_time": Checker( lambda v: isinstance(v, int) and (v % 2) == 0,
                                     "expects an integer `n` such that `n`*`vl_trace_timescale` is the cycle time" ),
 
+    "vl_trace_format": Checker( lambda v: v in ['vcd', 'fst'],
+                                "vl_trace_format should be one of ['vcd', 'fst']" ),
+
+    "vl_trace_flush_interval": Checker( lambda v: isinstance(v, int) and v >= 0,
+                                        "expects a non-negative integer" ),
+
     "vl_mk_dir": Checker( lambda v: isinstance(v, str), "expects a path to directory" ),
 
     "c_include_path": Checker( lambda v: isinstance(v, list) and all(os.path.isdir(expand(p)) for p in v),
@@ -268,7 +295,8 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     opt_level   = "-O3"
     loop_unroll = "--unroll-count 1000000"
     stmt_unroll = "--unroll-stmts 1000000"
-    trace       = "--trace" if s.vl_trace else ""
+    trace       = "" if not s.vl_trace else \
+                  "--trace-fst" if s.vl_trace_format == 'fst' else "--trace"
     coverage    = "--coverage" if s.vl_coverage else ""
     line_cov    = "--coverage-line" if s.vl_line_coverage else ""
     toggle_cov  = "--coverage-toggle" if s.vl_toggle_coverage else ""
@@ -329,12 +357,30 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     c_src_files = " ".join(s._get_c_src_files())
     ld_flags = expand(s.ld_flags)
     ld_libs = s.ld_libs
+    # FST tracing compresses the waveform with zlib
+    if s.vl_trace and s.vl_trace_format == 'fst':
+      ld_libs += " -lz"
     coverage = "-DVM_COVERAGE" if s.vl_coverage or \
                                   s.vl_line_coverage or \
                                   s.vl_toggle_coverage else ""
     return f"g++ {c_flags} {c_include_path} {ld_flags}"\
            f" -o {out_file} {c_src_files} {ld_libs} {coverage}"
 
+  def get_tool_versions( s ):
+    # Return the version strings of verilator and the C compiler, or None
+    # if either of them cannot be determined.
+    for tool in [ "verilator", "g++" ]:
+      if tool not in _tool_versions:
+        try:
+          _tool_versions[ tool ] = subprocess.check_output(
+              [ tool, "--version" ], stderr = subprocess.STDOUT,
+              universal_newlines = True ).strip()
+        except (OSError, subprocess.CalledProcessError):
+          _tool_versions[ tool ] = None
+    if None in _tool_versions.values():
+      return None
+    return [ _tool_versions[ "verilator" ], _tool_versions[ "g++" ] ]
+
   def vprint( s, msg, nspaces = 0, use_fill = False ):
     if s.verbose:
       if use_fill:
@@ -14,6 +14,7 @@ import shutil
 import subprocess
 import sys
 import timeit
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 from importlib import reload
 from itertools import cycle
@@ -23,9 +24,10 @@ from pymtl3 import MetadataKey
 from pymtl3.datatypes import Bits, is_bitstruct_class, is_bitstruct_inst, mk_bits
 from pymtl3.dsl import Component
 from pymtl3.dsl.errors import UnsetMetadataError
+from pymtl3.extra.disk_cache import FileCache, hash_file, hash_strings
 from pymtl3.passes.BasePass import BasePass
 from pymtl3.passes.rtlir import RTLIRDataType as rdt
-from pymtl3.passes.rtlir import RTLIRGetter
+from pymtl3.passes.rtlir import get_rtlir_getter
 from pymtl3.passes.rtlir import RTLIRType as rt
 from pymtl3.passes.rtlir.rtype.RTLIRDataType import _get_rtlir_dtype_struct
 
@@ -39,9 +41,12 @@ from ..util.utility import (
     wrap,
 )
 from ..VerilogPlaceholderPass import VerilogPlaceholderPass
+from .sim_run_records import elem_nbytes
 from .verilator_wrapper_c_template import template as c_template
 from .verilator_wrapper_py_template import template as py_template
 
+# Size bound of the shared cache of compiled models in MB
+SHARED_CACHE_MAX_MB = int( os.environ.get( "PYMTL_VERILATOR_CACHE_MB", 2048 ) )
 
 class VerilogVerilatorImportPass( BasePass ):
   """Import an arbitrary SystemVerilog module as a PyMTL component."""
@@ -195,6 +200,21 @@ class VerilogVerilatorImportPass( BasePass ):
   #: Default value: ``100``
   vl_trace_cycle_time = MetadataKey(int)
 
+  #: Format of the Verilator waveform, either ``'vcd'`` or ``'fst'``.
+  #:
+  #: Type: ``str``; input
+  #:
+  #: Default value: ``'vcd'``
+  vl_trace_format = MetadataKey(str)
+
+  #: Number of cycles between two flushes of the Verilator waveform file;
+  #: 0 to only flush when the trace buffer is full or the model is finalized.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``1``
+  vl_trace_flush_interval = MetadataKey(int)
+
   #: Set to true to allow for on-demand VCD dumping
   #:
   #: Type: ``bool``; input
@@ -211,6 +231,13 @@ class VerilogVerilatorImportPass( BasePass ):
   #: Default value: ``""``
   vl_trace_on_demand_portname = MetadataKey(str)
 
+  #: Share compiled models through a machine-wide cache.
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: ``True``
+  vl_shared_cache     = MetadataKey(bool)
+
   #: Optional flags to be passed to the C compiler.
   #:
   #: Type: ``str``; input
@@ -246,6 +273,14 @@ class VerilogVerilatorImportPass( BasePass ):
   #: Default value: ``''``
   ld_libs             = MetadataKey(str)
 
+  #: Number of components that are verilated and compiled concurrently.
+  #: Only read from the top component.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: the number of CPUs
+  build_jobs          = MetadataKey(int)
+
   # Import pass output pass data
 
   #: An instnace of :class:`VerilatorImportConfigs` containing the parsed options.
@@ -267,16 +302,73 @@ class VerilogVerilatorImportPass( BasePass ):
     return ret
 
   def traverse_hierarchy( s, m ):
+    # Verilate and compile all components to be imported before replacing
+    # any of them, so that independent builds can run concurrently.
+    imports = []
+    s.collect_imports( m, imports )
+    s.build_imports( imports )
+
+    # do_import only returns an object if m itself is imported, in which
+    # case it is the only component in imports.
+    ret = None
+    for x in imports:
+      ret = s.do_import( x )
+    return ret
+
+  def collect_imports( s, m, imports ):
     c = s.__class__
     ph_pass = c.get_placeholder_pass()
     # Import can only be performed on Placeholders
     if m.has_metadata( ph_pass.enable ) and m.get_metadata( ph_pass.enable ):
       m.set_metadata( c.import_config, c.get_import_config()( m ) )
-      return s.do_import( m )
+      imports.append( m )
 
     else:
       for child in m.get_child_components(repr):
-        s.traverse_hierarchy( child )
+        s.collect_imports( child, imports )
+
+  def build_imports( s, imports ):
+    """Verilate and compile the given components in a pool of workers.
+
+    Each worker mostly waits on a verilator or C compiler subprocess, so
+    threads are enough to keep the CPUs busy. Components that share the
+    same translated module name share the same output files; only the
+    first one is built here and the others are built (or found cached)
+    when they are imported. Errors are raised in hierarchy order, as if
+    the components were built one after another.
+    """
+    s._built = {}
+
+    if s.top.has_metadata( s.__class__.build_jobs ):
+      njobs = s.top.get_metadata( s.__class__.build_jobs )
+    else:
+      njobs = os.cpu_count() or 1
+
+    if njobs <= 1 or len(imports) <= 1:
+      return
+
+    jobs  = []
+    names = set()
+    for m in imports:
+      try:
+        job = s.prepare_import( m )
+      except AssertionError as e:
+        msg = '' if e.args[0] is None else e.args[0]
+        raise VerilogImportError( m, msg )
+      ph_cfg, ip_cfg, ports, _, cached, _, _ = job
+      if ip_cfg.translated_top_module not in names:
+        names.add( ip_cfg.translated_top_module )
+        jobs.append( (m, job, (m, ph_cfg, ip_cfg, ports, cached)) )
+
+    with ThreadPoolExecutor( max_workers=njobs ) as pool:
+      futures = [ pool.submit( s.build_import, *args ) for _, _, args in jobs ]
+
+    for (m, job, _), future in zip( jobs, futures ):
+      try:
+        s._built[ m ] = ( job, future.result() )
+      except AssertionError as e:
+        msg = '' if e.args[0] is None else e.args[0]
+        raise VerilogImportError( m, msg )
 
   def do_import( s, m ):
     try:
@@ -353,12 +445,36 @@ class VerilogVerilatorImportPass( BasePass ):
   #-----------------------------------------------------------------------
 
   def get_imported_object( s, m ):
+    built = getattr( s, '_built', {} ).pop( m, None )
+    if built is None:
+      job = s.prepare_import( m )
+      ph_cfg, ip_cfg, ports, rtype, cached, config_file, cfg_d = job
+      port_cdefs = s.build_import( m, ph_cfg, ip_cfg, ports, cached )
+    else:
+      job, port_cdefs = built
+      ph_cfg, ip_cfg, ports, rtype, cached, config_file, cfg_d = job
+
+    symbols = s.create_py_wrapper( m, ph_cfg, ip_cfg, rtype, ports, port_cdefs, cached )
+
+    imp = s.import_component( m, ph_cfg, ip_cfg, symbols )
+
+    imp._ip_cfg = ip_cfg
+    imp._ph_cfg = ph_cfg
+    imp._ports = ports
+
+    # Dump configuration dict to config_file
+    with open( config_file, 'w' ) as fd:
+      json.dump( cfg_d, fd, indent = 4 )
+
+    return imp
+
+  def prepare_import( s, m ):
     c = s.__class__
     ph_cfg = m.get_metadata( c.get_placeholder_pass().placeholder_config )
     ip_cfg = m.get_metadata( c.import_config )
     ip_cfg.setup_configs( m, c.get_translation_pass(), c.get_placeholder_pass() )
 
-    rtype = RTLIRGetter(cache=False).get_component_ifc_rtlir( m )
+    rtype = get_rtlir_getter( m ).get_component_ifc_rtlir( m )
 
     # Now we selectively unpack array of ports if they are referred to in
     # port_map
@@ -368,25 +484,58 @@ class VerilogVerilatorImportPass( BasePass ):
 
     cached, config_file, cfg_d = s.is_cached( m, ip_cfg )
 
-    s.create_verilator_model( m, ph_cfg, ip_cfg, cached )
+    return ph_cfg, ip_cfg, ports, rtype, cached, config_file, cfg_d
 
-    port_cdefs = s.create_verilator_c_wrapper( m, ph_cfg, ip_cfg, ports, cached )
+  def build_import( s, m, ph_cfg, ip_cfg, ports, cached ):
+    # Return the port declarations of the C wrapper.
 
-    s.create_shared_lib( m, ph_cfg, ip_cfg, cached )
+    port_cdefs = s.create_verilator_c_wrapper( m, ph_cfg, ip_cfg, ports, cached )
 
-    symbols = s.create_py_wrapper( m, ph_cfg, ip_cfg, rtype, ports, port_cdefs, cached )
+    key = None if cached else s.get_shared_cache_key( ip_cfg )
+    if key is None:
+      s.create_verilator_model( m, ph_cfg, ip_cfg, cached )
+      s.create_shared_lib( m, ph_cfg, ip_cfg, cached )
+      return port_cdefs
+
+    # Hold the lock while building so that other processes that need the
+    # same model wait for us instead of building it again.
+    store = FileCache( "verilator", SHARED_CACHE_MAX_MB << 20 )
+    with store.lock( key ):
+      if store.fetch( key, ip_cfg.get_shared_lib_path() ):
+        ip_cfg.vprint(f"\n{ip_cfg.translated_top_module} not verilated because "
+                      f"it's in the shared cache!", 2)
+      else:
+        s.create_verilator_model( m, ph_cfg, ip_cfg, cached )
+        s.create_shared_lib( m, ph_cfg, ip_cfg, cached )
+        store.publish( key, ip_cfg.get_shared_lib_path() )
 
-    imp = s.import_component( m, ph_cfg, ip_cfg, symbols )
+    return port_cdefs
 
-    imp._ip_cfg = ip_cfg
-    imp._ph_cfg = ph_cfg
-    imp._ports = ports
+  def get_shared_cache_key( s, ip_cfg ):
+    # The shared library is fully determined by the translated Verilog,
+    # the C wrapper, the import options and the tool versions.
+    if not ip_cfg.vl_shared_cache or ip_cfg.c_include_path:
+      return None
 
-    # Dump configuration dict to config_file
-    with open( config_file, 'w' ) as fd:
-      json.dump( cfg_d, fd, indent = 4 )
+    versions = ip_cfg.get_tool_versions()
+    if versions is None:
+      return None
 
-    return imp
+    try:
+      parts = [
+        s.__class__.__name__,
+        ip_cfg.translated_top_module,
+        json.dumps( s.serialize_cfg( ip_cfg ), sort_keys = True ),
+        str(ip_cfg.fast),
+        hash_file( ip_cfg.translated_source_file ),
+        hash_file( ip_cfg.get_c_wrapper_path() ),
+        *versions,
+        *[ hash_file( expand(x) ) for x in ip_cfg.c_srcs ],
+      ]
+    except OSError:
+      return None
+
+    return hash_strings( parts )
 
   #-----------------------------------------------------------------------
   # create_verilator_model
@@ -448,6 +597,8 @@ class VerilogVerilatorImportPass( BasePass ):
     dump_vcd = int(ip_cfg.vl_trace)
     vcd_timescale = ip_cfg.vl_trace_timescale
     half_cycle_time = ip_cfg.vl_trace_cycle_time // 2
+    dump_fst = int(ip_cfg.vl_trace_format == 'fst')
+    trace_flush_interval = ip_cfg.vl_trace_flush_interval
     external_trace = int(ip_cfg.vl_line_trace)
     wrapper_name = ip_cfg.get_c_wrapper_path()
     verilator_xinit_value = ip_cfg.get_vl_xinit_value()
@@ -481,6 +632,15 @@ class VerilogVerilatorImportPass( BasePass ):
     make_indent( port_inits, 1 )
     port_inits = '\n'.join( port_inits )
 
+    # Generate the record copies of sim_run
+    sim_run_in_layout, sim_run_out_layout = s.gen_sim_run_layout( ports )
+    sim_run_inputs  = s.gen_sim_run_copy_c( sim_run_in_layout, 'in', True )
+    sim_run_outputs = s.gen_sim_run_copy_c( sim_run_out_layout, 'out', False )
+    make_indent( sim_run_inputs, 2 )
+    make_indent( sim_run_outputs, 2 )
+    sim_run_inputs  = '\n'.join( sim_run_inputs )
+    sim_run_outputs = '\n'.join( sim_run_outputs )
+
     # Fill in the C wrapper template
     with open( wrapper_name, 'w' ) as output:
       output.write( c_template.format( **locals() ) )
@@ -571,6 +731,9 @@ class VerilogVerilatorImportPass( BasePass ):
     else:
       external_trace_c_def = ''
 
+    # Record layouts of sim_run
+    sim_run_in_layout, sim_run_out_layout = s.gen_sim_run_layout( ports )
+
     # Fill in the python wrapper template
     with open( wrapper_name, 'w' ) as output:
       py_wrapper = py_template.format(
@@ -590,8 +753,11 @@ class VerilogVerilatorImportPass( BasePass ):
         dump_vcd              = int(ip_cfg.vl_trace),
         has_vl_trace_filename = bool(ip_cfg.vl_trace_filename),
         vl_trace_filename     = ip_cfg.vl_trace_filename,
+        trace_ext             = ip_cfg.vl_trace_format,
         external_trace        = int(ip_cfg.vl_line_trace),
         trace_c_def           = external_trace_c_def,
+        sim_run_input_layout  = repr(sim_run_in_layout),
+        sim_run_output_layout = repr(sim_run_out_layout),
       )
       output.write( py_wrapper )
 
@@ -658,6 +824,7 @@ class VerilogVerilatorImportPass( BasePass ):
       'vl_W_lint', 'vl_W_style', 'vl_W_fatal', 'vl_Wno_list',
       'vl_xinit', 'vl_trace',
       'vl_trace_timescale', 'vl_trace_cycle_time',
+      'vl_trace_format', 'vl_trace_flush_interval',
       'vl_trace_on_demand', 'vl_trace_on_demand_portname',
       'c_flags', 'c_include_path', 'c_srcs',
       'ld_flags', 'ld_libs',
@@ -740,6 +907,47 @@ m->{name}{sub} = {deference}model->{name}{sub};
 
     return ret
 
+  #-------------------------------------------------------------------------
+  # gen_sim_run_layout
+  #-------------------------------------------------------------------------
+  # Return the layouts of the input and output records of sim_run. Each
+  # layout is a list of (verilog port name, nbits, array dimensions). The
+  # clock is driven by sim_run itself so it is not part of the inputs.
+
+  def gen_sim_run_layout( s, ports ):
+    inputs, outputs = [], []
+    for pnames, vname, port, _ in ports:
+      if not vname:
+        continue
+      entry = ( vname, s._get_c_nbits( port ), s._get_c_n_dim( port ) )
+      if s._get_direction( port ) == 'InPort':
+        if pnames[0] != 'clk':
+          inputs.append( entry )
+      else:
+        outputs.append( entry )
+    return inputs, outputs
+
+  #-------------------------------------------------------------------------
+  # gen_sim_run_copy_c
+  #-------------------------------------------------------------------------
+  # Return the C statements that copy one record between buffer `buf` and
+  # the exposed ports of the model.
+
+  def gen_sim_run_copy_c( s, layout, buf, to_model ):
+    ret = []
+    for vname, nbits, dims in layout:
+      name   = s._verilator_name( vname )
+      nbytes = elem_nbytes( nbits )
+      sub    = "".join( f"[i_{idx}]" for idx in range(len(dims)) )
+      for idx, dim_size in enumerate( dims ):
+        ret.append( "  "*idx + f"for ( int i_{idx} = 0; i_{idx} < {dim_size}; i_{idx}++ )" )
+      indent = "  "*len(dims)
+      if to_model:
+        ret.append( indent + f"{{ memcpy( m->{name}{sub}, {buf}, {nbytes} ); {buf} += {nbytes}; }}" )
+      else:
+        ret.append( indent + f"{{ memcpy( {buf}, m->{name}{sub}, {nbytes} ); {buf} += {nbytes}; }}" )
+    return ret
+
   #-------------------------------------------------------------------------
   # gen_signal_decl_py
   #-------------------------------------------------------------------------
@@ -1207,9 +1415,18 @@ m->{name}{sub} = {deference}model->{name}{sub};
       dtype = port.get_dtype()
     return dtype.get_length()
 
+  # Verilator stores signals wider than 64 bits as arrays of 32-bit words
+  # with the least significant word first. On little-endian hosts that is
+  # the little-endian byte representation of the whole value, so we
+  # marshal wide signals with a single int.to_bytes/from_bytes through a
+  # CFFI buffer instead of slicing out every word in Python.
+
   def _gen_ref_write( s, lhs, rhs, nbits, equal='=' ):
     if nbits <= 64:
       return [ '', f"{lhs}[0] {equal} int({rhs})" ]
+    elif sys.byteorder == 'little' and equal == '=':
+      nbytes = elem_nbytes( nbits )
+      return [ '', f"_ffi_buffer( {lhs}, {nbytes} )[:] = int({rhs}).to_bytes( {nbytes}, 'little' )" ]
     else:
       ret = [ '', f'x = {lhs}' ]
       ITEM_BITWIDTH = 32
@@ -1223,6 +1440,13 @@ m->{name}{sub} = {deference}model->{name}{sub};
   def _gen_ref_read( s, lhs, rhs, nbits, equal='=' ):
     if nbits <= 64:
       return [ '', f"{lhs} {equal} {rhs}[0]" ]
+    elif sys.byteorder == 'little':
+      nbytes = elem_nbytes( nbits )
+      value  = f"_int_from_bytes( _ffi_buffer( {rhs}, {nbytes} ), 'little' )"
+      # Mask out the unused bits of the last word
+      if nbits % 32:
+        value = f"{value} & {hex((1 << nbits) - 1)}"
+      return [ '', f"{lhs} {equal} {value}" ]
     else:
       ret = [ '', f'x = {rhs}' ]
       ITEM_BITWIDTH = 32
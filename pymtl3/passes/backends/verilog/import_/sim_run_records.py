@@ -0,0 +1,83 @@
+#=========================================================================
+# sim_run_records.py
+#=========================================================================
+# Date   : Oct 18, 2026
+"""Pack and unpack the per-cycle records used by `sim_run` of imported
+Verilator models.
+
+A record stores the value of every port in a layout, in layout order.
+Each element of a port is stored in its Verilator storage format, i.e.
+a little-endian unsigned integer of 1, 2, 4 or 8 bytes, or an array of
+32-bit words for ports wider than 64 bits. A layout is a list of
+(verilog port name, nbits, array dimensions).
+"""
+
+def elem_nbytes( nbits ):
+  if   nbits <= 8:  return 1
+  elif nbits <= 16: return 2
+  elif nbits <= 32: return 4
+  elif nbits <= 64: return 8
+  else:             return 4 * ((nbits - 1) // 32 + 1)
+
+def _nelems( dims ):
+  n = 1
+  for d in dims:
+    n *= d
+  return n
+
+def record_nbytes( layout ):
+  return sum( elem_nbytes( nbits ) * _nelems( dims ) for _, nbits, dims in layout )
+
+def _flatten( value, dims ):
+  if not dims:
+    return [ value ]
+  assert len(value) == dims[0], f"expects a list of {dims[0]} elements, got {value}"
+  ret = []
+  for x in value:
+    ret.extend( _flatten( x, dims[1:] ) )
+  return ret
+
+def _nest( values, dims ):
+  if not dims:
+    return values[0]
+  step = len(values) // dims[0]
+  return [ _nest( values[i*step:(i+1)*step], dims[1:] ) for i in range(dims[0]) ]
+
+def pack_records( layout, vectors ):
+  """Return a bytearray of records, one for each dict in `vectors` that
+  maps port names to integers (or nested lists of integers for arrays
+  of ports). Missing ports are zero."""
+  ret = bytearray()
+  for vector in vectors:
+    for name, nbits, dims in layout:
+      n = elem_nbytes( nbits )
+      value = vector.get( name, 0 if not dims else None )
+      if value is None:
+        values = [ 0 ] * _nelems( dims )
+      else:
+        values = _flatten( value, dims )
+      mask = (1 << nbits) - 1
+      for x in values:
+        ret += (int(x) & mask).to_bytes( n, 'little' )
+  return ret
+
+def unpack_records( layout, buf, n_records ):
+  """Return a list of `n_records` dicts that map port names to integers
+  (or nested lists of integers for arrays of ports)."""
+  view = memoryview( buf ).cast( 'B' )
+  nbytes = record_nbytes( layout )
+  assert len(view) >= n_records * nbytes, "buffer is smaller than the records"
+
+  ret = []
+  pos = 0
+  for _ in range(n_records):
+    record = {}
+    for name, nbits, dims in layout:
+      n = elem_nbytes( nbits )
+      values = []
+      for _ in range( _nelems( dims ) ):
+        values.append( int.from_bytes( view[pos:pos+n], 'little' ) )
+        pos += n
+      record[ name ] = _nest( values, dims )
+    ret.append( record )
+  return ret
@@ -6,6 +6,7 @@
 """Test if the imported object works correctly."""
 
 import gc
+import os
 from os.path import dirname
 
 import pytest
@@ -60,6 +61,50 @@ def test_reg( do_test ):
   a._tv_out = tv_out
   do_test( a )
 
+def test_sim_run():
+  class VReg( Component, VerilogPlaceholder ):
+    def construct( s ):
+      s.in_ = InPort( Bits32 )
+      s.out = OutPort( Bits32 )
+      s.set_metadata( VerilogPlaceholderPass.port_map, {
+          s.clk : "clk", s.reset : "reset",
+          s.in_ : "d",   s.out : "q",
+      } )
+
+  def create():
+    m = VReg()
+    m.elaborate()
+    m.set_metadata( VerilogTranslationImportPass.enable, True )
+    m.apply( VerilogPlaceholderPass() )
+    m = VerilogTranslationImportPass()( m )
+    m.apply( DefaultPassGroup() )
+    m.sim_reset()
+    return m
+
+  ref, m = create(), create()
+  assert sorted( x[0] for x in m.sim_run_input_layout ) == [ 'd', 'reset' ]
+  assert [ x[0] for x in m.sim_run_output_layout ] == [ 'q' ]
+
+  values = [ 1, 2, 0xffffffff, 42, 0xdeadbeef, 0 ]
+  outs = []
+  for v in values:
+    ref.in_ @= v
+    ref.sim_eval_combinational()
+    outs.append( int(ref.out) )
+    ref.sim_tick()
+
+  inputs = m.pack_sim_run_inputs( [ { 'd': v } for v in values ] )
+  output_buffer = bytearray( len(values) * 4 )
+  assert m.sim_run( len(values), bytes(inputs), output_buffer ) is output_buffer
+  outputs = m.unpack_sim_run_outputs( output_buffer, len(values) )
+  assert [ x[ 'q' ] for x in outputs ] == outs
+
+  with pytest.raises( ValueError ):
+    m.sim_run( len(values) + 1, inputs )
+
+  m.finalize()
+  ref.finalize()
+
 def test_vl_uninit( do_test ):
   # Use a latch to test if verilator has correctly set up
   # the inital signal values
@@ -509,3 +554,37 @@ def test_incr_on_demand_vcd( do_test ):
     a.sim_tick()
 
   a.finalize()
+
+@pytest.mark.parametrize( "trace_format", [ 'vcd', 'fst' ] )
+def test_reg_buffered_trace( trace_format ):
+  class VReg( Component, VerilogPlaceholder ):
+    def construct( s ):
+      s.in_ = InPort( Bits32 )
+      s.out = OutPort( Bits32 )
+      s.set_metadata( VerilogPlaceholderPass.port_map, {
+          s.clk : "clk", s.reset : "reset",
+          s.in_ : "d",   s.out : "q",
+      } )
+      s.set_metadata( VerilogVerilatorImportPass.vl_trace, True )
+      s.set_metadata( VerilogVerilatorImportPass.vl_trace_format, trace_format )
+      s.set_metadata( VerilogVerilatorImportPass.vl_trace_flush_interval, 0 )
+  a = VReg()
+  a.elaborate()
+  a.set_metadata( VerilogTranslationImportPass.enable, True )
+  a.apply( VerilogPlaceholderPass() )
+  a = VerilogTranslationImportPass()( a )
+  a.apply( DefaultPassGroup() )
+  a.sim_reset()
+
+  for i in range(16):
+    a.in_ @= Bits32(i)
+    a.sim_tick()
+
+  # The trace is written out when the model is finalized
+  a.finalize()
+  trace_file = f"VReg_noparam.verilator1.{trace_format}"
+  assert os.path.getsize( trace_file ) > 0
+  if trace_format == 'vcd':
+    with open( trace_file ) as f:
+      times = [ int(x[1:]) for x in f.read().split() if x.startswith('#') ]
+    assert max( times ) >= 16*100
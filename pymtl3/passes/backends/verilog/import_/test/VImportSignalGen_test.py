@@ -234,3 +234,25 @@ def test_nested_interface_port_array( do_test ):
     "s.ifc = [ Ifc() for _ in range(2) ]"
   ]
   do_test( a )
+
+def test_wide_port_marshaling():
+  # Wide ports are copied to/from the Verilator words of a port with a
+  # single conversion
+  from cffi import FFI
+  ffi = FFI()
+  ipass = VerilogVerilatorImportPass()
+
+  for nbits in [ 65, 96, 4100 ]:
+    BitsN = mk_bits( nbits )
+    nwords = (nbits - 1) // 32 + 1
+    words = ffi.new( f"unsigned int[{nwords}]" )
+    value = BitsN( (1 << (nbits - 1)) | 0x123456789 )
+    ns = { 's' : type( "S", (), { 'x' : value, 'y' : BitsN() } )(),
+           '_ffi_m' : words, '_ffi_buffer' : ffi.buffer, '_int_from_bytes' : int.from_bytes }
+
+    exec( "\n".join( ipass._gen_ref_write( "_ffi_m", "s.x", nbits ) ), ns )
+    assert [ words[i] for i in range(nwords) ] == \
+           [ (int(value) >> (32 * i)) & 0xffffffff for i in range(nwords) ]
+
+    exec( "\n".join( ipass._gen_ref_read( "s.y", "_ffi_m", nbits, '@=' ) ), ns )
+    assert ns['s'].y == value
@@ -10,8 +10,8 @@ template = \
 #include "obj_dir_{component_name}/V{component_name}.h"
 #include "stdio.h"
 #include "stdint.h"
+#include "string.h"
 #include "verilated.h"
-#include "verilated_vcd_c.h"
 
 // set to true if the model has clk signal
 #define HAS_CLK {has_clk}
@@ -19,6 +19,22 @@ template = \
 // set to true when VCD tracing is enabled in Verilator
 #define DUMP_VCD {dump_vcd}
 
+// set to true to dump FST instead of VCD
+#define DUMP_FST {dump_fst}
+
+// number of cycles between two flushes of the trace file; 0 to only
+// flush when the buffer of the trace file is full and when the model is
+// destroyed
+#define TRACE_FLUSH_INTERVAL {trace_flush_interval}
+
+#if DUMP_FST
+#include "verilated_fst_c.h"
+typedef VerilatedFstC VerilatedTraceFile;
+#else
+#include "verilated_vcd_c.h"
+typedef VerilatedVcdC VerilatedTraceFile;
+#endif
+
 // set to true to enable on-demand VCD dumping
 #define ON_DEMAND_DUMP_VCD {on_demand_dump_vcd}
 
@@ -55,6 +71,7 @@ extern "C" {{
     #if DUMP_VCD
     void *        tfp;
     unsigned int  trace_time;
+    unsigned int  trace_ncycles;
     #endif
 
   }} V{component_name}_t;
@@ -64,6 +81,9 @@ extern "C" {{
   void destroy_model( V{component_name}_t *);
   void comb_eval( V{component_name}_t * );
   void seq_eval( V{component_name}_t * );
+  void flush_trace( V{component_name}_t * );
+  void sim_run( V{component_name}_t *, unsigned int,
+                const unsigned char *, unsigned char * );
   void assert_en( bool en );
 
   #if VLINETRACE
@@ -115,14 +135,15 @@ V{component_name}_t * create_model( const char *vcd_filename ) {{
   if ( strlen( vcd_filename ) != 0 ) {{
     m->_vcd_en = 1;
     Verilated::traceEverOn( true );
-    VerilatedVcdC * tfp = new VerilatedVcdC();
+    VerilatedTraceFile * tfp = new VerilatedTraceFile();
 
     model->trace( tfp, 99 );
     tfp->spTrace()->set_time_resolution( "{vcd_timescale}" );
     tfp->open( vcd_filename );
 
-    m->tfp        = (void *) tfp;
-    m->trace_time = 0;
+    m->tfp           = (void *) tfp;
+    m->trace_time    = 0;
+    m->trace_ncycles = 0;
   }}
   #endif
 
@@ -152,7 +173,7 @@ void destroy_model( V{component_name}_t * m ) {{
   #if DUMP_VCD
   if ( m->_vcd_en ) {{
     // printf("DESTROYING %d\\n", m->trace_time);
-    VerilatedVcdC * tfp = (VerilatedVcdC *) m->tfp;
+    VerilatedTraceFile * tfp = (VerilatedTraceFile *) m->tfp;
     tfp->close();
   }}
   #endif
@@ -178,7 +199,7 @@ void comb_eval( V{component_name}_t * m ) {{
   // #if DUMP_VCD
   // if ( m->_vcd_en ) {{
   //   // dump current signal values
-  //   VerilatedVcdC * tfp = (VerilatedVcdC *) m->tfp;
+  //   VerilatedTraceFile * tfp = (VerilatedTraceFile *) m->tfp;
   //   tfp->dump( m->trace_time );
   //   tfp->flush();
   // }}
@@ -211,9 +232,8 @@ void seq_eval( V{component_name}_t * m ) {{
     g_main_time   += {half_cycle_time};
 
     // dump current signal values
-    VerilatedVcdC * tfp = (VerilatedVcdC *) m->tfp;
+    VerilatedTraceFile * tfp = (VerilatedTraceFile *) m->tfp;
     tfp->dump( m->trace_time );
-    tfp->flush();
 
   }}
   #endif
@@ -232,14 +252,68 @@ void seq_eval( V{component_name}_t * m ) {{
     g_main_time += {half_cycle_time};
 
     // dump current signal values
-    VerilatedVcdC * tfp = (VerilatedVcdC *) m->tfp;
+    VerilatedTraceFile * tfp = (VerilatedTraceFile *) m->tfp;
     tfp->dump( m->trace_time );
-    tfp->flush();
+
+    // Flushing is a system call, so we only do it every
+    // TRACE_FLUSH_INTERVAL cycles instead of after every dump
+    #if TRACE_FLUSH_INTERVAL > 0
+    if ( ++m->trace_ncycles >= TRACE_FLUSH_INTERVAL ) {{
+      m->trace_ncycles = 0;
+      tfp->flush();
+    }}
+    #endif
 
   }}
   #endif
 }}
 
+//------------------------------------------------------------------------
+// flush_trace()
+//------------------------------------------------------------------------
+// Write the buffered trace to the trace file.
+
+void flush_trace( V{component_name}_t * m ) {{
+
+  #if DUMP_VCD
+  if ( m->_vcd_en ) {{
+    VerilatedTraceFile * tfp = (VerilatedTraceFile *) m->tfp;
+    tfp->flush();
+    m->trace_ncycles = 0;
+  }}
+  #endif
+
+}}
+
+//------------------------------------------------------------------------
+// sim_run()
+//------------------------------------------------------------------------
+// Simulate ncycles cycles without returning to Python. In each cycle we
+// copy one record from the input buffer to the input ports, evaluate the
+// model, copy the output ports to one record of the output buffer, and
+// then tick the clock. See sim_run_records.py for the record format.
+
+void sim_run( V{component_name}_t * m, unsigned int ncycles,
+              const unsigned char * in, unsigned char * out ) {{
+
+  V{component_name} * model = (V{component_name} *) m->model;
+
+  for ( unsigned int i = 0; i < ncycles; i++ ) {{
+
+    // set inputs
+{sim_run_inputs}
+
+    model->eval();
+
+    // read outputs
+{sim_run_outputs}
+
+    seq_eval( m );
+
+  }}
+
+}}
+
 //------------------------------------------------------------------------
 // assert_en()
 //------------------------------------------------------------------------
@@ -15,6 +15,11 @@ from cffi import FFI
 
 from pymtl3.datatypes import *
 from pymtl3.dsl import Component, connect, InPort, OutPort, Wire, update, update_ff
+from pymtl3.passes.backends.verilog.import_.sim_run_records import (
+  pack_records,
+  record_nbytes,
+  unpack_records,
+)
 
 #-------------------------------------------------------------------------
 # {component_name}
@@ -23,6 +28,10 @@ from pymtl3.dsl import Component, connect, InPort, OutPort, Wire, update, update
 class {component_name}( Component ):
   id_ = 0
 
+  # Record layouts of sim_run: (verilog port name, nbits, array dimensions)
+  sim_run_input_layout  = {sim_run_input_layout}
+  sim_run_output_layout = {sim_run_output_layout}
+
   def __init__( s, *args, **kwargs ):
     s._finalization_count = 0
 
@@ -43,6 +52,9 @@ class {component_name}( Component ):
       void destroy_model( V{component_name}_t *);
       void comb_eval( V{component_name}_t * );
       void seq_eval( V{component_name}_t * );
+      void flush_trace( V{component_name}_t * );
+      void sim_run( V{component_name}_t *, unsigned int,
+                    const unsigned char *, unsigned char * );
       void assert_en( bool en );
       {trace_c_def}
 
@@ -80,11 +92,16 @@ class {component_name}( Component ):
     assert s._finalization_count == 0,\
       'Imported component can only be finalized once!'
     s._finalization_count += 1
+    # Destroying the model also flushes and closes the trace file
     s._ffi_inst.destroy_model( s._ffi_m )
     s.ffi.dlclose( s._ffi_inst )
     s.ffi = None
     s._ffi_inst = None
 
+  def flush_trace( s ):
+    """Write the buffered VCD/FST trace to the trace file."""
+    s._ffi_inst.flush_trace( s._ffi_m )
+
   def __del__( s ):
     if s._finalization_count == 0:
       s._finalization_count += 1
@@ -98,9 +115,9 @@ class {component_name}( Component ):
     verilator_vcd_file = ""
     if {dump_vcd}:
       if {has_vl_trace_filename}:
-        verilator_vcd_file = "{vl_trace_filename}.verilator1.vcd"
+        verilator_vcd_file = "{vl_trace_filename}.verilator1.{trace_ext}"
       else:
-        verilator_vcd_file = "{component_name}.verilator1.vcd"
+        verilator_vcd_file = "{component_name}.verilator1.{trace_ext}"
 
     # Convert string to `bytes` which is required by CFFI on python 3
     verilator_vcd_file = verilator_vcd_file.encode('ascii')
@@ -116,6 +133,8 @@ class {component_name}( Component ):
     _ffi_m = s._ffi_m
     _ffi_inst_comb_eval = s._ffi_inst.comb_eval
     _ffi_inst_seq_eval  = s._ffi_inst.seq_eval
+    _ffi_buffer         = s.ffi.buffer
+    _int_from_bytes     = int.from_bytes
 
     # declare the port interface
 {port_defs}
@@ -140,6 +159,45 @@ class {component_name}( Component ):
       # seq_eval will automatically tick clock in C land
       _ffi_inst_seq_eval( _ffi_m )
 
+  def sim_run( s, n_cycles, input_buffer, output_buffer=None ):
+    """Simulate `n_cycles` cycles in one call into the verilated model.
+
+    `input_buffer` is a bytes-like object (bytes, bytearray, NumPy array,
+    etc.) of `n_cycles` input records, see `pack_sim_run_inputs`. In each
+    cycle the inputs are applied, the outputs are written to one record of
+    `output_buffer`, and then the clock ticks. If `output_buffer` is None,
+    a new bytearray is allocated. Return the output buffer.
+
+    The PyMTL ports of this component are not updated; the next
+    sim_eval_combinational/sim_tick drives the model from them again.
+    """
+    in_nbytes  = record_nbytes( s.sim_run_input_layout )
+    out_nbytes = record_nbytes( s.sim_run_output_layout )
+
+    if output_buffer is None:
+      output_buffer = bytearray( n_cycles * out_nbytes )
+
+    in_buf  = s.ffi.from_buffer( "unsigned char[]", input_buffer )
+    out_buf = s.ffi.from_buffer( "unsigned char[]", output_buffer, require_writable=True )
+    if len(in_buf) < n_cycles * in_nbytes:
+      raise ValueError( f"input buffer has {{len(in_buf)}} bytes but {{n_cycles}} "
+                        f"cycles need {{n_cycles * in_nbytes}} bytes" )
+    if len(out_buf) < n_cycles * out_nbytes:
+      raise ValueError( f"output buffer has {{len(out_buf)}} bytes but {{n_cycles}} "
+                        f"cycles need {{n_cycles * out_nbytes}} bytes" )
+
+    s._ffi_inst.sim_run( s._ffi_m, n_cycles, in_buf, out_buf )
+    return output_buffer
+
+  def pack_sim_run_inputs( s, vectors ):
+    """Return the input buffer of sim_run for a list of dicts that map
+    verilog input port names to values."""
+    return pack_records( s.sim_run_input_layout, vectors )
+
+  def unpack_sim_run_outputs( s, output_buffer, n_cycles ):
+    """Return a list of dicts that map verilog output port names to values."""
+    return unpack_records( s.sim_run_output_layout, output_buffer, n_cycles )
+
   def assert_en( s, en ):
     # TODO: for verilator, any assertion failure will cause the C simulator
     # to abort, which results in a Python internal error. A better approach
@@ -5,11 +5,17 @@
 # Date   : Jun 5, 2019
 """Test ad-hoc components with SystemVerilog translation and import."""
 
+import os
+
 import pytest
 
 from pymtl3.datatypes import Bits16, Bits32, bitstruct, concat
 from pymtl3.dsl import Component, InPort, Interface, OutPort, update
-from pymtl3.passes.backends.verilog import VerilogPlaceholderPass
+from pymtl3.passes.backends.verilog import (
+    VerilogPlaceholderPass,
+    VerilogVerilatorImportPass,
+)
+from pymtl3.passes.PassGroups import DefaultPassGroup
 from pymtl3.passes.rtlir.util.test_utility import get_parameter
 from pymtl3.stdlib.test_utils import TestVectorSimulator
 
@@ -89,6 +95,62 @@ def test_pymtl_top_multi_placeholder():
   sim = TestVectorSimulator( m, case.TV, case.TV_IN, case.TV_OUT )
   sim.run_test()
 
+def test_pymtl_top_multi_placeholder_serial_build():
+  case = CaseMultiPlaceholderImport
+  m = case.DUT()
+  m.elaborate()
+  m.set_metadata( VerilogVerilatorImportPass.build_jobs, 1 )
+  m.apply( VerilogPlaceholderPass() )
+  m = VerilogTranslationImportPass()( m )
+  sim = TestVectorSimulator( m, case.TV, case.TV_IN, case.TV_OUT )
+  sim.run_test()
+
+def test_parallel_build_distinct_children():
+  class Incr( Component ):
+    def construct( s, nbits, amount ):
+      s.in_ = InPort( nbits )
+      s.out = OutPort( nbits )
+      @update
+      def upblk():
+        s.out @= s.in_ + amount
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits32 )
+      s.out = OutPort( Bits32 )
+      s.incrs = [ Incr( 32, i ) for i in range(4) ]
+      s.incrs[0].in_ //= s.in_
+      for i in range(3):
+        s.incrs[i].out //= s.incrs[i+1].in_
+      s.out //= s.incrs[-1].out
+
+  m = Top()
+  m.elaborate()
+  m.set_metadata( VerilogVerilatorImportPass.build_jobs, 4 )
+  for child in m.incrs:
+    child.set_metadata( VerilogTranslationImportPass.enable, True )
+  m.apply( VerilogPlaceholderPass() )
+  m = VerilogTranslationImportPass()( m )
+  m.apply( DefaultPassGroup() )
+  m.sim_reset()
+
+  for x in [ 0, 1, 42, 0xffffffff ]:
+    m.in_ @= x
+    m.sim_eval_combinational()
+    assert m.out == Bits32( x + 6, trunc_int=True )
+
+def test_shared_cache_across_directories( tmp_path, monkeypatch ):
+  monkeypatch.setenv( "PYMTL_CACHE_DIR", str(tmp_path / "cache") )
+  for d in [ "a", "b" ]:
+    os.mkdir( tmp_path / d )
+    monkeypatch.chdir( tmp_path / d )
+    run_test( CasePlaceholderTranslationRegIncr )
+
+  # The second run copies the shared library instead of verilating
+  store = tmp_path / "cache" / "verilator"
+  assert len( [ x for x in os.listdir( store ) if not x.endswith(".lock") ] ) == 1
+  assert not any( x.startswith( "obj_dir_" ) for x in os.listdir( tmp_path / "b" ) )
+
 def test_bitstruct_same_name_different_fields():
   class A:
     @bitstruct
@@ -17,7 +17,7 @@ from pymtl3.passes.rtlir import RTLIRDataType as rdt
 from pymtl3.passes.rtlir import RTLIRType as rt
 
 from ...errors import VerilogTranslationError
-from ...util.utility import make_indent
+from ...util.utility import gen_sized_literal, make_indent
 from .VBehavioralTranslatorL0 import VBehavioralTranslatorL0
 
 
@@ -279,7 +279,7 @@ class BehavioralRTLIRToVVisitorL1( bir.BehavioralRTLIRNodeVisitor ):
   def visit_Number( s, node ):
     """Return a number in string."""
     nbits = node.Type.get_dtype().get_length()
-    return f"{nbits}'d{node.value}"
+    return gen_sized_literal( nbits, node.value )
 
   #-----------------------------------------------------------------------
   # visit_Concat
@@ -415,7 +415,7 @@ class BehavioralRTLIRToVVisitorL1( bir.BehavioralRTLIRNodeVisitor ):
       # be a negative number. Since verilator errors when that happens, we
       # need to manually truncate the integer.
       value = int(Bits(nbits, node._value))
-      return f"{nbits}'d{value}"
+      return gen_sized_literal( nbits, value )
 
     return f"{nbits}'( {value} )"
 
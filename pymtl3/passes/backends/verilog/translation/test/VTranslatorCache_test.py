@@ -0,0 +1,151 @@
+#=========================================================================
+# VTranslatorCache_test.py
+#=========================================================================
+"""Test the SystemVerilog translator with the translation cache."""
+#
+# Date   : Oct 18, 2026
+
+import gc
+import os
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.extra.test_utility import mk_cache_fixture
+from pymtl3.passes.backends.generic import TranslationCache
+from pymtl3.passes.backends.verilog.util.test_utility import check_eq
+from pymtl3.passes.rtlir.util.test_utility import get_parameter
+
+from ..behavioral.test.VBehavioralTranslatorL1_test import test_verilog_behavioral_L1
+from ..behavioral.test.VBehavioralTranslatorL2_test import test_verilog_behavioral_L2
+from ..behavioral.test.VBehavioralTranslatorL4_test import test_verilog_behavioral_L4
+from ..behavioral.test.VBehavioralTranslatorL5_test import test_verilog_behavioral_L5
+from ..structural.test.VStructuralTranslatorL1_test import test_verilog_structural_L1
+from ..structural.test.VStructuralTranslatorL3_test import test_verilog_structural_L3
+from ..structural.test.VStructuralTranslatorL4_test import test_verilog_structural_L4
+from ..VTranslator import VTranslator
+
+cache_dir = mk_cache_fixture( TranslationCache )
+
+def run_test( case, nprocs, path ):
+  TranslationCache.enable( path, nprocs )
+  stats = []
+  # A cold and a warm translation must produce the same source
+  for _ in range(2):
+    TranslationCache.clear()
+    m = case.DUT()
+    m.elaborate()
+    tr = VTranslator( m )
+    tr.translate( m )
+    check_eq( tr.hierarchy.src, case.REF_SRC )
+    stats.append( ( tr.tr_cache.hits, tr.tr_cache.misses ) )
+
+  (cold_hits, cold_misses), (warm_hits, warm_misses) = stats
+  assert cold_hits == 0 and warm_misses == 0
+  assert warm_hits == cold_misses
+
+@pytest.mark.parametrize(
+  'case', get_parameter('case', test_verilog_structural_L1) + \
+          get_parameter('case', test_verilog_behavioral_L1) + \
+          get_parameter('case', test_verilog_behavioral_L2) + \
+          get_parameter('case', test_verilog_behavioral_L4) + \
+          get_parameter('case', test_verilog_structural_L3)
+)
+def test_verilog_cache( case, cache_dir ):
+  run_test( case, 1, cache_dir )
+
+@pytest.mark.skipif( not hasattr( os, "fork" ), reason="requires os.fork" )
+@pytest.mark.parametrize(
+  'case', get_parameter('case', test_verilog_behavioral_L5) + \
+          get_parameter('case', test_verilog_structural_L4)
+)
+def test_verilog_cache_parallel( case, cache_dir ):
+  run_test( case, 2, cache_dir )
+
+#-------------------------------------------------------------------------
+# Sharing between instances
+#-------------------------------------------------------------------------
+
+class Tile( Component ):
+  def construct( s, nbits, incr ):
+    s.in_ = InPort( nbits )
+    s.out = OutPort( nbits )
+    @update
+    def up_tile():
+      s.out @= s.in_ + incr
+
+class Mesh( Component ):
+  def construct( s, ntiles ):
+    s.in_   = InPort( 8 )
+    s.out   = OutPort( 8 )
+    s.tiles = [ Tile( 8, 1 ) for _ in range(ntiles) ]
+    s.last  = Tile( 8, 2 )
+    s.tiles[0].in_ //= s.in_
+    for i in range(1, ntiles):
+      s.tiles[i].in_ //= s.tiles[i-1].out
+    s.last.in_ //= s.tiles[-1].out
+    s.out //= s.last.out
+
+def translate( m ):
+  m.elaborate()
+  tr = VTranslator( m )
+  tr.translate( m )
+  return tr
+
+def test_shared_instances():
+  TranslationCache.clear()
+  tr = translate( Mesh( 8 ) )
+  # Mesh, Tile( 8, 1 ) and Tile( 8, 2 )
+  assert len( tr.tr_cache.keys ) == 10
+  assert ( tr.tr_cache.hits, tr.tr_cache.misses ) == ( 0, 3 )
+
+  # Another design with the same components translates nothing
+  tr2 = translate( Mesh( 8 ) )
+  assert ( tr2.tr_cache.hits, tr2.tr_cache.misses ) == ( 3, 0 )
+  assert tr2.hierarchy.src == tr.hierarchy.src
+
+  TranslationCache.clear()
+  assert translate( Mesh( 8 ) ).hierarchy.src == tr.hierarchy.src
+
+TILE_INCR = 1
+
+class GlobalTile( Component ):
+  def construct( s ):
+    s.in_ = InPort( 8 )
+    s.out = OutPort( 8 )
+    @update
+    def up_global():
+      s.out @= s.in_ + TILE_INCR
+
+def test_shared_instances_with_different_globals():
+  global TILE_INCR
+  TranslationCache.clear()
+  src1 = translate( GlobalTile() ).hierarchy.src
+
+  # Same class and parameters, but the update block refers to a global
+  # with another value
+  TILE_INCR = 2
+  try:
+    tr = translate( GlobalTile() )
+  finally:
+    TILE_INCR = 1
+  assert ( tr.tr_cache.hits, tr.tr_cache.misses ) == ( 0, 1 )
+  assert "__const__TILE_INCR  = 2'd2;" in tr.hierarchy.src
+  assert "__const__TILE_INCR  = 2'd2;" not in src1
+
+def test_shared_results_are_weak():
+
+  class LocalTile( Component ):
+    def construct( s ):
+      s.in_ = InPort( 8 )
+      s.out = OutPort( 8 )
+      @update
+      def up_local():
+        s.out @= s.in_
+
+  translate( LocalTile() )
+  assert LocalTile in TranslationCache._shared
+
+  del LocalTile
+  gc.collect()
+  assert not any( cls.__name__ == 'LocalTile' for cls in TranslationCache._shared.keys() )
@@ -12,7 +12,7 @@ from collections import deque
 from hashlib import blake2b
 
 from pymtl3.passes.rtlir import RTLIRDataType as rdt
-from pymtl3.passes.rtlir import RTLIRGetter
+from pymtl3.passes.rtlir import get_rtlir_getter
 from pymtl3.passes.rtlir import RTLIRType as rt
 from pymtl3.passes.rtlir.util.utility import get_component_full_name
 
@@ -36,6 +36,16 @@ def get_component_unique_name( c_rtype ):
   param_name = param_hash.hexdigest()
   return comp_name + "__" + param_name
 
+def gen_sized_literal( nbits, value ):
+  """Return the Verilog literal of a non-negative value of nbits bits.
+
+  Values of wide signals are printed in hex because Python refuses to
+  convert very large ints to decimal strings."""
+  value = int( value )
+  if value.bit_length() > 1024:
+    return f"{nbits}'h{value:x}"
+  return f"{nbits}'d{value}"
+
 def wrap( s ):
   col = shutil.get_terminal_size().columns
   return "\n".join(sum((textwrap.wrap(line, col) for line in s.split("\n")), []))
@@ -279,7 +289,7 @@ def gen_mapped_ports( m, raw_port_map, has_clk=True, has_reset=True, sep='__' ):
 
   # We start from all packed ports/interfaces, and unpack arrays if
   # it is found in a port.
-  rtype = RTLIRGetter(cache=False).get_component_ifc_rtlir(m)
+  rtype = get_rtlir_getter(m).get_component_ifc_rtlir(m)
   ret = []
 
   for name, port in rtype.get_ports_packed():
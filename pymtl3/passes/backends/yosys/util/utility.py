@@ -6,7 +6,7 @@
 """Provide helper methods that might be useful to verilog passes."""
 
 from pymtl3.passes.rtlir import RTLIRDataType as rdt
-from pymtl3.passes.rtlir import RTLIRGetter
+from pymtl3.passes.rtlir import get_rtlir_getter
 from pymtl3.passes.rtlir import RTLIRType as rt
 
 #-----------------------------------------------------------------------
@@ -105,7 +105,7 @@ def gen_mapped_ports( m, port_map, has_clk=True, has_reset=True, sep='__' ):
 
   # We start from all packed ports/interfaces, and unpack arrays if
   # it is found in a port.
-  rtype = RTLIRGetter(cache=False).get_component_ifc_rtlir(m)
+  rtype = get_rtlir_getter(m).get_component_ifc_rtlir(m)
   ret = []
 
   for name, port in rtype.get_ports_packed():
@@ -0,0 +1,285 @@
+"""
+========================================================================
+BatchSimPass.py
+========================================================================
+Simulate N independent stimulus sets ("lanes") with one elaborated model.
+Every Bits object of the model is replaced with a LaneBits object that
+holds one value per lane, so each execution of the (reused) update block
+schedule advances all lanes together.
+
+An update block whose control flow differs between lanes raises
+LaneDivergence. We then re-execute that block once per lane with plain
+Bits swapped into the signals it reads and writes. This requires update
+blocks to be re-executable, which holds for all RTL blocks that don't
+have Python side effects. Any other exception is an error of the design
+and is raised as in a normal simulation.
+
+BatchSimPass requires numpy, which is not a dependency of PyMTL.
+
+Date   : Oct 18, 2026
+"""
+import types
+from collections import defaultdict
+
+import py
+
+from pymtl3.datatypes import is_bitstruct_inst
+from pymtl3.dsl.Connectable import Interface, MethodPort, Signal
+from pymtl3.extra.pypy import custom_exec
+from pymtl3.passes.BasePass import PassMetadata
+from pymtl3.passes.errors import ModelTypeError, PassOrderError
+from pymtl3.passes.sim.PrepareSimPass import PrepareSimPass
+
+from .LaneBits import LaneBits, LaneDivergence, get_lane, lane_helpers, np, set_lane, to_lanes
+
+_lane_helpers_by_id = { id(x): y for x, y in lane_helpers.items() }
+
+class BatchSimPass( PrepareSimPass ):
+
+  def __init__( self, nlanes, reset_active_high=True ):
+    if np is None:
+      raise ImportError( "BatchSimPass requires numpy\n"
+                         "- Suggestion: pip install numpy" )
+    super().__init__( print_line_trace=False, reset_active_high=reset_active_high )
+
+    nlanes = int(nlanes)
+    if nlanes < 1:
+      raise ValueError( f"BatchSimPass needs at least one lane, not {nlanes}" )
+    self.nlanes = nlanes
+
+  def __call__( self, top ):
+    if hasattr(top, "sim_reset"):
+      raise AttributeError( "Please rename the attribute top.sim_reset")
+    if not hasattr( top, "_sched" ):
+      raise PassOrderError( "_sched" )
+    if not hasattr( top._sched, "update_schedule" ):
+      raise PassOrderError( "update_schedule" )
+    if not hasattr( top._sched, "schedule_ff" ):
+      raise PassOrderError( "schedule_ff" )
+    if not hasattr( top._sched, "schedule_posedge_flip" ):
+      raise PassOrderError( "schedule_posedge_flip" )
+
+    # Python state of CL/FL components is not replicated across lanes
+    if top.get_all_object_filter( MethodPort ) or \
+       top.get_all_update_once():
+      raise ModelTypeError( "pure RTL components (no method ports or update_once)" )
+
+    top._sim = PassMetadata()
+    top._sim.nlanes = self.nlanes
+    top._sim.lane_fallbacks = defaultdict(int)
+
+    self.create_sim_cycle_count( top )
+    self.create_sim_lane_fallbacks( top )
+    self.create_lock_unlock_simulation( top )
+
+    top.lock_in_simulation()
+
+    self.wrap_lane_schedule( top )
+
+    self.create_sim_eval_comb( top )
+    self.create_sim_tick( top )
+    self.create_sim_reset( top )
+
+  @staticmethod
+  def create_sim_lane_fallbacks( top ):
+    def sim_lane_fallbacks():
+      return dict( top._sim.lane_fallbacks )
+    top.sim_lane_fallbacks = sim_lane_fallbacks
+
+  # Override
+  def create_lock_unlock_simulation( self, top ):
+    super().create_lock_unlock_simulation( top )
+
+    scalar_lock_in_simulation = top.lock_in_simulation
+    nlanes = self.nlanes
+
+    def lock_in_simulation():
+      scalar_lock_in_simulation()
+
+      # Replace each distinct value object with its laned version. Signals
+      # in the same net share the same object so we memoize by id.
+      mapping = top._sim.signal_object_mapping
+      laned   = {}
+
+      for obj, (current_obj, i, is_list, value) in mapping.items():
+        if isinstance( value, int ):
+          continue # int constant driven net
+        try:
+          new_value = laned[ id(value) ]
+        except KeyError:
+          try:
+            new_value = laned[ id(value) ] = to_lanes( value, nlanes )
+          except TypeError as e:
+            raise TypeError( f"{e} ({obj!r})" )
+
+        mapping[ obj ] = (current_obj, i, is_list, new_value)
+        if is_list: current_obj[i] = new_value
+        else:       setattr( current_obj, i, new_value )
+
+      # The top-level inport check generated by the scalar version has to
+      # be regenerated with the new objects.
+      inports = []
+      objs    = []
+      for x in top._dsl.all_signals:
+        if x.is_input_value_port() and x.is_top_level_signal() and x.get_host_component() is top:
+          inports.append( x )
+          objs.append( mapping[x][-1] )
+
+      src = """
+def check_top_level_inports():
+  {}
+""".format( "\n  ".join([ f"assert {x} is obj{i}, 'Please use @= to assign top level InPort top.{repr(x)[2:]}'"
+                            for i, x in enumerate(inports) ]) )
+      _locals = {}
+      _globals = { f"obj{i}" : x for i, x in enumerate(objs) }
+      _globals['s'] = top
+      custom_exec( py.code.Source(src).compile(), _globals, _locals)
+      top._sim.check_top_level_inports = _locals['check_top_level_inports']
+
+    top.lock_in_simulation = lock_in_simulation
+
+  #-----------------------------------------------------------------------
+  # wrap_lane_schedule
+  #-----------------------------------------------------------------------
+  # Reuse the schedule but wrap every block with the per-lane fallback.
+
+  def wrap_lane_schedule( self, top ):
+    upblk_reads, upblk_writes, _ = top.get_all_upblk_metadata()
+    genblk_reads, genblk_writes  = top._dag.genblk_reads, top._dag.genblk_writes
+    update_ff = top.get_all_update_ff()
+
+    rebound_globals = {}
+
+    def wrap( blk ):
+      if blk in upblk_reads:
+        reads, writes = upblk_reads[ blk ], upblk_writes[ blk ]
+        blk = self.rebind_lane_helpers( blk, rebound_globals )
+      else:
+        reads, writes = genblk_reads.get( blk, () ), genblk_writes.get( blk, () )
+      return self.gen_lane_block( top, blk, reads, writes, blk in update_ff )
+
+    top._sched.update_schedule = [ wrap(x) for x in top._sched.update_schedule ]
+    top._sched.schedule_ff     = [ wrap(x) for x in top._sched.schedule_ff ]
+
+  @staticmethod
+  def rebind_lane_helpers( blk, cache ):
+    """ Return a copy of blk whose globals map zext/sext/trunc/concat/...
+    to their lane-aware versions. The module globals are left untouched
+    since the same module may also be simulated without lanes. """
+    g = blk.__globals__
+    try:
+      new_g = cache[ id(g) ]
+    except KeyError:
+      names = { k: _lane_helpers_by_id[ id(v) ] for k, v in g.items()
+                if id(v) in _lane_helpers_by_id }
+      if names:
+        new_g = dict(g)
+        new_g.update( names )
+      else:
+        new_g = g
+      cache[ id(g) ] = new_g
+
+    if new_g is g:
+      return blk
+
+    ret = types.FunctionType( blk.__code__, new_g, blk.__name__,
+                              blk.__defaults__, blk.__closure__ )
+    ret.__kwdefaults__ = blk.__kwdefaults__
+    ret.__qualname__   = blk.__qualname__
+    return ret
+
+  @staticmethod
+  def gen_lane_block( top, blk, reads, writes, is_update_ff ):
+
+    def top_level_signals( objs ):
+      ret = set()
+      for x in objs:
+        if isinstance( x, Signal ):
+          ret.add( x.get_top_level_signal() )
+        elif isinstance( x, Interface ):
+          ret |= { y.get_top_level_signal() for y in
+                   x._collect_all_single( lambda y: isinstance( y, Signal ) ) }
+      return ret
+
+    rd_sigs = top_level_signals( reads )
+    wr_sigs = top_level_signals( writes )
+    signals = sorted( rd_sigs | wr_sigs, key=repr )
+
+    # A combinational block that reads a value it also writes cannot be
+    # blindly re-executed after a partial vectorized run, so we save the
+    # written values first. update_ff writes go to _next which is never
+    # read, so they don't need this.
+    mapping  = top._sim.signal_object_mapping
+    rd_objs  = { id(mapping[x][-1]) for x in rd_sigs if x in mapping }
+    rmw_sigs = [ x for x in wr_sigs if x in mapping and id(mapping[x][-1]) in rd_objs ]
+    if is_update_ff:
+      rmw_sigs = []
+
+    nlanes    = top._sim.nlanes
+    fallbacks = top._sim.lane_fallbacks
+    name      = blk.__name__
+
+    def run_per_lane():
+      fallbacks[ name ] += 1
+
+      mapping = top._sim.signal_object_mapping
+      entries = [ mapping[x] for x in signals if x in mapping ]
+      values  = {}
+      for _, _, _, value in entries:
+        if isinstance( value, LaneBits ) or is_bitstruct_inst( value ):
+          values[ id(value) ] = value
+
+      try:
+        for lane in range( nlanes ):
+          scalars = { k: get_lane( v, lane ) for k, v in values.items() }
+          for current_obj, i, is_list, value in entries:
+            if id(value) in scalars:
+              if is_list: current_obj[i] = scalars[ id(value) ]
+              else:       setattr( current_obj, i, scalars[ id(value) ] )
+
+          blk()
+
+          for k, v in values.items():
+            set_lane( v, lane, scalars[k] )
+      finally:
+        for current_obj, i, is_list, value in entries:
+          if is_list: current_obj[i] = value
+          else:       setattr( current_obj, i, value )
+
+    if not rmw_sigs:
+      def lane_block():
+        try:
+          blk()
+        except LaneDivergence:
+          run_per_lane()
+
+    else:
+      def lane_block():
+        mapping = top._sim.signal_object_mapping
+        saved   = [ _save_lanes( mapping[x][-1] ) for x in rmw_sigs ]
+        try:
+          blk()
+        except LaneDivergence:
+          for x in saved:
+            _restore_lanes( x )
+          run_per_lane()
+
+    lane_block.__name__ = name
+    return lane_block
+
+def _save_lanes( value ):
+  ret = []
+  stack = [ value ]
+  while stack:
+    u = stack.pop()
+    if isinstance( u, LaneBits ):
+      ret.append( (u, u._lanes.copy()) )
+    elif isinstance( u, list ):
+      stack.extend( u )
+    elif is_bitstruct_inst( u ):
+      stack.extend( getattr( u, name ) for name in type(u).__bitstruct_fields__ )
+  return ret
+
+def _restore_lanes( saved ):
+  for u, lanes in saved:
+    u._lanes[:] = lanes
@@ -0,0 +1,566 @@
+"""
+========================================================================
+LaneBits.py
+========================================================================
+A NumPy-backed fixed-bitwidth data type that holds one value per
+simulation lane. BatchSimPass swaps every Bits object of an elaborated
+model with a LaneBits object so that one execution of an update block
+advances all lanes at once.
+
+Operations that stay element-wise (arithmetics, logic ops, slicing,
+@=, <<=) are vectorized. Any operation that needs a single Python value
+(__bool__, __int__, __index__, uint(), ...) succeeds only if all lanes
+hold the same value, otherwise it raises LaneDivergence. BatchSimPass
+catches it and re-executes the update block lane by lane.
+
+Date   : Oct 18, 2026
+"""
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+from pymtl3.datatypes import Bits, is_bitstruct_inst, mk_bits
+from pymtl3.datatypes import helpers as _helpers
+
+# Signals up to 64 bits are backed by uint64 arrays. Wider signals fall
+# back to object arrays of Python integers which numpy still handles
+# element-wise.
+
+def _mask( nbits ):
+  return (1 << nbits) - 1
+
+def _dtype( nbits ):
+  return np.uint64 if nbits <= 64 else object
+
+def _cast( lanes, nbits ):
+  """ Convert an array of lane values to the storage dtype of nbits. The
+  values must already fit in nbits. """
+  dtype = _dtype( nbits )
+  if lanes.dtype == dtype:
+    return lanes
+  return lanes.astype( dtype )
+
+class LaneDivergence( Exception ):
+  """ Raised when a single value is required but lanes disagree """
+
+class LaneBits:
+  __slots__ = ( "_nbits", "_lanes", "_next" )
+
+  def __init__( self, nbits, nlanes, v=0 ):
+    nbits = int(nbits)
+    if nbits < 1:
+      raise ValueError( f"Only support nbits >= 1, not {nbits}" )
+    self._nbits = nbits
+    self._lanes = np.zeros( nlanes, dtype=_dtype(nbits) )
+    self._lanes[:] = self._operand( v, "construct" )
+    self._next  = self._lanes.copy()
+
+  @classmethod
+  def _from_lanes( cls, nbits, lanes ):
+    ret = object.__new__( cls )
+    ret._nbits = nbits
+    ret._lanes = lanes
+    ret._next  = None
+    return ret
+
+  @property
+  def nbits( self ):
+    return self._nbits
+
+  @property
+  def nlanes( self ):
+    return len(self._lanes)
+
+  # Lane accessors
+
+  def lane( self, i ):
+    return mk_bits( self._nbits )( int(self._lanes[i]) )
+
+  def lanes( self ):
+    return self._lanes.copy()
+
+  def _get_lane( self, i ):
+    return int(self._lanes[i])
+
+  def _get_next_lane( self, i ):
+    return int(self._next[i])
+
+  def _set_lane( self, i, cur, nxt ):
+    self._lanes[i] = cur
+    self._next [i] = nxt
+
+  # Operand normalization. Returns either an array with the same storage
+  # dtype or a Python/numpy scalar that broadcasts.
+
+  def _operand( self, other, op ):
+    nbits = self._nbits
+
+    if isinstance( other, LaneBits ):
+      if other._nbits != nbits:
+        raise ValueError( f"Operands of '{op}' operation must have matching bitwidth, "\
+                          f"but here LaneBits{nbits} != LaneBits{other._nbits}.\n" )
+      if len(other._lanes) != len(self._lanes):
+        raise ValueError( f"Operands of '{op}' operation must have the same number of lanes, "\
+                          f"but here {len(self._lanes)} != {len(other._lanes)}.\n" )
+      return other._lanes
+
+    if isinstance( other, (list, tuple, np.ndarray) ):
+      if len(other) != len(self._lanes):
+        raise ValueError( f"Expect {len(self._lanes)} per-lane values for '{op}', got {len(other)}" )
+      up = _mask( nbits )
+      ret = np.empty( len(other), dtype=_dtype(nbits) )
+      for i, x in enumerate( other ):
+        x = int(x)
+        if x < -(1 << (nbits-1)) or x > up:
+          raise ValueError( f"Value {hex(x)} of lane {i} is too wide for LaneBits{nbits}!" )
+        ret[i] = x & up
+      return ret
+
+    try:
+      # Bits/Bitstruct
+      if other.nbits != nbits:
+        raise ValueError( f"Operands of '{op}' operation must have matching bitwidth, "\
+                          f"but here LaneBits{nbits} != Bits{other.nbits}.\n" )
+      v = int(other.to_bits())
+    except AttributeError:
+      v = int(other)
+      up = _mask( nbits )
+      lo = -(1 << (nbits-1)) if op in ("@=", "<<=", "construct") else 0
+      if v < lo or v > up:
+        raise ValueError( f"Integer {hex(v)} is not a valid '{op}' operand with LaneBits{nbits}!\n"
+                          f"Suggestion: {hex(lo)} <= x <= {hex(up)}" )
+      v &= up
+
+    return np.uint64(v) if nbits <= 64 else v
+
+  def _new( self, nbits, lanes ):
+    return LaneBits._from_lanes( nbits, lanes )
+
+  def _uniform( self ):
+    lanes = self._lanes
+    v = lanes[0]
+    if len(lanes) > 1 and not (lanes == v).all():
+      raise LaneDivergence( f"LaneBits{self._nbits} has different values across lanes" )
+    return int(v)
+
+  # PyMTL simulation specific
+
+  def __ilshift__( self, v ):
+    self._next[:] = self._operand( v, "<<=" )
+    return self
+
+  def _flip( self ):
+    np.copyto( self._lanes, self._next )
+
+  def clone( self ):
+    return self._new( self._nbits, self._lanes.copy() )
+
+  def __deepcopy__( self, memo ):
+    return self.clone()
+
+  def __imatmul__( self, v ):
+    self._lanes[:] = self._operand( v, "@=" )
+    return self
+
+  def to_bits( self ):
+    return self
+
+  # Arithmetics
+
+  def _slice_bounds( self, idx ):
+    if idx.step:
+      raise IndexError( "Index cannot contain step" )
+    try:
+      start, stop = int(idx.start or 0), int(idx.stop or self._nbits)
+      assert 0 <= start < stop <= self._nbits
+    except LaneDivergence:
+      raise
+    except:
+      raise IndexError( f"Invalid access: [{idx.start}:{idx.stop}] in a LaneBits{self._nbits} instance" )
+    return start, stop
+
+  def _bit_index( self, idx ):
+    # A per-lane index selects a different bit in every lane
+    if isinstance( idx, LaneBits ):
+      i = idx._lanes
+      if (i >= self._nbits).any():
+        raise IndexError( f"Invalid access: [{idx}] in a LaneBits{self._nbits} instance" )
+      return _cast( i, self._nbits )
+    i = int(idx)
+    if i >= self._nbits or i < 0:
+      raise IndexError( f"Invalid access: [{i}] in a LaneBits{self._nbits} instance" )
+    return np.uint64(i) if self._nbits <= 64 else i
+
+  def __getitem__( self, idx ):
+    lanes = self._lanes
+    if isinstance( idx, slice ):
+      start, stop = self._slice_bounds( idx )
+      nbits = stop - start
+      if self._nbits <= 64:
+        return self._new( nbits, (lanes >> np.uint64(start)) & np.uint64(_mask(nbits)) )
+      return self._new( nbits, _cast( (lanes >> start) & _mask(nbits), nbits ) )
+
+    i = self._bit_index( idx )
+    one = np.uint64(1) if self._nbits <= 64 else 1
+    return self._new( 1, _cast( (lanes >> i) & one, 1 ) )
+
+  def __setitem__( self, idx, v ):
+    lanes = self._lanes
+    wide  = self._nbits > 64
+
+    if isinstance( idx, slice ):
+      start, stop = self._slice_bounds( idx )
+      slice_nbits = stop - start
+      clear = _mask( self._nbits ) ^ (_mask( stop ) ^ _mask( start ))
+
+      if isinstance( v, LaneBits ):
+        if v._nbits != slice_nbits:
+          raise ValueError( f"Cannot fit a LaneBits{v._nbits} object into a {slice_nbits}-bit slice [{start}:{stop}]" )
+        val = v._lanes
+      else:
+        val = LaneBits._from_lanes( slice_nbits, lanes )._operand( v, "@=" )
+
+      if wide:
+        val = _cast( val, self._nbits ) if isinstance( val, np.ndarray ) else int(val)
+        lanes[:] = (lanes & clear) | (val << start)
+      else:
+        lanes[:] = (lanes & np.uint64(clear)) | (val << np.uint64(start))
+      return
+
+    i = self._bit_index( idx )
+
+    if isinstance( v, LaneBits ):
+      if v._nbits > 1:
+        raise ValueError( f"Cannot fit a LaneBits{v._nbits} object into the 1-bit slice" )
+      val = _cast( v._lanes, self._nbits )
+    else:
+      val = LaneBits._from_lanes( 1, lanes )._operand( v, "@=" )
+      if wide:
+        val = _cast( val, self._nbits ) if isinstance( val, np.ndarray ) else int(val)
+
+    if wide:
+      lanes[:] = (lanes & ~(1 << i)) | (val << i)
+    else:
+      one = np.uint64(1)
+      lanes[:] = (lanes & ~(one << i)) | (val << i)
+
+  def _binop( self, other, op, fn ):
+    nbits = self._nbits
+    b = self._operand( other, op )
+    if nbits <= 64:
+      return self._new( nbits, fn( self._lanes, b ) & np.uint64(_mask(nbits)) )
+    return self._new( nbits, fn( self._lanes, b ) & _mask(nbits) )
+
+  def __add__( self, other ):
+    return self._binop( other, "+", np.add )
+
+  def __radd__( self, other ):
+    return self.__add__( other )
+
+  def __sub__( self, other ):
+    return self._binop( other, "-", np.subtract )
+
+  def __rsub__( self, other ):
+    return self._binop( other, "-", lambda a, b: b - a )
+
+  def __mul__( self, other ):
+    return self._binop( other, "*", np.multiply )
+
+  def __rmul__( self, other ):
+    return self.__mul__( other )
+
+  def __and__( self, other ):
+    return self._binop( other, "&", np.bitwise_and )
+
+  def __rand__( self, other ):
+    return self.__and__( other )
+
+  def __or__( self, other ):
+    return self._binop( other, "|", np.bitwise_or )
+
+  def __ror__( self, other ):
+    return self.__or__( other )
+
+  def __xor__( self, other ):
+    return self._binop( other, "^", np.bitwise_xor )
+
+  def __rxor__( self, other ):
+    return self.__xor__( other )
+
+  def _divop( self, other, op, fn ):
+    b = self._operand( other, op )
+    if (np.asarray(b) == 0).any():
+      raise ZeroDivisionError( f"LaneBits{self._nbits} '{op}' by zero" )
+    return self._binop( other, op, fn )
+
+  def __floordiv__( self, other ):
+    return self._divop( other, "//", np.floor_divide )
+
+  def __rfloordiv__( self, other ):
+    if (self._lanes == 0).any():
+      raise ZeroDivisionError( f"LaneBits{self._nbits} '//' by zero" )
+    return self._binop( other, "//", lambda a, b: b // a )
+
+  def __mod__( self, other ):
+    return self._divop( other, "%", np.remainder )
+
+  def __rmod__( self, other ):
+    if (self._lanes == 0).any():
+      raise ZeroDivisionError( f"LaneBits{self._nbits} '%' by zero" )
+    return self._binop( other, "%", lambda a, b: b % a )
+
+  def __invert__( self ):
+    nbits = self._nbits
+    if nbits <= 64:
+      return self._new( nbits, ~self._lanes & np.uint64(_mask(nbits)) )
+    return self._new( nbits, ~self._lanes & _mask(nbits) )
+
+  # Shift amounts that are not smaller than nbits produce zero. We clamp
+  # the shift amount before shifting because shifting an uint64 by 64 or
+  # more is undefined, and shifting a Python int by a huge amount is slow.
+
+  def _shift_amount( self, other, op ):
+    nbits = self._nbits
+    b = self._operand( other, op )
+    if isinstance( b, np.ndarray ):
+      return b, np.minimum( b, nbits-1 )
+    b = int(b)
+    clamp = min( b, nbits-1 )
+    return b, (np.uint64(clamp) if nbits <= 64 else clamp)
+
+  def __lshift__( self, other ):
+    nbits = self._nbits
+    b, clamp = self._shift_amount( other, "<<" )
+    mask = np.uint64(_mask(nbits)) if nbits <= 64 else _mask(nbits)
+    ret  = np.where( b >= nbits, 0, (self._lanes << clamp) & mask )
+    return self._new( nbits, _cast( ret, nbits ) )
+
+  def __rshift__( self, other ):
+    nbits = self._nbits
+    b, clamp = self._shift_amount( other, ">>" )
+    ret = np.where( b >= nbits, 0, self._lanes >> clamp )
+    return self._new( nbits, _cast( ret, nbits ) )
+
+  def _cmpop( self, other, op, fn ):
+    b = self._operand( other, op )
+    return self._new( 1, np.asarray( fn( self._lanes, b ) ).astype( np.uint64 ) )
+
+  def __eq__( self, other ):
+    try:
+      return self._cmpop( other, "==", np.equal )
+    except (TypeError, ValueError):
+      if isinstance( other, (int, Bits, LaneBits) ) or is_bitstruct_inst( other ):
+        raise
+      return self._new( 1, np.zeros( len(self._lanes), dtype=np.uint64 ) )
+
+  def __ne__( self, other ):
+    try:
+      return self._cmpop( other, "!=", np.not_equal )
+    except (TypeError, ValueError):
+      if isinstance( other, (int, Bits, LaneBits) ) or is_bitstruct_inst( other ):
+        raise
+      return self._new( 1, np.ones( len(self._lanes), dtype=np.uint64 ) )
+
+  def __lt__( self, other ):
+    return self._cmpop( other, "<", np.less )
+
+  def __le__( self, other ):
+    return self._cmpop( other, "<=", np.less_equal )
+
+  def __gt__( self, other ):
+    return self._cmpop( other, ">", np.greater )
+
+  def __ge__( self, other ):
+    return self._cmpop( other, ">=", np.greater_equal )
+
+  # Scalar conversions are only valid when all lanes agree
+
+  def __bool__( self ):
+    return self._uniform() != 0
+
+  def __int__( self ):
+    return self._uniform()
+
+  def __index__( self ):
+    return self._uniform()
+
+  def uint( self ):
+    return self._uniform()
+
+  def int( self ):
+    v = self._uniform()
+    if v >> (self._nbits - 1):
+      return v - (1 << self._nbits)
+    return v
+
+  def __hash__( self ):
+    return hash((self._nbits, self._uniform()))
+
+  # Print
+
+  def __repr__( self ):
+    return "LaneBits{}([{}])".format( self._nbits, ", ".join( [ "0x"+self._fmt(x) for x in self._lanes ] ) )
+
+  def __str__( self ):
+    return "|".join( [ self._fmt(x) for x in self._lanes ] )
+
+  def _fmt( self, x ):
+    return "{:x}".format(int(x)).zfill(((self._nbits-1)//4)+1)
+
+#-------------------------------------------------------------------------
+# Lane-aware helpers
+#-------------------------------------------------------------------------
+# BatchSimPass rebinds the Bits helpers in the globals of each update
+# block to these versions. They fall back to the original helpers when
+# none of the arguments is a LaneBits.
+
+def _nbits_of( new_width ):
+  return new_width if isinstance( new_width, int ) else new_width.nbits
+
+def lane_zext( value, new_width ):
+  if not isinstance( value, LaneBits ):
+    return _helpers.zext( value, new_width )
+  nbits = _nbits_of( new_width )
+  assert nbits >= value._nbits
+  return LaneBits._from_lanes( nbits, _cast( value._lanes, nbits ) )
+
+def lane_trunc( value, new_width ):
+  if not isinstance( value, LaneBits ):
+    return _helpers.trunc( value, new_width )
+  nbits = _nbits_of( new_width )
+  assert nbits <= value._nbits
+  if value._nbits <= 64:
+    return LaneBits._from_lanes( nbits, value._lanes & np.uint64(_mask(nbits)) )
+  return LaneBits._from_lanes( nbits, _cast( value._lanes & _mask(nbits), nbits ) )
+
+def lane_sext( value, new_width ):
+  if not isinstance( value, LaneBits ):
+    return _helpers.sext( value, new_width )
+  nbits = _nbits_of( new_width )
+  assert nbits >= value._nbits
+  old = value._nbits
+  ext = _mask( nbits ) ^ _mask( old )
+  lanes = _cast( value._lanes, nbits )
+  if nbits <= 64:
+    sign = (lanes >> np.uint64(old-1)) & np.uint64(1)
+    return LaneBits._from_lanes( nbits, lanes | (sign * np.uint64(ext)) )
+  sign = (lanes >> (old-1)) & 1
+  return LaneBits._from_lanes( nbits, lanes | (sign * ext) )
+
+def lane_concat( *args ):
+  if not any( isinstance( x, LaneBits ) for x in args ):
+    return _helpers.concat( *args )
+
+  nlanes = next( len(x._lanes) for x in args if isinstance( x, LaneBits ) )
+  nbits  = sum( x.nbits for x in args )
+  dtype  = _dtype( nbits )
+
+  value = None
+  for x in args:
+    if isinstance( x, LaneBits ):
+      lanes = x._lanes.astype( dtype )
+    else:
+      lanes = np.full( nlanes, x.uint() if dtype is object else np.uint64(x.uint()), dtype=dtype )
+    if value is None:
+      value = lanes
+    elif dtype is object:
+      value = (value << x.nbits) | lanes
+    else:
+      value = (value << np.uint64(x.nbits)) | lanes
+
+  return LaneBits._from_lanes( nbits, value )
+
+def lane_reduce_and( value ):
+  if not isinstance( value, LaneBits ):
+    return _helpers.reduce_and( value )
+  mask = np.uint64(_mask(value._nbits)) if value._nbits <= 64 else _mask(value._nbits)
+  return LaneBits._from_lanes( 1, (value._lanes == mask).astype( np.uint64 ) )
+
+def lane_reduce_or( value ):
+  if not isinstance( value, LaneBits ):
+    return _helpers.reduce_or( value )
+  return LaneBits._from_lanes( 1, (value._lanes != 0).astype( np.uint64 ) )
+
+def lane_reduce_xor( value ):
+  if not isinstance( value, LaneBits ):
+    return _helpers.reduce_xor( value )
+  if value._nbits <= 64:
+    x = value._lanes.copy()
+    for sh in (32, 16, 8, 4, 2, 1):
+      x ^= x >> np.uint64(sh)
+    return LaneBits._from_lanes( 1, x & np.uint64(1) )
+  return LaneBits._from_lanes( 1, np.array( [ bin(x).count("1") & 1 for x in value._lanes ],
+                                            dtype=np.uint64 ) )
+
+lane_helpers = {
+  _helpers.zext       : lane_zext,
+  _helpers.trunc      : lane_trunc,
+  _helpers.sext       : lane_sext,
+  _helpers.concat     : lane_concat,
+  _helpers.reduce_and : lane_reduce_and,
+  _helpers.reduce_or  : lane_reduce_or,
+  _helpers.reduce_xor : lane_reduce_xor,
+}
+
+#-------------------------------------------------------------------------
+# Conversions between scalar and laned values
+#-------------------------------------------------------------------------
+# A laned bitstruct is an ordinary bitstruct instance whose leaf fields
+# are LaneBits objects, so the generated @=/<<=/_flip of the bitstruct
+# class keeps working.
+
+def to_lanes( value, nlanes ):
+  if isinstance( value, Bits ):
+    ret = LaneBits( value.nbits, nlanes, value )
+    try:
+      ret._next[:] = value._next
+    except AttributeError:
+      pass
+    return ret
+
+  if is_bitstruct_inst( value ):
+    ret = object.__new__( type(value) )
+    for name in type(value).__bitstruct_fields__:
+      setattr( ret, name, _list_map( getattr( value, name ), lambda x: to_lanes( x, nlanes ) ) )
+    return ret
+
+  raise TypeError( f"BatchSimPass only supports Bits and bitstruct signals, not {type(value).__name__}" )
+
+def get_lane( value, i ):
+  """ Return a scalar copy of lane i, including the value to be flipped in
+  at the next clock edge. """
+  if isinstance( value, LaneBits ):
+    ret = mk_bits( value._nbits )( value._get_lane(i) )
+    ret <<= value._get_next_lane(i)
+    return ret
+
+  if is_bitstruct_inst( value ):
+    # Don't go through __init__ which would convert LaneBits to Bits
+    ret = object.__new__( type(value) )
+    for name in type(value).__bitstruct_fields__:
+      setattr( ret, name, _list_map( getattr( value, name ), lambda x: get_lane( x, i ) ) )
+    return ret
+
+  return value
+
+def set_lane( value, i, scalar ):
+  """ Write the scalar copy of lane i produced by get_lane back. """
+  if isinstance( value, LaneBits ):
+    value._set_lane( i, int(scalar), scalar._next )
+
+  elif is_bitstruct_inst( value ):
+    for name in type(value).__bitstruct_fields__:
+      _list_zip( getattr( value, name ), getattr( scalar, name ), lambda x, y: set_lane( x, i, y ) )
+
+def _list_map( x, fn ):
+  if isinstance( x, list ):
+    return [ _list_map( y, fn ) for y in x ]
+  return fn( x )
+
+def _list_zip( x, y, fn ):
+  if isinstance( x, list ):
+    for a, b in zip( x, y ):
+      _list_zip( a, b, fn )
+  else:
+    fn( x, y )
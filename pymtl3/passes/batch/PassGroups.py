@@ -0,0 +1,18 @@
+from ..BasePass import BasePass
+from ..sim.GenDAGPass import GenDAGPass
+from ..sim.SimpleSchedulePass import SimpleSchedulePass
+from .BatchSimPass import BatchSimPass
+
+
+# BatchSim elaborates and schedules a pure RTL design once and simulates
+# nlanes independent stimulus sets at the same time. The update blocks
+# have to form a DAG, same as SimpleSimPass.
+class BatchSim( BasePass ):
+  def __init__( s, nlanes, *, reset_active_high=True ):
+    s.nlanes = nlanes
+    s.reset_active_high = reset_active_high
+
+  def __call__( s, top ):
+    GenDAGPass()( top )
+    SimpleSchedulePass()( top )
+    BatchSimPass( s.nlanes, reset_active_high=s.reset_active_high )( top )
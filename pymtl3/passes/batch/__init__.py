@@ -0,0 +1,2 @@
+from .LaneBits import LaneBits, LaneDivergence
+from .PassGroups import BatchSim
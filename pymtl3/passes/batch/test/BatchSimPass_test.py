@@ -0,0 +1,239 @@
+#=========================================================================
+# BatchSimPass_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import random
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.datatypes import mk_bits
+from pymtl3.passes.errors import ModelTypeError
+from pymtl3.stdlib.queues import NormalQueueRTL
+
+pytest.importorskip( "numpy" )
+
+from ..LaneBits import LaneBits, LaneDivergence
+from ..PassGroups import BatchSim
+
+
+def _run_lanes_vs_scalar( cls, nlanes, stimulus, outputs, ncycles=40, seed=0xdeadbeef ):
+  """ Simulate the same stimulus with one BatchSim model and nlanes
+  separately simulated DefaultPassGroup models, and compare outputs. """
+  rng = random.Random( seed )
+
+  batch = cls()
+  batch.elaborate()
+  batch.apply( BatchSim( nlanes ) )
+  batch.sim_reset()
+
+  refs = []
+  for i in range(nlanes):
+    ref = cls()
+    ref.elaborate()
+    ref.apply( DefaultPassGroup() )
+    ref.sim_reset()
+    refs.append( ref )
+
+  for _ in range(ncycles):
+    values = { name: [ gen(rng) for _ in range(nlanes) ] for name, gen in stimulus.items() }
+
+    for name, vs in values.items():
+      port = getattr( batch, name )
+      port @= vs
+      for ref, v in zip( refs, vs ):
+        port = getattr( ref, name )
+        port @= v
+
+    batch.sim_tick()
+    for ref in refs:
+      ref.sim_tick()
+
+    for name in outputs:
+      assert [ int(x) for x in getattr( batch, name ).lanes() ] == \
+             [ int(getattr( ref, name )) for ref in refs ]
+
+  return batch
+
+def test_lanebits_ops():
+  rng = random.Random( 0xabcd )
+  for nbits in [ 1, 7, 32, 64, 100 ]:
+    B = mk_bits( nbits )
+    xs = [ rng.randrange( 1 << nbits ) for _ in range(8) ]
+    ys = [ rng.randrange( 1 << nbits ) for _ in range(8) ]
+    a = LaneBits( nbits, 8, xs )
+    b = LaneBits( nbits, 8, ys )
+
+    for op in [ lambda x, y: x + y, lambda x, y: x - y, lambda x, y: x * y,
+                lambda x, y: x & y, lambda x, y: x | y, lambda x, y: x ^ y,
+                lambda x, y: x << y, lambda x, y: x >> y,
+                lambda x, y: x == y, lambda x, y: x < y, lambda x, y: x >= y ]:
+      ref = [ op( B(x), B(y) ) for x, y in zip( xs, ys ) ]
+      assert [ int(v) for v in op( a, b ).lanes() ] == [ int(v) for v in ref ]
+
+    assert [ int(v) for v in (~a).lanes() ] == [ int(~B(x)) for x in xs ]
+    assert [ int(v) for v in a[0:1].lanes() ] == [ int(B(x)[0:1]) for x in xs ]
+
+    c = a.clone()
+    c[nbits-1] = 1
+    assert [ int(v) for v in c.lanes() ] == [ x | (1 << (nbits-1)) for x in xs ]
+
+def test_lanebits_divergence():
+  a = LaneBits( 8, 4, [ 1, 1, 1, 1 ] )
+  assert a == 1
+  assert int(a) == 1
+
+  a @= [ 1, 2, 3, 4 ]
+  with pytest.raises( LaneDivergence ):
+    bool( a )
+  with pytest.raises( LaneDivergence ):
+    int( a )
+
+def test_comb_and_ff():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( 8 )
+      s.sel = InPort()
+      s.out = OutPort( 16 )
+      s.tmp = Wire( 16 )
+      s.acc = Wire( 16 )
+
+      @update
+      def up_comb():
+        if s.sel:
+          s.tmp @= zext( s.in_, 16 ) + 3
+        else:
+          s.tmp @= concat( s.in_, s.in_ )
+
+      @update_ff
+      def up_ff():
+        if s.reset:
+          s.acc <<= 0
+        else:
+          s.acc <<= s.acc + s.tmp
+
+      s.out //= s.acc
+
+  batch = _run_lanes_vs_scalar( Top, 6,
+            { 'in_': lambda rng: rng.randrange(256), 'sel': lambda rng: rng.randrange(2) },
+            [ 'out' ] )
+  assert batch.sim_lane_fallbacks()[ 'up_comb' ] > 0
+  assert 'up_ff' not in batch.sim_lane_fallbacks()
+
+def test_read_modify_write_fallback():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( 8 )
+      s.out = OutPort( 8 )
+
+      @update
+      def up():
+        s.out @= s.in_
+        if s.out[0]:
+          s.out @= s.out + 1
+
+  _run_lanes_vs_scalar( Top, 5, { 'in_': lambda rng: rng.randrange(255) }, [ 'out' ] )
+
+def test_wide_signals():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( 100 )
+      s.out = OutPort( 100 )
+
+      @update
+      def up():
+        s.out @= (s.in_ << 3) ^ s.in_[0:100]
+
+  _run_lanes_vs_scalar( Top, 4, { 'in_': lambda rng: rng.randrange(1 << 100) }, [ 'out' ] )
+
+def test_normal_queue():
+
+  @bitstruct
+  class Msg:
+    x : Bits8
+    y : [ Bits4, Bits4 ]
+
+  nlanes = 5
+
+  batch = NormalQueueRTL( Msg, 2 )
+  batch.elaborate()
+  batch.apply( BatchSim( nlanes ) )
+  batch.sim_reset()
+
+  refs = []
+  for i in range(nlanes):
+    ref = NormalQueueRTL( Msg, 2 )
+    ref.elaborate()
+    ref.apply( DefaultPassGroup() )
+    ref.sim_reset()
+    refs.append( ref )
+
+  rng = random.Random( 0x1234 )
+  for _ in range(50):
+    enq_en = [ rng.randrange(2) for _ in range(nlanes) ]
+    deq_en = [ rng.randrange(2) for _ in range(nlanes) ]
+    msg_x  = [ rng.randrange(256) for _ in range(nlanes) ]
+
+    batch.enq.en  @= [ x & int(batch.enq.rdy.lane(i)) for i, x in enumerate(enq_en) ]
+    batch.enq.msg.x @= msg_x
+    batch.deq.en  @= [ x & int(batch.deq.rdy.lane(i)) for i, x in enumerate(deq_en) ]
+    batch.sim_eval_combinational()
+
+    for i, ref in enumerate( refs ):
+      ref.enq.en @= enq_en[i] & int(ref.enq.rdy)
+      ref.enq.msg.x @= msg_x[i]
+      ref.deq.en @= deq_en[i] & int(ref.deq.rdy)
+      ref.sim_eval_combinational()
+
+    assert [ int(x) for x in batch.deq.ret.x.lanes() ] == [ int(ref.deq.ret.x) for ref in refs ]
+
+    batch.sim_tick()
+    for ref in refs:
+      ref.sim_tick()
+
+    assert [ int(x) for x in batch.count.lanes() ] == [ int(ref.count) for ref in refs ]
+
+def test_reject_method_ports():
+
+  class Top( Component ):
+    def construct( s ):
+      s.x = Wire( 8 )
+
+    @method_port
+    def foo( s ):
+      pass
+
+  a = Top()
+  a.elaborate()
+  with pytest.raises( ModelTypeError ):
+    a.apply( BatchSim( 4 ) )
+
+def test_design_errors_are_not_hidden():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( 8 )
+      s.out = OutPort( 8 )
+
+      @update
+      def up():
+        if s.in_ == 0xff:
+          s.out @= zext( s.in_, 16 )
+        else:
+          s.out @= s.in_ + 1
+
+  a = Top()
+  a.elaborate()
+  a.apply( BatchSim( 4 ) )
+  a.sim_reset()
+
+  # Only LaneDivergence falls back to per-lane execution
+  a.in_ @= [ 0xff ] * 4
+  with pytest.raises( ValueError ):
+    a.sim_eval_combinational()
+  assert 'up' not in a.sim_lane_fallbacks()
@@ -0,0 +1,324 @@
+"""
+========================================================================
+FlattenSimPass.py
+========================================================================
+Generate tick functions that splice the bodies of update blocks and net
+blocks into a single Python function in schedule order, instead of
+calling each block. This removes a Python call frame and the closure
+lookups of every block from each cycle.
+
+While inlining we
+- rename the local variables of each block apart so that blocks don't
+  interfere with each other,
+- bind the free variables of each block (closure cells and globals, which
+  PyMTL already treats as fixed after elaboration) to globals of the
+  generated function,
+- hoist attribute chains like s.x.y.z that resolve to components,
+  interfaces, lists, or the value objects of signals into globals of the
+  generated function. This is safe because after lock_in_simulation
+  every signal is a fixed value object that is only updated in place,
+- fold the writer of constant nets, and drop net blocks that are empty
+  because the whole net shares a single value object.
+
+Blocks that cannot be inlined safely (e.g. lambdas, SCC wrappers,
+greenlets, or blocks that return, declare nonlocal/global variables,
+define functions, or rebind attributes with =) are called as usual.
+
+Date   : Oct 18, 2026
+"""
+import ast
+import builtins
+import copy
+from linecache import cache as line_cache
+
+from pymtl3.dsl.NamedObject import NamedObject
+from pymtl3.extra.pypy import custom_exec
+
+from .UnrollSimPass import UnrollSimPass
+
+_Index = getattr( ast, "Index", None )
+
+# Nodes that make inlining a function body unsafe
+_forbidden_nodes = ( ast.Return, ast.Yield, ast.YieldFrom, ast.Global, ast.Nonlocal,
+                     ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef,
+                     ast.Await )
+
+class _NotInlinable( Exception ):
+  pass
+
+def _const_index( node ):
+  # Return the integer index of a subscript if it is a constant, or None
+  idx = node.slice
+  if _Index is not None and isinstance( idx, _Index ):
+    idx = idx.value
+  if isinstance( idx, ast.Constant ) and type(idx.value) is int:
+    return idx.value
+  if isinstance( idx, getattr( ast, "Num", () ) ) and type(idx.n) is int:
+    return idx.n
+  return None
+
+class _BlockInliner( ast.NodeTransformer ):
+  """ Rewrite the body of a block for the flattened function. """
+
+  def __init__( s, flattener, prefix, local_names, free_values ):
+    s.flattener   = flattener
+    s.prefix      = prefix
+    s.local_names = local_names
+    s.free_values = free_values
+    s.augassign_target = None
+
+  def resolve( s, name ):
+    try:
+      return s.free_values[ name ]
+    except KeyError:
+      raise _NotInlinable( f"cannot resolve free variable {name}" )
+
+  def visit_Name( s, node ):
+    if node.id in s.local_names:
+      return ast.copy_location( ast.Name( id=s.prefix + node.id, ctx=node.ctx ), node )
+
+    if node.id not in s.free_values and hasattr( builtins, node.id ):
+      return node
+
+    name = s.flattener.bind( s.resolve( node.id ) )
+    return ast.copy_location( ast.Name( id=name, ctx=node.ctx ), node )
+
+  def _visit_chain( s, node ):
+    # s.x.y[0].z: find the longest prefix that resolves to a hoistable
+    # object and replace it with a global
+    steps = []
+    cur   = node
+    while isinstance( cur, (ast.Attribute, ast.Subscript) ):
+      steps.append( cur )
+      cur = cur.value
+
+    # The indices in the chain are visited normally
+    for st in steps:
+      if isinstance( st, ast.Subscript ):
+        st.slice = s.visit( st.slice )
+
+    if not isinstance( cur, ast.Name ) or cur.id in s.local_names or \
+       ( cur.id not in s.free_values and hasattr( builtins, cur.id ) ):
+      steps[-1].value = s.visit( cur )
+      return node
+
+    obj   = s.resolve( cur.id )
+    best  = (0, obj) if s.flattener.is_hoistable( obj ) else None
+    steps = steps[::-1]
+
+    for k, st in enumerate( steps ):
+      try:
+        if isinstance( st, ast.Attribute ):
+          obj = getattr( obj, st.attr )
+        else:
+          idx = _const_index( st )
+          if idx is None:
+            break
+          obj = obj[ idx ]
+      except Exception:
+        break
+      if s.flattener.is_hoistable( obj ):
+        best = (k+1, obj)
+
+    if best is None:
+      steps[0].value = s.visit( cur )
+      return node
+
+    depth, obj = best
+
+    # Only the target of @=/<<= can be fully replaced because they update
+    # the signal in place and return it. Other stores, e.g. s.x[0] = ...,
+    # must keep the last step
+    if depth == len(steps) and isinstance( node.ctx, ast.Store ) and \
+       node is not s.augassign_target:
+      depth, obj = depth - 1, None
+
+    if obj is None:
+      obj = s.resolve( cur.id )
+      for st in steps[:depth]:
+        obj = getattr( obj, st.attr ) if isinstance( st, ast.Attribute ) else obj[ _const_index( st ) ]
+
+    name = s.flattener.bind( obj )
+
+    if depth == len(steps):
+      if isinstance( node.ctx, ast.Store ):
+        s.flattener.stored_globals.add( name )
+      return ast.copy_location( ast.Name( id=name, ctx=node.ctx ), node )
+
+    steps[ depth ].value = ast.copy_location( ast.Name( id=name, ctx=ast.Load() ), steps[ depth ] )
+    return node
+
+  def visit_AugAssign( s, node ):
+    s.augassign_target = node.target
+    node.target = s.visit( node.target )
+    s.augassign_target = None
+    node.value = s.visit( node.value )
+    return node
+
+  def visit_Attribute( s, node ):
+    return s._visit_chain( node )
+
+  def visit_Subscript( s, node ):
+    return s._visit_chain( node )
+
+class _Flattener:
+
+  def __init__( s, top ):
+    s.top = top
+    s.namespace = {}
+    s.bound = {} # id(obj) -> name in namespace
+    s.stored_globals = set()
+    s.signal_values = { id(v[-1]) for v in top._sim.signal_object_mapping.values() }
+    s.upblks = top.get_all_update_blocks()
+    s.genblk_src = getattr( top._dag, "genblk_src", {} )
+    s.nblocks = 0
+
+  def bind( s, obj ):
+    try:
+      return s.bound[ id(obj) ]
+    except KeyError:
+      name = f"_h{len(s.bound)}"
+      s.bound[ id(obj) ] = name
+      s.namespace[ name ] = obj
+      return name
+
+  def is_hoistable( s, obj ):
+    # Lists are only hoisted if they hold components/signals, since their
+    # identity is fixed after elaboration
+    if isinstance( obj, list ):
+      return len(obj) > 0 and s.is_hoistable( obj[0] )
+    return isinstance( obj, NamedObject ) or id(obj) in s.signal_values
+
+  def get_block_ast( s, blk ):
+    # Return (FunctionDef, free variable values) or None
+    if blk in s.genblk_src:
+      src, _globals, const = s.genblk_src[ blk ]
+      func = ast.parse( src ).body[0]
+      free_values = dict( _globals )
+      if const is not None:
+        # Constant net: x = <const> is folded into the constant object
+        func.body[0].value = ast.Name( id="__const__", ctx=ast.Load() )
+        free_values[ "__const__" ] = const
+      return func, free_values
+
+    if blk not in s.upblks:
+      return None
+
+    host = s.top.get_update_block_host_component( blk )
+    info = host.get_update_block_info( blk )
+    if info is None or info[0]: # lambda
+      return None
+
+    module = info[-1]
+    if len(module.body) != 1 or not isinstance( module.body[0], ast.FunctionDef ) or \
+       module.body[0].name != blk.__name__:
+      return None
+
+    code = blk.__code__
+    free_values = dict( builtins.__dict__ )
+    free_values.update( blk.__globals__ )
+    for name, cell in zip( code.co_freevars, blk.__closure__ or () ):
+      try:
+        free_values[ name ] = cell.cell_contents
+      except ValueError: # empty cell
+        pass
+    return copy.deepcopy( module.body[0] ), free_values
+
+  def inline( s, blk ):
+    # Return the list of statements of blk for the flattened function, or
+    # None if blk has to be called.
+    ret = s.get_block_ast( blk )
+    if ret is None:
+      return None
+    func, free_values = ret
+
+    args = func.args
+    if args.args or args.vararg or args.kwarg or args.kwonlyargs:
+      return None
+
+    body = func.body
+    if len(body) == 1 and isinstance( body[0], ast.Pass ):
+      return []
+
+    local_names = set()
+    for stmt in body:
+      for node in ast.walk( stmt ):
+        if isinstance( node, _forbidden_nodes ):
+          return None
+        if isinstance( node, ast.Name ) and not isinstance( node.ctx, ast.Load ):
+          local_names.add( node.id )
+        # Only signals can be assigned through attributes/indices, and
+        # only with @= and <<=
+        elif isinstance( node, ast.Assign ):
+          if any( isinstance( t, ast.Attribute ) for t in node.targets ):
+            return None
+        elif isinstance( node, ast.AugAssign ):
+          if isinstance( node.target, ast.Attribute ) and \
+             not isinstance( node.op, (ast.MatMult, ast.LShift) ):
+            return None
+
+    # Free variables are resolved in the scope of the block, so they must
+    # not be shadowed by other free variable names of the same block
+    for name in local_names:
+      free_values.pop( name, None )
+
+    s.nblocks += 1
+    inliner = _BlockInliner( s, f"_b{s.nblocks}_", local_names, free_values )
+    stored = set( s.stored_globals )
+    try:
+      ret = [ inliner.visit( stmt ) for stmt in body ]
+    except _NotInlinable:
+      s.stored_globals = stored
+      return None
+    return ret
+
+  def flatten( s, funclist ):
+    s.stored_globals = set()
+    body = []
+    for blk in funclist:
+      stmts = s.inline( blk )
+      if stmts is None:
+        call = ast.Call( func=ast.Name( id=s.bind( blk ), ctx=ast.Load() ), args=[], keywords=[] )
+        body.append( ast.Expr( value=call ) )
+      else:
+        body.extend( stmts )
+
+    if s.stored_globals:
+      body.insert( 0, ast.Global( names=sorted( s.stored_globals ) ) )
+    if not body:
+      body.append( ast.Pass() )
+
+    fname = f"flattened_{len(s.namespace)}"
+    args = ast.arguments( posonlyargs=[], args=[], vararg=None, kwonlyargs=[],
+                          kw_defaults=[], kwarg=None, defaults=[] )
+    func = ast.FunctionDef( name=fname, args=args, body=body, decorator_list=[], returns=None )
+    module = ast.Module( body=[ func ], type_ignores=[] )
+    ast.fix_missing_locations( module )
+
+    # Register the source for tracebacks
+    if hasattr( ast, "unparse" ):
+      src = ast.unparse( module )
+      filename = f"Flattened schedule {fname}"
+      line_cache[ filename ] = ( len(src), None, src.splitlines(), filename )
+      code = compile( src, filename=filename, mode="exec" )
+    else:
+      code = compile( module, filename="Flattened schedule", mode="exec" )
+
+    _locals = {}
+    custom_exec( code, s.namespace, _locals )
+    return _locals[ fname ]
+
+class FlattenSimPass( UnrollSimPass ):
+
+  def __call__( self, top ):
+    self.top = top
+    self.flattener = None
+    super().__call__( top )
+
+  # Override
+  def gen_tick_function( self, funclist ):
+    # The flattener needs the signal value objects which only exist after
+    # lock_in_simulation
+    if self.flattener is None:
+      self.flattener = _Flattener( self.top )
+    return self.flattener.flatten( funclist )
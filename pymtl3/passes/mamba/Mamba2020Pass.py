@@ -9,18 +9,17 @@
 # Date   : Feb 14, 2020
 
 import os
-from collections import defaultdict, deque
+from collections import deque
 
 import py
 
-from pymtl3.datatypes import Bits, is_bitstruct_class
 from pymtl3.dsl import MethodPort
 from pymtl3.dsl.errors import UpblkCyclicError
 from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.BasePass import BasePass, PassMetadata
 from pymtl3.passes.errors import PassOrderError
 
-from ..sim.DynamicSchedulePass import kosaraju_scc
+from ..sim.DynamicSchedulePass import gen_scc_block, kosaraju_scc
 from ..sim.SimpleSchedulePass import SimpleSchedulePass, dump_dag
 from .HeuristicTopoPass import CountBranchesLoops
 from .UnrollSimPass import UnrollSimPass
@@ -38,6 +37,7 @@ class Mamba2020Pass( UnrollSimPass ):
       raise Exception("Some schedule pass has already been applied!")
 
     top._sched = PassMetadata()
+    top._sched.scc_stats = []
 
     # Extract branchiness first
     # Initialize all generated net block to 0 branchiness
@@ -272,81 +272,6 @@ class Mamba2020Pass( UnrollSimPass ):
                         "Probably a loop that involves blocks that should be update_once:\n{}"\
                         .format(", ".join( [ x.__name__ for x in scc] )))
 
-      # generate a loop for scc
-      # Shunning: we just simply loop over the whole SCC block
-      # TODO performance optimizations using Mamba techniques within a SCC block
-
-      template = """
-from copy import deepcopy
-def wrapped_SCC_{0}():
-  N = 0
-  while True:
-    N += 1
-    if N > 100:
-      raise UpblkCyclicError("Combinational loop detected at runtime in {{{4}}} after 100 iters!")
-    {1}
-    {3}
-    {2}
-    # print( "SCC block{0} is executed", N, "times" )
-    break
-generated_block = wrapped_SCC_{0}
-"""
-
-      # clean up non-top variables if top is there. For slices of Bits
-      # we directly use the top level wide Bits since Bits clone is
-      # rpython code
-
-      final_variables = set()
-
-      for x in sorted( variables, key=repr ):
-        w = x.get_top_level_signal()
-        if w is x:
-          final_variables.add( x )
-          continue
-
-        # w is not x
-        if issubclass( w._dsl.Type, Bits ):
-          if w not in final_variables:
-            final_variables.add( w )
-        elif is_bitstruct_class( w._dsl.Type ):
-          if w not in final_variables:
-            final_variables.add( x )
-        else:
-          final_variables.add( x )
-
-      # also group them by common ancestor to reduce byte code
-      # TODO use longest-common-prefix (LCP) algorithms ...
-
-      final_var_host = defaultdict(list)
-      for x in final_variables:
-        final_var_host[ x.get_host_component() ].append( x )
-
-      # Then, we generate the Python code that saves variables at the
-      # beginning of each SCC iteration and the code that checks if the
-      # values of those variables have changed
-      copy_srcs  = []
-      check_srcs = []
-
-      var_id = 0
-      for host, var_list in final_var_host.items():
-        hostlen = len(repr(host))
-
-        copy_srcs.append( f"host = {host!r}" )
-        check_srcs.append( f"host = {host!r}" )
-
-        sub_check_srcs = []
-
-        for var in var_list:
-          var_id += 1
-          subname = repr(var)[hostlen+1:]
-          if issubclass( var._dsl.Type, Bits ):     copy_srcs.append( f"t{var_id}=host.{subname}.clone()" )
-          elif is_bitstruct_class( var._dsl.Type ): copy_srcs.append( f"t{var_id}=host.{subname}.clone()" )
-          else:                                     copy_srcs.append( f"t{var_id}=deepcopy(host.{subname})" )
-
-          sub_check_srcs.append( f"host.{subname} != t{var_id}" )
-
-        check_srcs.append( f"if { ' or '.join(sub_check_srcs)}: continue" )
-
       # Divide all blks into meta blocks
       # Branchiness factor is the bound of branchiness in a meta block.
       branchiness_factor = 20
@@ -356,15 +281,9 @@ generated_block = wrapped_SCC_{0}
       cur_meta, cur_br, cur_count = [], 0, 0
       scc_schedule = []
 
-      _globals = { 's': top, 'UpblkCyclicError': UpblkCyclicError }
-      blk_srcs = []
-
       # If there is only 10 blocks, we directly unroll it
       if len(tmp_schedule) < 10:
-        blk_srcs = []
-        for i, b in enumerate(tmp_schedule):
-          blk_srcs.append( f"blk{i}() # [br {self.branchiness[b]}, loop {int(self.only_loop_at_top[b])}] {b.__name__}" )
-          _globals[f"blk{i}"] = b # put it into the block's closure
+        units = [ ( b, [ b ] ) for b in tmp_schedule ]
 
       else:
         for i, blk in enumerate( tmp_schedule ):
@@ -401,40 +320,14 @@ generated_block = wrapped_SCC_{0}
         assert num_blks == len(tmp_schedule), f"Some blocks are missing during trace breaking of SCC "\
                                               f"({num_blks} compiled, {len(tmp_schedule)} total)"
 
-        blk_srcs = []
-
         if len(scc_schedule) == 1:
-          for i, b in enumerate( scc_schedule[-1] ):
-            blk_srcs.append( f"blk{i}() # [br {self.branchiness[b]}, loop {int(self.only_loop_at_top[b])}] {b.__name__}" )
-            _globals[ f"blk{i}" ] = b
+          units = [ ( b, [ b ] ) for b in scc_schedule[-1] ]
 
         else:
-          # TODO we might turn all meta blocks before the last one into meta
-          # blocks, and directly fold the last block into the main loop
-          # for i, meta in enumerate( scc_schedule[:-1] ):
-            # b = self.compile_meta_block( meta )
-            # blk_srcs.append( f"{b.__name__}()" )
-            # _globals[ b.__name__ ] = b
-
-          # for i, b in enumerate( scc_schedule[-1] ):
-            # blk_srcs.append( f"blk_of_last_meta{i}() # [br {self.branchiness[b]}, loop {int(self.only_loop_at_top[b])}] {b.__name__}" )
-            # _globals[ f"blk_of_last_meta{i}" ] = b
-
-          for i, meta in enumerate( scc_schedule ):
-            b = self.compile_meta_block( meta )
-            blk_srcs.append( f"{b.__name__}()" )
-            _globals[ b.__name__ ] = b
-
-
-      scc_block_src = template.format( scc_id, "; ".join( copy_srcs ), "\n    ".join( check_srcs ),
-                                       '\n    '.join(blk_srcs),
-                                       ", ".join( [ x.__name__ for x in scc] ) )
-
-      if _DEBUG: print(scc_block_src, "\n", "="*100 )
+          # Each meta block is a unit of the SCC worklist
+          units = [ ( self.compile_meta_block( meta ), meta ) for meta in scc_schedule ]
 
-      _locals  = {}
-      custom_exec(py.code.Source( scc_block_src ).compile(), _globals, _locals)
-      return _locals[ 'generated_block' ]
+      return gen_scc_block( top, scc_id, units, E )
 
     # Now we generate meta blocks for each SCC and produce final schedule
 
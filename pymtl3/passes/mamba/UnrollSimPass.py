@@ -44,7 +44,7 @@ def compile_unroll( schedule ):
   # Override
   def create_sim_eval_comb( self, top ):
     # FIXME update_once? currently check if the design has method_port
-    method_ports = top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) )
+    method_ports = top.get_all_object_filter( MethodPort )
 
     if len(method_ports) == 0: # Pure RTL design, add eval_combinational
       sim_eval_combinational = self.gen_tick_function( top._sched.update_schedule )
@@ -57,7 +57,7 @@ def compile_unroll( schedule ):
   # Override
   def create_sim_tick( self, top ):
     final_schedule = []
-    if not top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ):
+    if not top.get_all_object_filter( MethodPort ):
       # Pure RTL -- tick update blocks first
       final_schedule = top._sched.update_schedule[::]
 
@@ -1 +1 @@
-from .PassGroups import HeuTopoUnrollSim, Mamba2020, UnrollSim
+from .PassGroups import FlattenSim, HeuTopoUnrollSim, Mamba2020, UnrollSim
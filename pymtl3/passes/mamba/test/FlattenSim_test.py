@@ -0,0 +1,109 @@
+import dis
+
+from pymtl3.datatypes import *
+from pymtl3.dsl import *
+from pymtl3.passes.PassGroups import DefaultPassGroup
+
+from ..PassGroups import FlattenSim
+
+Pair = mk_bitstruct( "FlattenPair", {
+  'lo': Bits8,
+  'hi': Bits8,
+} )
+
+class Stage( Component ):
+  def construct( s, k ):
+    s.in_ = InPort( Bits16 )
+    s.out = OutPort( Bits16 )
+    s.acc = Wire( Bits16 )
+
+    @update
+    def up_out():
+      tmp = s.in_ + k
+      for i in range(2):
+        tmp = tmp ^ (s.acc << i)
+      s.out @= tmp
+
+    @update_ff
+    def up_acc():
+      if s.reset: s.acc <<= 0
+      else:       s.acc <<= s.acc + zext( s.in_[0:8], 16 )
+
+class Top( Component ):
+  def construct( s, N=4 ):
+    s.in_   = InPort( Bits16 )
+    s.out   = OutPort( Bits16 )
+    s.pair  = OutPort( Pair )
+    s.const = Wire( Bits16 )
+    s.sel   = [ Wire( Bits16 ) for _ in range(2) ]
+
+    s.stages = [ Stage( i ) for i in range(N) ]
+    s.stages[0].in_ //= s.in_
+    for i in range(N-1):
+      s.stages[i].out //= s.stages[i+1].in_
+
+    s.const //= 42
+    s.sel[0] //= s.stages[N-1].out
+    s.sel[1] //= s.const
+
+    @update
+    def up_top():
+      total = Bits16(0)
+      for i in range(2):
+        total = total + s.sel[i]
+      s.out @= total
+      s.pair.lo @= s.out[0:8]
+      s.pair.hi @= s.out[8:16]
+
+  def line_trace( s ):
+    return f"{s.in_} > {s.out}"
+
+def _run( pass_group, ncycles=20 ):
+  top = Top()
+  top.apply( pass_group )
+  top.sim_reset()
+  trace = []
+  for i in range(ncycles):
+    top.in_ @= i * 37
+    top.sim_eval_combinational()
+    trace.append( (int(top.out), int(top.pair.lo), int(top.pair.hi),
+                   [ int(x.acc) for x in top.stages ]) )
+    top.sim_tick()
+  return top, trace
+
+def test_same_as_default():
+  _, ref = _run( DefaultPassGroup( linetrace=False ) )
+  _, out = _run( FlattenSim( print_line_trace=False ) )
+  assert out == ref
+
+def test_blocks_are_inlined():
+  top, _ = _run( FlattenSim( print_line_trace=False ), 1 )
+
+  # All update blocks and net blocks are spliced into the flattened
+  # function, so the only calls left are the ones in the blocks (e.g. range)
+  calls = [ x for x in dis.get_instructions( top.sim_eval_combinational ) if x.opname.startswith("CALL") ]
+  assert len(calls) < len(top._sched.update_schedule)
+  assert top.sim_eval_combinational.__name__.startswith( "flattened" )
+
+def test_lambda_and_method_blocks():
+  class A( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+      s.mid = Wire( Bits8 )
+      s.mid //= lambda: s.in_ + 1
+
+      @update
+      def up():
+        s.out @= s.helper( s.mid )
+
+    def helper( s, x ):
+      return x + 1
+
+  a = A()
+  a.apply( FlattenSim() )
+  a.sim_reset()
+  for i in range(10):
+    a.in_ @= i
+    a.sim_tick()
+    assert a.out == i + 2
@@ -89,6 +89,43 @@ def test_combinational_loop():
     return
   raise Exception("Should've thrown UpblkCyclicError.")
 
+def test_scc_meta_blocks():
+
+  class Inner(Component):
+    def construct( s ):
+      s.in_ = InPort(Bits32)
+      s.out = OutPort(Bits32)
+
+      @update
+      def up():
+        if s.in_ > 0:
+          s.out @= s.in_
+        else:
+          s.out @= 0
+
+  class Top(Component):
+    def construct( s, N=16 ):
+      s.in_    = InPort(Bits32)
+      s.inners = [ Inner() for i in range(N) ]
+      for i in range(N-1):
+        s.inners[i].out //= s.inners[i+1].in_
+
+      @update
+      def up_or():
+        s.inners[0].in_ @= s.in_ | ( s.inners[N-1].out << 1 )
+
+  A = Top()
+  A.apply( Mamba2020() )
+  A.sim_reset()
+
+  A.in_ @= 0x100
+  A.sim_eval_combinational()
+  assert A.inners[-1].out == 0xffffff00
+
+  stats, = A._sched.scc_stats
+  assert len(stats.blocks) > 16
+  assert stats.ncalls > 0 and stats.max_sweeps > 1
+
 def test_equal_top_level():
   class A(Component):
     def construct( s ):
@@ -0,0 +1,449 @@
+"""
+========================================================================
+PartitionedSimPass.py
+========================================================================
+Simulate a design with multiple processes. The design is cut at the
+latency-insensitive channels (stdlib.delays ChannelRTL/ChannelCL) that
+are children of the top component. Every other child of the top is a
+partition, and the partitions are distributed over nprocs worker
+processes. The top component itself can only instantiate partitions and
+channels and connect them to each other.
+
+Each worker instantiates its partitions again from their constructor
+arguments under a new top component, together with the halves of the
+channels connected to them, and simulates them with DefaultPassGroup.
+The halves of a channel in different workers exchange messages and
+credits through a ring buffer in shared memory. Before a half consumes
+the messages (or credits) that arrive in cycle t, it waits until the
+other half has finished cycle t-latency. This is a conservative
+synchronization with the channel latency as lookahead: workers never
+block each other within a cycle and can run up to latency cycles apart,
+and the simulation is cycle-accurate and deterministic regardless of the
+number of processes.
+
+The simulation is controlled from the original top component:
+
+- top.sim_reset() / top.sim_tick() / top.sim_run( ncycles )
+- top.sim_cycle_count()
+- top.sim_call( method, *args ): call a method of every partition in
+  the worker processes and return the results in partition order (None
+  for partitions without the method)
+- top.sim_close(): stop the worker processes
+
+Worker processes are forked, so this pass requires os.fork.
+
+Date   : Oct 18, 2026
+"""
+import mmap
+import multiprocessing
+import os
+import re
+import time
+import traceback
+import weakref
+from struct import pack_into, unpack_from
+
+from pymtl3.datatypes import is_bitstruct_class, mk_bits
+from pymtl3.dsl import Component, connect
+from pymtl3.passes.BasePass import BasePass, PassMetadata
+from pymtl3.passes.errors import PartitionError
+from pymtl3.passes.PassGroups import DefaultPassGroup
+from pymtl3.stdlib.delays import ChannelCL, ChannelRTL
+
+#-------------------------------------------------------------------------
+# SharedMemoryLink
+#-------------------------------------------------------------------------
+# The link between two channel halves in different processes. The
+# messages and credits are kept in two ring buffers of num_credits slots,
+# which is enough because every message in flight holds a credit. Each
+# side keeps its own head/tail counters locally and only publishes the
+# ones that the other side reads.
+
+_MSG_TAIL    = 0
+_TX_PROGRESS = 8
+_CREDIT_TAIL = 16
+_RX_PROGRESS = 24
+_HEADER_NBYTES = 32
+
+class PartitionAborted( Exception ):
+  """ Raised in a worker that waits for another worker that has failed. """
+
+class SharedMemoryLink:
+
+  def __init__( s, Type, latency, num_credits, abort ):
+    if is_bitstruct_class( Type ):
+      BitsN = mk_bits( Type.nbits )
+      s.encode = lambda msg: int( msg.to_bits() )
+      s.decode = lambda x: Type.from_bits( BitsN( x ) )
+    else:
+      s.encode = int
+      s.decode = Type
+
+    s.latency     = latency
+    s.nslots      = num_credits
+    s.msg_nbytes  = ( Type.nbits + 7 ) // 8
+    s.slot_nbytes = 8 + s.msg_nbytes
+    s.credit_base = _HEADER_NBYTES + num_credits * s.slot_nbytes
+
+    s.buf   = mmap.mmap( -1, s.credit_base + num_credits * 8 )
+    s.abort = abort
+
+    s.msg_head = s.msg_tail = 0
+    s.credit_head = s.credit_tail = 0
+
+  def _wait( s, offset, ncycles ):
+    # Spin until the other side has finished ncycles cycles
+    buf = s.buf
+    spins = 0
+    while unpack_from( '<q', buf, offset )[0] < ncycles:
+      spins += 1
+      if spins & 0xff == 0:
+        if s.abort[0]:
+          raise PartitionAborted( "another partition worker failed" )
+        time.sleep( 0 )
+
+  # Sender side
+
+  def push_msg( s, arrival, msg ):
+    offset = _HEADER_NBYTES + ( s.msg_tail % s.nslots ) * s.slot_nbytes
+    pack_into( '<q', s.buf, offset, arrival )
+    s.buf[ offset+8 : offset+8+s.msg_nbytes ] = s.encode( msg ).to_bytes( s.msg_nbytes, 'little' )
+    s.msg_tail += 1
+    pack_into( '<q', s.buf, _MSG_TAIL, s.msg_tail )
+
+  def pop_credits( s, cycle ):
+    s._wait( _RX_PROGRESS, cycle - s.latency + 1 )
+    tail = unpack_from( '<q', s.buf, _CREDIT_TAIL )[0]
+    ret  = 0
+    while s.credit_head < tail:
+      offset = s.credit_base + ( s.credit_head % s.nslots ) * 8
+      if unpack_from( '<q', s.buf, offset )[0] > cycle:
+        break
+      s.credit_head += 1
+      ret += 1
+    return ret
+
+  def tx_done( s, ncycles ):
+    pack_into( '<q', s.buf, _TX_PROGRESS, ncycles )
+
+  # Receiver side
+
+  def pop_msgs( s, cycle ):
+    s._wait( _TX_PROGRESS, cycle - s.latency + 1 )
+    tail = unpack_from( '<q', s.buf, _MSG_TAIL )[0]
+    ret  = []
+    while s.msg_head < tail:
+      offset = _HEADER_NBYTES + ( s.msg_head % s.nslots ) * s.slot_nbytes
+      if unpack_from( '<q', s.buf, offset )[0] > cycle:
+        break
+      ret.append( s.decode( int.from_bytes( s.buf[ offset+8 : offset+8+s.msg_nbytes ], 'little' ) ) )
+      s.msg_head += 1
+    return ret
+
+  def push_credit( s, arrival ):
+    pack_into( '<q', s.buf, s.credit_base + ( s.credit_tail % s.nslots ) * 8, arrival )
+    s.credit_tail += 1
+    pack_into( '<q', s.buf, _CREDIT_TAIL, s.credit_tail )
+
+  def rx_done( s, ncycles ):
+    pack_into( '<q', s.buf, _RX_PROGRESS, ncycles )
+
+#-------------------------------------------------------------------------
+# Worker
+#-------------------------------------------------------------------------
+
+_path_token_re = re.compile( r"(\w+)((?:\[\d+\])*)$" )
+
+def _resolve_path( obj, path ):
+  """ Return obj.<path>, e.g. path = "ifc.send[1][2]". """
+  for token in path.split('.'):
+    name, indices = _path_token_re.match( token ).groups()
+    obj = getattr( obj, name )
+    for idx in re.findall( r"\d+", indices ):
+      obj = obj[ int(idx) ]
+  return obj
+
+class PartitionWorkerTop( Component ):
+
+  def construct( s, parts, channels ):
+    # parts: [ (class, args, kwargs, param_tree) ]
+    # channels: [ (class, args, side, (tx part index, tx path), (rx part index, rx path) ) ]
+
+    partitions = []
+    for cls, args, kwargs, param_tree in parts:
+      p = cls( *args, **kwargs )
+      p._dsl.param_tree = param_tree
+      partitions.append( p )
+    s.partitions = partitions
+
+    s.channels = [ cls( *args, side=side ) for cls, args, side, _, _ in channels ]
+
+    for c, (_, _, side, tx, rx) in zip( s.channels, channels ):
+      if side != 'rx':
+        connect( _resolve_path( s.partitions[ tx[0] ], tx[1] ), c.recv )
+      if side != 'tx':
+        connect( c.send, _resolve_path( s.partitions[ rx[0] ], rx[1] ) )
+
+  def line_trace( s ):
+    return "|".join( p.line_trace() for p in s.partitions )
+
+def _worker_main( conn, abort, parts, channels, links ):
+
+  def reply( kind, ret ):
+    if kind != 'ok':
+      abort[0] = 1
+    conn.send( (kind, ret) )
+
+  try:
+    top = PartitionWorkerTop( parts, channels )
+    top.elaborate()
+    for c, link in zip( top.channels, links ):
+      if link is not None:
+        c.link = link
+    top.apply( DefaultPassGroup() )
+    reply( 'ok', None )
+  except Exception:
+    reply( 'error', traceback.format_exc() )
+    return
+
+  while True:
+    cmd, args = conn.recv()
+    if cmd == 'close':
+      break
+    try:
+      if cmd == 'reset':
+        top.sim_reset()
+        ret = top.sim_cycle_count()
+      elif cmd == 'run':
+        for _ in range( args[0] ):
+          top.sim_tick()
+        ret = top.sim_cycle_count()
+      else: # call
+        ret = [ getattr( p, args[0] )( *args[1] ) if hasattr( p, args[0] ) else None
+                for p in top.partitions ]
+      reply( 'ok', ret )
+    except PartitionAborted:
+      reply( 'aborted', None )
+    except Exception:
+      reply( 'error', traceback.format_exc() )
+
+def _close_workers( conns, procs ):
+  for conn, proc in zip( conns, procs ):
+    if proc.is_alive():
+      try:
+        conn.send( ('close', None) )
+      except OSError:
+        pass
+  for proc in procs:
+    proc.join( 1 )
+    if proc.is_alive():
+      proc.terminate()
+
+#-------------------------------------------------------------------------
+# PartitionedSimPass
+#-------------------------------------------------------------------------
+
+class PartitionedSimPass( BasePass ):
+
+  def __init__( s, nprocs=None ):
+    s.nprocs = nprocs
+
+  def __call__( s, top ):
+    if not hasattr( os, 'fork' ):
+      raise PartitionError( "PartitionedSimPass requires os.fork" )
+    if hasattr( top, "_sim" ):
+      raise PartitionError( "top is already prepared for a single-process simulation" )
+
+    top._partition = PassMetadata()
+    s.split_design( top )
+    s.start_workers( top )
+    s.create_sim_functions( top )
+
+  #-----------------------------------------------------------------------
+  # split_design
+  #-----------------------------------------------------------------------
+  # Find the partitions and for each channel the interfaces of the
+  # partitions that are connected to its two sides.
+
+  @staticmethod
+  def split_design( top ):
+    if top.get_update_blocks():
+      raise PartitionError( "top has update blocks; move them into a partition" )
+
+    def top_child( x ):
+      # Return the child component of top that x belongs to, or None if x
+      # is part of top itself
+      while x._dsl.parent_obj is not top:
+        x = x._dsl.parent_obj
+      return x if isinstance( x, Component ) else None
+
+    def child_key( x ):
+      return ( x._dsl._my_name, x._dsl._my_indices or () )
+
+    children   = sorted( top.get_child_components(), key=child_key )
+    channels   = [ x for x in children if isinstance( x, (ChannelRTL, ChannelCL) ) ]
+    partitions = [ x for x in children if not isinstance( x, (ChannelRTL, ChannelCL) ) ]
+    if not partitions:
+      raise PartitionError( "top has no partitions" )
+
+    part_index = { x: i for i, x in enumerate( partitions ) }
+    ends = { c: {} for c in channels }
+
+    for _, net in top.get_all_value_nets() + top.get_all_method_nets():
+      owners = { top_child( x ) for x in net }
+
+      if None in owners:
+        if any( x not in ( top.clk, top.reset ) for x in net if top_child( x ) is None ):
+          raise PartitionError( f"top has ports other than clk/reset: {sorted( net, key=repr )}" )
+        continue
+
+      parts = sorted( ( x for x in owners if x in part_index ), key=child_key )
+      chans = sorted( ( x for x in owners if x in ends ), key=child_key )
+      if len(parts) > 1:
+        raise PartitionError( f"{parts[0]} and {parts[1]} are connected without a channel: "
+                              f"{sorted( net, key=repr )}" )
+      if len(chans) > 1:
+        raise PartitionError( f"{chans[0]} and {chans[1]} are connected to each other" )
+      if not parts or not chans:
+        continue
+
+      p, c = parts[0], chans[0]
+      x = next( x for x in net if top_child( x ) is c )
+      y = min( ( x for x in net if top_child( x ) is p ), key=lambda x: x._dsl.level )
+
+      # Go up from both ports to the interfaces that are connected
+      while x._dsl.parent_obj is not c:
+        x = x._dsl.parent_obj
+        y = y._dsl.parent_obj
+      side = 'tx' if x is c.recv else 'rx'
+      path = repr(y)[ len(repr(p))+1 : ]
+
+      if ends[c].setdefault( side, (part_index[p], path) ) != (part_index[p], path):
+        raise PartitionError( f"{c} is connected to more than one interface on the same side" )
+
+    for c in channels:
+      if len( ends[c] ) != 2:
+        raise PartitionError( f"{c} is not connected to a partition on both sides" )
+
+    top._partition.partitions = partitions
+    top._partition.channels   = [ ( c, ends[c]['tx'], ends[c]['rx'] ) for c in channels ]
+
+  #-----------------------------------------------------------------------
+  # start_workers
+  #-----------------------------------------------------------------------
+
+  def start_workers( s, top ):
+    partitions = top._partition.partitions
+    nprocs = s.nprocs or os.cpu_count() or 1
+    nprocs = max( 1, min( nprocs, len(partitions) ) )
+
+    # Contiguous blocks of partitions go to the same worker
+    worker_of = [ i * nprocs // len(partitions) for i in range(len(partitions)) ]
+    top._partition.nprocs    = nprocs
+    top._partition.worker_of = worker_of
+
+    abort = mmap.mmap( -1, 1 )
+    specs = [ ( [], [], [], {} ) for _ in range(nprocs) ] # parts, channels, links, part index
+
+    for i, p in enumerate( partitions ):
+      parts, _, _, index = specs[ worker_of[i] ]
+      index[i] = len(parts)
+      parts.append( ( p.__class__, p._dsl.args, p._dsl.kwargs, p._dsl.param_tree ) )
+
+    for c, (tx, tx_path), (rx, rx_path) in top._partition.channels:
+      args = ( c.Type, c.latency, c.num_credits )
+      wtx, wrx = worker_of[tx], worker_of[rx]
+
+      if wtx == wrx:
+        _, chans, links, index = specs[ wtx ]
+        chans.append( ( c.__class__, args, 'both', (index[tx], tx_path), (index[rx], rx_path) ) )
+        links.append( None )
+        continue
+
+      if not ( isinstance( c.Type, type ) and hasattr( c.Type, 'nbits' ) ):
+        raise PartitionError( f"{c} needs a Bits or bitstruct message type to be cut" )
+
+      link = SharedMemoryLink( c.Type, c.latency, c.num_credits, abort )
+      for w, side in ( (wtx, 'tx'), (wrx, 'rx') ):
+        _, chans, links, index = specs[w]
+        chans.append( ( c.__class__, args, side,
+                        (index.get(tx), tx_path), (index.get(rx), rx_path) ) )
+        links.append( link )
+
+    ctx = multiprocessing.get_context( 'fork' )
+    conns, procs = [], []
+    for parts, chans, links, _ in specs:
+      conn, child_conn = ctx.Pipe()
+      proc = ctx.Process( target=_worker_main, args=( child_conn, abort, parts, chans, links ),
+                          daemon=True )
+      proc.start()
+      child_conn.close()
+      conns.append( conn )
+      procs.append( proc )
+
+    top._partition.conns = conns
+    top._partition.procs = procs
+    top._partition.finalizer = weakref.finalize( top, _close_workers, conns, procs )
+
+    # Wait for the elaboration in all workers
+    s.collect( top )
+
+  @staticmethod
+  def collect( top ):
+    """ Return the replies of all workers or raise the first error. """
+    results, errors = [], []
+    for w, conn in enumerate( top._partition.conns ):
+      try:
+        kind, ret = conn.recv()
+      except EOFError:
+        kind, ret = 'error', "the worker process has exited"
+      if kind == 'error':
+        errors.append( f"Partition worker {w} failed:\n{ret}" )
+      results.append( ret )
+
+    if errors:
+      top._partition.finalizer()
+      raise RuntimeError( "\n".join( errors ) )
+    return results
+
+  #-----------------------------------------------------------------------
+  # create_sim_functions
+  #-----------------------------------------------------------------------
+
+  def create_sim_functions( s, top ):
+    conns = top._partition.conns
+    top._partition.simulated_cycles = 0
+
+    def command( cmd, *args ):
+      if not top._partition.finalizer.alive:
+        raise RuntimeError( "The partition workers have been closed" )
+      for conn in conns:
+        conn.send( (cmd, args) )
+      return s.collect( top )
+
+    def sim_reset():
+      top._partition.simulated_cycles = command( 'reset' )[0]
+
+    def sim_run( ncycles ):
+      top._partition.simulated_cycles = command( 'run', ncycles )[0]
+
+    def sim_tick():
+      sim_run( 1 )
+
+    def sim_cycle_count():
+      return top._partition.simulated_cycles
+
+    def sim_call( method, *args ):
+      results = command( 'call', method, args )
+      iters = [ iter(x) for x in results ]
+      return [ next( iters[w] ) for w in top._partition.worker_of ]
+
+    def sim_close():
+      top._partition.finalizer()
+
+    top.sim_reset       = sim_reset
+    top.sim_tick        = sim_tick
+    top.sim_run         = sim_run
+    top.sim_cycle_count = sim_cycle_count
+    top.sim_call        = sim_call
+    top.sim_close       = sim_close
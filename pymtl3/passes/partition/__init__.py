@@ -0,0 +1 @@
+from .PartitionedSimPass import PartitionedSimPass, SharedMemoryLink
@@ -0,0 +1,217 @@
+#=========================================================================
+# PartitionedSimPass_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import os
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.passes.errors import PartitionError
+from pymtl3.stdlib.delays import ChannelCL, ChannelRTL
+from pymtl3.stdlib.ifcs import RecvIfcRTL, SendIfcRTL
+from pymtl3.stdlib.queues import NormalQueueRTL
+from pymtl3.stdlib.test_utils.test_sinks import TestSinkCL, TestSinkRTL
+from pymtl3.stdlib.test_utils.test_srcs import TestSrcCL, TestSrcRTL
+
+from ..PartitionedSimPass import PartitionedSimPass
+
+pytestmark = pytest.mark.skipif( not hasattr( os, "fork" ), reason="requires os.fork" )
+
+@bitstruct
+class Packet:
+  src  : Bits4
+  hops : Bits8
+  data : Bits16
+
+# A stage adds one to the hop count and records when it sends a packet
+
+class Stage( Component ):
+
+  def construct( s, sid ):
+    s.recv = RecvIfcRTL( Packet )
+    s.send = SendIfcRTL( Packet )
+    s.q    = NormalQueueRTL( Packet, 2 )
+    s.log  = []
+
+    s.q.enq.msg //= s.recv.msg
+    s.q.enq.en  //= s.recv.en
+    s.q.enq.rdy //= s.recv.rdy
+
+    @update
+    def up_send():
+      s.send.msg      @= s.q.deq.ret
+      s.send.msg.hops @= s.q.deq.ret.hops + 1
+      s.send.en       @= s.q.deq.rdy & s.send.rdy
+      s.q.deq.en      @= s.q.deq.rdy & s.send.rdy
+
+    @update_ff
+    def up_log():
+      if s.send.en:
+        s.log.append( (int(s.q.deq.ret.data), int(s.q.deq.ret.hops)) )
+
+  def get_log( s ):
+    return s.log
+
+  def line_trace( s ):
+    return f"{s.recv}({s.q.line_trace()}){s.send}"
+
+def mk_msgs( n ):
+  return [ Packet( 0, 0, i * 7 ) for i in range(n) ]
+
+class Chain( Component ):
+
+  def construct( s, nstages, latency, msgs ):
+    s.src    = TestSrcRTL( Packet, msgs )
+    s.stages = [ Stage( i ) for i in range(nstages) ]
+    s.sink   = TestSinkRTL( Packet, [ Packet( 0, nstages, x.data ) for x in msgs ] )
+    s.chans  = [ ChannelRTL( Packet, latency ) for _ in range(nstages+1) ]
+
+    s.src.send //= s.chans[0].recv
+    for i in range(nstages):
+      s.chans[i].send //= s.stages[i].recv
+      s.stages[i].send //= s.chans[i+1].recv
+    s.chans[nstages].send //= s.sink.recv
+
+  def done( s ):
+    return s.src.done() and s.sink.done()
+
+# A ring of stages where packets keep going around
+
+class RingStage( Component ):
+
+  def construct( s, sid, ninject ):
+    s.recv  = RecvIfcRTL( Packet )
+    s.send  = SendIfcRTL( Packet )
+    s.stage = Stage( sid )
+    s.count = Wire( 8 )
+
+    s.recv //= s.stage.recv
+
+    @update
+    def up_inject():
+      if s.count < ninject:
+        s.send.en  @= s.send.rdy
+        s.send.msg @= Packet( sid, 0, zext( s.count, 16 ) )
+        s.stage.send.rdy @= 0
+      else:
+        s.send.en  @= s.stage.send.en
+        s.send.msg @= s.stage.send.msg
+        s.stage.send.rdy @= s.send.rdy
+
+    @update_ff
+    def up_count():
+      if s.reset:
+        s.count <<= 0
+      elif s.send.en & ( s.count < ninject ):
+        s.count <<= s.count + 1
+
+  def get_log( s ):
+    return s.stage.log
+
+class Ring( Component ):
+
+  def construct( s, nstages, latency ):
+    s.stages = [ RingStage( i, 3 ) for i in range(nstages) ]
+    s.chans  = [ ChannelRTL( Packet, latency, num_credits=2 ) for _ in range(nstages) ]
+    for i in range(nstages):
+      s.stages[i].send //= s.chans[i].recv
+      s.chans[i].send  //= s.stages[(i+1) % nstages].recv
+
+def run_reference( top, ncycles=None ):
+  top.elaborate()
+  top.apply( DefaultPassGroup() )
+  top.sim_reset()
+  if ncycles is None:
+    while not top.done():
+      top.sim_tick()
+  else:
+    for _ in range(ncycles):
+      top.sim_tick()
+  return top.sim_cycle_count()
+
+def mk_partitioned( top, nprocs ):
+  top.elaborate()
+  top.apply( PartitionedSimPass( nprocs ) )
+  top.sim_reset()
+  return top
+
+@pytest.mark.parametrize( "nprocs, latency", [ (1, 1), (2, 1), (6, 1), (3, 2) ] )
+def test_chain( nprocs, latency ):
+  ref = Chain( 4, latency, mk_msgs( 20 ) )
+  ncycles = run_reference( ref )
+
+  top = mk_partitioned( Chain( 4, latency, mk_msgs( 20 ) ), nprocs )
+  try:
+    while not all( x for x in top.sim_call( 'done' ) if x is not None ):
+      top.sim_tick()
+    assert top.sim_cycle_count() == ncycles
+
+    logs = dict( zip( map( repr, top._partition.partitions ), top.sim_call( 'get_log' ) ) )
+    assert [ logs[ repr(x) ] for x in ref.stages ] == [ x.get_log() for x in ref.stages ]
+  finally:
+    top.sim_close()
+
+@pytest.mark.parametrize( "nprocs", [ 2, 4 ] )
+def test_ring( nprocs ):
+  ref = Ring( 4, 1 )
+  run_reference( ref, 100 )
+
+  top = mk_partitioned( Ring( 4, 1 ), nprocs )
+  try:
+    top.sim_run( 100 )
+    assert top.sim_call( 'get_log' ) == [ x.get_log() for x in ref.stages ]
+    assert len( ref.stages[0].get_log() ) > 20
+  finally:
+    top.sim_close()
+
+class ChainCL( Component ):
+
+  def construct( s, msgs ):
+    s.src  = TestSrcCL( Bits16, msgs )
+    s.chan = ChannelCL( Bits16, latency=2 )
+    s.sink = TestSinkCL( Bits16, msgs, arrival_time=[ 6 + i for i in range(len(msgs)) ] )
+    s.src.send  //= s.chan.recv
+    s.chan.send //= s.sink.recv
+
+def test_cl():
+  msgs = [ Bits16(i) for i in range(10) ]
+  top = mk_partitioned( ChainCL( msgs ), 2 )
+  try:
+    top.sim_run( 20 )
+    assert top.sim_call( 'done' ) == [ True, True ]
+  finally:
+    top.sim_close()
+
+def test_worker_error():
+  msgs = [ Bits16(i) for i in range(10) ]
+  top = ChainCL( msgs )
+  top.set_param( "top.sink.construct", arrival_time=[ 3 ] * len(msgs) )
+  top = mk_partitioned( top, 2 )
+  with pytest.raises( RuntimeError, match="LATER than expected" ):
+    top.sim_run( 20 )
+
+  with pytest.raises( RuntimeError, match="closed" ):
+    top.sim_tick()
+
+class Direct( Component ):
+  def construct( s ):
+    s.src  = TestSrcRTL( Bits8, [] )
+    s.sink = TestSinkRTL( Bits8, [] )
+    s.src.send //= s.sink.recv
+
+class Dangling( Component ):
+  def construct( s ):
+    s.src  = TestSrcRTL( Bits8, [] )
+    s.chan = ChannelRTL( Bits8 )
+    s.src.send //= s.chan.recv
+
+@pytest.mark.parametrize( "cls, msg", [ (Direct, "without a channel"),
+                                        (Dangling, "both sides") ] )
+def test_invalid( cls, msg ):
+  top = cls()
+  top.elaborate()
+  with pytest.raises( PartitionError, match=msg ):
+    top.apply( PartitionedSimPass( 2 ) )
@@ -11,5 +11,5 @@ from .behavioral import (
 )
 from .rtype import RTLIRDataType, RTLIRType
 from .rtype.RTLIRDataType import get_rtlir_dtype
-from .rtype.RTLIRType import RTLIRGetter
+from .rtype.RTLIRType import RTLIRGetter, get_rtlir_getter
 from .structural import StructuralRTLIRGenPass, StructuralRTLIRSignalExpr
@@ -23,7 +23,7 @@ from pymtl3.datatypes import (
 )
 from pymtl3.passes.rtlir.errors import PyMTLSyntaxError
 from pymtl3.passes.rtlir.RTLIRPass import RTLIRPass
-from pymtl3.passes.rtlir.rtype.RTLIRType import RTLIRGetter
+from pymtl3.passes.rtlir.rtype.RTLIRType import get_rtlir_getter
 from pymtl3.passes.rtlir.util.utility import get_ordered_upblks, get_ordered_update_ff
 
 from . import BehavioralRTLIR as bir
@@ -39,10 +39,8 @@ class BehavioralRTLIRGenL1Pass( RTLIRPass ):
   rtlir_upblks = MetadataKey()
 
   def __init__( s, translation_top ):
-    c = s.__class__
     s.tr_top = translation_top
-    if not translation_top.has_metadata( c.rtlir_getter ):
-      translation_top.set_metadata( c.rtlir_getter, RTLIRGetter(cache=True) )
+    get_rtlir_getter( translation_top )
 
   def __call__( s, m ):
     """Generate RTLIR for all upblks of m."""
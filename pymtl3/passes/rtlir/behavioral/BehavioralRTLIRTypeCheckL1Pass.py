@@ -37,10 +37,8 @@ class BehavioralRTLIRTypeCheckL1Pass( RTLIRPass ):
   rtlir_accessed = MetadataKey()
 
   def __init__( s, translation_top ):
-    c = s.__class__
     s.tr_top = translation_top
-    if not translation_top.has_metadata( c.rtlir_getter ):
-      translation_top.set_metadata( c.rtlir_getter, rt.RTLIRGetter(cache=True) )
+    rt.get_rtlir_getter( translation_top )
 
   def __call__( s, m ):
     """Perform type checking on all RTLIR in rtlir_upblks."""
@@ -19,6 +19,7 @@ from pymtl3 import dsl
 from pymtl3.datatypes import Bits, is_bitstruct_inst
 
 from ..errors import RTLIRConversionError
+from ..RTLIRPass import RTLIRPass
 from ..util.utility import collect_objs
 from .RTLIRDataType import BaseRTLIRDataType, PackedArray, get_rtlir_dtype
 
@@ -520,13 +521,25 @@ def is_rtlir_convertible( obj ):
 
 NA = "<N/A>"
 
+def get_rtlir_getter( top ):
+  """Return the RTLIRGetter shared by all passes that work on `top`.
+
+  The getter is stored as metadata of `top` so that it goes away together
+  with the component hierarchy.
+  """
+  if not top.has_metadata( RTLIRPass.rtlir_getter ):
+    top.set_metadata( RTLIRPass.rtlir_getter, RTLIRGetter(cache=True) )
+  return top.get_metadata( RTLIRPass.rtlir_getter )
+
 # uncached=0
 class RTLIRGetter:
   ifc_primitive_types = ( dsl.InPort, dsl.OutPort, dsl.Interface )
 
   def __init__( self, cache=True ):
+    self.cache = cache
     if cache:
       self._rtlir_cache = {}
+      self._rtlir_ifc_cache = {}
       self.get_rtlir = self._get_rtlir_cached
       # self.cache_hit = 0
       # self.cache_miss = 0
@@ -556,6 +569,13 @@ class RTLIRGetter:
 
   def get_component_ifc_rtlir( self, obj ):
     """Return the RTLIR of the interfaces of component `obj`."""
+    if not self.cache:
+      return self._get_component_ifc_rtlir( obj )
+    if obj not in self._rtlir_ifc_cache:
+      self._rtlir_ifc_cache[ obj ] = self._get_component_ifc_rtlir( obj )
+    return self._rtlir_ifc_cache[ obj ]
+
+  def _get_component_ifc_rtlir( self, obj ):
 
     def _is_interface( id_, obj ):
       _type = type(obj)
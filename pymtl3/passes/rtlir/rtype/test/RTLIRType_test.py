@@ -91,3 +91,12 @@ def test_pymtl3_interface_wire():
   # in_.foo will be silently dropped!
   assert rtlir_getter.get_rtlir( a.in_ ) == rt.InterfaceView('Bits32FooWireBarInIfc',
       {'bar':rt.Port('input', rdt.Vector(32))})
+
+def test_shared_rtlir_getter():
+  a = CaseBits32InOutx5CompOnly.DUT()
+  a.elaborate()
+  getter = rt.get_rtlir_getter( a )
+  assert rt.get_rtlir_getter( a ) is getter
+  ifc = getter.get_component_ifc_rtlir( a )
+  assert getter.get_component_ifc_rtlir( a ) is ifc
+  assert ifc == rt.RTLIRGetter(cache=False).get_component_ifc_rtlir( a )
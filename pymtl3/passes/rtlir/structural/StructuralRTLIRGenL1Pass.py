@@ -9,7 +9,7 @@ from pymtl3 import MetadataKey
 from pymtl3.passes.PlaceholderConfigs import PlaceholderConfigs
 # from pymtl3.passes.rtlir.RTLIRPass import RTLIRPass
 from pymtl3.passes.rtlir.errors import RTLIRConversionError
-from pymtl3.passes.rtlir.rtype.RTLIRType import RTLIRGetter
+from pymtl3.passes.rtlir.rtype.RTLIRType import get_rtlir_getter
 
 from .StructuralRTLIRGenL0Pass import StructuralRTLIRGenL0Pass
 from .StructuralRTLIRSignalExpr import gen_signal_expr
@@ -22,10 +22,8 @@ class StructuralRTLIRGenL1Pass( StructuralRTLIRGenL0Pass ):
 
   def __call__( s, tr_top ):
     """ generate structural RTLIR for component `tr_top` """
-    c = s.__class__
     s.tr_top = tr_top
-    if not tr_top.has_metadata( c.rtlir_getter ):
-      tr_top.set_metadata( c.rtlir_getter, RTLIRGetter(cache=True) )
+    get_rtlir_getter( tr_top )
 
     try:
       s._gen_metadata( tr_top )
@@ -47,6 +47,28 @@ def get_component_full_name( c_rtype ):
     comp_name += '_noparam'
   return comp_name
 
+def get_component_key( m ):
+  """Return a hashable key of the class and construct parameters of `m`.
+
+  Instances with the same key elaborate to the same hardware and share
+  their RTLIR. Return None if some parameter is not hashable.
+  """
+
+  def _freeze( v ):
+    if isinstance( v, ( list, tuple ) ):
+      return ( type(v), tuple( _freeze(x) for x in v ) )
+    if isinstance( v, dict ):
+      return ( dict, tuple( ( k, _freeze(x) ) for k, x in v.items() ) )
+    hash( v )
+    # Keep the type so that e.g. Bits8(1) and Bits16(1) differ
+    return ( type(v), v )
+
+  try:
+    return ( type(m), _freeze( m._dsl.args ),
+             tuple( ( k, _freeze(v) ) for k, v in sorted( m._dsl.kwargs.items() ) ) )
+  except TypeError:
+    return None
+
 def get_ordered_upblks( m ):
   """Return a list of non-update-ff update blocks that have deterministic order"""
 
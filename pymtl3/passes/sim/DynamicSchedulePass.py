@@ -18,7 +18,6 @@ from pymtl3.passes.BasePass import BasePass, PassMetadata
 from pymtl3.passes.errors import PassOrderError
 
 from .SimpleSchedulePass import SimpleSchedulePass, dump_dag
-from .SimpleTickPass import SimpleTickPass
 
 
 class DynamicSchedulePass( BasePass ):
@@ -57,6 +56,47 @@ class DynamicSchedulePass( BasePass ):
     if 'MAMBA_DAG' in os.environ:
       dump_dag( top, V, E )
 
+    # The SCC-level plan only depends on the graph, so we can reuse the
+    # one computed by a previous run if the elaboration cache is on.
+
+    cache = getattr( top._dsl, "elab_cache", None )
+    cache_name = f"DynamicSchedulePass-{len(V)}-{len(E)}"
+
+    plan = None
+    if cache is not None:
+      graph = cache.hash_graph( top, V, E )
+      plan  = cache.load_schedule( top, cache_name, graph )
+    if plan is not None and ( sum( len(blks) for blks, _ in plan ) != len(V) or
+                              { x for blks, _ in plan for x in blks } != V ):
+      plan = None
+
+    if plan is None:
+      plan = self.plan_intra_cycle( top, V, G, G_T, E )
+      if cache is not None:
+        cache.store_schedule( top, cache_name, graph, plan )
+
+    #---------------------------------------------------------------------
+    # Now we generate super blocks for each SCC and produce final schedule
+    #---------------------------------------------------------------------
+
+    # Put the graph schedule to _sched
+    top._sched.update_schedule = schedule = []
+    top._sched.scc_stats = []
+
+    scc_id = 0
+    for tmp_schedule, variables in plan:
+      if len(tmp_schedule) == 1:
+        schedule.append( tmp_schedule[0] )
+      else:
+        scc_id += 1
+        units = [ ( blk, [ blk ] ) for blk in tmp_schedule ]
+        schedule.append( gen_scc_block( top, scc_id, units, E ) )
+
+  def plan_intra_cycle( self, top, V, G, G_T, E ):
+    """ Return the SCC-level schedule as a list of (blocks, variables).
+    A non-trivial SCC comes with an intra-SCC order of its blocks and
+    the variables that trigger re-execution of the SCC. """
+
     # Compute SCC using Kosaraju's algorithm
 
     SCCs, G_new = kosaraju_scc( G, G_T )
@@ -86,21 +126,14 @@ class DynamicSchedulePass( BasePass ):
 
     assert len(scc_schedule) == len(SCCs)
 
-    #---------------------------------------------------------------------
-    # Now we generate super blocks for each SCC and produce final schedule
-    #---------------------------------------------------------------------
-
     constraint_objs = top._dag.constraint_objs
     onces = top.get_all_update_once()
 
-    # Put the graph schedule to _sched
-    top._sched.update_schedule = schedule = []
-
-    scc_id = 0
+    plan = []
     for i in scc_schedule:
       scc = SCCs[i]
       if len(scc) == 1:
-        schedule.append( list(scc)[0] )
+        plan.append( ( list(scc), [] ) )
       else:
 
         # For each non-trivial SCC, we need to figure out a intra-SCC
@@ -153,7 +186,6 @@ class DynamicSchedulePass( BasePass ):
               Q.append( v )
               visited.add( v )
 
-        scc_id += 1
         variables = set()
         for (u, v) in E:
           # Collect all variables that triggers other blocks in the SCC
@@ -165,94 +197,9 @@ class DynamicSchedulePass( BasePass ):
                           "Probably a loop that involves blocks that should be update_once:\n{}"\
                           .format(", ".join( [ x.__name__ for x in scc] )))
 
-        # generate a loop for scc
-        # Shunning: we just simply loop over the whole SCC block
-        # TODO performance optimizations using Mamba techniques within a SCC block
+        plan.append( ( tmp_schedule, sorted( variables, key=repr ) ) )
 
-        def gen_wrapped_SCCblk( s, scc, src ):
-
-          # TODO mamba?
-          scc_tick_func = SimpleTickPass.gen_tick_function( scc )
-          _globals = { 's': s, 'scc_tick_func': scc_tick_func, 'deepcopy': deepcopy,
-                       'UpblkCyclicError': UpblkCyclicError }
-          _locals  = {}
-
-          custom_exec(py.code.Source( src ).compile(), _globals, _locals)
-          return _locals[ 'generated_block' ]
-
-        template = """
-def wrapped_SCC_{0}():
-  N = 0
-  while True:
-    N += 1
-    if N > 100:
-      raise UpblkCyclicError("Combinational loop detected at runtime in {{{3}}} after 100 iters!")
-    {1}
-    scc_tick_func()
-    {2}
-    # print( "SCC block{0} is executed", num_iters, "times" )
-    break
-generated_block = wrapped_SCC_{0}
-          """
-
-        copy_srcs  = []
-        check_srcs = []
-        # print_srcs = []
-
-        # clean up non-top variables if top is there. remove slices
-
-        final_variables = set()
-
-        for x in sorted( variables, key=repr ):
-          w = x.get_top_level_signal()
-          if w is x:
-            final_variables.add( x )
-            continue
-
-          # w is not x
-          if issubclass( w._dsl.Type, Bits ):
-            if w not in final_variables:
-              final_variables.add( w )
-          elif is_bitstruct_class( w._dsl.Type ):
-            if w not in final_variables:
-              final_variables.add( x )
-          else:
-            final_variables.add( x )
-
-        # group them by host component so that we create less bytecode
-
-        final_var_host = defaultdict(list)
-        for x in final_variables:
-          final_var_host[ x.get_host_component() ].append( x )
-
-        # create a block of copy/check code for each host component. Need
-        # to allocate global var_id across different host components.
-
-        var_id = 0
-        for host, var_list in final_var_host.items():
-
-          copy_srcs .append( f"host={host!r}" )
-          check_srcs.append( f"host={host!r}" )
-
-          sub_check_srcs = []
-
-          hostlen = len(repr(host))
-          for var in var_list:
-            var_id += 1
-            subname = repr(var)[hostlen+1:]
-            if issubclass( var._dsl.Type, Bits ):     copy_srcs.append( f"t{var_id}=host.{subname}.clone()" )
-            elif is_bitstruct_class( var._dsl.Type ): copy_srcs.append( f"t{var_id}=host.{subname}.clone()" )
-            else:                                     copy_srcs.append( f"t{var_id}=deepcopy(host.{subname})" )
-
-            sub_check_srcs.append( f"host.{subname} != t{var_id}" )
-
-          check_srcs.append( f"if { ' or '.join(sub_check_srcs)}: continue" )
-
-        scc_block_src = template.format( scc_id, "; ".join( copy_srcs ), "\n    ".join( check_srcs ),
-                                         ", ".join( [ x.__name__ for x in scc] ) )
-
-        # print(scc_block_src)
-        schedule.append( gen_wrapped_SCCblk( top, tmp_schedule, scc_block_src ) )
+    return plan
 
 def kosaraju_scc( G, G_T ):
 
@@ -349,3 +296,159 @@ def kosaraju_scc( G, G_T ):
           G_new[ scc_u ].add( scc_v )
 
     return SCCs, G_new
+
+#-------------------------------------------------------------------------
+# SCC evaluation
+#-------------------------------------------------------------------------
+# A non-trivial SCC is evaluated with a worklist instead of rerunning all
+# of its blocks until nothing changes. Every block of the SCC starts as
+# pending and we sweep over the intra-SCC order running the pending ones.
+# When a block runs, we only check the variables on its outgoing edges
+# inside the SCC (top._dag.constraint_objs) and make the blocks on the
+# other end of an edge pending if the variable has changed.
+
+class SCCStats:
+  """ Runtime statistics of a non-trivial SCC. nruns counts block
+  executions and nchanges[i] counts how many times variables[i] has
+  changed, so nruns/ncalls close to len(blocks) means the worklist
+  cannot skip much of the SCC. """
+
+  def __init__( s, name, blocks, variables ):
+    s.name       = name
+    s.blocks     = blocks
+    s.variables  = variables
+    s.ncalls     = 0
+    s.nsweeps    = 0
+    s.max_sweeps = 0
+    s.nruns      = 0
+    s.nchanges   = [ 0 ] * len(variables)
+
+  def __str__( s ):
+    ncalls = max( s.ncalls, 1 )
+    changes = sorted( zip( s.nchanges, s.variables ), key=lambda x: -x[0] )[:5]
+    return f"{s.name} ({len(s.blocks)} blocks): {s.ncalls} calls, " \
+           f"{s.nsweeps/ncalls:.2f} sweeps/call (max {s.max_sweeps}), " \
+           f"{s.nruns/ncalls:.2f} blocks/call; most changed: " + \
+           ", ".join( f"{v} {n}" for n, v in changes if n )
+
+def gen_scc_block( top, scc_id, units, E ):
+  """ Return a block that evaluates a non-trivial SCC. units is a list of
+  (callable, blocks) in the intra-SCC order where the callable runs the
+  blocks in order, e.g. a single update block or a meta block. """
+
+  constraint_objs = top._dag.constraint_objs
+
+  unit_of = {}
+  pos_of  = {}
+  for i, (_, blks) in enumerate( units ):
+    for j, blk in enumerate( blks ):
+      unit_of[ blk ] = i
+      pos_of [ blk ] = j
+
+  edges = [ (u, v) for (u, v) in E if u in unit_of and v in unit_of ]
+
+  # Clean up non-top variables if top is there. For slices of Bits we
+  # directly use the top level wide Bits.
+
+  variables = set()
+  for e in edges:
+    variables.update( constraint_objs[ e ] )
+
+  normalized = {}
+  for x in variables:
+    w = x.get_top_level_signal()
+    if w is not x and ( issubclass( w._dsl.Type, Bits ) or w in variables ):
+      normalized[ x ] = w
+    else:
+      normalized[ x ] = x
+
+  final_variables = sorted( set( normalized.values() ), key=repr )
+  var_id = { x: i for i, x in enumerate( final_variables ) }
+
+  # For each unit and variable on its outgoing edges, the units to wake
+  # up if the variable changes. A unit that also reads the variable has
+  # to rerun itself, unless it is only read later in the same unit.
+
+  reads = [ set() for _ in units ]
+  wakes = [ defaultdict(set) for _ in units ]
+  for (u, v) in edges:
+    iu, iv = unit_of[u], unit_of[v]
+    for x in constraint_objs[ (u, v) ]:
+      k = var_id[ normalized[x] ]
+      reads[ iv ].add( k )
+      if iu != iv or pos_of[v] < pos_of[u]:
+        wakes[ iu ][ k ].add( iv )
+
+  for i, w in enumerate( wakes ):
+    for k in reads[i]:
+      if k in w:
+        w[k].add( i )
+
+  # Group the variables by host component so that we create less bytecode
+
+  name = f"wrapped_SCC_{scc_id}"
+  stats = SCCStats( name, [ blk.__name__ for _, blks in units for blk in blks ],
+                    [ repr(x) for x in final_variables ] )
+  top._sched.scc_stats.append( stats )
+
+  _globals = { 'stats': stats, 'C': stats.nchanges, 'deepcopy': deepcopy,
+               'UpblkCyclicError': UpblkCyclicError }
+
+  hosts = {}
+  exprs = []
+  for x in final_variables:
+    host = x.get_host_component()
+    if host not in hosts:
+      hosts[ host ] = f"h{len(hosts)}"
+      _globals[ hosts[ host ] ] = host
+    exprs.append( f"{hosts[host]}.{repr(x)[len(repr(host))+1:]}" )
+
+  def snapshot( k ):
+    Type = final_variables[k]._dsl.Type
+    if issubclass( Type, Bits ):    return f"int({exprs[k]})"
+    if is_bitstruct_class( Type ):  return f"{exprs[k]}.clone()"
+    return f"deepcopy({exprs[k]})"
+
+  def changed( k ):
+    if issubclass( final_variables[k]._dsl.Type, Bits ):
+      return f"int({exprs[k]}) != t{k}"
+    return f"{exprs[k]} != t{k}"
+
+  pending = [ f"p{i}" for i in range(len(units)) ]
+  unit_srcs = []
+  for i, (func, blks) in enumerate( units ):
+    _globals[ f"u{i}" ] = func
+    src = [ f"    if p{i}:",
+            f"      p{i} = False",
+            f"      R += {len(blks)}" ]
+    ks = sorted( wakes[i] )
+    if ks:
+      src.append( f"      {'; '.join( f't{k} = {snapshot(k)}' for k in ks )}" )
+    src.append( f"      u{i}() # {', '.join( x.__name__ for x in blks )}" )
+    for k in ks:
+      src.append( f"      if {changed(k)}:" )
+      src.append( f"        {' = '.join( pending[j] for j in sorted(wakes[i][k]) )} = True" )
+      src.append( f"        C[{k}] += 1" )
+    unit_srcs.append( "\n".join( src ) )
+
+  blk_names = ", ".join( stats.blocks )
+  src = f"""
+def {name}():
+  {' = '.join( pending )} = True
+  N = R = 0
+  while {' or '.join( pending )}:
+    N += 1
+    if N > 100:
+      raise UpblkCyclicError("Combinational loop detected at runtime in {{{blk_names}}} after 100 iters!")
+{chr(10).join( unit_srcs )}
+  stats.ncalls  += 1
+  stats.nsweeps += N
+  stats.nruns   += R
+  if N > stats.max_sweeps:
+    stats.max_sweeps = N
+generated_block = {name}
+"""
+
+  _locals = {}
+  custom_exec( py.code.Source( src ).compile(), _globals, _locals )
+  return _locals[ 'generated_block' ]
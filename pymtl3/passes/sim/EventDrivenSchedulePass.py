@@ -0,0 +1,242 @@
+"""
+========================================================================
+EventDrivenSchedulePass.py
+========================================================================
+Generate an activity-driven schedule on top of the dynamic schedule.
+Instead of executing every update block in every delta cycle, a block is
+only re-executed if one of the signals it reads has changed since the
+last evaluation. This pays off when most of the design is idle.
+
+Changes are detected by comparing the value objects against snapshots
+taken after the last write: we compare the signals written by a block
+right after it executes, and the "source" signals (top-level inports,
+outputs of update_ff blocks, etc.) at the beginning of each evaluation.
+Update blocks are assumed to be pure functions of the signals they read.
+Blocks we cannot analyze (blocks of components that have method ports or
+update_once blocks, blocks that call methods, SCC wrappers and greenlet
+wrappers) are always executed.
+
+Date   : Oct 18, 2026
+"""
+import ast
+import linecache
+
+from pymtl3.datatypes import Bits, is_bitstruct_inst
+from pymtl3.dsl.Connectable import Interface, MethodPort, Signal
+from pymtl3.extra.pypy import custom_exec
+
+from .DynamicSchedulePass import DynamicSchedulePass
+
+
+class EventDrivenSchedulePass( DynamicSchedulePass ):
+  def __call__( self, top ):
+    super().__call__( top )
+    self.schedule_event_driven( top )
+
+  def schedule_event_driven( self, top ):
+
+    schedule = top._sched.update_schedule
+    upblk_reads, upblk_writes, upblk_calls = top.get_all_upblk_metadata()
+    genblk_reads  = top._dag.genblk_reads
+    genblk_writes = top._dag.genblk_writes
+    genblks       = top._dag.genblks
+    onces         = top.get_all_update_once()
+
+    # Components with method ports or update_once blocks, or whose update
+    # blocks modify Python attributes, keep Python state that their update
+    # blocks read and that doesn't show up in the metadata. We don't gate
+    # any of their blocks.
+    impure_hosts = { top.get_update_block_host_component( x ) for x in onces }
+    impure_hosts.update( x.get_host_component() for x in
+                         top.get_all_object_filter( MethodPort ) )
+    for blk in top.get_all_update_blocks():
+      host = top.get_update_block_host_component( blk )
+      if host not in impure_hosts and writes_python_state( host.get_update_block_info( blk )[-1] ):
+        impure_hosts.add( host )
+
+    def top_level_signals( objs ):
+      ret = set()
+      for x in objs:
+        if isinstance( x, Signal ):
+          ret.add( x.get_top_level_signal() )
+        elif isinstance( x, Interface ):
+          ret |= { y.get_top_level_signal() for y in
+                   x._collect_all_single( lambda y: isinstance( y, Signal ) ) }
+        else:
+          return None
+      return ret
+
+    # For each block we collect the top-level signals it reads/writes. A
+    # None sensitivity list means the block is always executed, and a
+    # None write set means we cannot tell what the block writes.
+
+    sensitivity = []
+    out_signals = []
+
+    for blk in schedule:
+      rd = wr = None
+      if blk in genblks:
+        rd = top_level_signals( genblk_reads.get( blk, () ) )
+        wr = top_level_signals( genblk_writes.get( blk, () ) )
+      elif blk in upblk_reads and not upblk_calls.get( blk ):
+        # Methods may write signals on behalf of the caller
+        wr = top_level_signals( upblk_writes[ blk ] )
+        if top.get_update_block_host_component( blk ) not in impure_hosts:
+          rd = top_level_signals( upblk_reads[ blk ] )
+
+      sensitivity.append( rd )
+      out_signals.append( wr )
+
+    top._sched.event_driven_sensitivity = dict( zip( schedule, sensitivity ) )
+
+    # The actual objects only exist after lock_in_simulation, so we
+    # generate the evaluation function lazily and regenerate it if the
+    # model is locked again.
+
+    state = [ None, None ] # [ mapping, eval_func ]
+
+    def event_driven_eval():
+      mapping = top._sim.signal_object_mapping
+      if mapping is not state[0]:
+        state[0] = mapping
+        state[1] = self.gen_event_driven_eval( top, mapping, schedule,
+                                               sensitivity, out_signals, genblks )
+        # Evaluate everything once to establish the snapshots
+        for blk in schedule:
+          blk()
+        state[1].snapshot()
+      else:
+        state[1]()
+
+    top._sched.update_schedule = [ event_driven_eval ]
+
+  @staticmethod
+  def gen_event_driven_eval( top, mapping, schedule, sensitivity, out_signals, genblks ):
+
+    # Signals in the same net share the same value object, so we assign
+    # one index per distinct object. Int constants never change and other
+    # non-Bits values cannot be snapshotted, so the blocks that read them
+    # are always executed.
+
+    obj_idx = {}
+    objs    = []
+    untracked = object()
+
+    def get_idx( sig ):
+      try:
+        value = mapping[ sig ][-1]
+      except KeyError:
+        return untracked
+      if isinstance( value, int ):
+        return None
+      if not isinstance( value, Bits ) and not is_bitstruct_inst( value ):
+        return untracked
+      try:
+        return obj_idx[ id(value) ]
+      except KeyError:
+        obj_idx[ id(value) ] = ret = len(objs)
+        objs.append( value )
+        return ret
+
+    blk_reads  = []
+    blk_writes = []
+    known_written = set()
+
+    for blk, rd, wr in zip( schedule, sensitivity, out_signals ):
+      rs = None if rd is None else { get_idx( x ) for x in rd } - { None }
+
+      if wr is not None:
+        ws = { get_idx( x ) for x in wr } - { None, untracked }
+        # Top-level signals in a net share the writer's value object, so
+        # a net block only writes the objects that it doesn't read
+        if blk in genblks and rs:
+          ws -= rs
+        known_written |= ws
+        blk_writes.append( sorted(ws) )
+      else:
+        blk_writes.append( None )
+
+      if rs is not None and untracked not in rs:
+        blk_reads.append( sorted(rs) )
+      else:
+        blk_reads.append( None )
+
+    # Only signals read by some gated block need to be tracked. Source
+    # signals are not written by any block we can analyze. They are
+    # checked at the beginning of every evaluation and after every block
+    # that writes unknown signals.
+
+    tracked = set()
+    for rs in blk_reads:
+      if rs:
+        tracked.update( rs )
+
+    sources = sorted( tracked - known_written )
+
+    def check( i, indent ):
+      return [ f"{indent}if o{i} != t[{i}]:",
+               f"{indent}  t[{i}] = o{i}.clone()",
+               f"{indent}  d{i} = True" ]
+
+    lines = [ "def event_driven_eval():" ]
+    if tracked:
+      lines.append( "  " + " = ".join( f"d{i}" for i in sorted(tracked) ) + " = False" )
+
+    for i in sources:
+      lines.extend( check( i, "  " ) )
+
+    for j, (rs, ws) in enumerate( zip( blk_reads, blk_writes ) ):
+      if rs is None:
+        lines.append( f"  blk{j}()" )
+        indent = "  "
+      elif rs:
+        lines.append( f"  if {' or '.join( f'd{i}' for i in rs )}:" )
+        lines.append( f"    blk{j}()" )
+        indent = "    "
+      else:
+        continue # reads nothing that can change
+
+      for i in ( sources if ws is None else ws ):
+        if i in tracked:
+          lines.extend( check( i, indent ) )
+
+    if len(lines) == 1:
+      lines.append( "  pass" )
+
+    lines += [
+      "",
+      "def snapshot():",
+      "  t[:] = [ x.clone() for x in objs ]",
+      "",
+      "event_driven_eval.snapshot = snapshot",
+    ]
+
+    _globals = { f"blk{j}": blk for j, blk in enumerate(schedule) }
+    _globals.update( { f"o{i}": x for i, x in enumerate(objs) } )
+    _globals[ 'objs' ] = objs
+    _globals[ 't' ]    = [ x.clone() for x in objs ]
+
+    fname = f"event_driven_eval_{id(top)}"
+    src   = "\n".join( lines )
+    custom_exec( compile( src, filename=fname, mode="exec" ), _globals, _globals )
+    linecache.cache[ fname ] = (len(src), None, lines, fname)
+
+    return _globals[ 'event_driven_eval' ]
+
+def writes_python_state( tree ):
+  """ Return True if the update block modifies anything other than local
+  variables and signals (which can only be updated with @= and <<=). """
+  for node in ast.walk( tree ):
+    if isinstance( node, (ast.Assign, ast.AnnAssign) ):
+      targets = node.targets if isinstance( node, ast.Assign ) else [ node.target ]
+      for x in targets:
+        if not isinstance( x, (ast.Name, ast.Tuple, ast.List) ) or \
+           any( not isinstance( y, ast.Name ) for y in getattr( x, 'elts', () ) ):
+          return True
+    elif isinstance( node, ast.AugAssign ):
+      if not isinstance( node.op, (ast.MatMult, ast.LShift) ) and \
+         not isinstance( node.target, ast.Name ):
+        return True
+    elif isinstance( node, (ast.Delete, ast.Global, ast.Nonlocal) ):
+      return True
+  return False
@@ -23,19 +23,42 @@ class GenDAGPass( BasePass ):
 
   def __call__( self, top ):
     top.check()
+
+    # Net blocks of the nets that are not changed since the last run
+    # (e.g. after replace_component) are reused instead of recompiled
+    prev_net_genblks = top._dag.net_genblks if hasattr( top, "_dag" ) and \
+                       hasattr( top._dag, "net_genblks" ) else {}
+    prev_genblk_src  = top._dag.genblk_src if prev_net_genblks else {}
+
     top._dag = PassMetadata()
 
-    placeholders = [ x for x in top._dsl.all_named_objects
-                     if isinstance( x, Placeholder ) ]
+    placeholders = list( top.get_all_object_filter( Placeholder ) )
 
     if placeholders:
       raise LeftoverPlaceholderError( placeholders )
 
-    self._generate_net_blocks( top )
-    self._process_value_constraints( top )
+    self._generate_net_blocks( top, prev_net_genblks, prev_genblk_src )
+
+    # The constraint graph of value signals only depends on the signals
+    # each block reads and writes, so we can reuse the one from a previous
+    # run with the same inputs.
+    cache  = getattr( top._dsl, "elab_cache", None )
+    cached = None
+    if cache is not None:
+      inputs = cache.hash_constraint_inputs( top )
+      cached = cache.load_constraints( top, inputs )
+    if cached is None:
+      self._process_value_constraints( top )
+      if cache is not None:
+        cache.store_constraints( top, inputs, top._dag.all_constraints,
+                                 top._dag.constraint_objs )
+    else:
+      top._dag.all_constraints = cached[0]
+      top._dag.constraint_objs = defaultdict( set, cached[1] )
+
     self._process_methods( top )
 
-  def _generate_net_blocks( self, top ):
+  def _generate_net_blocks( self, top, prev_net_genblks, prev_genblk_src ):
     """ _generate_net_blocks:
     Each net is an update block. Readers are actually "written" here.
       >>> s.net_reader1 = s.net_writer
@@ -45,7 +68,11 @@ class GenDAGPass( BasePass ):
     top._dag.genblk_hostobj = {}
     top._dag.genblk_reads   = {}
     top._dag.genblk_writes  = {}
-    # top._dag.genblk_src     = {}
+    # genblk -> (source, globals, constant writer value or None); used by
+    # passes that inline net blocks
+    top._dag.genblk_src     = {}
+    # id(net) -> (net, genblk), to reuse net blocks in the next run
+    top._dag.net_genblks    = {}
 
     # Fall back to compiling one block at a time
     # This is currently because there might be different structs with
@@ -61,13 +88,26 @@ class GenDAGPass( BasePass ):
       line_cache[ fname ] = (len(src), None, src.splitlines(), fname )
       return list(_locals.values())[0]
 
-    for writer, signals in top.get_all_value_nets():
+    for net in top.get_all_value_nets():
+      writer, signals = net
       if len(signals) == 1:
         continue
 
       all_readers = [ x for x in signals if x is not writer ]
       all_fanout  = len( all_readers )
 
+      # The same net object means the net is untouched since the last run
+      prev = prev_net_genblks.get( id(net) )
+      if prev is not None and prev[0] is net:
+        blk = prev[1]
+        top._dag.genblks.add( blk )
+        top._dag.genblk_src[ blk ] = prev_genblk_src[ blk ]
+        top._dag.net_genblks[ id(net) ] = prev
+        if writer.is_signal():
+          top._dag.genblk_reads[ blk ] = [ writer ]
+        top._dag.genblk_writes[ blk ] = all_readers
+        continue
+
       # Here we remove every top-level signal from the reader list, but need to keep a shallow
       # one as the delegate
       #
@@ -120,9 +160,12 @@ class GenDAGPass( BasePass ):
       # to convey the constraints using all_readers
 
       if fanout == 0:
-        blk = compile_net_blk( {}, f"""def {genblk_name}(): pass""", writer )
+        gen_src = f"""def {genblk_name}(): pass"""
+        blk = compile_net_blk( {}, gen_src, writer )
 
         top._dag.genblks.add( blk )
+        top._dag.genblk_src[ blk ] = ( gen_src, {}, None )
+        top._dag.net_genblks[ id(net) ] = ( net, blk )
         if writer.is_signal():
           top._dag.genblk_reads[ blk ] = [ writer ]
         top._dag.genblk_writes[ blk ] = all_readers
@@ -189,6 +232,9 @@ def {}():
       blk = compile_net_blk( _globals, gen_src, writer )
 
       top._dag.genblks.add( blk )
+      top._dag.genblk_src[ blk ] = ( gen_src, _globals,
+                                     writer._dsl.const if isinstance( writer, Const ) else None )
+      top._dag.net_genblks[ id(net) ] = ( net, blk )
       if writer.is_signal():
         top._dag.genblk_reads[ blk ] = [ writer ]
       top._dag.genblk_writes[ blk ] = all_readers
@@ -354,8 +400,8 @@ def {}():
     # because all members in the net will eventually point to the same
     # method object.
 
-    top._dsl.top_level_callee_ports = top.get_all_object_filter(
-      lambda x: isinstance(x, CalleePort) and x.get_host_component() is top )
+    top._dsl.top_level_callee_ports = { x for x in top._dsl.object_registry.get_objects_in_host( top )
+                                        if isinstance( x, CalleePort ) }
 
     method_is_top_level_callee = set()
 
@@ -583,7 +629,7 @@ def {}():
     # Mark update blocks that call blocking methods
     # (CalleeIfcFL/CallerIfcFL) for greenlet wrapping
 
-    blocking_ifcs = top.get_all_object_filter( lambda x: isinstance( x, (CalleeIfcFL, CallerIfcFL) ) )
+    blocking_ifcs = top.get_all_object_filter( (CalleeIfcFL, CallerIfcFL) )
 
     top._dag.greenlet_upblks = set()
 
@@ -7,16 +7,27 @@ Author : Shunning Jiang
 Date   : Jan 26, 2020
 """
 
+import io
+import os
+import pickle
+import random
+import sys
+import zlib
+from collections import deque
+
 import py
 
-from pymtl3.datatypes import Bits, b1
+from pymtl3.datatypes import Bits, b1, is_bitstruct_class, is_bitstruct_inst, mk_bits
 from pymtl3.dsl.Component import Component
 from pymtl3.dsl.Connectable import Const, Interface, MethodPort, Signal
 from pymtl3.dsl.NamedObject import NamedObject
+from pymtl3.extra.disk_cache import hash_strings
 from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.backends.verilog import VerilogTBGenPass
 from pymtl3.passes.BasePass import BasePass, PassMetadata
 from pymtl3.passes.errors import PassOrderError
+from pymtl3.passes.tracing.BinaryLineTracePass import BinaryLineTracePass
+from pymtl3.passes.tracing.BinaryWavePass import BinaryWavePass
 from pymtl3.passes.tracing.CLLineTracePass import CLLineTracePass
 from pymtl3.passes.tracing.LineTraceParamPass import LineTraceParamPass
 from pymtl3.passes.tracing.PrintTextWavePass import PrintTextWavePass
@@ -57,11 +68,12 @@ class PrepareSimPass( BasePass ):
     self.create_sim_eval_comb( top )
     self.create_sim_tick( top )
     self.create_sim_reset( top )
+    self.create_sim_checkpoint( top )
 
 
   def create_sim_eval_comb( self, top ):
     # Pure RTL design, add eval_combinational
-    if len( top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ) ) == 0 and \
+    if len( top.get_all_object_filter( MethodPort ) ) == 0 and \
        len( top.get_all_update_once() ) == 0:
       sim_eval_combinational = SimpleTickPass.gen_tick_function( [top._sim.check_top_level_inports] + top._sched.update_schedule )
     else:
@@ -74,7 +86,7 @@ class PrepareSimPass( BasePass ):
     final_schedule = []
 
     # Pure RTL -- tick update blocks first
-    if len( top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ) ) == 0 and \
+    if len( top.get_all_object_filter( MethodPort ) ) == 0 and \
        len( top.get_all_update_once() ) == 0:
       final_schedule = top._sched.update_schedule[::]
 
@@ -95,6 +107,12 @@ class PrepareSimPass( BasePass ):
     if top.has_metadata( PrintTextWavePass.textwave_func ):
       ret.append( top.get_metadata( PrintTextWavePass.textwave_func ) )
 
+    if top.has_metadata( BinaryWavePass.wave_func ):
+      ret.append( top.get_metadata( BinaryWavePass.wave_func ) )
+
+    if top.has_metadata( BinaryLineTracePass.line_trace_func ):
+      ret.append( top.get_metadata( BinaryLineTracePass.line_trace_func ) )
+
     if top.has_metadata( VerilogTBGenPass.vtbgen_hooks ):
       ret.extend( top.get_metadata( VerilogTBGenPass.vtbgen_hooks ) )
 
@@ -161,6 +179,86 @@ class PrepareSimPass( BasePass ):
       return top._sim.simulated_cycles
     top.sim_cycle_count = sim_cycle_count
 
+  #-----------------------------------------------------------------------
+  # Checkpoint/restore
+  #-----------------------------------------------------------------------
+  # top.sim_checkpoint( path=None ) returns the state of the simulation
+  # as bytes (and writes it to path if given): the cycle count, the
+  # value and the _next buffer of every signal, and the Python attributes
+  # of all components and interfaces that are not part of the design
+  # (e.g. CL queue contents, magic memory pages, test source indices).
+  # top.sim_restore( ckpt ) restores a checkpoint (bytes or a path) into
+  # the same design, which may be another instance built in another
+  # process. Signal values and mutable attributes are restored in place,
+  # so the objects captured by update blocks stay valid. State that only
+  # lives in the local variables of construct (e.g. a random generator
+  # captured by an update block) is not part of the checkpoint.
+  #
+  # top.sim_fork() is the fast in-memory alternative for running several
+  # detailed simulations from one warmed-up state. It forks the process
+  # like os.fork(), so the child starts with a copy-on-write copy of the
+  # whole simulator.
+
+  @staticmethod
+  def create_sim_checkpoint( top ):
+
+    def sim_checkpoint( path=None ):
+      values, objs = _collect_sim_state( top )
+      buf = io.BytesIO()
+      try:
+        _CheckpointPickler( buf, values ).dump(
+          ( top._sim.simulated_cycles,
+            [ _get_value_state( v ) for v in values ],
+            [ getattr( obj, name ) for obj, name in objs ] ) )
+      except Exception as e:
+        for obj, name in objs:
+          try:
+            _CheckpointPickler( io.BytesIO(), values ).dump( getattr( obj, name ) )
+          except Exception:
+            raise TypeError( f"Cannot checkpoint {obj!r}.{name}: {e}\n"
+                             f"- Suggestion: prefix the attribute with '_' to exclude "
+                             f"it from checkpoints" ) from e
+        raise
+
+      ret = _CKPT_MAGIC + _sim_state_key( top, values, objs ).encode() + \
+            zlib.compress( buf.getvalue(), 1 )
+      if path is not None:
+        with open( path, 'wb' ) as f:
+          f.write( ret )
+      return ret
+
+    def sim_restore( ckpt ):
+      if not isinstance( ckpt, (bytes, bytearray) ):
+        with open( ckpt, 'rb' ) as f:
+          ckpt = f.read()
+
+      if ckpt[:len(_CKPT_MAGIC)] != _CKPT_MAGIC:
+        raise ValueError( "Not a PyMTL simulation checkpoint" )
+      key  = ckpt[ len(_CKPT_MAGIC) : len(_CKPT_MAGIC) + 64 ].decode()
+      data = ckpt[ len(_CKPT_MAGIC) + 64 : ]
+
+      values, objs = _collect_sim_state( top )
+      if key != _sim_state_key( top, values, objs ):
+        raise ValueError( f"The checkpoint was not taken from the same design as {top!r}" )
+
+      cycles, value_states, obj_states = \
+        _CheckpointUnpickler( io.BytesIO( zlib.decompress( data ) ), values,
+                              _collect_bitstruct_types( top, objs ) ).load()
+      top._sim.simulated_cycles = cycles
+      for v, state in zip( values, value_states ):
+        _set_value_state( v, state )
+      for (obj, name), state in zip( objs, obj_states ):
+        _restore_attr( obj, name, state )
+
+    def sim_fork():
+      sys.stdout.flush()
+      sys.stderr.flush()
+      return os.fork()
+
+    top.sim_checkpoint = sim_checkpoint
+    top.sim_restore    = sim_restore
+    top.sim_fork       = sim_fork
+
   @staticmethod
   def create_lock_unlock_simulation( top ):
 
@@ -297,3 +395,185 @@ def check_top_level_inports():
 
     top.lock_in_simulation = lock_in_simulation
     top.unlock_simulation  = unlock_simulation
+
+#-------------------------------------------------------------------------
+# Checkpoint helpers
+#-------------------------------------------------------------------------
+
+_CKPT_MAGIC = b"PYMTLCKPT1\0"
+
+def _collect_sim_state( top ):
+  """ Return the signal values and the (object, attribute) pairs of the
+  Python state of top in a deterministic order. """
+  mapping = top._sim.signal_object_mapping
+
+  values = []
+  value_ids = set()
+  signal_slots = set()
+  containers = set()
+  for signal in sorted( mapping, key=repr ):
+    current_obj, i, is_list, value = mapping[ signal ]
+    if is_list: containers.add( id(current_obj) )
+    else:       signal_slots.add( (id(current_obj), i) )
+    if id(value) not in value_ids and (isinstance( value, Bits ) or is_bitstruct_inst( value )):
+      value_ids.add( id(value) )
+      values.append( value )
+
+  def is_design( x ):
+    if isinstance( x, NamedObject ) or id(x) in value_ids or id(x) in containers:
+      return True
+    if isinstance( x, list ):
+      return any( is_design( y ) for y in x )
+    return False
+
+  objs = []
+  named = [ x for x in top._dsl.all_named_objects if isinstance( x, (Component, Interface) ) ]
+  for obj in sorted( named, key=repr ):
+    for name, x in obj.__dict__.items():
+      if name[0] == '_' or (id(obj), name) in signal_slots or callable( x ) or is_design( x ):
+        continue
+      objs.append( (obj, name) )
+  return values, objs
+
+def _sim_state_key( top, values, objs ):
+  return hash_strings( [ f"{x!r}:{x.__class__.__qualname__}" for x in sorted( top._dsl.all_components, key=repr ) ] +
+                       [ x.__class__.__name__ for x in values ] +
+                       [ f"{obj!r}.{name}" for obj, name in objs ] )
+
+# Python state may reference signal values, e.g. a CL queue holding the
+# value of an output port. These references are saved as the index of the
+# value so that they point to the live signal values after a restore.
+#
+# Other bitstruct instances are saved as the field layout of their type
+# and their bits, because their types are often created inside functions
+# (e.g. mk_mem_msg) and cannot be pickled. They are rebuilt with the type
+# of the same layout found in the restoring design.
+
+def _bitstruct_layout( T ):
+  if is_bitstruct_class( T ):
+    fields = ",".join( f"{name}:{_bitstruct_layout( t )}"
+                       for name, t in T.__bitstruct_fields__.items() )
+    return f"{T.__qualname__}({fields})"
+  if isinstance( T, list ):
+    return f"[{len(T)}]{_bitstruct_layout( T[0] )}"
+  return repr( T )
+
+def _collect_bitstruct_types( top, objs ):
+  """ Return a dict that maps the layout of each bitstruct type used by
+  the signals, the method interfaces and the Python state of top to the
+  type. """
+  types = {}
+
+  def add_type( T ):
+    if isinstance( T, list ):
+      add_type( T[0] )
+    elif is_bitstruct_class( T ):
+      layout = _bitstruct_layout( T )
+      if layout not in types:
+        types[ layout ] = T
+        for t in T.__bitstruct_fields__.values():
+          add_type( t )
+
+  seen = set()
+  def add_value( x ):
+    if is_bitstruct_inst( x ):
+      add_type( type(x) )
+    elif isinstance( x, (list, tuple, set, frozenset, deque, dict) ) and id(x) not in seen:
+      seen.add( id(x) )
+      for y in ( x.items() if isinstance( x, dict ) else x ):
+        add_value( y )
+
+  for x in top._dsl.all_signals:
+    add_type( x._dsl.Type )
+  for x in top.get_all_object_filter( MethodPort ):
+    add_type( getattr( x, 'Type', None ) )
+  for x in top._dsl.all_named_objects:
+    if isinstance( x, Interface ):
+      add_type( getattr( x, 'MsgType', None ) )
+      add_type( getattr( x, 'RetType', None ) )
+  for obj, name in objs:
+    add_value( getattr( obj, name ) )
+  return types
+
+class _CheckpointPickler( pickle.Pickler ):
+  def __init__( self, file, values ):
+    super().__init__( file, pickle.HIGHEST_PROTOCOL )
+    self.value_index = { id(v): i for i, v in enumerate( values ) }
+    self.layouts = {}
+
+  def persistent_id( self, obj ):
+    i = self.value_index.get( id(obj) )
+    if i is None and is_bitstruct_inst( obj ):
+      T = type(obj)
+      if T not in self.layouts:
+        self.layouts[T] = _bitstruct_layout( T )
+      return ( self.layouts[T], int( obj.to_bits() ) )
+    return i
+
+class _CheckpointUnpickler( pickle.Unpickler ):
+  def __init__( self, file, values, types ):
+    super().__init__( file )
+    self.values = values
+    self.types  = types
+
+  def persistent_load( self, pid ):
+    if isinstance( pid, int ):
+      return self.values[ pid ]
+    layout, uint = pid
+    T = self.types.get( layout )
+    if T is None:
+      raise TypeError( f"Cannot restore a bitstruct of type {layout}: the design "
+                       f"doesn't use a bitstruct type with the same fields" )
+    return T.from_bits( mk_bits( T.nbits )( uint ) )
+
+def _get_value_state( v ):
+  if isinstance( v, list ):
+    return [ _get_value_state( x ) for x in v ]
+  if isinstance( v, Bits ):
+    return ( int(v), getattr( v, '_next', None ) )
+  if is_bitstruct_inst( v ):
+    if getattr( v, '__bitstruct_packed__', False ):
+      return ( v._uint, v.__dict__.get( '_next' ) )
+    return tuple( _get_value_state( getattr( v, f ) ) for f in v.__bitstruct_fields__ )
+  raise TypeError( f"Cannot checkpoint the signal value {v!r}" )
+
+def _set_value_state( v, state ):
+  if isinstance( v, list ):
+    for x, st in zip( v, state ):
+      _set_value_state( x, st )
+  elif isinstance( v, Bits ):
+    v @= state[0]
+    if state[1] is not None:
+      v._next = state[1]
+  elif getattr( v, '__bitstruct_packed__', False ):
+    v._uint = state[0]
+    if state[1] is not None:
+      v._next = state[1]
+  else:
+    for f, st in zip( v.__bitstruct_fields__, state ):
+      _set_value_state( getattr( v, f ), st )
+
+def _restore_attr( obj, name, new ):
+  # Update mutable objects in place in case they are also referenced by
+  # the closures of update blocks or by other components
+  old = obj.__dict__.get( name )
+  if old is not None and type(old) is type(new):
+    if isinstance( old, (list, bytearray) ):
+      old[:] = new
+      return
+    if isinstance( old, (dict, set) ):
+      old.clear()
+      old.update( new )
+      return
+    if isinstance( old, deque ):
+      old.clear()
+      old.extend( new )
+      return
+    if isinstance( old, random.Random ):
+      old.setstate( new.getstate() )
+      return
+    if hasattr( old, '__dict__' ) and not isinstance( old, (Bits, type) ):
+      old.__dict__.clear()
+      old.__dict__.update( new.__dict__ )
+      return
+  setattr( obj, name, new )
@@ -119,6 +119,53 @@ def test_combinational_loop():
     return
   raise Exception("Should've thrown UpblkCyclicError.")
 
+def test_scc_worklist():
+
+  class Top(Component):
+
+    def construct( s ):
+      s.in_ = InPort(8)
+      s.out = OutPort(8)
+      s.b   = Wire(8)
+      s.c   = Wire(8)
+      s.d   = Wire(8)
+
+      # Set all bits above the lowest set bit of in_
+      @update
+      def up1():
+        s.b @= s.in_ | s.d
+
+      @update
+      def up2():
+        s.c @= s.b
+
+      @update
+      def up3():
+        s.d @= s.c << 1
+        s.out @= s.c
+
+  A = Top()
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( DynamicSchedulePass() )
+  A.apply( PrepareSimPass() )
+  A.sim_reset()
+
+  for x, y in [ (0b100, 0b11111100), (0b1, 0b11111111), (0b1000000, 0b11000000) ]:
+    A.in_ @= x
+    A.sim_eval_combinational()
+    assert A.out == y
+    A.sim_tick()
+
+  stats, = A._sched.scc_stats
+  assert sorted( stats.blocks ) == [ 'up1', 'up2', 'up3' ]
+  assert stats.ncalls > 0 and stats.max_sweeps > 1
+  # Blocks whose inputs have not changed are skipped
+  assert stats.nruns < 3 * stats.nsweeps
+  assert sum( stats.nchanges ) > 0
+  assert str( stats ).startswith( f"wrapped_SCC_1 (3 blocks): {stats.ncalls} calls" )
+  assert "most changed: " in str( stats ) and "s.b" in str( stats )
+
 def test_very_deep_dag():
 
   class Inner(Component):
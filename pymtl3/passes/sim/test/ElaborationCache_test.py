@@ -0,0 +1,201 @@
+#=========================================================================
+# ElaborationCache_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import glob
+import os
+import random
+
+from pymtl3.datatypes import Bits8
+from pymtl3.dsl import *
+from pymtl3.dsl.ElaborationCache import ElaborationCache
+from pymtl3.extra.test_utility import mk_cache_fixture
+from pymtl3.passes.PassGroups import DefaultPassGroup
+from pymtl3.stdlib.queues import BypassQueueRTL, NormalQueueRTL
+
+from ..GenDAGPass import GenDAGPass
+
+elab_cache = mk_cache_fixture( ElaborationCache )
+
+class Chain( Component ):
+  def construct( s, n ):
+    s.in_msg = InPort( Bits8 )
+    s.in_en  = InPort()
+    s.in_rdy = OutPort()
+    s.out_rdy = InPort()
+    s.out_en  = OutPort()
+    s.out_msg = OutPort( Bits8 )
+
+    s.q = [ NormalQueueRTL( Bits8, 2 ) if i % 2 else BypassQueueRTL( Bits8, 1 )
+            for i in range(n) ]
+    s.xfer = [ Wire() for _ in range(n-1) ]
+
+    s.q[0].enq.msg //= s.in_msg
+    s.q[0].enq.en  //= s.in_en
+    s.in_rdy       //= s.q[0].enq.rdy
+    for i in range(n-1):
+      s.q[i].deq.ret  //= s.q[i+1].enq.msg
+      s.q[i].deq.en   //= s.xfer[i]
+      s.q[i+1].enq.en //= s.xfer[i]
+    s.out_msg       //= s.q[-1].deq.ret
+    s.q[-1].deq.en  //= s.out_en
+
+    @update
+    def up_xfer():
+      for i in range(n-1):
+        s.xfer[i] @= s.q[i].deq.rdy & s.q[i+1].enq.rdy
+      s.out_en @= s.q[-1].deq.rdy & s.out_rdy
+
+class Loop( Component ):
+  def construct( s ):
+    s.in_ = InPort( 8 )
+    s.out = OutPort( 8 )
+    s.a   = Wire( 8 )
+    s.b   = Wire( 8 )
+
+    # A false combinational loop
+    @update
+    def up_a():
+      if s.in_ > 3: s.a @= s.in_
+      else:         s.a @= s.b + 1
+
+    @update
+    def up_b():
+      if s.in_ > 3: s.b @= s.a
+      else:         s.b @= s.in_
+
+    @update
+    def up_out():
+      s.out @= s.a + s.b
+
+# Stands for a constant imported from a helper module, which is not
+# covered by the key of the cache
+SELECT = 0
+
+class Select( Component ):
+  def construct( s ):
+    s.in_ = InPort( 8 )
+    s.out = OutPort( 8 )
+    s.x   = [ Wire( 8 ) for _ in range(2) ]
+
+    @update
+    def up_x0():
+      s.x[0] @= s.in_
+
+    @update
+    def up_out():
+      s.out @= s.x[ SELECT ]
+
+    @update
+    def up_x1():
+      s.x[1] @= s.in_ + 1
+
+def _entries( path ):
+  return sorted( glob.glob( os.path.join( path, "elab", "*", "*.json" ) ) )
+
+def _refs( top, blks ):
+  return [ ElaborationCache.blk_ref( top, x ) for x in blks ]
+
+def _elaborate( model ):
+  model.elaborate()
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+  return model
+
+def test_nets_and_constraints( elab_cache ):
+  A = Chain( 4 )
+  A.elaborate()
+  assert A._dsl.elab_cache is not None
+  nets_A = { repr(w): sorted( map( repr, n ) ) for w, n in A.get_all_value_nets() }
+  A.apply( GenDAGPass() )
+  assert len( _entries( elab_cache ) ) == 2
+
+  B = Chain( 4 )
+  B.elaborate()
+  nets_B = { repr(w): sorted( map( repr, n ) ) for w, n in B.get_all_value_nets() }
+  B.apply( GenDAGPass() )
+
+  assert nets_A == nets_B
+  assert { tuple(map( repr, _refs( A, e ) )) for e in A._dag.all_constraints } == \
+         { tuple(map( repr, _refs( B, e ) )) for e in B._dag.all_constraints }
+
+  # A different parameter is a different entry
+  C = Chain( 3 )
+  C.elaborate()
+  C.apply( GenDAGPass() )
+  assert len( _entries( elab_cache ) ) == 4
+
+def test_simulation_matches( elab_cache ):
+  models = [ _elaborate( Chain( 5 ) ) for _ in range(2) ]
+  # The second one uses the cached intra-cycle schedule
+  assert [ _refs( models[0], [x] ) for x in models[0]._sched.update_schedule ] == \
+         [ _refs( models[1], [x] ) for x in models[1]._sched.update_schedule ]
+
+  rng = random.Random( 0x5678 )
+  for i in range(100):
+    msg, rdy, en = rng.randrange(256), rng.randrange(2), rng.randrange(2)
+    outs = []
+    for x in models:
+      x.in_msg  @= msg
+      x.out_rdy @= rdy
+      x.in_en   @= 0
+      x.sim_eval_combinational()
+      x.in_en   @= en & x.in_rdy
+      x.sim_eval_combinational()
+      outs.append( (int(x.in_rdy), int(x.out_en), int(x.out_msg)) )
+      x.sim_tick()
+    assert outs[0] == outs[1]
+
+def test_scc_schedule( elab_cache ):
+  models = [ _elaborate( Loop() ) for _ in range(2) ]
+  for i in range(10):
+    for x in models:
+      x.in_ @= i
+      x.sim_eval_combinational()
+    assert models[0].out == models[1].out
+
+def test_stale_constraints_and_schedule( elab_cache ):
+  global SELECT
+  _elaborate( Select() )
+  entries = _entries( elab_cache )
+
+  # The update blocks read SELECT when they run, so simulate before it is
+  # restored
+  SELECT = 1
+  try:
+    A = _elaborate( Select() )
+    A.in_ @= 5
+    A.sim_eval_combinational()
+    assert A.out == 6
+  finally:
+    SELECT = 0
+  assert _entries( elab_cache ) == entries
+
+  constraints = { tuple( x.__name__ for x in e ) for e in A._dag.all_constraints }
+  assert constraints == { ( 'up_x1', 'up_out' ) }
+
+def test_corrupted_entry( elab_cache ):
+  _elaborate( Chain( 2 ) )
+  entries = _entries( elab_cache )
+  assert entries
+  for name in entries:
+    with open( name, 'w' ) as f:
+      f.write( '{"key": "garbage", "value": [[' )
+
+  _elaborate( Chain( 2 ) )
+  assert _entries( elab_cache ) == entries
+
+def test_mutation_drops_cache( elab_cache ):
+  A = Chain( 2 )
+  A.elaborate()
+  assert A._dsl.elab_cache is not None
+  A.add_value_port( A, "extra", InPort( 8 ) )
+  assert A._dsl.elab_cache is None
+
+def test_disabled_by_default( elab_cache ):
+  ElaborationCache.disable()
+  A = Chain( 2 )
+  A.elaborate()
+  assert A._dsl.elab_cache is None
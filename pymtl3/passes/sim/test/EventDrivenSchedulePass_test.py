@@ -0,0 +1,220 @@
+#=========================================================================
+# EventDrivenSchedulePass_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import random
+
+from pymtl3.datatypes import Bits8, Bits32, bitstruct
+from pymtl3.dsl import *
+from pymtl3.stdlib.queues import BypassQueueRTL, NormalQueueRTL, PipeQueueRTL
+
+from ..EventDrivenSchedulePass import EventDrivenSchedulePass
+from ..GenDAGPass import GenDAGPass
+from ..PrepareSimPass import PrepareSimPass
+
+
+def _apply( A ):
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( EventDrivenSchedulePass() )
+  A.apply( PrepareSimPass(print_line_trace=False) )
+  A.sim_reset()
+  return A
+
+def test_skip_idle_blocks():
+
+  count = []
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( 32 )
+      s.out = OutPort( 32 )
+      s.tmp = Wire( 32 )
+
+      @update
+      def up_add():
+        count.append( 1 )
+        s.tmp @= s.in_ + 1
+
+      @update
+      def up_mul():
+        s.out @= s.tmp * 2
+
+  A = _apply( Top() )
+
+  A.in_ @= 10
+  A.sim_eval_combinational()
+  assert A.out == 22
+
+  del count[:]
+  for i in range(10):
+    A.sim_tick()
+  assert A.out == 22
+  assert len(count) == 0
+
+  A.in_ @= 11
+  A.sim_tick()
+  assert A.out == 24
+  assert len(count) == 1
+
+def test_sequential_loop():
+
+  class Top( Component ):
+    def construct( s ):
+      s.b = Wire( Bits32 )
+      s.c = Wire( Bits32 )
+
+      @update
+      def up1():
+        s.b @= s.c + 1
+
+      @update_ff
+      def up2():
+        if s.reset:
+          s.c <<= 0
+        else:
+          s.c <<= s.b + 1
+
+  A = _apply( Top() )
+  for i in range(5):
+    A.sim_tick()
+  assert A.c == 10
+  assert A.b == 11
+
+def test_false_cyclic_dependency():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( 32 )
+      s.a = Wire( 32 )
+      s.b = Wire( 32 )
+      s.c = Wire( 32 )
+      s.d = Wire( 32 )
+      s.e = Wire( 32 )
+
+      @update
+      def up1():
+        s.a @= s.in_ + 1
+        s.b @= s.d + 1
+
+      @update
+      def up2():
+        s.c @= s.a + 1
+
+      @update
+      def up3():
+        s.d @= s.c + 1
+
+      @update
+      def up4():
+        s.e @= s.b + 1
+
+  A = _apply( Top() )
+  for i in range(3):
+    A.in_ @= i
+    A.sim_tick()
+    assert A.e == i + 5
+
+def test_struct_slices():
+
+  @bitstruct
+  class SomeMsg:
+    a: [ Bits8, Bits8 ]
+    b: Bits32
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_    = InPort( 8 )
+      s.struct = Wire( SomeMsg )
+      s.out    = OutPort( 32 )
+
+      @update
+      def up_struct():
+        s.struct.a[0] @= s.in_
+        s.struct.a[1] @= s.in_ + 1
+        s.struct.b    @= 0
+
+      @update
+      def up_out():
+        s.out @= 0
+        s.out[0:8]  @= s.struct.a[1]
+        s.out[8:16] @= s.struct.a[0]
+
+  A = _apply( Top() )
+  for i in range(5):
+    A.in_ @= i
+    A.sim_tick()
+    assert A.out == ((i << 8) | (i + 1))
+
+def test_method_port():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_  = InPort( 32 )
+      s.data = Wire( 32 )
+      s.out  = OutPort( 32 )
+
+      @update_once
+      def up_call():
+        s.write( s.in_ )
+
+      @update
+      def up_out():
+        s.out @= s.data + 1
+
+      s.add_constraints( M(s.write) < U(up_out) )
+
+    @method_port
+    def write( s, v ):
+      s.data @= v
+
+  A = _apply( Top() )
+  for i in range(5):
+    A.in_ @= i
+    A.sim_tick()
+    assert A.out == i + 1
+
+def run_queue_vs_default( Queue, num_entries ):
+
+  from pymtl3.passes.PassGroups import DefaultPassGroup
+
+  A = _apply( Queue( Bits8, num_entries ) )
+  B = Queue( Bits8, num_entries )
+  B.elaborate()
+  B.apply( DefaultPassGroup() )
+  B.sim_reset()
+
+  rng = random.Random( 0x1234 )
+  for i in range(100):
+    enq_en = rng.randrange(2)
+    deq_en = rng.randrange(2)
+    msg    = rng.randrange(256)
+
+    for x in [ A, B ]:
+      x.enq.msg @= msg
+      x.enq.en  @= 0
+      x.deq.en  @= 0
+      x.sim_eval_combinational()
+      x.enq.en  @= enq_en & x.enq.rdy
+      x.deq.en  @= deq_en & x.deq.rdy
+      x.sim_eval_combinational()
+
+    assert A.deq.rdy == B.deq.rdy
+    assert A.enq.rdy == B.enq.rdy
+    if A.deq.rdy:
+      assert A.deq.ret == B.deq.ret
+    assert A.count == B.count
+
+    A.sim_tick()
+    B.sim_tick()
+
+def test_normal_queue():
+  run_queue_vs_default( NormalQueueRTL, 2 )
+
+def test_pipe_queue():
+  run_queue_vs_default( PipeQueueRTL, 2 )
+
+def test_bypass_queue():
+  run_queue_vs_default( BypassQueueRTL, 3 )
@@ -0,0 +1,62 @@
+#=========================================================================
+# GenDAGPass_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+from pymtl3.datatypes import Bits32
+from pymtl3.dsl import *
+from pymtl3.passes.PassGroups import DefaultPassGroup
+
+from ..GenDAGPass import GenDAGPass
+
+
+class Add( Component ):
+  def construct( s, k=1 ):
+    s.in_ = InPort( Bits32 )
+    s.out = OutPort( Bits32 )
+    @update
+    def up_add():
+      s.out @= s.in_ + k
+
+class Mul( Component ):
+  def construct( s, k=1 ):
+    s.in_ = InPort( Bits32 )
+    s.out = OutPort( Bits32 )
+    @update
+    def up_mul():
+      s.out @= s.in_ * k
+
+class Chain( Component ):
+  def construct( s, n=6 ):
+    s.in_ = InPort( Bits32 )
+    s.out = OutPort( Bits32 )
+    s.stages = [ Add( i+1 ) for i in range(n) ]
+    s.stages[0].in_ //= s.in_
+    for i in range(n-1):
+      s.stages[i].out //= s.stages[i+1].in_
+    s.stages[-1].out //= s.out
+
+def test_reuse_net_blocks_after_replace():
+  a = Chain()
+  a.elaborate()
+  GenDAGPass()( a )
+  old_genblks = set( a._dag.genblks )
+
+  a.replace_component( a.stages[2], Mul )
+  GenDAGPass()( a )
+
+  # Only the nets of the replaced stage (in_, out, clk, reset) get new
+  # net blocks
+  new_genblks = a._dag.genblks - old_genblks
+  assert len(new_genblks) == 4
+  assert len(a._dag.genblks) == len(old_genblks)
+  ports = { a.stages[2].in_, a.stages[2].out, a.stages[2].clk, a.stages[2].reset }
+  for blk in new_genblks:
+    assert ports & set( a._dag.genblk_writes[blk] + a._dag.genblk_reads.get( blk, [] ) )
+
+  a.apply( DefaultPassGroup() )
+  a.sim_reset()
+  a.in_ @= 10
+  a.sim_eval_combinational()
+  assert a.out == ((10 + 1 + 2) * 3 + 4 + 5 + 6)
@@ -0,0 +1,144 @@
+#=========================================================================
+# SimCheckpoint_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import os
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.mem import MagicMemoryFL
+from pymtl3.stdlib.mem import MagicMemoryCL
+from pymtl3.stdlib.mem.test.MagicMemoryCL_test import TestHarness, req_cls, resp_cls, stream_msgs
+from pymtl3.stdlib.queues import NormalQueueRTL, PipeQueueCL
+
+
+@bitstruct( packed=True )
+class Pair:
+  a : Bits8
+  b : Bits8
+
+class Top( Component ):
+  def construct( s ):
+    s.out  = OutPort( Bits32 )
+    s.pair = OutPort( Pair )
+    s.acc  = Wire( Bits32 )
+    s.rq   = NormalQueueRTL( Bits32, 2 )
+    s.q    = PipeQueueCL( num_entries=2 )
+    s.mem  = MagicMemoryFL()
+    s.hist = []
+
+    s.rq.enq.msg //= s.acc
+    s.rq.enq.en  //= s.rq.enq.rdy
+
+    @update
+    def up_deq():
+      s.rq.deq.en @= s.rq.deq.rdy & s.acc[0]
+
+    @update_ff
+    def up_acc():
+      s.acc <<= s.acc + 3
+      s.pair <<= Pair( s.acc[0:8], s.pair.a )
+
+    @update_once
+    def up_cl():
+      if s.q.enq.rdy() and s.rq.deq.en:
+        s.q.enq( s.rq.deq.ret )
+      if s.q.deq.rdy() and s.acc[1]:
+        v = s.q.deq()
+        s.mem.write( v[0:12], 4, v )
+        s.hist.append( int(v) )
+      s.out @= s.mem.read( s.acc[0:12], 4 )
+
+  def line_trace( s ):
+    return f"{s.out}|{s.pair}|{s.q.line_trace()}|{s.hist[-3:]}"
+
+def _mk_top():
+  top = Top()
+  top.elaborate()
+  top.apply( DefaultPassGroup() )
+  top.sim_reset()
+  return top
+
+def _run( top, ncycles ):
+  traces = []
+  for _ in range( ncycles ):
+    top.sim_tick()
+    traces.append( (top.sim_cycle_count(), top.line_trace()) )
+  return traces
+
+def test_checkpoint_restore():
+  top = _mk_top()
+  _run( top, 50 )
+  ckpt = top.sim_checkpoint()
+  ref  = _run( top, 50 )
+
+  # Restore into the same instance ...
+  top.sim_restore( ckpt )
+  assert _run( top, 50 ) == ref
+
+  # ... and into a new one
+  top2 = _mk_top()
+  _run( top2, 7 )
+  top2.sim_restore( ckpt )
+  assert _run( top2, 50 ) == ref
+
+def test_checkpoint_file( tmp_path ):
+  top = _mk_top()
+  _run( top, 20 )
+  path = str( tmp_path / "top.ckpt" )
+  top.sim_checkpoint( path )
+  ref = _run( top, 20 )
+
+  top2 = _mk_top()
+  top2.sim_restore( path )
+  assert _run( top2, 20 ) == ref
+
+  other = NormalQueueRTL( Bits32, 2 )
+  other.elaborate()
+  other.apply( DefaultPassGroup() )
+  with pytest.raises( ValueError ):
+    other.sim_restore( path )
+
+def _mk_mem_top():
+  # The messages are instances of bitstructs defined inside mk_mem_msg
+  msgs = stream_msgs( 0x1000 )
+  top = TestHarness( MagicMemoryCL, 1, [(req_cls, resp_cls)], [msgs[::2]], [msgs[1::2]],
+                     0.5, 2, 0, 0, 0, 0 )
+  top.elaborate()
+  top.apply( DefaultPassGroup() )
+  top.sim_reset()
+  return top
+
+def test_checkpoint_local_bitstructs():
+  top = _mk_mem_top()
+  _run( top, 30 )
+  ckpt = top.sim_checkpoint()
+  ref  = _run( top, 60 )
+  assert top.done()
+
+  top2 = _mk_mem_top()
+  _run( top2, 5 )
+  top2.sim_restore( ckpt )
+  assert _run( top2, 60 ) == ref
+  assert top2.done()
+
+@pytest.mark.skipif( not hasattr( os, "fork" ), reason="requires os.fork" )
+def test_fork( tmp_path ):
+  top = _mk_top()
+  _run( top, 30 )
+  path = str( tmp_path / "child" )
+
+  pid = top.sim_fork()
+  if pid == 0:
+    try:
+      with open( path, 'w' ) as f:
+        f.write( repr( _run( top, 10 ) ) )
+    finally:
+      os._exit( 0 )
+
+  os.waitpid( pid, 0 )
+  with open( path ) as f:
+    assert f.read() == repr( _run( top, 10 ) )
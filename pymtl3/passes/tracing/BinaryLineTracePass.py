@@ -0,0 +1,178 @@
+"""
+========================================================================
+BinaryLineTracePass.py
+========================================================================
+Record the raw information that the line trace is composed of to a
+binary file instead of formatting top.line_trace() every cycle. The
+line trace of any window of cycles can then be rendered afterwards with
+LineTraceReader.
+
+Every cycle the pass records the value of every signal, the same way as
+BinaryWavePass, and the arguments and return values of the CL method
+calls recorded by CLLineTracePass. The file has the layout of a binary
+waveform file with a different magic and one more column in each chunk:
+
+  header   : MAGIC, u32 length of the json header, json header
+             {"signals": [[name, nbits, host component], ...],
+              "chunk_cycles": n, "cl_slots": [method port, ...]}
+  cl column: zlib compressed u32 number of cycles, u32 end offset of
+             the pickle of each cycle, and the pickles. A cycle in
+             which no method was called has an empty pickle. Otherwise
+             it is the pickle of the slots of CLLineTracePass, i.e.
+             ( args, ret ) of each slot that was called and None for
+             the others.
+
+Arguments may be signal values that are overwritten in place after the
+call (e.g. RecvRTL2SendCL sends its recv.msg port), so CLLineTracePass
+has to copy them when they are recorded, which is turned on with its
+cl_trace_snapshot metadata (DefaultPassGroup does it for bintrace). The
+slots are pickled every cycle with Bits reduced to their width and
+value, which is much faster than pickling their slots. The slots of a
+cycle that can't be pickled are recorded as strings.
+
+Date   : Oct 18, 2026
+"""
+
+import io
+import json
+import pickle
+import struct
+import zlib
+from array import array
+
+from pymtl3.datatypes import Bits, mk_bits
+from pymtl3.dsl import MetadataKey
+from pymtl3.passes.BasePass import BasePass
+
+from .BinaryWavePass import BinaryWavePass
+from .CLLineTracePass import CLLineTracePass
+
+MAGIC = b"PYMTLLT1"
+
+def _new_bits( nbits, uint ):
+  return mk_bits( nbits )( uint )
+
+def _reduce_bits( v ):
+  return _new_bits, ( v.nbits, int(v) )
+
+def _reduce_default( v ):
+  return v.__reduce_ex__( pickle.HIGHEST_PROTOCOL )
+
+class _ReduceTable( dict ):
+  """ type -> reduce function used by the pickler of the records. """
+  def __missing__( self, T ):
+    ret = self[T] = _reduce_bits if issubclass( T, Bits ) else _reduce_default
+    return ret
+
+def _to_str( record ):
+  if record is None:
+    return None
+  args, ret = record
+  if not isinstance( ret, ( bool, int, type(None) ) ):
+    ret = str( ret )
+  return tuple( str(x) for x in args ), ret
+
+class BinaryLineTracePass( BasePass ):
+
+  # BinaryLineTracePass public pass data
+
+  #: Name of the line trace file without the .ptrace suffix
+  #:
+  #: Type: ``str``; input
+  #:
+  #: Default value: ""
+  line_trace_file_name = MetadataKey(str)
+
+  #: Number of cycles in each chunk of the line trace file
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: 4096
+  line_trace_chunk_cycles = MetadataKey(int)
+
+  line_trace_func = MetadataKey()
+
+  #: Write the current partial chunk to the file.
+  #:
+  #: Type: ``callable``; output
+  line_trace_flush_func = MetadataKey()
+
+  def __call__( self, top ):
+    if top.has_metadata( self.line_trace_file_name ):
+      file_name = top.get_metadata( self.line_trace_file_name )
+
+      if file_name is not None:
+        assert not top.has_metadata( self.line_trace_func )
+        func, flush = self.make_line_trace_func( top, file_name )
+        top.set_metadata( self.line_trace_func, func )
+        top.set_metadata( self.line_trace_flush_func, flush )
+
+  def make_line_trace_func( self, top, file_name ):
+    if file_name != "":
+      file_name = str(file_name) + ".ptrace"
+    else:
+      file_name = str(top.__class__.__name__) + ".ptrace"
+
+    if top.has_metadata( self.line_trace_chunk_cycles ):
+      chunk_cycles = top.get_metadata( self.line_trace_chunk_cycles )
+    else:
+      chunk_cycles = 4096
+    assert chunk_cycles > 0
+
+    # The slots of CLLineTracePass are named after the smallest method
+    # port of their net, which doesn't depend on the order of the slots
+
+    if top.has_metadata( CLLineTracePass.cl_trace_slots ):
+      assert top.has_metadata( CLLineTracePass.cl_trace_snapshot ) and \
+             top.get_metadata( CLLineTracePass.cl_trace_snapshot ), \
+             "CLLineTracePass.cl_trace_snapshot must be set before CLLineTracePass " \
+             "is applied to record CL method calls to a binary line trace"
+      slots      = top.get_metadata( CLLineTracePass.cl_trace_slots )
+      slot_index = top.get_metadata( CLLineTracePass.cl_trace_slot_index )
+    else:
+      slots, slot_index = [], {}
+
+    slot_names = [ None ] * len(slots)
+    for mport, i in slot_index.items():
+      if slot_names[i] is None or repr(mport) < slot_names[i]:
+        slot_names[i] = repr(mport)
+
+    signals = BinaryWavePass.collect_signals( top )
+
+    header = json.dumps( { 'signals': BinaryWavePass.get_signal_header( signals ),
+                           'chunk_cycles': chunk_cycles,
+                           'cl_slots': slot_names } ).encode()
+
+    trace_file = open( file_name, "wb" )
+    trace_file.write( MAGIC + struct.pack( "<I", len(header) ) + header )
+    trace_file.flush()
+
+    # The memo is cleared every cycle so that the pickle of each cycle can
+    # be loaded on its own
+    buf  = io.BytesIO()
+    ends = array( 'I' )
+    pickler = pickle.Pickler( buf, pickle.HIGHEST_PROTOCOL )
+    pickler.dispatch_table = _ReduceTable()
+    empty = [ None ] * len(slots)
+
+    def record_cl():
+      if slots != empty:
+        pos = buf.tell()
+        try:
+          pickler.dump( slots )
+        except Exception:
+          buf.seek( pos )
+          buf.truncate()
+          pickler.dump( [ _to_str( x ) for x in slots ] )
+        pickler.clear_memo()
+      ends.append( buf.tell() )
+
+    def flush_cl():
+      data = struct.pack( "<I", len(ends) ) + ends.tobytes() + buf.getvalue()
+      buf.seek( 0 )
+      buf.truncate()
+      del ends[:]
+      return zlib.compress( data )
+
+    return BinaryWavePass.gen_chunk_writer( top, trace_file, signals, chunk_cycles,
+                                            ( record_cl, flush_cl ) )
@@ -0,0 +1,209 @@
+"""
+========================================================================
+BinaryWavePass.py
+========================================================================
+Record the value of every top level signal to a compact binary waveform
+file that can later be queried with WaveReader, e.g. to print a text
+wave or export a VCD of a window of cycles.
+
+The file consists of a header followed by chunks. Each chunk covers
+`wave_chunk_cycles` consecutive cycles and stores one column per signal,
+so the writer only keeps one chunk in memory and a reader can seek to
+the chunks of a cycle range and decode only the signals it needs.
+
+  header : MAGIC, u32 length of the json header, json header
+           {"signals": [[name, nbits, host component], ...],
+            "chunk_cycles": n}
+  chunk  : CHUNK_MAGIC, u32 first cycle, u32 number of cycles,
+           u32 payload size, payload
+  payload: u32 offset of each column in the payload, then for each
+           signal a column (BinaryLineTracePass appends one more
+           column with the records of CL method calls)
+  column : u32 number of changes, u32 cycle offset of each change
+           relative to the first cycle of the chunk, and the value of
+           each change in ceil(nbits/8) little-endian bytes
+
+The first entry of each column is always at cycle offset 0 so chunks
+can be decoded independently.
+
+Date   : Oct 18, 2026
+"""
+
+import json
+import struct
+import weakref
+from array import array
+
+from pymtl3.datatypes import Bits
+from pymtl3.dsl import MetadataKey
+from pymtl3.passes.BasePass import BasePass
+
+MAGIC       = b"PYMTLWV1"
+CHUNK_MAGIC = b"CHNK"
+CHUNK_HEADER = struct.Struct( "<4sIII" )
+
+def value_nbytes( nbits ):
+  return (nbits + 7) // 8
+
+class BinaryWavePass( BasePass ):
+
+  # BinaryWavePass public pass data
+
+  #: Name of the waveform file without the .pwave suffix
+  #:
+  #: Type: ``str``; input
+  #:
+  #: Default value: ""
+  wave_file_name = MetadataKey(str)
+
+  #: Number of cycles in each chunk of the waveform file. The pass keeps
+  #: at most one chunk in memory.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: 4096
+  wave_chunk_cycles = MetadataKey(int)
+
+  wave_func = MetadataKey()
+
+  #: Write the current partial chunk to the file.
+  #:
+  #: Type: ``callable``; output
+  wave_flush_func = MetadataKey()
+
+  def __call__( self, top ):
+    if top.has_metadata( self.wave_file_name ):
+      wave_file_name = top.get_metadata( self.wave_file_name )
+
+      if wave_file_name is not None:
+        assert not top.has_metadata( self.wave_func )
+        func, flush = self.make_wave_func( top, wave_file_name )
+        top.set_metadata( self.wave_func, func )
+        top.set_metadata( self.wave_flush_func, flush )
+
+  def make_wave_func( self, top, wave_file_name ):
+    if wave_file_name != "":
+      wave_file_name = str(wave_file_name) + ".pwave"
+    else:
+      wave_file_name = str(top.__class__.__name__) + ".pwave"
+
+    if top.has_metadata( self.wave_chunk_cycles ):
+      chunk_cycles = top.get_metadata( self.wave_chunk_cycles )
+    else:
+      chunk_cycles = 4096
+    assert chunk_cycles > 0
+
+    signals = self.collect_signals( top )
+
+    header = json.dumps( { 'signals': self.get_signal_header( signals ),
+                           'chunk_cycles': chunk_cycles } ).encode()
+
+    wave_file = open( wave_file_name, "wb" )
+    wave_file.write( MAGIC + struct.pack( "<I", len(header) ) + header )
+    wave_file.flush()
+
+    return self.gen_chunk_writer( top, wave_file, signals, chunk_cycles )
+
+  @staticmethod
+  def collect_signals( top ):
+    # Same signals as PrintTextWavePass, in the same order
+    signal_names = []
+    for x in top._dsl.all_signals:
+      if x.is_top_level_signal() and x.get_field_name() != "clk" and x.get_field_name() != "reset":
+        signal_names.append( (x._dsl.level, repr(x), x) )
+
+    return [ top.reset ] + [ x for _, _, x in sorted( signal_names, key=lambda v: v[:2] ) ]
+
+  @staticmethod
+  def get_signal_header( signals ):
+    return [ [ repr(x), x._dsl.Type.nbits, repr(x.get_host_component()) ] for x in signals ]
+
+  @staticmethod
+  def gen_chunk_writer( top, wave_file, signals, chunk_cycles, extra=None ):
+    """Return the per-cycle function that records the values of signals
+    and the function that writes the current chunk to wave_file.
+
+    extra is an optional pair of functions ( record, flush ). record is
+    called every cycle and flush returns the bytes of an extra column
+    that is appended to the payload of the chunk after the columns of
+    the signals."""
+    nsignals = len(signals)
+    nbytes   = [ value_nbytes( x._dsl.Type.nbits ) for x in signals ]
+
+    # Per-signal columns of the current chunk
+    cycles = [ array('I') for _ in range(nsignals) ]
+    values = [ bytearray() for _ in range(nsignals) ]
+    state  = [ 0, 0 ] # first cycle of the chunk, number of cycles
+
+    def flush():
+      start, ncycles = state
+      if ncycles == 0:
+        return
+
+      columns = []
+      for i in range(nsignals):
+        columns.append( struct.pack( "<I", len(cycles[i]) ) + cycles[i].tobytes() + bytes(values[i]) )
+        del cycles[i][:]
+        values[i].clear()
+
+      if extra is not None:
+        columns.append( extra[1]() )
+
+      offsets = array( 'I' )
+      pos = 4 * len(columns)
+      for c in columns:
+        offsets.append( pos )
+        pos += len(c)
+
+      payload = offsets.tobytes() + b"".join( columns )
+      wave_file.write( CHUNK_HEADER.pack( CHUNK_MAGIC, start, ncycles, len(payload) ) )
+      wave_file.write( payload )
+      wave_file.flush()
+
+      state[0] = start + ncycles
+      state[1] = 0
+
+    # Generate the per-cycle function. Every column starts with the value
+    # at the first cycle of the chunk, so we reset the last values when a
+    # new chunk begins.
+
+    src = [ "def dump_wave():",
+            "  _n = _state[1]",
+            "  if _n == 0:",
+            "    _last[:] = [ None ] * len(_last)" ]
+
+    for i, x in enumerate( signals ):
+      if issubclass( x._dsl.Type, Bits ):
+        read = f"s{repr(x)[1:]}._uint"
+      else:
+        read = f"s{repr(x)[1:]}.to_bits()._uint"
+
+      src += [ f"  _v = {read}",
+               f"  if _v != _last[{i}]:",
+               f"    _last[{i}] = _v",
+               f"    _cycles[{i}].append( _n )",
+               f"    _values[{i}] += _v.to_bytes( {nbytes[i]}, 'little' )" ]
+
+    if extra is not None:
+      src.append( "  _extra()" )
+
+    src += [ "  _state[1] = _n + 1",
+            f"  if _n + 1 == {chunk_cycles}:",
+             "    _flush()" ]
+
+    namespace = {
+      's'       : top,
+      '_state'  : state,
+      '_last'   : [ None ] * nsignals,
+      '_cycles' : cycles,
+      '_values' : values,
+      '_flush'  : flush,
+      '_extra'  : None if extra is None else extra[0],
+    }
+    exec( compile( "\n".join( src ), filename="wave_func", mode="exec" ), namespace )
+
+    # Write the last partial chunk when top is garbage collected or the
+    # interpreter exits
+    weakref.finalize( top, flush )
+
+    return namespace['dump_wave'], flush
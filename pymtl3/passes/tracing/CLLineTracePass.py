@@ -3,10 +3,23 @@
 #========================================================================
 # Enable CL line trace.
 #
+# Each method net gets a generated wrapper that calls the actual method
+# with the same fixed arity and records the arguments and the return
+# value in a slot of a preallocated list. The slots are cleared at the
+# end of each cycle and the line trace of method interfaces is composed
+# from them. Recording can be turned off at runtime with the function in
+# toggle_cl_trace_func, which leaves only a global flag check per call.
+#
 # Author : Yanghui Ou
 #   Date : May 21, 2019
 
+import inspect
+
+import py
+
+from pymtl3.datatypes import Bits, is_bitstruct_class
 from pymtl3.dsl import *
+from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.BasePass import BasePass
 
 
@@ -23,6 +36,30 @@ class CLLineTracePass( BasePass ):
 
   clear_cl_trace_func = MetadataKey()
 
+  #: Copy Bits and bitstruct arguments and return values when they are
+  #: recorded so that the records stay valid after the end of the cycle,
+  #: e.g. when a signal value that is passed to a method is overwritten
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: False
+  cl_trace_snapshot = MetadataKey(bool)
+
+  #: A function that takes a bool to turn the recording on or off
+  #:
+  #: Type: ``callable``; output
+  toggle_cl_trace_func = MetadataKey()
+
+  #: The records of this cycle, ( args, ret ) or None if not called
+  #:
+  #: Type: ``list``; output
+  cl_trace_slots = MetadataKey()
+
+  #: A dictionary that maps method ports to their slot
+  #:
+  #: Type: ``dict``; output
+  cl_trace_slot_index = MetadataKey()
+
   def __init__( self, default_trace_len=8 ):
     self.default_trace_len = default_trace_len
 
@@ -38,63 +75,83 @@ class CLLineTracePass( BasePass ):
 
   def process_component( self, top ):
 
-    # [wrap_callee_method] wraps the original method in a callee port
-    # into a new method that not only calls the origianl method, but
-    # also saves the arguments to the method and the return value,
-    # which can be used for composing the line trace.
-    # The wrapped method also need to update the saved arguments and
-    # return value of all the methods this callee port is driving.
-    def wrap_callee_method( mport, net ):
-      mport.raw_method = mport.method
-      def wrapped_method( self, *args, **kwargs ):
-        # If it has greenlet i.e. blocking ... we need to make sure
-        # we record everything after the method is successfully invoked
-        ret = self.raw_method( *args, **kwargs )
-        for m in net:
-          m.called = True
-          m.saved_args = args
-          m.saved_kwargs = kwargs
-          m.saved_ret = ret
-        return ret
-      mport.method = lambda *args, **kwargs : wrapped_method( mport, *args, **kwargs )
-
-    # [wrap_caller_method] wraps the original method in a caller port
-    # into a new method that calls its driver instead of the actual
-    # method, which will trigger the actual driver to update all other
-    # method ports connected to this net.
-    def wrap_caller_method( mport, driver_method ):
-      def wrapped_method( self, *args, **kwargs ):
-        return driver_method( *args, **kwargs )
-      mport.method = lambda *args, **kwargs : wrapped_method( mport, *args, **kwargs )
-
-    # Collect all method ports and add some stamps
-    all_callees = set()
-    all_method_ports = top.get_all_object_filter(
-      lambda s: isinstance( s, MethodPort )
-    )
-    for mport in all_method_ports:
-      mport.called = False
-      mport.saved_args = None
-      mport.saved_kwargs = None
-      mport.saved_ret = None
-      if isinstance( mport, CalleePort ):
-        all_callees.add( mport )
-
-    # Collect all method nets and wrap the actual driving method
-    all_drivers = set()
-    all_method_nets = top.get_all_method_nets()
-    for driver, net in all_method_nets:
-      if driver is not None:
-        wrap_callee_method( driver, net )
-        all_drivers.add( driver )
-      for member in net:
-        if isinstance( member, CallerPort ):
-          assert member is not driver
-          wrap_caller_method( member, driver )
+    # Every method net gets a slot in a list that is preallocated for the
+    # whole design. A call records ( args, ret ) in the slot of its net,
+    # and the slots are cleared at the end of each cycle.
+    nets = []
+    slot_index = {}
+    for driver, net in top.get_all_method_nets():
+      if driver is not None and driver.method is not None:
+        for member in net:
+          slot_index[ member ] = len(nets)
+        nets.append( ( driver.method, net ) )
 
     # Handle other callee that is not driving anything
-    for mport in ( all_callees - all_drivers ):
-      wrap_callee_method( mport, set() )
+    for mport in top.get_all_object_filter( CalleePort ):
+      if mport not in slot_index and mport.method is not None:
+        slot_index[ mport ] = len(nets)
+        nets.append( ( mport.method, [ mport ] ) )
+
+    # The last slot is never written. It belongs to the ports that are
+    # not connected to any method.
+    slots = [ None ] * ( len(nets) + 1 )
+    empty = [ None ] * ( len(nets) + 1 )
+    never = len(nets)
+
+    # [gen_wrappers] compiles one wrapper per net that calls the actual
+    # method and records the arguments and the return value. All ports of
+    # the net call the same wrapper. If it has greenlet i.e. blocking ...
+    # we record everything after the method is successfully invoked.
+    snapshot = top.has_metadata( self.cl_trace_snapshot ) and \
+               top.get_metadata( self.cl_trace_snapshot )
+
+    def cp( x ):
+      return f"( {x}.clone() if _clone[ {x}.__class__ ] else {x} )" if snapshot else x
+
+    _globals = { '_slots': slots, '_on': True, '_clone': _CloneTable() }
+    src = []
+    for i, ( method, net ) in enumerate( nets ):
+      _globals[ f"_m{i}" ] = method
+      params = _get_fixed_params( method )
+      if params is None:
+        if snapshot:
+          args = "tuple( [ ( x.clone() if _clone[ x.__class__ ] else x ) " \
+                 "for x in args + tuple( kwargs.values() ) ] )"
+        else:
+          args = "args + tuple( kwargs.values() )"
+        src.append( f"""
+def _trace{i}( *args, **kwargs ):
+  ret = _m{i}( *args, **kwargs )
+  if _on:
+    _slots[{i}] = ( {args}, {cp('ret')} )
+  return ret""" )
+      else:
+        args = ", ".join( params )
+        rec  = "".join( f"{cp(x)}, " for x in params )
+        src.append( f"""
+def _trace{i}( {args} ):
+  ret = _m{i}( {args} )
+  if _on:
+    _slots[{i}] = ( ( {rec}), {cp('ret')} )
+  return ret""" )
+
+    custom_exec( py.code.Source( "\n".join( src ) ).compile(), _globals, _globals )
+
+    for i, ( method, net ) in enumerate( nets ):
+      wrapper = _globals[ f"_trace{i}" ]
+      for mport in net:
+        mport.method = wrapper
+
+    top.set_metadata( self.cl_trace_slots, slots )
+    top.set_metadata( self.cl_trace_slot_index, slot_index )
+
+    # [toggle_cl_trace] turns the recording on and off at runtime. The
+    # wrappers only check a global flag when recording is off.
+    def toggle_cl_trace( enable ):
+      _globals['_on'] = bool( enable )
+      slots[:] = empty
+
+    top.set_metadata( self.toggle_cl_trace_func, toggle_cl_trace )
 
     # [mk_new_str] replaces [_str_hook] in a non-blocking interface with
     # a new to-string function that uses the metadata to compose line
@@ -115,24 +172,18 @@ class CLLineTracePass( BasePass ):
     #  3:( 0001 () #    ) - enq(0001) called, deq is not ready again
 
     def mk_new_str_non_blocking( ifc ):
+      method_slot = slot_index.get( ifc.method, never )
+      rdy_slot    = slot_index.get( ifc.rdy, never )
       def new_str():
+        method = slots[ method_slot ]
+        rdy    = slots[ rdy_slot ]
         # If rdy is called
-        if ifc.rdy.called:
+        if rdy is not None:
           # If rdy is called and returns true
-          if ifc.rdy.saved_ret:
+          if rdy[1]:
             # If rdy and method called - return actual message
-            if ifc.method.called:
-              args_strs = [ str( arg ) for arg in ifc.method.saved_args ] + \
-                          [ str( arg ) for _, arg in ifc.method.saved_kwargs.items() ]
-
-              ret_str = "" if ifc.method.saved_ret is None else str( ifc.method.saved_ret )
-
-              trace = ""
-              if args_strs:
-                trace += f"({','.join(args_strs)})"
-              if ret_str:
-                trace += f"={ret_str}"
-
+            if method is not None:
+              trace = fmt_cl_trace( method )
               ifc.trace_len = len(trace)
               return trace
 
@@ -141,13 +192,13 @@ class CLLineTracePass( BasePass ):
               return " ".ljust( ifc.trace_len )
 
           # If rdy is called and returns false
-          elif ifc.method.called:
+          elif method is not None:
             return "X".ljust( ifc.trace_len )
           else:
             return "#".ljust( ifc.trace_len )
 
         # If rdy is not called
-        elif ifc.method.called:
+        elif method is not None:
           return "x".ljust( ifc.trace_len )
 
         else:
@@ -155,11 +206,12 @@ class CLLineTracePass( BasePass ):
       return new_str
 
     # Collecting all non blocking interfaces and replace the str hook
-    for ifc in top.get_all_object_filter( lambda s: isinstance( s, NonBlockingIfc ) ):
+    for ifc in top.get_all_object_filter( NonBlockingIfc ):
       if ifc.method.Type is not None:
-        ifc.trace_len = len( str( ifc.method.Type() ) )
+        ifc.init_trace_len = len( str( ifc.method.Type() ) )
       else:
-        ifc.trace_len = self.default_trace_len
+        ifc.init_trace_len = self.default_trace_len
+      ifc.trace_len = ifc.init_trace_len
       ifc._str_hook = mk_new_str_non_blocking( ifc )
 
     # [mk_new_str] replaces [_str_hook] in a blocking interface with
@@ -170,20 +222,12 @@ class CLLineTracePass( BasePass ):
     # - " " method not called
     # - msg method called
     def mk_new_str_blocking( ifc ):
+      method_slot = slot_index.get( ifc.method, never )
       def new_str():
+        method = slots[ method_slot ]
         # If method called - return actual message
-        if ifc.method.called:
-          args_strs = [ str( arg ) for arg in ifc.method.saved_args ] + \
-                      [ str( arg ) for _, arg in ifc.method.saved_kwargs.items() ]
-
-          ret_str = "" if ifc.method.saved_ret is None else str( ifc.method.saved_ret )
-
-          trace = ""
-          if args_strs:
-            trace += f"({','.join(args_strs)})"
-          if ret_str:
-            trace += f"={ret_str}"
-
+        if method is not None:
+          trace = fmt_cl_trace( method )
           ifc.trace_len = len(trace)
           return trace
 
@@ -193,19 +237,62 @@ class CLLineTracePass( BasePass ):
       return new_str
 
     # Collecting all blocking interfaces and replace the str hook
-    for ifc in top.get_all_object_filter( lambda s: isinstance( s, BlockingIfc ) ):
+    for ifc in top.get_all_object_filter( BlockingIfc ):
       if ifc.method.Type is not None:
-        ifc.trace_len = len( str( ifc.method.Type() ) )
+        ifc.init_trace_len = len( str( ifc.method.Type() ) )
       else:
-        ifc.trace_len = self.default_trace_len
+        ifc.init_trace_len = self.default_trace_len
+      ifc.trace_len = ifc.init_trace_len
       ifc._str_hook = mk_new_str_blocking( ifc )
 
     # An update block that resets all method ports to not called
     def reset_method_ports():
-      for mport in all_method_ports:
-        mport.called = False
-        mport.saved_args = None
-        mport.saved_kwargs = None
-        mport.saved_ret = None
+      slots[:] = empty
 
     return reset_method_ports
+
+#-------------------------------------------------------------------------
+# _CloneTable
+#-------------------------------------------------------------------------
+
+class _CloneTable( dict ):
+  """ type -> whether the recorded values of the type are cloned. """
+  def __missing__( self, T ):
+    ret = self[T] = issubclass( T, Bits ) or is_bitstruct_class( T )
+    return ret
+
+#-------------------------------------------------------------------------
+# fmt_cl_trace
+#-------------------------------------------------------------------------
+# Format the ( args, ret ) record of a method call.
+
+def fmt_cl_trace( record ):
+  args, ret = record
+  trace = ""
+  if args:
+    trace += f"({','.join( str( arg ) for arg in args )})"
+  if ret is not None:
+    ret_str = str( ret )
+    if ret_str:
+      trace += f"={ret_str}"
+  return trace
+
+#-------------------------------------------------------------------------
+# _get_fixed_params
+#-------------------------------------------------------------------------
+# Return the parameter names of method if it only takes a fixed number of
+# positional arguments, otherwise None.
+
+def _get_fixed_params( method ):
+  try:
+    sig = inspect.signature( method )
+  except ( TypeError, ValueError ):
+    return None
+
+  params = []
+  for name, param in sig.parameters.items():
+    if param.kind not in ( param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD ) or \
+       param.default is not param.empty or name == 'ret' or name.startswith( '_' ):
+      return None
+    params.append( name )
+  return params
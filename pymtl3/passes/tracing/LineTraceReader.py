@@ -0,0 +1,216 @@
+"""
+========================================================================
+LineTraceReader.py
+========================================================================
+Render the line trace of any window of cycles from a file written by
+BinaryLineTracePass.
+
+Rendering needs an instance of the traced design built with the same
+parameters. For each cycle the reader writes the recorded signal values
+into it, puts the recorded CL method calls into the slots of its
+CLLineTracePass and calls top.line_trace(). Line traces that only
+format ports and method interfaces, which is what most line traces do,
+come out the same as during the simulation. Attributes of a component
+that are not signals are not recorded and keep whatever value they have
+in the rendering instance.
+
+Example:
+
+  reader = LineTraceReader( "Top.ptrace" )
+  reader.print_line_trace( Top(), 1000, 1020 )
+
+Date   : Oct 18, 2026
+"""
+
+import pickle
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+
+import py
+
+from pymtl3.datatypes import Bits, mk_bits
+from pymtl3.dsl import BlockingIfc, NonBlockingIfc
+from pymtl3.extra.pypy import custom_exec
+
+from .BinaryLineTracePass import MAGIC
+from .CLLineTracePass import CLLineTracePass, fmt_cl_trace
+from .WaveReader import WaveReader
+
+
+class LineTraceReader( WaveReader ):
+
+  MAGIC     = MAGIC
+  file_kind = "PyMTL binary line trace"
+
+  def __init__( s, file_name ):
+    super().__init__( file_name )
+    s.cl_slots = s.header['cl_slots']
+
+  def _read_cl_records( s, start, stop ):
+    # Return a list of ( slot, ( args, ret ) ) of each cycle
+    start, stop = s._check_window( start, stop )
+    ret = []
+    if start == stop:
+      return ret
+
+    first = bisect_right( s._chunk_starts, start ) - 1
+    with open( s.file_name, "rb" ) as f:
+      for k in range( first, len(s._chunk_starts) ):
+        c_start, c_cycles = s._chunk_starts[k], s._chunk_cycles[k]
+        if c_start >= stop:
+          break
+        lo = max( start, c_start ) - c_start
+        hi = min( stop, c_start + c_cycles ) - c_start
+        ret.extend( s._read_cl_column( f, k )[ lo:hi ] )
+    return ret
+
+  def _read_cl_column( s, f, k ):
+    # Return the per-cycle calls in chunk k
+    base = s._chunk_offsets[k]
+    f.seek( base + 4 * len(s.signals) )
+    offset, = struct.unpack( "<I", f.read( 4 ) )
+    f.seek( base + offset )
+    data = zlib.decompress( f.read( s._chunk_sizes[k] - offset ) )
+    n, = struct.unpack_from( "<I", data )
+    ends = array( 'I' )
+    ends.frombytes( data[ 4:4+4*n ] )
+    data = memoryview( data )[ 4+4*n: ]
+
+    ret, pos = [], 0
+    for end in ends:
+      if end == pos:
+        ret.append( [] )
+      else:
+        ret.append( [ (i, r) for i, r in enumerate( pickle.loads( data[ pos:end ] ) )
+                      if r is not None ] )
+      pos = end
+    return ret
+
+  def get_cl_records( s, start=0, stop=None ):
+    """Return a list with one dict per cycle in [start, stop) that maps
+    the name of a method port to the ( args, ret ) of its call."""
+    return [ { s.cl_slots[i]: record for i, record in calls }
+             for calls in s._read_cl_records( start, stop ) ]
+
+  #-----------------------------------------------------------------------
+  # Rendering
+  #-----------------------------------------------------------------------
+
+  def _prepare( s, top ):
+    # Simulate an instance of the design so that its signals become values
+    # and its method interfaces are traced by CLLineTracePass
+    from pymtl3.passes.PassGroups import DefaultPassGroup
+
+    if not top._dsl.constructed:
+      top.elaborate()
+    if not hasattr( top, '_sim' ):
+      top.apply( DefaultPassGroup() )
+
+    signals = { repr(x): x for x in top._dsl.all_signals }
+
+    # [gen_set_signals] compiles a function that writes the values of one
+    # cycle to the signals of top
+
+    src = [ "def set_signals( _v ):" ]
+    _globals = { 's': top }
+    for i, name in enumerate( s.signals ):
+      if name not in signals:
+        raise ValueError( f"{name} of {s.file_name} is not a signal of {top}" )
+      Type = signals[ name ]._dsl.Type
+      if issubclass( Type, Bits ):
+        src.append( f"  s{name[1:]} @= _v[{i}]" )
+      else:
+        _globals[ f"_T{i}" ] = Type
+        _globals[ f"_B{i}" ] = mk_bits( s._nbits[ name ] )
+        src.append( f"  s{name[1:]} @= _T{i}.from_bits( _B{i}( _v[{i}] ) )" )
+
+    custom_exec( py.code.Source( "\n".join( src ) ).compile(), _globals, _globals )
+
+    if top.has_metadata( CLLineTracePass.cl_trace_slots ):
+      slots = top.get_metadata( CLLineTracePass.cl_trace_slots )
+      index = { repr(x): i for x, i in
+                top.get_metadata( CLLineTracePass.cl_trace_slot_index ).items() }
+    else:
+      slots, index = [], {}
+
+    # Calls to methods that are missing in top are dropped
+    slot_map = [ index.get( name ) for name in s.cl_slots ]
+
+    return _globals['set_signals'], slots, slot_map
+
+  def _restore_trace_lens( s, top, start, slot_map ):
+    # The trace of a method interface is padded to the length of its last
+    # printed call, so we look for that call before the window. Chunks
+    # are scanned backwards until every interface has found one.
+    slot_index = top.get_metadata( CLLineTracePass.cl_trace_slot_index )
+    index = { i: j for j, i in enumerate( slot_map ) if i is not None }
+
+    pending = {}
+    for ifc in top.get_all_object_filter( NonBlockingIfc ) | \
+               top.get_all_object_filter( BlockingIfc ):
+      if not hasattr( ifc, 'init_trace_len' ):
+        continue
+      ifc.trace_len = ifc.init_trace_len
+      method = index.get( slot_index.get( ifc.method ) )
+      if method is None:
+        continue
+      # Calls of a non-blocking interface are only printed if rdy is
+      # called and returns true
+      rdy = -1 if isinstance( ifc, BlockingIfc ) else index.get( slot_index.get( ifc.rdy ), -2 )
+      pending[ ifc ] = ( method, rdy )
+
+    k = bisect_right( s._chunk_starts, start - 1 ) - 1
+    with open( s.file_name, "rb" ) as f:
+      while pending and k >= 0 and start > 0:
+        c_start = s._chunk_starts[k]
+        column  = s._read_cl_column( f, k )[ :start - c_start ]
+        for calls in reversed( column ):
+          if not calls:
+            continue
+          calls = dict( calls )
+          for ifc, ( method, rdy ) in list( pending.items() ):
+            if method in calls and ( rdy == -1 or ( rdy in calls and calls[rdy][1] ) ):
+              ifc.trace_len = len( fmt_cl_trace( calls[ method ] ) )
+              del pending[ ifc ]
+          if not pending:
+            break
+        k -= 1
+
+  def render( s, top, start=0, stop=None, reset_active_high=True ):
+    """Return the lines of the line trace of cycles [start, stop) in the
+    same format as the line trace printed during the simulation. Cycles
+    in reset are marked with 'r'."""
+    if not hasattr( top, 'line_trace' ):
+      raise AttributeError( f"{top} doesn't have a line_trace method" )
+
+    start, stop = s._check_window( start, stop )
+    set_signals, slots, slot_map = s._prepare( top )
+    if top.has_metadata( CLLineTracePass.cl_trace_slot_index ):
+      s._restore_trace_lens( top, start, slot_map )
+
+    values  = s.get_values( s.signals, start, stop )
+    columns = [ values[ name ] for name in s.signals ]
+    records = s._read_cl_records( start, stop )
+    empty   = [ None ] * len(slots)
+    reset   = int( reset_active_high )
+
+    lines = []
+    for i in range( stop - start ):
+      set_signals( [ x[i] for x in columns ] )
+
+      slots[:] = empty
+      for j, record in records[i]:
+        if slot_map[j] is not None:
+          slots[ slot_map[j] ] = record
+
+      mark = 'r' if columns[0][i] == reset else ':'
+      lines.append( f"{start+i:3}{mark} {top.line_trace()}" )
+
+    slots[:] = empty
+    return lines
+
+  def print_line_trace( s, top, start=0, stop=None, reset_active_high=True ):
+    for line in s.render( top, start, stop, reset_active_high ):
+      print( line )
@@ -90,127 +90,133 @@ class PrintTextWavePass( BasePass ):
         char_length = top.get_metadata( self.chars_per_cycle )
       else:
         char_length = 6
-      # Shunning: deprecate text_fancy
-      # up, down = '\u2571', '\u2572'
-      # x, low = '\u2573', '\u005f'
-
-      assert char_length % 2 == 0
-      tick = '|'
-      up,down,x,low,high = '/','\\','|','_', '\u203e'
-      revstart, revstop = '\x1B[7m', '\x1B[0m'
-      light_gray = '\033[47m'
-      back='\033[0m'  #back to normal printing
-
-      all_signal_values = text_sigs
-      #spaces before cycle number
-      max_length = 5
-      for sig in all_signal_values:
-        #   Example: s.in(12b)
-        # length of signal name + (b) + number of digits, like 12
-        # to add(32b) in front, add this to maxlength:
-        #len(str(len(all_signal_values[sig][0][0])))+3
-        max_length = max( max_length, len(sig)-2 )
+      self.print_text_wave( sigs_dict, char_length )
 
-      print("")
-      print(" "*(max_length+1),end = "")
-
-      #-----------------------------------------------------------------------
-      # handle clk and reset
-      #-----------------------------------------------------------------------
-      # handles clock tick symbol
-
-      for i in range(len(all_signal_values["s.reset"])):
-        # insert a space every 5 cycles
-        print(f"{tick}{str(i).ljust(char_length-1)}",end="")
-      print("")
-
-      # Adding one blank line
-      print("")
-
-      # handle clock signal
-      clk_cycle_str = up + (char_length-2)//2*str(high) + down + (char_length-2)//2*str(low)
-
-      print("clk".rjust(max_length), clk_cycle_str * len(all_signal_values["s.reset"]))
-
-      print("")
+    return print_wave
 
-      #signals
-      for sig in all_signal_values:
-        bit_length = len(all_signal_values[sig][0])-2
-        print((sig[2:]).rjust(max_length),end=" ")
-        # one bit
-        if bit_length==1:
-          prev_sig = None
-          for i, val in enumerate( all_signal_values[sig] ):
-            # every 5 cycles add a space
-            # if i%5 == 0:
-              # print(" ",end = "")
-            if val[2] == '1':
-              current_sig = high
-            else:
-              current_sig = low
-            # detecting if first cycle
-            if prev_sig is not None:
-              if prev_sig == low and current_sig == high:
-                print(up+current_sig*(char_length-1),end = "")
-              elif prev_sig == high and current_sig == low:
-                print(down+current_sig*(char_length-1),end = "")
-              # prev and current signal agree
-              else:
-                print(current_sig*char_length,end = "")
-            # first cycle
+  def print_text_wave( self, all_signal_values, char_length=6, start_cycle=0 ):
+    """Print the text wave of `all_signal_values`, which maps the name of
+    each signal (starting with s.reset) to a list of its per-cycle values
+    in the form of Bits.bin(). The first cycle is labeled `start_cycle`."""
+    # Shunning: deprecate text_fancy
+    # up, down = '\u2571', '\u2572'
+    # x, low = '\u2573', '\u005f'
+
+    assert char_length % 2 == 0
+    tick = '|'
+    up,down,x,low,high = '/','\\','|','_', '\u203e'
+    revstart, revstop = '\x1B[7m', '\x1B[0m'
+    light_gray = '\033[47m'
+    back='\033[0m'  #back to normal printing
+
+    #spaces before cycle number
+    max_length = 5
+    for sig in all_signal_values:
+      #   Example: s.in(12b)
+      # length of signal name + (b) + number of digits, like 12
+      # to add(32b) in front, add this to maxlength:
+      #len(str(len(all_signal_values[sig][0][0])))+3
+      max_length = max( max_length, len(sig)-2 )
+
+    print("")
+    print(" "*(max_length+1),end = "")
+
+    #-----------------------------------------------------------------------
+    # handle clk and reset
+    #-----------------------------------------------------------------------
+    # handles clock tick symbol
+
+    for i in range(len(all_signal_values["s.reset"])):
+      # insert a space every 5 cycles
+      print(f"{tick}{str(start_cycle+i).ljust(char_length-1)}",end="")
+    print("")
+
+    # Adding one blank line
+    print("")
+
+    # handle clock signal
+    clk_cycle_str = up + (char_length-2)//2*str(high) + down + (char_length-2)//2*str(low)
+
+    print("clk".rjust(max_length), clk_cycle_str * len(all_signal_values["s.reset"]))
+
+    print("")
+
+    #signals
+    for sig in all_signal_values:
+      bit_length = len(all_signal_values[sig][0])-2
+      print((sig[2:]).rjust(max_length),end=" ")
+      # one bit
+      if bit_length==1:
+        prev_sig = None
+        for i, val in enumerate( all_signal_values[sig] ):
+          # every 5 cycles add a space
+          # if i%5 == 0:
+            # print(" ",end = "")
+          if val[2] == '1':
+            current_sig = high
+          else:
+            current_sig = low
+          # detecting if first cycle
+          if prev_sig is not None:
+            if prev_sig == low and current_sig == high:
+              print(up+current_sig*(char_length-1),end = "")
+            elif prev_sig == high and current_sig == low:
+              print(down+current_sig*(char_length-1),end = "")
+            # prev and current signal agree
             else:
               print(current_sig*char_length,end = "")
-            prev_sig = current_sig
-
-          print("")
-          #multiple bits
-        else:
-          next = 0
-          val_list = all_signal_values[sig]
-          for i in range(len(val_list)):
-            # signals in this cycle is still the same as before
-            if next > 0:
-              next -= 1
-              continue
-
-            val = val_list[i]
-            for j in range(i,len(val_list)):
-              if val_list[j] != val:
-                j = j-1
-                break
-
-            #first is reserved for X or " ". Rest is 5 char length.
-            length = (char_length-1) + char_length*(j-i)
-            next = j-i
-
-            if length >= bit_length // (char_length-1):
-              length = bit_length // (char_length-1)
-              if bit_length % char_length != 0:
-                length += 1
-              plus = False
+          # first cycle
+          else:
+            print(current_sig*char_length,end = "")
+          prev_sig = current_sig
+
+        print("")
+        #multiple bits
+      else:
+        next = 0
+        val_list = all_signal_values[sig]
+        for i in range(len(val_list)):
+          # signals in this cycle is still the same as before
+          if next > 0:
+            next -= 1
+            continue
+
+          val = val_list[i]
+          for j in range(i,len(val_list)):
+            if val_list[j] != val:
+              j = j-1
+              break
+
+          #first is reserved for X or " ". Rest is 5 char length.
+          length = (char_length-1) + char_length*(j-i)
+          next = j-i
+
+          if length >= bit_length // (char_length-1):
+            length = bit_length // (char_length-1)
+            if bit_length % char_length != 0:
+              length += 1
+            plus = False
+          else:
+            #reverse a place for +
+            length = length -1
+            plus = True
+
+          current = self._process_binary(val,16,length)
+          # print a +, with one less space for signal number
+          if plus:
+            if i==0:
+              print(light_gray + " " +'\033[30m'+"+"+ current,end = "")
             else:
-              #reverse a place for +
-              length = length -1
-              plus = True
-
-            current = self._process_binary(val,16,length)
-            # print a +, with one less space for signal number
-            if plus:
-              if i==0:
-                print(light_gray + " " +'\033[30m'+"+"+ current,end = "")
-              else:
-                print(light_gray + '\033[30m'+x + "+" +current,end = "")
-            # no +, more spaces for signal number
+              print(light_gray + '\033[30m'+x + "+" +current,end = "")
+          # no +, more spaces for signal number
+          else:
+            if i==0:
+              print(light_gray + " " +'\033[30m'+ current,end = "")
             else:
-              if i==0:
-                print(light_gray + " " +'\033[30m'+ current,end = "")
-              else:
-                print(light_gray + '\033[30m'+x +current,end = "")
-              print(" "*(char_length-1+char_length*(j-i)-length),end = "")
-          print(back + "")
-        print("")
-    return print_wave
+              print(light_gray + '\033[30m'+x +current,end = "")
+            print(" "*(char_length-1+char_length*(j-i)-length),end = "")
+        print(back + "")
+      print("")
 
   def _collect_sig_func( self, top ):
 
@@ -2,19 +2,65 @@
 ========================================================================
 VcdGenerationPass.py
 ========================================================================
+Dump the value changes of the signals in the hierarchy to a VCD file.
+
+The per-cycle dump function is generated from the nets that are traced
+so that each cycle only reads every traced net once and compares it
+against its last dumped value without any interpretation overhead. The
+value changes of a cycle are written as a single string to a file with
+a large buffer, which is flushed to the disk in chunks.
+
+The traced signals can be narrowed down with include/exclude glob
+patterns on hierarchical names (e.g. "top.dpath.*") and a limit on the
+depth of the hierarchy, and the dump can be restricted to a window of
+cycles.
 
 Author : Shunning Jiang, Yanghui Ou, Peitian Pan
 Date   : Sep 8, 2019
 """
 
+import atexit
 import time
+import weakref
 from collections import defaultdict
+from fnmatch import fnmatchcase
 
-from pymtl3.datatypes import Bits, concat
+from pymtl3.datatypes import Bits
 from pymtl3.dsl import Const, MetadataKey
 from pymtl3.passes.BasePass import BasePass
 from pymtl3.passes.errors import PassOrderError
 
+# Make sure the buffered part of all VCD files is written out before the
+# interpreter exits, even if the top component is still alive.
+
+_vcd_files = weakref.WeakSet()
+
+@atexit.register
+def _flush_vcd_files():
+  for f in list(_vcd_files):
+    if not f.closed:
+      f.flush()
+
+# Utility generator to create new symbols for each VCD signal.
+# Code inspired by MyHDL 0.7.
+# Shunning: I just reuse it from pymtl v2
+
+def vcd_symbols():
+
+  # Generate a string containing all valid vcd symbol characters
+  _codechars = ''.join([chr(i) for i in range(33, 127)])
+  _mod       = len(_codechars)
+
+  # Generator logic
+  n = 0
+  while True:
+    q, r = divmod(n, _mod)
+    code = _codechars[r]
+    while q > 0:
+      q, r = divmod(q, _mod)
+      code = _codechars[r] + code
+    yield code
+    n += 1
 
 class VcdGenerationPass( BasePass ):
 
@@ -27,8 +73,59 @@ class VcdGenerationPass( BasePass ):
   #: Default value: ""
   vcd_file_name = MetadataKey(str)
 
+  #: Glob patterns of hierarchical signal names to trace, e.g.
+  #: ``["top.dpath.*", "top.*.in_"]``. A signal is traced if it matches
+  #: any of the patterns.
+  #:
+  #: Type: ``list``; input
+  #:
+  #: Default value: ``["*"]``
+  vcd_include = MetadataKey(list)
+
+  #: Glob patterns of hierarchical signal names not to trace. Takes
+  #: precedence over ``vcd_include``.
+  #:
+  #: Type: ``list``; input
+  #:
+  #: Default value: ``[]``
+  vcd_exclude = MetadataKey(list)
+
+  #: Only trace signals of components at most this many levels below the
+  #: top component; 0 to only trace the top component.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: None (unlimited)
+  vcd_max_depth = MetadataKey(int)
+
+  #: First cycle to dump.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: 0
+  vcd_start_cycle = MetadataKey(int)
+
+  #: Stop dumping at this cycle.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: None (never stop)
+  vcd_stop_cycle = MetadataKey(int)
+
+  #: Size of the write buffer of the VCD file in bytes.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: 1MB
+  vcd_buffer_size = MetadataKey(int)
+
   vcd_func = MetadataKey()
 
+  #: Write the buffered part of the VCD to the file.
+  #:
+  #: Type: ``callable``; output
+  vcd_flush_func = MetadataKey()
+
   def __call__( self, top ):
     if top.has_metadata( self.vcd_file_name ):
       vcd_file_name = top.get_metadata( self.vcd_file_name )
@@ -37,6 +134,11 @@ class VcdGenerationPass( BasePass ):
         assert not top.has_metadata( self.vcd_func )
         top.set_metadata( self.vcd_func, self.make_vcd_func( top, vcd_file_name ) )
 
+  def _get_option( self, top, key, default ):
+    if top.has_metadata( key ):
+      return top.get_metadata( key )
+    return default
+
   def make_vcd_func( self, top, vcd_file_name ):
     assert vcd_file_name is not None
     if vcd_file_name != "":
@@ -44,7 +146,16 @@ class VcdGenerationPass( BasePass ):
     else:
       vcd_file_name = str(top.__class__.__name__) + ".vcd"
 
-    vcd_file = open( vcd_file_name, "w" )
+    include     = self._get_option( top, self.vcd_include, ["*"] )
+    exclude     = self._get_option( top, self.vcd_exclude, [] )
+    max_depth   = self._get_option( top, self.vcd_max_depth, None )
+    start_cycle = self._get_option( top, self.vcd_start_cycle, 0 )
+    stop_cycle  = self._get_option( top, self.vcd_stop_cycle, None )
+    buffer_size = self._get_option( top, self.vcd_buffer_size, 1 << 20 )
+
+    vcd_file = open( vcd_file_name, "w", buffering=buffer_size )
+    _vcd_files.add( vcd_file )
+    top.set_metadata( self.vcd_flush_func, vcd_file.flush )
 
     # Get vcd timescale
 
@@ -57,39 +168,26 @@ class VcdGenerationPass( BasePass ):
            "$timescale\n {}\n$end\n".format( time.asctime(), vcd_timescale ),
            file=vcd_file )
 
-    # Utility generator to create new symbols for each VCD signal.
-    # Code inspired by MyHDL 0.7.
-    # Shunning: I just reuse it from pymtl v2
+    symbols = vcd_symbols()
 
-    def _gen_vcd_symbol():
+    # Filter signals by depth and hierarchical names
 
-      # Generate a string containing all valid vcd symbol characters
-      _codechars = ''.join([chr(i) for i in range(33, 127)])
-      _mod       = len(_codechars)
-
-      # Generator logic
-      n = 0
-      while True:
-        q, r = divmod(n, _mod)
-        code = _codechars[r]
-        while q > 0:
-          q, r = divmod(q, _mod)
-          code = _codechars[r] + code
-        yield code
-        n += 1
-
-    vcd_symbols = _gen_vcd_symbol()
+    def is_traced( x ):
+      host = x.get_host_component()
+      if max_depth is not None and host.get_component_level() > max_depth:
+        return False
+      name = "top" + repr(x)[1:]
+      return any( fnmatchcase( name, p ) for p in include ) and \
+             not any( fnmatchcase( name, p ) for p in exclude )
 
     # Preprocess some metadata
 
     component_signals = defaultdict(set)
 
-    all_components = set()
-
     # We only collect top level signals, and squash bitstruct into a long
     # bits object
     for x in top._dsl.all_signals:
-      if x.is_top_level_signal():
+      if x.is_top_level_signal() and is_traced( x ):
         host = x.get_host_component()
         component_signals[ host ].add( x )
 
@@ -103,7 +201,8 @@ class VcdGenerationPass( BasePass ):
     for writer, net in top.get_all_value_nets():
       new_net = []
       for x in net:
-        if not isinstance(x, Const) and x.is_top_level_signal():
+        if not isinstance(x, Const) and x.is_top_level_signal() and \
+           x in component_signals[ x.get_host_component() ]:
           new_net.append( x )
           if repr(x) == "s.clk":
             # Hardcode clock net because it needs to go up and down
@@ -115,7 +214,7 @@ class VcdGenerationPass( BasePass ):
 
     # Generate symbol for existing nets
 
-    net_symbol_mapping = [ next(vcd_symbols) for x in trimmed_value_nets ]
+    net_symbol_mapping = [ next(symbols) for x in trimmed_value_nets ]
     signal_net_mapping = {}
 
     for i in range(len(trimmed_value_nets)):
@@ -130,8 +229,22 @@ class VcdGenerationPass( BasePass ):
       # signal names with colons in it silently fail gtkwave
       return name.replace('[','(').replace(']',')').replace(':', '__')
 
+    # Skip the scopes of components whose subtree doesn't have any traced
+    # signal
+
+    has_signals = {}
+
+    def collect_has_signals( m ):
+      ret = bool( component_signals[m] )
+      for child in m.get_child_components():
+        ret |= collect_has_signals( child )
+      has_signals[m] = ret
+      return ret
+
+    collect_has_signals( top )
+
     def recurse_models( m, spaces ):
-      nonlocal vcd_clock_net_idx, vcd_sim_ncycles
+      nonlocal vcd_clock_net_idx
 
       # Special case the top level "s" to "top"
 
@@ -146,7 +259,7 @@ class VcdGenerationPass( BasePass ):
       m_name = repr(m)
 
       # Define all signals for this model.
-      for signal in component_signals[m]:
+      for signal in sorted( component_signals[m], key=repr ):
 
         # Multiple signals may be collapsed into a single net in the
         # simulator if they are connected. Generate new vcd symbols per
@@ -168,9 +281,9 @@ class VcdGenerationPass( BasePass ):
           # a signal updated in an upblk. Creating a new net for it does
           # not hurt functionality.
 
+          signal_net_mapping[signal] = len(trimmed_value_nets)
           trimmed_value_nets.append( [ signal ] )
-          signal_net_mapping[signal] = len(signal_net_mapping)
-          symbol = next(vcd_symbols)
+          symbol = next(symbols)
           net_symbol_mapping.append( symbol )
 
         # This signal can be a part of an interface so we have to
@@ -183,7 +296,8 @@ class VcdGenerationPass( BasePass ):
 
       # Recursively visit all submodels.
       for child in m.get_child_components():
-        recurse_models( child, spaces+'  ' )
+        if has_signals[ child ]:
+          recurse_models( child, spaces+'  ' )
 
       print( f"{spaces}$upscope $end", file=vcd_file )
 
@@ -195,74 +309,95 @@ class VcdGenerationPass( BasePass ):
     # nets in the design.
     print( "$enddefinitions $end\n", file=vcd_file )
 
-    # last_values is an array of values from the previous cycle
-
-    last_values = [0 for _ in range(len(trimmed_value_nets))]
-
     for i, net in enumerate(trimmed_value_nets):
       # Convert everything to Bits to get around lack of bit struct support.
       # The first cycle VCD contains the default value
       bin_str = net[0]._dsl.Type().to_bits().to_vcd_str()
-
       print( f"{bin_str}{net_symbol_mapping[i]}", file=vcd_file )
 
-      # Set this to be the last cycle value str
-      last_values[i] = bin_str
-
-    # Now we create per-cycle signal value collect functions
-
-    vcd_sim_ncycles = 0
-
-    # Separate clock net from normal nets ahead of time
-    clock_symbol = net_symbol_mapping[ vcd_clock_net_idx ]
+    # Flip clock for the first cycle
+    if vcd_clock_net_idx is not None:
+      clock_symbol = net_symbol_mapping[ vcd_clock_net_idx ]
+      print( f'\n#0\n1{clock_symbol}\n', file=vcd_file, flush=True )
+    else:
+      print( '\n#0\n', file=vcd_file, flush=True )
 
     net_details = [ ( trimmed_value_nets[i][0], net_symbol_mapping[i] )
                     for i in range(len(trimmed_value_nets))
                       if i != vcd_clock_net_idx ]
 
-    # Flip clock for the first cycle
-    print( '\n#0\n1{}\n'.format( clock_symbol ), file=vcd_file, flush=True )
-
-    # Returns a dump_vcd function that is ready to be appended to _sched.
-    # TODO: type check?
-
-    # Adding this 's' argument is for eval to correctly evaluate 's.x'...
-    # Python 3 destroys a lot of our hacks .. sigh
-
-    def dump_vcd_inner( s ):
-      nonlocal vcd_sim_ncycles
-
-      for i, (signal, symbol) in enumerate( net_details ):
-
-        # If we encounter a BitStruct then dump it as a concatenation of
-        # all fields.
-        # TODO: treat each field in a BitStruct as a separate signal?
-
-        try:
-          net_bits_bin = eval(repr(signal)).to_bits()
-        except Exception as e:
-          raise TypeError(f'{e}\n - {signal} becomes another type. Please check your code.')
-
-        net_bits_bin_str = net_bits_bin.to_vcd_str()
-        # `last_value` is the string form of a Bits object in binary
-        # e.g. '000' == Bits3(0).to_vcd_str()
-        # We store strings instead of values ...
-        if last_values[i] != net_bits_bin_str:
-          last_values[i] = net_bits_bin_str
-          print( f'{net_bits_bin_str}{symbol}', file=vcd_file )
-
-      # Flop clock at the end of cycle
-      next_neg_edge = 100 * vcd_sim_ncycles + 50
-      print( f'\n#{next_neg_edge}\n0{clock_symbol}', file=vcd_file )
-
-      # Flip clock of the next cycle
-      next_pos_edge = next_neg_edge + 50
-      print( f'#{next_pos_edge}\n1{clock_symbol}\n', file=vcd_file, flush=True )
-      vcd_sim_ncycles += 1
-
-    def gen_dump_vcd( s ):
-      def dump_vcd():
-        dump_vcd_inner( s )
-      return dump_vcd
-
-    return gen_dump_vcd( top )
+    return self.gen_dump_vcd( top, vcd_file, net_details,
+                              None if vcd_clock_net_idx is None else clock_symbol,
+                              start_cycle, stop_cycle )
+
+  @staticmethod
+  def gen_dump_vcd( top, vcd_file, net_details, clock_symbol, start_cycle, stop_cycle ):
+    # Generate a function that reads every net once, compares its integer
+    # value with the last dumped one, and writes all changes of a cycle
+    # with a single write. The last values start from the default values
+    # that are dumped in the header.
+
+    src = [ "def dump_vcd():",
+            "  _n = _state[0]",
+            "  _state[0] = _n + 1" ]
+
+    # Outside the cycle window we only count cycles. When entering the
+    # window we invalidate all last values to dump a full snapshot.
+    if start_cycle > 0:
+      src += [ f"  if _n < {start_cycle}: return",
+               f"  if _n == {start_cycle}:",
+                "    _last[:] = [ None ] * len(_last)",
+               f"    _write( '#{100 * start_cycle}\\n' )" ]
+    if stop_cycle is not None:
+      src += [ f"  if _n >= {stop_cycle}:",
+               f"    if _n == {stop_cycle}: _flush()",
+                "    return" ]
+
+    src += [ "  _out = []",
+             "  try:" ]
+
+    last_values = []
+    for i, (signal, symbol) in enumerate( net_details ):
+      Type = signal._dsl.Type
+      nbits = Type.nbits
+
+      # If we encounter a BitStruct then dump it as a concatenation of
+      # all fields.
+      if issubclass( Type, Bits ):
+        read = f"s{repr(signal)[1:]}._uint"
+      else:
+        read = f"s{repr(signal)[1:]}.to_bits()._uint"
+
+      if nbits == 1:
+        fmt = f"f'{{_v}}' + {repr(symbol+chr(10))}"
+      else:
+        fmt = f"f'b{{_v:0{nbits}b}}' + {repr(' '+symbol+chr(10))}"
+
+      src += [ f"    _v = {read}",
+               f"    if _v != _last[{i}]:",
+               f"      _last[{i}] = _v",
+               f"      _out.append( {fmt} )" ]
+
+      last_values.append( int(Type().to_bits()) )
+
+    src += [ "  except AttributeError as e:",
+             "    raise TypeError( f'{e}\\n - a traced signal becomes another type. Please check your code.' )" ]
+
+    # Flop clock at the end of cycle and flip clock of the next cycle
+    if clock_symbol is not None:
+      neg_edge = repr( '\n#{}\n0' + clock_symbol + '\n#{}\n1' + clock_symbol + '\n\n' )
+    else:
+      neg_edge = repr( '\n#{}\n#{}\n\n' )
+    src += [ "  _t = 100 * _n + 50",
+             f"  _out.append( {neg_edge}.format( _t, _t + 50 ) )",
+             "  _write( ''.join( _out ) )" ]
+
+    namespace = {
+      's'      : top,
+      '_state' : [ 0 ],
+      '_last'  : last_values,
+      '_write' : vcd_file.write,
+      '_flush' : vcd_file.flush,
+    }
+    exec( compile( "\n".join( src ), filename="vcd_func", mode="exec" ), namespace )
+    return namespace['dump_vcd']
@@ -0,0 +1,205 @@
+"""
+========================================================================
+WaveReader.py
+========================================================================
+Random access to the binary waveform files written by BinaryWavePass.
+
+Opening a file only reads the header and the chunk headers, which form
+the time index of the file. Queries then only read and decode the
+columns of the requested signals in the chunks that overlap the
+requested cycle range.
+
+Example:
+
+  reader = WaveReader( "Top.pwave" )
+  reader.print_text_wave( 100, 120 )
+  reader.to_vcd( "Top_100_120.vcd", 100, 120, [ "s.in_", "s.out" ] )
+
+Date   : Oct 18, 2026
+"""
+
+import json
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_right
+
+from .BinaryWavePass import CHUNK_HEADER, CHUNK_MAGIC, MAGIC, value_nbytes
+from .PrintTextWavePass import PrintTextWavePass
+from .VcdGenerationPass import vcd_symbols
+
+
+class WaveReader:
+
+  MAGIC     = MAGIC
+  file_kind = "PyMTL binary waveform"
+
+  def __init__( s, file_name ):
+    s.file_name = file_name
+
+    file_size = os.path.getsize( file_name )
+    with open( file_name, "rb" ) as f:
+      if f.read( len(s.MAGIC) ) != s.MAGIC:
+        raise ValueError( f"{file_name} is not a {s.file_kind} file" )
+      header_len, = struct.unpack( "<I", f.read( 4 ) )
+      s.header = header = json.loads( f.read( header_len ) )
+
+      # Build the time index from the chunk headers. A truncated chunk at
+      # the end of the file (e.g. the simulation was killed while writing
+      # it) is ignored.
+      s._chunk_starts  = []
+      s._chunk_cycles  = []
+      s._chunk_offsets = []
+      s._chunk_sizes   = []
+      while True:
+        buf = f.read( CHUNK_HEADER.size )
+        if len(buf) < CHUNK_HEADER.size:
+          break
+        magic, start, ncycles, size = CHUNK_HEADER.unpack( buf )
+        if magic != CHUNK_MAGIC:
+          raise ValueError( f"{file_name} has a corrupted chunk at byte {f.tell()-len(buf)}" )
+        pos = f.tell()
+        if pos + size > file_size:
+          break
+        f.seek( pos + size )
+        s._chunk_starts.append( start )
+        s._chunk_cycles.append( ncycles )
+        s._chunk_offsets.append( pos )
+        s._chunk_sizes.append( size )
+
+    s.signals = [ name for name, _, _ in header['signals'] ]
+    s._nbits  = { name: nbits for name, nbits, _ in header['signals'] }
+    s._host   = { name: host for name, _, host in header['signals'] }
+    s._index  = { name: i for i, name in enumerate( s.signals ) }
+
+    s.ncycles = s._chunk_starts[-1] + s._chunk_cycles[-1] if s._chunk_starts else 0
+
+  def get_nbits( s, name ):
+    return s._nbits[ name ]
+
+  def _check_window( s, start, stop ):
+    if stop is None or stop > s.ncycles:
+      stop = s.ncycles
+    if not 0 <= start <= stop:
+      raise ValueError( f"invalid cycle window [{start}, {stop}) of a {s.ncycles}-cycle waveform" )
+    return start, stop
+
+  def get_values( s, names, start=0, stop=None ):
+    """Return a dict that maps each signal in `names` to the list of its
+    integer values in cycles [start, stop)."""
+    start, stop = s._check_window( start, stop )
+    ret = { name: [] for name in names }
+    if start == stop:
+      return ret
+
+    first = bisect_right( s._chunk_starts, start ) - 1
+    with open( s.file_name, "rb" ) as f:
+      for k in range( first, len(s._chunk_starts) ):
+        c_start, c_cycles = s._chunk_starts[k], s._chunk_cycles[k]
+        if c_start >= stop:
+          break
+        lo = max( start, c_start ) - c_start
+        hi = min( stop, c_start + c_cycles ) - c_start
+
+        for name in names:
+          values = s._read_column( f, k, s._index[ name ], value_nbytes( s._nbits[ name ] ), c_cycles )
+          ret[ name ].extend( values[ lo:hi ] )
+    return ret
+
+  def _read_column( s, f, k, idx, nbytes, c_cycles ):
+    # Return the per-cycle values of column idx in chunk k
+    base = s._chunk_offsets[k]
+    f.seek( base + 4 * idx )
+    offset, = struct.unpack( "<I", f.read( 4 ) )
+    f.seek( base + offset )
+    nchanges, = struct.unpack( "<I", f.read( 4 ) )
+    cycles = array( 'I' )
+    cycles.frombytes( f.read( 4 * nchanges ) )
+    raw = f.read( nbytes * nchanges )
+
+    ret = [ 0 ] * c_cycles
+    for j in range( nchanges ):
+      v   = int.from_bytes( raw[ j*nbytes:(j+1)*nbytes ], 'little' )
+      end = cycles[j+1] if j+1 < nchanges else c_cycles
+      ret[ cycles[j]:end ] = [ v ] * (end - cycles[j])
+    return ret
+
+  def print_text_wave( s, start=0, stop=None, names=None, chars_per_cycle=6 ):
+    """Print the text wave of cycles [start, stop) in the same format as
+    PrintTextWavePass. `names` defaults to all signals."""
+    if names is None:
+      names = s.signals
+    names = [ "s.reset" ] + [ x for x in names if x != "s.reset" ]
+
+    start, stop = s._check_window( start, stop )
+    if start == stop:
+      return
+
+    values = s.get_values( names, start, stop )
+    text_sigs = { name: [ f"0b{v:0{s._nbits[name]}b}" for v in values[name] ]
+                  for name in names }
+    PrintTextWavePass().print_text_wave( text_sigs, chars_per_cycle, start )
+
+  def to_vcd( s, vcd_file_name, start=0, stop=None, names=None, timescale="10ps" ):
+    """Export cycles [start, stop) of the signals in `names` (default to
+    all signals) to a VCD file with the same layout as the one generated
+    by VcdGenerationPass."""
+    if names is None:
+      names = s.signals
+    start, stop = s._check_window( start, stop )
+    values = s.get_values( names, start, stop )
+
+    # Build the scope tree from the host components of the signals
+
+    symbols = vcd_symbols()
+    tree = {}
+    for name in names:
+      host = s._host[ name ]
+      node = tree
+      for scope in host.split('.')[1:]:
+        node = node.setdefault( scope, {} )
+      node.setdefault( None, [] ).append( (name[ len(host)+1: ], name, next(symbols)) )
+
+    def mangle( name ):
+      return name.replace('[','(').replace(']',')').replace(':', '__')
+
+    symbol_of = {}
+    lines = [ f"$date\n  {time.asctime()}\n$end\n$version\n  PyMTL 3 (Mamba)\n$end\n"
+              f"$timescale\n {timescale}\n$end\n" ]
+
+    def recurse( scope, node, spaces ):
+      lines.append( f"{spaces}$scope module {mangle(scope)} $end" )
+      for field, name, symbol in node.get( None, [] ):
+        symbol_of[ name ] = symbol
+        lines.append( f"{spaces}  $var reg {s._nbits[name]} {symbol} {mangle(field)} $end" )
+      for child, subtree in node.items():
+        if child is not None:
+          recurse( child, subtree, spaces + '  ' )
+      lines.append( f"{spaces}$upscope $end" )
+
+    recurse( "top", tree, "" )
+    clock_symbol = next( symbols )
+    lines.insert( 2, f"  $var reg 1 {clock_symbol} clk $end" )
+    lines.append( "$enddefinitions $end\n" )
+
+    def fmt( name, v ):
+      nbits = s._nbits[ name ]
+      return f"{v}{symbol_of[name]}" if nbits == 1 else f"b{v:0{nbits}b} {symbol_of[name]}"
+
+    # Cycle i of the waveform is dumped between the positive edge at time
+    # 100*i and the negative edge at 100*i+50, the same as the VCD
+    # generated during simulation.
+    with open( vcd_file_name, "w" ) as out:
+      out.write( "\n".join( lines ) + "\n" )
+      last = {}
+      for i in range( stop - start ):
+        t = 100 * (start + i)
+        out.write( f"#{t}\n1{clock_symbol}\n" )
+        for name in names:
+          v = values[ name ][i]
+          if last.get( name ) != v:
+            last[ name ] = v
+            out.write( fmt( name, v ) + "\n" )
+        out.write( f"#{t+50}\n0{clock_symbol}\n" )
+      out.write( f"#{100*stop}\n1{clock_symbol}\n" )
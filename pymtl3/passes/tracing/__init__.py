@@ -1,2 +1,6 @@
+from .BinaryLineTracePass import BinaryLineTracePass
+from .BinaryWavePass import BinaryWavePass
+from .LineTraceReader import LineTraceReader
 from .PrintTextWavePass import PrintTextWavePass
 from .VcdGenerationPass import VcdGenerationPass
+from .WaveReader import WaveReader
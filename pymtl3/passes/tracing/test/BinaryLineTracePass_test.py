@@ -0,0 +1,196 @@
+#=========================================================================
+# BinaryLineTracePass_test.py
+#=========================================================================
+# Record binary line traces during simulation and render them with
+# LineTraceReader.
+#
+# Date   : Oct 18, 2026
+
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.ifcs import RecvIfcRTL, RecvRTL2SendCL
+from pymtl3.stdlib.queues import NormalQueueCL
+from pymtl3.stdlib.test_utils.test_sinks import TestSinkCL
+from pymtl3.stdlib.test_utils.test_srcs import TestSrcCL
+
+from ..BinaryLineTracePass import BinaryLineTracePass
+from ..LineTraceReader import LineTraceReader
+
+#-------------------------------------------------------------------------
+# Designs
+#-------------------------------------------------------------------------
+
+class QueueHarness( Component ):
+
+  def construct( s, nmsgs ):
+    msgs   = [ Bits16( i * 3 ) for i in range(nmsgs) ]
+    s.src  = TestSrcCL( Bits16, msgs, initial_delay=2, interval_delay=1 )
+    s.q    = NormalQueueCL( 2 )
+    s.sink = TestSinkCL( Bits16, msgs, interval_delay=2 )
+
+    s.src.send //= s.q.enq
+
+    @update_once
+    def up_deq():
+      if s.q.deq.rdy() and s.sink.recv.rdy():
+        s.sink.recv( s.q.deq() )
+
+  def done( s ):
+    return s.src.done() and s.sink.done()
+
+  def line_trace( s ):
+    return f"{s.src.line_trace()} > {s.q.line_trace()} > {s.sink.line_trace()}"
+
+class SinkCL( Component ):
+
+  @non_blocking( lambda s: True )
+  def recv( s, msg ):
+    s.received.append( int(msg) )
+
+  def construct( s ):
+    s.received = []
+
+class AdapterHarness( Component ):
+
+  def construct( s ):
+    s.in_     = RecvIfcRTL( Bits16 )
+    s.adapter = RecvRTL2SendCL( Bits16 )
+    s.sink    = SinkCL()
+
+    s.in_ //= s.adapter.recv
+    s.adapter.send //= s.sink.recv
+
+  def line_trace( s ):
+    return f"{s.in_} > {s.sink.recv}"
+
+bs = mk_bitstruct( "TraceStruct", {
+  'foo' : Bits1,
+  'bar' : Bits12,
+} )
+
+class Counter( Component ):
+
+  def construct( s ):
+    s.in_ = InPort( Bits16 )
+    s.out = OutPort( Bits16 )
+    s.cnt = Wire( Bits8 )
+    s.st  = OutPort( bs )
+
+    @update_ff
+    def up_cnt():
+      if s.reset: s.cnt <<= 0
+      else:       s.cnt <<= s.cnt + 1
+
+    @update
+    def up_out():
+      s.out @= s.in_ + zext( s.cnt, 16 )
+      s.st  @= bs( s.cnt[0], zext( s.cnt, 12 ) )
+
+  def line_trace( s ):
+    return f"{s.in_} {s.cnt} {s.out} {s.st}"
+
+#-------------------------------------------------------------------------
+# Helpers
+#-------------------------------------------------------------------------
+
+def simulate( top, ncycles, bintrace=None, chunk_cycles=None, stim=None ):
+  """ Return the line trace printed during the simulation. """
+  top.elaborate()
+  if chunk_cycles is not None:
+    top.set_metadata( BinaryLineTracePass.line_trace_chunk_cycles, chunk_cycles )
+  top.apply( DefaultPassGroup( linetrace=bintrace is None, bintrace=bintrace ) )
+
+  out = io.StringIO()
+  with redirect_stdout( out ):
+    top.sim_reset()
+    for i in range(ncycles):
+      if stim is not None:
+        stim( top, i )
+      top.sim_tick()
+
+  if bintrace is not None:
+    top.get_metadata( BinaryLineTracePass.line_trace_flush_func )()
+    assert out.getvalue() == ""
+  return [ x for x in out.getvalue().splitlines() if x ]
+
+def counter_stim( top, i ):
+  top.in_ @= ( i * 7 ) % 5
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( "chunk_cycles", [ 1, 7, 4096 ] )
+def test_render_cl( tmp_path, chunk_cycles ):
+  name = str( tmp_path / "queue" )
+  printed = simulate( QueueHarness( 6 ), 30 )
+  simulate( QueueHarness( 6 ), 30, name, chunk_cycles )
+
+  reader = LineTraceReader( name + ".ptrace" )
+  assert reader.ncycles == 33
+
+  # sim_reset doesn't print the first cycle
+  assert reader.render( QueueHarness( 6 ), 1 ) == printed
+
+  # Any window can be rendered on its own
+  assert reader.render( QueueHarness( 6 ), 17, 21 ) == printed[16:20]
+
+@pytest.mark.parametrize( "chunk_cycles", [ 1, 7, 4096 ] )
+def test_render_rtl( tmp_path, chunk_cycles ):
+  name = str( tmp_path / "counter" )
+  printed = simulate( Counter(), 20, stim=counter_stim )
+  simulate( Counter(), 20, name, chunk_cycles, stim=counter_stim )
+
+  reader = LineTraceReader( name + ".ptrace" )
+  top = Counter()
+  assert reader.render( top, 1 ) == printed
+  assert reader.render( top, 10, 12 ) == printed[9:11]
+
+def test_cl_records( tmp_path ):
+  name = str( tmp_path / "records" )
+  simulate( QueueHarness( 2 ), 12, name )
+
+  reader = LineTraceReader( name + ".ptrace" )
+  records = reader.get_cl_records()
+  assert len(records) == reader.ncycles
+
+  enqs = [ r[ 's.q.enq.method' ] for r in records if 's.q.enq.method' in r ]
+  assert enqs == [ ( ( Bits16(0), ), None ), ( ( Bits16(3), ), None ) ]
+
+def test_rtl_to_cl_messages( tmp_path ):
+  # RecvRTL2SendCL sends the value object of its recv.msg port, which is
+  # overwritten in place in the next cycle
+  name = str( tmp_path / "adapter" )
+
+  def stim( top, i ):
+    top.in_.en  @= i < 10
+    top.in_.msg @= i + 1
+
+  top = AdapterHarness()
+  simulate( top, 12, name, stim=stim )
+  assert len( top.sink.received ) == 10
+
+  reader = LineTraceReader( name + ".ptrace" )
+  sent = [ r[ 's.adapter.send.method' ] for r in reader.get_cl_records()
+           if 's.adapter.send.method' in r ]
+  assert sent == [ ( ( Bits16( x ), ), None ) for x in top.sink.received ]
+
+def test_print_line_trace( tmp_path ):
+  name = str( tmp_path / "print" )
+  printed = simulate( QueueHarness( 3 ), 10 )
+  simulate( QueueHarness( 3 ), 10, name )
+
+  out = io.StringIO()
+  with redirect_stdout( out ):
+    LineTraceReader( name + ".ptrace" ).print_line_trace( QueueHarness( 3 ), 3, 8 )
+  assert out.getvalue().splitlines() == printed[2:7]
+
+def test_wrong_file( tmp_path ):
+  path = tmp_path / "bad.ptrace"
+  path.write_bytes( b"PYMTLWV1" )
+  with pytest.raises( ValueError ):
+    LineTraceReader( str(path) )
@@ -0,0 +1,139 @@
+#=========================================================================
+# BinaryWavePass_test.py
+#=========================================================================
+# Write binary waveforms during simulation and query them with
+# WaveReader.
+#
+# Date   : Oct 18, 2026
+
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from pymtl3.datatypes import *
+from pymtl3.dsl import *
+from pymtl3.passes.PassGroups import DefaultPassGroup
+
+from ..BinaryWavePass import BinaryWavePass
+from ..PrintTextWavePass import PrintTextWavePass
+from ..WaveReader import WaveReader
+
+bs = mk_bitstruct( "WaveStruct", {
+  'foo' : Bits1,
+  'bar' : Bits12,
+} )
+
+class Counter( Component ):
+  def construct( s ):
+    s.in_   = InPort( Bits16 )
+    s.out   = OutPort( Bits16 )
+    s.cnt   = Wire( Bits8 )
+    s.odd   = OutPort( Bits1 )
+    s.st    = OutPort( bs )
+    s.wide  = OutPort( Bits100 )
+
+    @update_ff
+    def up_cnt():
+      if s.reset: s.cnt <<= 0
+      else:       s.cnt <<= s.cnt + 1
+
+    @update
+    def up_out():
+      s.out  @= s.in_ + zext( s.cnt, 16 )
+      s.odd  @= s.cnt[0]
+      s.st   @= bs( s.cnt[0], zext( s.cnt, 12 ) )
+      s.wide @= zext( s.cnt, 100 ) << 90
+
+def _simulate( name, n_cycles, chunk_cycles, textwave=False ):
+  dut = Counter()
+  dut.elaborate()
+  dut.set_metadata( BinaryWavePass.wave_file_name, name )
+  dut.set_metadata( BinaryWavePass.wave_chunk_cycles, chunk_cycles )
+  if textwave:
+    dut.set_metadata( PrintTextWavePass.enable, True )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+
+  expected = {}
+  for i in range(n_cycles):
+    dut.in_ @= (i * 7) % 5
+    dut.sim_eval_combinational()
+    for x in [ 'in_', 'out', 'cnt', 'odd', 'wide' ]:
+      expected.setdefault( f"s.{x}", [] ).append( int( getattr( dut, x ) ) )
+    expected.setdefault( "s.st", [] ).append( int( dut.st.to_bits() ) )
+    dut.sim_tick()
+
+  dut.get_metadata( BinaryWavePass.wave_flush_func )()
+  return dut, expected
+
+@pytest.mark.parametrize( "chunk_cycles", [ 1, 7, 4096 ] )
+def test_values( chunk_cycles ):
+  dut, expected = _simulate( f"binwave_{chunk_cycles}", 50, chunk_cycles )
+  reader = WaveReader( f"binwave_{chunk_cycles}.pwave" )
+
+  # sim_reset takes three cycles
+  n_reset = reader.ncycles - 50
+  assert reader.signals[0] == "s.reset"
+  assert reader.get_nbits( "s.wide" ) == 100
+  assert reader.get_nbits( "s.st" ) == 13
+
+  names = list( expected )
+  full = reader.get_values( names )
+  for name in names:
+    assert full[ name ][ n_reset: ] == expected[ name ]
+
+  # Random access to windows that cross chunk boundaries
+  for start, stop in [ (0, 1), (n_reset + 3, n_reset + 17), (20, 20), (40, None) ]:
+    window = reader.get_values( names, start, stop )
+    for name in names:
+      assert window[ name ] == full[ name ][ start:stop ]
+
+  with pytest.raises( ValueError ):
+    reader.get_values( names, 10, 5 )
+
+def test_text_wave_matches_print_text_wave():
+  dut, _ = _simulate( "binwave_text", 12, 5, textwave=True )
+  reader = WaveReader( "binwave_text.pwave" )
+  assert set( reader.signals ) == set( dut.get_metadata( PrintTextWavePass.textwave_dict ) )
+
+  f1 = io.StringIO()
+  with redirect_stdout( f1 ):
+    dut.print_textwave()
+
+  f2 = io.StringIO()
+  with redirect_stdout( f2 ):
+    reader.print_text_wave()
+
+  assert f1.getvalue() == f2.getvalue()
+
+  # A window starts with the label of its first cycle
+  f3 = io.StringIO()
+  with redirect_stdout( f3 ):
+    reader.print_text_wave( 4, 9, [ "s.out", "s.odd" ] )
+  assert "|4 " in f3.getvalue() and "|9 " not in f3.getvalue()
+
+def test_vcd_export():
+  dut, expected = _simulate( "binwave_vcd", 20, 8 )
+  reader = WaveReader( "binwave_vcd.pwave" )
+  reader.to_vcd( "binwave_vcd_window.vcd", 5, 15, [ "s.out", "s.odd", "s.cnt" ] )
+
+  with open( "binwave_vcd_window.vcd" ) as f:
+    text = f.read()
+  header, body = text.split( "$enddefinitions $end" )
+  assert "$scope module top $end" in header
+  assert " out $end" in header and " odd $end" in header and " in_ $end" not in header
+
+  tokens = body.split()
+  assert tokens[0] == "#500" and tokens[-2] == "#1500"
+
+def test_truncated_file():
+  _simulate( "binwave_trunc", 20, 8 )
+  with open( "binwave_trunc.pwave", "rb" ) as f:
+    data = f.read()
+  with open( "binwave_trunc.pwave", "wb" ) as f:
+    f.write( data[:-10] )
+
+  reader = WaveReader( "binwave_trunc.pwave" )
+  assert reader.ncycles == 16
+  assert len( reader.get_values( [ "s.out" ] )[ "s.out" ] ) == 16
@@ -0,0 +1,114 @@
+#=========================================================================
+# CLLineTracePass_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+from pymtl3 import *
+from pymtl3.stdlib.queues import NormalQueueCL
+
+from ..CLLineTracePass import CLLineTracePass
+
+
+class Callee( Component ):
+
+  @non_blocking( lambda s: True )
+  def fixed( s, msg ):
+    return msg + 1
+
+  @non_blocking( lambda s: True )
+  def default( s, msg, extra=10 ):
+    return msg + extra
+
+  def construct( s ):
+    pass
+
+class Harness( Component ):
+
+  def construct( s ):
+    s.q      = NormalQueueCL( 1 )
+    s.callee = Callee()
+    s.fixed  = CallerIfcCL()
+    s.fixed //= s.callee.fixed
+
+    s.cycle  = 0
+    s.rets   = []
+    s.traces = []
+
+    @update_once
+    def up_enq():
+      if s.cycle % 3 == 0 and s.q.enq.rdy():
+        s.q.enq( Bits8( s.cycle ) )
+
+    @update_once
+    def up_deq():
+      if s.cycle % 3 == 1 and s.q.deq.rdy():
+        s.q.deq()
+
+    @update_once
+    def up_call():
+      if s.cycle % 2 == 0 and s.fixed.rdy() and s.callee.default.rdy():
+        s.rets.append( ( s.fixed( msg=Bits8( s.cycle ) ),
+                         s.callee.default( Bits8( s.cycle ), extra=Bits8(2) ) ) )
+
+    @update_ff
+    def up_cycle():
+      s.cycle += 1
+
+  def line_trace( s ):
+    trace = f"{s.q.enq} {s.q.deq} {s.fixed} {s.callee.fixed} {s.callee.default}"
+    s.traces.append( trace )
+    return trace
+
+def run( ncycles, toggle_at=None ):
+  th = Harness()
+  th.elaborate()
+  th.apply( DefaultPassGroup( linetrace=True ) )
+  toggle = th.get_metadata( CLLineTracePass.toggle_cl_trace_func )
+  th.sim_reset()
+  for i in range(ncycles):
+    if toggle_at is not None and i in toggle_at:
+      toggle( toggle_at[i] )
+    th.sim_tick()
+  return th
+
+def test_cl_line_trace():
+  th = run( 4 )
+  # The first two traces are printed during reset
+  assert th.traces[2:] == [
+    "(03) .   .       .       .         ",
+    ".    =03 (04)=05 (04)=05 (04,02)=06",
+    ".    .   .       .       .         ",
+    "(06) .   (06)=07 (06)=07 (06,02)=08",
+  ]
+  assert th.rets == [ ( 1, 2 ), ( 3, 4 ), ( 5, 6 ), ( 7, 8 ) ]
+
+def test_cl_line_trace_toggle():
+  th = run( 6, { 1: False, 3: True } )
+  # Nothing is recorded while the recording is off, but the methods are
+  # still called
+  assert th.traces[3:6] == [ ".    .   .       .       .         " ] * 3
+  assert th.traces[6:] == [
+    ".    =06 .       .       .         ",
+    ".    .   (08)=09 (08)=09 (08,02)=0a",
+  ]
+  assert th.rets == [ ( 1, 2 ), ( 3, 4 ), ( 5, 6 ), ( 7, 8 ), ( 9, 10 ) ]
+
+def test_cl_trace_slots():
+  th = Harness()
+  th.elaborate()
+  th.apply( DefaultPassGroup() )
+  slots = th.get_metadata( CLLineTracePass.cl_trace_slots )
+  index = th.get_metadata( CLLineTracePass.cl_trace_slot_index )
+
+  # All ports of a net share one slot and one wrapper
+  assert index[ th.fixed.method ] == index[ th.callee.fixed.method ]
+  assert th.fixed.method.method is th.callee.fixed.method.method
+
+  th.fixed.method( Bits8(5) )
+  assert slots[ index[ th.fixed.method ] ] == ( ( Bits8(5), ), Bits8(6) )
+  th.callee.default.method( Bits8(1), extra=Bits8(1) )
+  assert slots[ index[ th.callee.default.method ] ] == ( ( Bits8(1), Bits8(1) ), Bits8(2) )
+
+  th.get_metadata( CLLineTracePass.clear_cl_trace_func )()
+  assert all( x is None for x in slots )
@@ -89,3 +89,112 @@ def test_bitstruct_signals():
     [  bs(0, -1), b32(0), b32(-1), ],
     [  bs(0, 42), b32(42), b32(84), ],
   ], tv_in, tv_out )
+
+class Inner( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.reg = Wire( Bits8 )
+
+    @update_ff
+    def up_reg():
+      s.reg <<= s.in_
+
+    s.out //= s.reg
+
+class Outer( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.cnt = OutPort( Bits1 )
+    s.inner = Inner()
+    s.inner.in_ //= s.in_
+    s.out //= s.inner.out
+
+    @update_ff
+    def up_cnt():
+      s.cnt <<= ~s.cnt
+
+def _simulate( name, n_cycles=8, **options ):
+  dut = Outer()
+  dut.elaborate()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, name )
+  for key, value in options.items():
+    dut.set_metadata( getattr( VcdGenerationPass, key ), value )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+  for i in range(n_cycles):
+    dut.in_ @= i * 3
+    dut.sim_tick()
+  dut.get_metadata( VcdGenerationPass.vcd_flush_func )()
+  with open( name + ".vcd" ) as f:
+    return f.read()
+
+def _parse_vcd( text ):
+  # Return {name: symbol} and [(time, symbol, value)]
+  header, body = text.split( "$enddefinitions $end" )
+  names = {}
+  scopes = []
+  for line in header.splitlines():
+    tokens = line.split()
+    if tokens[:1] == [ "$scope" ]:
+      scopes.append( tokens[2] )
+    elif tokens[:1] == [ "$upscope" ]:
+      scopes.pop()
+    elif tokens[:1] == [ "$var" ]:
+      names[ ".".join( scopes + [ tokens[4] ] ) ] = tokens[3]
+
+  changes = []
+  time  = 0
+  value = None
+  for token in body.split():
+    if value is not None:
+      changes.append( (time, token, value) )
+      value = None
+    elif token.startswith( "#" ):
+      time = int( token[1:] )
+    elif token.startswith( "b" ):
+      value = int( token[1:], 2 )
+    else:
+      changes.append( (time, token[1:], int( token[0] )) )
+  return names, changes
+
+def test_change_only():
+  names, changes = _parse_vcd( _simulate( "vcd_change_only" ) )
+  assert {
+    "top.in_", "top.out", "top.cnt", "top.clk", "top.reset",
+    "top.inner.in_", "top.inner.out", "top.inner.reg",
+  } <= set( names )
+
+  # Connected signals share the same symbol
+  assert names["top.in_"] == names["top.inner.in_"]
+  assert names["top.out"] == names["top.inner.out"] == names["top.inner.reg"]
+
+  # Only changes are dumped
+  cnt = [ (t, v) for t, sym, v in changes if sym == names["top.cnt"] ]
+  assert all( a[1] != b[1] for a, b in zip( cnt, cnt[1:] ) )
+  assert [ t for t, v in cnt ] == list( range( 0, 100 * len(cnt), 100 ) )
+
+  ins = [ v for t, sym, v in changes if sym == names["top.in_"] ]
+  assert ins == [ 0 ] + [ i*3 for i in range(1, 8) ]
+
+def test_filters():
+  names, _ = _parse_vcd( _simulate( "vcd_filters", vcd_include=[ "top.inner.*", "top.cnt" ],
+                                    vcd_exclude=[ "*.reg" ] ) )
+  assert set( names ) == { "top.cnt", "top.inner.in_", "top.inner.out",
+                           "top.inner.clk", "top.inner.reset" }
+
+  names, _ = _parse_vcd( _simulate( "vcd_depth", vcd_max_depth=0 ) )
+  assert set( names ) == { "top.in_", "top.out", "top.cnt", "top.clk", "top.reset" }
+
+def test_cycle_window():
+  names, changes = _parse_vcd( _simulate( "vcd_window", n_cycles=12,
+                                          vcd_start_cycle=5, vcd_stop_cycle=9 ) )
+  # Initial values plus a full snapshot when the window opens
+  times = sorted( { t for t, _, _ in changes } )
+  assert times[0] == 0
+  assert 500 in times
+  assert all( t == 0 or 500 <= t <= 900 for t in times )
+
+  snapshot = { sym for t, sym, _ in changes if t == 500 }
+  assert names["top.in_"] in snapshot and names["top.out"] in snapshot
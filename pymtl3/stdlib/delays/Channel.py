@@ -0,0 +1,214 @@
+"""
+========================================================================
+Channel.py
+========================================================================
+Latency-insensitive channels with a fixed latency and credit-based flow
+control. A message sent in cycle t can be received from cycle t+latency,
+and the credit of a message received in cycle t is back at the sender in
+cycle t+latency. With num_credits >= 2*latency a channel sustains one
+message per cycle.
+
+Nothing in one cycle of the sender affects the receiver in the same cycle
+and vice versa, so the two ends of a channel can be simulated
+independently as long as they are at most latency cycles apart. This is
+how PartitionedSimPass cuts a design at its channels: each half of a
+channel is instantiated (side='tx' or side='rx') in the process that
+simulates the partition connected to it, and the link object between the
+halves is replaced with a shared memory one.
+
+A link has the following methods. The halves call pop_* in their update
+blocks and *_done in their update_ff blocks.
+
+- push_msg( arrival, msg ) / pop_msgs( cycle ) -> [ msg, ... ]
+- push_credit( arrival ) / pop_credits( cycle ) -> number of credits
+- tx_done( ncycles ) / rx_done( ncycles ): the half has finished ncycles
+
+Date   : Oct 18, 2026
+"""
+from collections import deque
+
+from pymtl3 import *
+from pymtl3.extra import clone_deepcopy
+from pymtl3.stdlib.ifcs import RecvIfcRTL, SendIfcRTL
+
+#-------------------------------------------------------------------------
+# LocalLink
+#-------------------------------------------------------------------------
+# The link of a channel whose two halves are in the same simulator.
+
+class LocalLink:
+
+  def __init__( s ):
+    s.msgs    = deque()
+    s.credits = deque()
+
+  def push_msg( s, arrival, msg ):
+    s.msgs.append( (arrival, clone_deepcopy( msg )) )
+
+  def pop_msgs( s, cycle ):
+    ret = []
+    while s.msgs and s.msgs[0][0] <= cycle:
+      ret.append( s.msgs.popleft()[1] )
+    return ret
+
+  def push_credit( s, arrival ):
+    s.credits.append( arrival )
+
+  def pop_credits( s, cycle ):
+    ret = 0
+    while s.credits and s.credits[0] <= cycle:
+      s.credits.popleft()
+      ret += 1
+    return ret
+
+  def tx_done( s, ncycles ):
+    pass
+
+  def rx_done( s, ncycles ):
+    pass
+
+def _check_channel_params( latency, num_credits ):
+  assert latency >= 1, "A channel needs at least one cycle of latency"
+  if num_credits is None:
+    num_credits = 2 * latency
+  assert num_credits >= 1, "A channel needs at least one credit"
+  return num_credits
+
+#-------------------------------------------------------------------------
+# ChannelRTL
+#-------------------------------------------------------------------------
+
+class ChannelRTL( Component ):
+
+  def construct( s, Type, latency=1, num_credits=None, side='both' ):
+    assert side in ( 'both', 'tx', 'rx' )
+
+    s.Type        = Type
+    s.latency     = latency
+    s.num_credits = num_credits = _check_channel_params( latency, num_credits )
+    s.side        = side
+    s.link        = LocalLink()
+
+    # Sender half
+
+    if side != 'rx':
+      s.recv = RecvIfcRTL( Type )
+
+      s.credits  = num_credits
+      s.tx_cycle = 0
+
+      @update_once
+      def up_tx_rdy():
+        s.credits += s.link.pop_credits( s.tx_cycle )
+        s.recv.rdy @= b1( s.credits > 0 ) & ~s.reset
+
+      @update_ff
+      def up_tx_ff():
+        if s.recv.en:
+          s.link.push_msg( s.tx_cycle + latency, s.recv.msg )
+          s.credits -= 1
+        s.tx_cycle += 1
+        s.link.tx_done( s.tx_cycle )
+
+    # Receiver half
+
+    if side != 'tx':
+      s.send = SendIfcRTL( Type )
+
+      s.buf      = deque()
+      s.rx_cycle = 0
+
+      @update_once
+      def up_rx_send():
+        s.buf.extend( s.link.pop_msgs( s.rx_cycle ) )
+        if s.buf and not s.reset:
+          s.send.en  @= s.send.rdy
+          s.send.msg @= s.buf[0]
+        else:
+          s.send.en  @= 0
+
+      @update_ff
+      def up_rx_ff():
+        if s.send.en:
+          s.buf.popleft()
+          s.link.push_credit( s.rx_cycle + latency )
+        s.rx_cycle += 1
+        s.link.rx_done( s.rx_cycle )
+
+  def line_trace( s ):
+    if s.side == 'tx':
+      return f"{s.recv}(>{s.credits})"
+    if s.side == 'rx':
+      return f"({len(s.buf)}>){s.send}"
+    return f"{s.recv}({len(s.buf)}){s.send}"
+
+#-------------------------------------------------------------------------
+# ChannelCL
+#-------------------------------------------------------------------------
+# Type is only needed if the channel is cut by PartitionedSimPass, where
+# messages are sent as Bits between processes.
+
+class ChannelCL( Component ):
+
+  @non_blocking( lambda s: s.credits > 0 )
+  def recv( s, msg ):
+    s.link.push_msg( s.tx_cycle + s.latency, msg )
+    s.credits -= 1
+
+  def construct( s, Type=None, latency=1, num_credits=None, side='both' ):
+    assert side in ( 'both', 'tx', 'rx' )
+
+    s.Type        = Type
+    s.latency     = latency
+    s.num_credits = num_credits = _check_channel_params( latency, num_credits )
+    s.side        = side
+    s.link        = LocalLink()
+
+    # Sender half (recv is always there but only called on this side)
+
+    s.credits = 0
+
+    if side != 'rx':
+      s.credits  = num_credits
+      s.tx_cycle = 0
+
+      @update_once
+      def up_tx_credits():
+        s.credits += s.link.pop_credits( s.tx_cycle )
+
+      @update_ff
+      def up_tx_ff():
+        s.tx_cycle += 1
+        s.link.tx_done( s.tx_cycle )
+
+      s.add_constraints(
+        U( up_tx_credits ) < M( s.recv ),
+        U( up_tx_credits ) < M( s.recv.rdy ),
+      )
+
+    # Receiver half
+
+    if side != 'tx':
+      s.send = CallerIfcCL( Type=Type )
+
+      s.buf      = deque()
+      s.rx_cycle = 0
+
+      @update_once
+      def up_rx_send():
+        s.buf.extend( s.link.pop_msgs( s.rx_cycle ) )
+        if s.buf and s.send.rdy():
+          s.send( s.buf.popleft() )
+          s.link.push_credit( s.rx_cycle + latency )
+
+      @update_ff
+      def up_rx_ff():
+        s.rx_cycle += 1
+        s.link.rx_done( s.rx_cycle )
+
+  def line_trace( s ):
+    if s.side == 'tx':
+      return f"{s.recv}(>{s.credits})"
+    if s.side == 'rx':
+      return f"({len(s.buf)}>){s.send}"
+    return f"{s.recv}({len(s.buf)}){s.send}"
@@ -1,2 +1,3 @@
 from .DelayPipeCL import DelayPipeDeqCL, DelayPipeSendCL
 from .StallCL import StallCL
+from .Channel import ChannelCL, ChannelRTL, LocalLink
@@ -0,0 +1,57 @@
+#=========================================================================
+# Channel_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import run_sim
+from pymtl3.stdlib.test_utils.test_sinks import TestSinkCL, TestSinkRTL
+from pymtl3.stdlib.test_utils.test_srcs import TestSrcCL, TestSrcRTL
+
+from ..Channel import ChannelCL, ChannelRTL
+
+#-------------------------------------------------------------------------
+# TestHarness
+#-------------------------------------------------------------------------
+
+class TestHarness( Component ):
+
+  def construct( s, is_cl, msgs, latency, num_credits, sink_lat ):
+    Src, Chan, Sink = ( TestSrcCL, ChannelCL, TestSinkCL ) if is_cl else \
+                      ( TestSrcRTL, ChannelRTL, TestSinkRTL )
+
+    s.src  = Src( Bits16, msgs )
+    s.chan = Chan( Bits16, latency, num_credits )
+    s.sink = Sink( Bits16, msgs, interval_delay=sink_lat )
+
+    s.src.send  //= s.chan.recv
+    s.chan.send //= s.sink.recv
+
+  def done( s ):
+    return s.src.done() and s.sink.done()
+
+  def line_trace( s ):
+    return s.src.line_trace() + " > " + s.chan.line_trace() + " > " + s.sink.line_trace()
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+# With enough credits a channel sustains one message per cycle, and with
+# fewer credits a message takes a round trip of 2*latency cycles.
+
+@pytest.mark.parametrize( "is_cl", [ False, True ] )
+@pytest.mark.parametrize( "latency, num_credits, sink_lat, ncycles", [
+  ( 1, None, 0, 28 ),
+  ( 3, None, 0, 30 ),
+  ( 1, 1,    0, 47 ),
+  ( 3, 2,    0, 66 ),
+  ( 2, None, 3, 86 ),
+])
+def test_channel( is_cl, latency, num_credits, sink_lat, ncycles ):
+  msgs = [ Bits16(i) for i in range(20) ]
+  th = TestHarness( is_cl, msgs, latency, num_credits, sink_lat )
+  run_sim( th )
+  assert th.sim_cycle_count() == ncycles
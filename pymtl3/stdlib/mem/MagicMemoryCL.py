@@ -16,7 +16,7 @@ from pymtl3.stdlib.delays import DelayPipeDeqCL, DelayPipeSendCL, StallCL
 
 from .MagicMemoryFL import MagicMemoryFL
 from .mem_ifcs import MemMinionIfcCL
-from .MemMsg import MemMsgType, mk_mem_msg
+from .MemMsg import mk_mem_msg
 
 # BRGTC2 custom MemMsg modified for RISC-V 32
 
@@ -90,54 +90,10 @@ class MagicMemoryCL( Component ):
 
         if s.req_qs[i].deq.rdy() and s.resp_qs[i].enq.rdy():
 
-          # Dequeue memory request message
-
-          req = s.req_qs[i].deq()
-          len_ = int(req.len)
-          if len_ == 0: len_ = req_classes[i].data_nbits >> 3
-
-          #
-          # READ
-          #
-          if   req.type_ == MemMsgType.READ:
-            resp = resp_classes[i]( req.type_, req.opaque, 0, req.len,
-                                    zext( s.mem.read( req.addr, len_ ), req_classes[i].data_nbits ) )
-
-          #
-          # WRITE
-          #
-          elif  req.type_ == MemMsgType.WRITE:
-            s.mem.write( req.addr, len_, req.data[0:len_<<3] )
-            # FIXME do we really set len=0 in response when doing subword wr?
-            # resp = resp_classes[i]( req.type_, req.opaque, 0, req.len, 0 )
-            resp = resp_classes[i]( req.type_, req.opaque, 0, 0, 0 )
-
-          #
-          # AMOs
-          #
-          elif  req.type_ == MemMsgType.AMO_ADD   or \
-                req.type_ == MemMsgType.AMO_AND   or \
-                req.type_ == MemMsgType.AMO_MAX   or \
-                req.type_ == MemMsgType.AMO_MAXU  or \
-                req.type_ == MemMsgType.AMO_MIN   or \
-                req.type_ == MemMsgType.AMO_MINU  or \
-                req.type_ == MemMsgType.AMO_OR    or \
-                req.type_ == MemMsgType.AMO_SWAP  or \
-                req.type_ == MemMsgType.AMO_XOR:
-            resp = resp_classes[i]( req.type_, req.opaque, 0, req.len,
-               s.mem.amo( req.type_, req.addr, len_, req.data ) )
-
-          # INV
-          elif  req.type_ == MemMsgType.INV:
-            resp = resp_classes[i]( req.type_, req.opaque, 0, 0, 0 )
-
-          # FLUSH
-          elif  req.type_ == MemMsgType.FLUSH:
-            resp = resp_classes[i]( req.type_, req.opaque, 0, 0, 0 )
-
-          # Invalid type
-          else:
-            assert( False )
+          # Dequeue memory request message and serve it
+
+          req  = s.req_qs[i].deq()
+          resp = s.mem.handle_req( req, resp_classes[i] )
 
           s.resp_qs[i].enq( resp )
 
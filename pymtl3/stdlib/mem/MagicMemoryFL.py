@@ -1,11 +1,8 @@
 from pymtl3 import *
-from pymtl3.extra.pypy.fast_bytearray_funcs import (
-    read_bytearray_bits,
-    write_bytearray_bits,
-)
 
 from .mem_ifcs import MemMinionIfcFL
 from .MemMsg import MemMsgType
+from .SparseMemory import SparseMemory
 
 AMO_FUNS = { MemMsgType.AMO_ADD  : lambda m,a : m+a,
              MemMsgType.AMO_AND  : lambda m,a : m&a,
@@ -18,10 +15,16 @@ AMO_FUNS = { MemMsgType.AMO_ADD  : lambda m,a : m+a,
              MemMsgType.AMO_XOR  : lambda m,a : m^a,
            }
 
+# Request types answered with an empty response
+NOP_TYPES = { MemMsgType.INV, MemMsgType.FLUSH }
+
 class MagicMemoryFL( Component ):
 
+  # The memory is sparse, so mem_nbytes only bounds the addresses and
+  # e.g. mem_nbytes=1<<32 is as cheap as the default.
+
   def construct( s, mem_nbytes=1<<20 ):
-    s.mem = bytearray( mem_nbytes )
+    s.mem = SparseMemory( mem_nbytes )
 
     s.ifc = MemMinionIfcFL( s.read, s.write, s.amo )
 
@@ -32,11 +35,11 @@ class MagicMemoryFL( Component ):
 
   def read( s, addr, nbytes ):
     s.trace = "[rd ]"
-    return read_bytearray_bits( s.mem, addr, nbytes )
+    return s.mem.read_bits( addr, nbytes )
 
   def write( s, addr, nbytes, data ):
     s.trace = "[wr ]"
-    write_bytearray_bits( s.mem, addr, nbytes, data )
+    s.mem.write_bits( addr, nbytes, data )
 
     # addr = int(addr)
     # end  = addr + nbytes
@@ -47,19 +50,88 @@ class MagicMemoryFL( Component ):
       # addr += 1
     # s.trace = "[wr ]"
 
+  # Vectors of nbytes-byte accesses, see SparseMemory.read_bits_bulk
+
+  def read_bulk( s, addrs, nbytes ):
+    s.trace = "[rd ]"
+    return s.mem.read_bits_bulk( addrs, nbytes )
+
+  def write_bulk( s, addrs, nbytes, datas ):
+    s.trace = "[wr ]"
+    s.mem.write_bits_bulk( addrs, nbytes, datas )
+
   def amo( s, amo, addr, nbytes, data ):
     ret = s.read( addr, nbytes )
     s.write( addr, nbytes, AMO_FUNS[ int(amo) ]( ret, data ) )
     s.trace = "[amo]"
     return ret
 
+  #-----------------------------------------------------------------------
+  # Memory messages
+  #-----------------------------------------------------------------------
+  # Serve MemReqMsg-style requests and return MemRespMsg-style responses
+  # of type RespType. handle_reqs serves a vector of requests in order
+  # and reads runs of reads of the same length with one bulk access.
+
+  def handle_req( s, req, RespType ):
+    type_ = int(req.type_)
+    len_  = int(req.len)
+    if len_ == 0: len_ = req.data_nbits >> 3
+
+    if type_ == MemMsgType.READ:
+      return RespType( req.type_, req.opaque, 0, req.len,
+                       zext( s.read( req.addr, len_ ), req.data_nbits ) )
+
+    elif type_ == MemMsgType.WRITE:
+      s.write( req.addr, len_, req.data[0:len_<<3] )
+      # Write responses carry no data, so they report len=0 like the
+      # adapters in mem_ifcs
+      return RespType( req.type_, req.opaque, 0, 0, 0 )
+
+    elif type_ in AMO_FUNS:
+      return RespType( req.type_, req.opaque, 0, req.len,
+                       s.amo( req.type_, req.addr, len_, req.data ) )
+
+    elif type_ in NOP_TYPES:
+      return RespType( req.type_, req.opaque, 0, 0, 0 )
+
+    raise AssertionError( f"Invalid memory request type {type_}" )
+
+  def handle_reqs( s, reqs, RespType ):
+    resps = []
+    types = [ int(x.type_) for x in reqs ]
+    lens  = [ int(x.len) for x in reqs ]
+    i, n  = 0, len(reqs)
+    while i < n:
+      j = i + 1
+      if types[i] == MemMsgType.READ:
+        while j < n and types[j] == MemMsgType.READ and lens[j] == lens[i]:
+          j += 1
+
+      if j - i == 1:
+        resps.append( s.handle_req( reqs[i], RespType ) )
+      else:
+        nbits = reqs[i].data_nbits
+        run   = reqs[i:j]
+        datas = s.read_bulk( [ x.addr for x in run ], lens[i] or nbits >> 3 )
+        resps.extend( RespType( x.type_, x.opaque, 0, x.len, zext( data, nbits ) )
+                      for x, data in zip( run, datas ) )
+      i = j
+    return resps
+
+  #-----------------------------------------------------------------------
+  # Magical methods
+  #-----------------------------------------------------------------------
+
   def read_mem( s, addr, size ):
     assert len(s.mem) > (addr + size)
-    return s.mem[ addr : addr + size ]
+    return s.mem.read( addr, size )
 
+  # Read-only data (bytes, or the sections of elf_reader( ..., use_mmap=True ))
+  # is mapped copy-on-write instead of copied
   def write_mem( s, addr, data ):
     assert len(s.mem) > (addr + len(data))
-    s.mem[ addr : addr + len(data) ] = data
+    s.mem.write( addr, data )
 
   def line_trace( s ):
     return s.trace
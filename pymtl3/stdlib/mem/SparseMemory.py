@@ -0,0 +1,182 @@
+"""
+========================================================================
+SparseMemory
+========================================================================
+A sparse, page-based byte-addressable memory used as the backing store
+of the magic memories. Only pages that are written are allocated, and
+pages that are never written read as zeros, so a memory can span a full
+32-bit (or larger) address space at the cost of the data the program
+actually touches.
+
+Writing a read-only buffer (bytes, or a read-only memoryview such as the
+section data of elf_reader( ..., use_mmap=True )) maps all full pages of
+the buffer without copying. The mapped pages are copy-on-write: the
+first write to such a page copies it into a private bytearray, so the
+original buffer is never modified.
+
+Date   : Oct 18, 2026
+"""
+
+from pymtl3.datatypes import Bits, mk_bits
+
+
+class SparseMemory:
+
+  def __init__( s, nbytes=1<<32, page_nbytes=4096 ):
+    assert page_nbytes > 0 and page_nbytes & (page_nbytes - 1) == 0, \
+           f"page size {page_nbytes} is not a power of two"
+
+    s.nbytes      = nbytes
+    s.page_nbytes = page_nbytes
+    s.page_shift  = page_nbytes.bit_length() - 1
+    s.page_mask   = page_nbytes - 1
+
+    # page number -> bytearray (private) or read-only memoryview (mapped)
+    s.pages = {}
+
+  def __len__( s ):
+    return s.nbytes
+
+  # Mapped pages are saved as bytes when pickled/copied, e.g. in
+  # simulation checkpoints
+
+  def __getstate__( s ):
+    state = s.__dict__.copy()
+    state['pages'] = { pn: page if page.__class__ is bytearray else bytes(page)
+                       for pn, page in s.pages.items() }
+    return state
+
+  def _check_range( s, addr, size ):
+    if addr < 0 or addr + size > s.nbytes:
+      raise IndexError( f"memory access [{addr:#x}, {addr+size:#x}) is out of range "
+                        f"of the {s.nbytes:#x}-byte memory" )
+
+  def _get_writable_page( s, pn ):
+    page = s.pages.get( pn )
+    if page is None:
+      page = s.pages[ pn ] = bytearray( s.page_nbytes )
+    elif page.__class__ is not bytearray: # copy-on-write
+      page = s.pages[ pn ] = bytearray( page )
+    return page
+
+  #-----------------------------------------------------------------------
+  # Bits accesses
+  #-----------------------------------------------------------------------
+  # Little-endian reads/writes of nbytes bytes. These are the accesses of
+  # the memory requests, so the common case of an access within one page
+  # is handled inline.
+
+  def read_bits( s, addr, nbytes ):
+    addr = int(addr)
+    s._check_range( addr, nbytes )
+    off = addr & s.page_mask
+    if off + nbytes <= s.page_nbytes:
+      page = s.pages.get( addr >> s.page_shift )
+      if page is None:
+        return Bits( nbytes << 3, 0 )
+      return Bits( nbytes << 3, int.from_bytes( page[off:off+nbytes], 'little' ) )
+    return Bits( nbytes << 3, int.from_bytes( s.read( addr, nbytes ), 'little' ) )
+
+  def write_bits( s, addr, nbytes, data ):
+    addr = int(addr)
+    s._check_range( addr, nbytes )
+    data = (int(data) & ((1 << (nbytes << 3)) - 1)).to_bytes( nbytes, 'little' )
+    off  = addr & s.page_mask
+    if off + nbytes <= s.page_nbytes:
+      s._get_writable_page( addr >> s.page_shift )[ off:off+nbytes ] = data
+    else:
+      s.write( addr, data )
+
+  # Bulk versions of read_bits/write_bits for a vector of nbytes-byte
+  # accesses, e.g. all cache lines of a batch of requests. The lookups
+  # are hoisted out of the loop and each access is one from_bytes/to_bytes
+  # on a slice of its page.
+
+  def read_bits_bulk( s, addrs, nbytes ):
+    BitsN      = mk_bits( nbytes << 3 )
+    pages      = s.pages
+    shift      = s.page_shift
+    mask       = s.page_mask
+    last       = s.page_nbytes - nbytes
+    limit      = s.nbytes - nbytes
+    from_bytes = int.from_bytes
+    ret = []
+    for addr in addrs:
+      addr = int(addr)
+      if not 0 <= addr <= limit:
+        s._check_range( addr, nbytes )
+      off = addr & mask
+      if off <= last:
+        page = pages.get( addr >> shift )
+        ret.append( BitsN( 0 if page is None else from_bytes( page[off:off+nbytes], 'little' ) ) )
+      else:
+        ret.append( BitsN( from_bytes( s.read( addr, nbytes ), 'little' ) ) )
+    return ret
+
+  def write_bits_bulk( s, addrs, nbytes, datas ):
+    pages = s.pages
+    shift = s.page_shift
+    mask  = s.page_mask
+    last  = s.page_nbytes - nbytes
+    limit = s.nbytes - nbytes
+    dmask = (1 << (nbytes << 3)) - 1
+    for addr, data in zip( addrs, datas ):
+      addr = int(addr)
+      if not 0 <= addr <= limit:
+        s._check_range( addr, nbytes )
+      data = (int(data) & dmask).to_bytes( nbytes, 'little' )
+      off  = addr & mask
+      if off <= last:
+        page = pages.get( addr >> shift )
+        if page.__class__ is not bytearray:
+          page = s._get_writable_page( addr >> shift )
+        page[ off:off+nbytes ] = data
+      else:
+        s.write( addr, data )
+
+  #-----------------------------------------------------------------------
+  # Byte accesses
+  #-----------------------------------------------------------------------
+
+  def read( s, addr, size ):
+    addr = int(addr)
+    s._check_range( addr, size )
+    ret  = bytearray( size )
+    pos  = 0
+    while pos < size:
+      off = (addr + pos) & s.page_mask
+      n   = min( s.page_nbytes - off, size - pos )
+      page = s.pages.get( (addr + pos) >> s.page_shift )
+      if page is not None:
+        ret[ pos:pos+n ] = page[ off:off+n ]
+      pos += n
+    return ret
+
+  def write( s, addr, data ):
+    addr = int(addr)
+    view = memoryview( data ).cast( 'B' )
+    size = len(view)
+    s._check_range( addr, size )
+
+    # Only immutable buffers can be shared with the caller
+    mappable = view.readonly
+    pos = 0
+    while pos < size:
+      off = (addr + pos) & s.page_mask
+      n   = min( s.page_nbytes - off, size - pos )
+      pn  = (addr + pos) >> s.page_shift
+      if mappable and n == s.page_nbytes:
+        s.pages[ pn ] = view[ pos:pos+n ]
+      else:
+        s._get_writable_page( pn )[ off:off+n ] = view[ pos:pos+n ]
+      pos += n
+
+  #-----------------------------------------------------------------------
+  # Statistics
+  #-----------------------------------------------------------------------
+
+  def num_private_pages( s ):
+    return sum( 1 for x in s.pages.values() if x.__class__ is bytearray )
+
+  def num_mapped_pages( s ):
+    return sum( 1 for x in s.pages.values() if x.__class__ is not bytearray )
@@ -0,0 +1,138 @@
+#=========================================================================
+# SparseMemory_test.py
+#=========================================================================
+#
+# Date   : Oct 18, 2026
+
+import random
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.extra.pypy.fast_bytearray_funcs import (
+    read_bytearray_bits_bulk,
+    write_bytearray_bits_bulk,
+)
+from pymtl3.stdlib.proc import SparseMemoryImage, elf
+
+from ..MagicMemoryFL import MagicMemoryFL
+from ..MemMsg import MemMsgType, mk_mem_msg
+from ..SparseMemory import SparseMemory
+from .mem_bench import run_benchmarks
+
+
+def test_same_as_bytearray():
+  rng = random.Random( 0x5ba75e )
+  mem = SparseMemory( 1 << 16, page_nbytes=64 )
+  ref = bytearray( 1 << 16 )
+
+  for _ in range(2000):
+    addr   = rng.randrange( (1 << 16) - 256 )
+    nbytes = rng.choice( [ 1, 2, 4, 16, 100, 200 ] )
+    if rng.random() < 0.5:
+      data = rng.getrandbits( nbytes * 8 )
+      mem.write_bits( addr, nbytes, Bits( nbytes*8, data ) )
+      ref[ addr:addr+nbytes ] = data.to_bytes( nbytes, 'little' )
+    else:
+      assert mem.read_bits( addr, nbytes ) == int.from_bytes( ref[addr:addr+nbytes], 'little' )
+      assert mem.read( addr, nbytes ) == ref[ addr:addr+nbytes ]
+
+def test_sparse_4GiB():
+  mem = SparseMemory( 1 << 32 )
+  mem.write_bits( 0xfffffffc, 4, Bits32(0xdeadbeef) )
+  mem.write_bits( 0x80000ffe, 4, Bits32(0x12345678) )
+  assert mem.read_bits( 0xfffffffc, 4 ) == 0xdeadbeef
+  assert mem.read_bits( 0x80000ffe, 4 ) == 0x12345678
+  assert mem.read_bits( 0x40000000, 4 ) == 0
+  assert mem.num_private_pages() == 3
+
+  with pytest.raises( IndexError ):
+    mem.read_bits( 0xfffffffe, 4 )
+
+def test_copy_on_write():
+  mem  = SparseMemory( 1 << 20, page_nbytes=256 )
+  data = bytes( range(256) ) * 4 + b'\x01\x02'
+  mem.write( 0x100, data )
+  assert mem.num_mapped_pages() == 4 and mem.num_private_pages() == 1
+  assert mem.read( 0x100, len(data) ) == data
+
+  mem.write_bits( 0x200, 1, Bits8(0xff) )
+  assert mem.num_mapped_pages() == 3
+  assert mem.read_bits( 0x200, 2 ) == 0x01ff
+  assert data[0x100] == 0
+
+  # Mutable buffers are always copied
+  buf = bytearray( 256 )
+  mem.write( 0x1000, buf )
+  buf[0] = 1
+  assert mem.read_bits( 0x1000, 1 ) == 0
+
+def test_load_mmap_elf( tmpdir ):
+  mem_image = SparseMemoryImage()
+  text = bytes( random.Random(1).getrandbits(8) for _ in range(8192) )
+  mem_image.add_section( ".text", 0x2000, text )
+
+  with tmpdir.join("elf-test").open('wb') as file_obj:
+    elf.elf_writer( mem_image, file_obj )
+
+  with tmpdir.join("elf-test").open('rb') as file_obj:
+    image = elf.elf_reader( file_obj, use_mmap=True )
+
+  mem = MagicMemoryFL( 1 << 32 )
+  mem.elaborate()
+  for section in image.get_sections():
+    mem.write_mem( section.addr, section.data )
+
+  assert mem.read_mem( 0x2000, len(text) ) == text
+  assert mem.read( 0x2004, 4 ) == int.from_bytes( text[4:8], 'little' )
+  mem.write( 0x2004, 4, Bits32(0) )
+  assert mem.read( 0x2004, 4 ) == 0
+  assert image.get_section( ".text" ).data == text
+
+def test_bulk():
+  rng = random.Random( 0xb01c )
+  for nbytes in [ 1, 4, 64 ]:
+    mem = SparseMemory( 1 << 16, page_nbytes=256 )
+    arr = bytearray( 1 << 16 )
+    addrs = [ rng.randrange( (1 << 16) - nbytes ) for _ in range(100) ]
+    datas = [ rng.getrandbits( nbytes * 8 ) for _ in range(100) ]
+
+    mem.write_bits_bulk( addrs, nbytes, datas )
+    write_bytearray_bits_bulk( arr, addrs, nbytes, datas )
+    assert mem.read( 0, 1 << 16 ) == arr
+
+    ref = [ mem.read_bits( a, nbytes ) for a in addrs ]
+    assert mem.read_bits_bulk( addrs, nbytes ) == ref
+    assert read_bytearray_bits_bulk( arr, addrs, nbytes ) == ref
+
+  with pytest.raises( IndexError ):
+    mem.read_bits_bulk( [ 0, 1 << 16 ], 4 )
+  with pytest.raises( IndexError ):
+    read_bytearray_bits_bulk( arr, [ -1 ], 4 )
+
+def test_handle_reqs():
+  Req, Resp = mk_mem_msg( 8, 32, 32 )
+  mem = MagicMemoryFL()
+  mem.elaborate()
+
+  reqs = [ Req( MemMsgType.WRITE,   0, 0x100, 0, 0xdeadbeef ),
+           Req( MemMsgType.READ,    1, 0x100, 0, 0 ),
+           Req( MemMsgType.READ,    2, 0x101, 1, 0 ),
+           Req( MemMsgType.READ,    3, 0x102, 1, 0 ),
+           Req( MemMsgType.AMO_ADD, 4, 0x100, 0, 1 ),
+           Req( MemMsgType.READ,    5, 0x100, 0, 0 ),
+           Req( MemMsgType.READ,    6, 0x104, 0, 0 ) ]
+
+  assert mem.handle_reqs( reqs, Resp ) == [
+    Resp( MemMsgType.WRITE,   0, 0, 0, 0 ),
+    Resp( MemMsgType.READ,    1, 0, 0, 0xdeadbeef ),
+    Resp( MemMsgType.READ,    2, 0, 1, 0xbe ),
+    Resp( MemMsgType.READ,    3, 0, 1, 0xad ),
+    Resp( MemMsgType.AMO_ADD, 4, 0, 0, 0xdeadbeef ),
+    Resp( MemMsgType.READ,    5, 0, 0, 0xdeadbef0 ),
+    Resp( MemMsgType.READ,    6, 0, 0, 0 ),
+  ]
+
+def test_mem_bench():
+  results = run_benchmarks( 4, nreqs=10, number=1, repeat=1 )
+  assert all( t > 0 for t in results.values() )
@@ -0,0 +1,82 @@
+#=========================================================================
+# mem_bench.py
+#=========================================================================
+# Per-request throughput of the magic memory backing stores: one access
+# at a time on a dense bytearray (the original MagicMemoryFL), one access
+# at a time on a SparseMemory, and the bulk versions that serve a vector
+# of requests per call. Run with
+#
+#   python -m pymtl3.stdlib.mem.test.mem_bench [nbytes ...]
+#
+# Date   : Oct 18, 2026
+
+import random
+import sys
+import timeit
+
+from pymtl3.extra.pypy.fast_bytearray_funcs import (
+    read_bytearray_bits,
+    read_bytearray_bits_bulk,
+    write_bytearray_bits,
+    write_bytearray_bits_bulk,
+)
+
+from ..MagicMemoryFL import MagicMemoryFL
+from ..MemMsg import MemMsgType, mk_mem_msg
+from ..SparseMemory import SparseMemory
+
+MEM_NBYTES = 1 << 20
+
+# name -> statement serving all requests once
+BENCHMARKS = {
+  'read'              : "for a in addrs: read_bytearray_bits( arr, a, n )",
+  'read_sparse'       : "for a in addrs: mem.read_bits( a, n )",
+  'read_bulk'         : "read_bytearray_bits_bulk( arr, addrs, n )",
+  'read_sparse_bulk'  : "mem.read_bits_bulk( addrs, n )",
+  'write'             : "for a, d in zip( addrs, datas ): write_bytearray_bits( arr, a, n, d )",
+  'write_sparse'      : "for a, d in zip( addrs, datas ): mem.write_bits( a, n, d )",
+  'write_bulk'        : "write_bytearray_bits_bulk( arr, addrs, n, datas )",
+  'write_sparse_bulk' : "mem.write_bits_bulk( addrs, n, datas )",
+  'msg_read'          : "for r in reqs: fl.handle_req( r, Resp )",
+  'msg_read_bulk'     : "fl.handle_reqs( reqs, Resp )",
+}
+
+def _mk_env( nbytes, nreqs ):
+  rng   = random.Random( 0xbe9c )
+  addrs = [ rng.randrange( MEM_NBYTES // nbytes ) * nbytes for _ in range(nreqs) ]
+  datas = [ rng.getrandbits( nbytes * 8 ) for _ in range(nreqs) ]
+
+  mem = SparseMemory( MEM_NBYTES )
+  mem.write( 0, bytearray( MEM_NBYTES ) )
+
+  fl = MagicMemoryFL( MEM_NBYTES )
+  fl.elaborate()
+  Req, Resp = mk_mem_msg( 8, 32, nbytes * 8 )
+  reqs = [ Req( MemMsgType.READ, 0, a, 0, 0 ) for a in addrs ]
+
+  return { 'arr': bytearray( MEM_NBYTES ), 'mem': mem, 'fl': fl, 'n': nbytes,
+           'addrs': addrs, 'datas': datas, 'reqs': reqs, 'Resp': Resp,
+           'read_bytearray_bits': read_bytearray_bits,
+           'write_bytearray_bits': write_bytearray_bits,
+           'read_bytearray_bits_bulk': read_bytearray_bits_bulk,
+           'write_bytearray_bits_bulk': write_bytearray_bits_bulk }
+
+def run_benchmarks( nbytes=4, nreqs=1000, number=20, repeat=3 ):
+  """ Return {benchmark: ns per request}. """
+  env = _mk_env( nbytes, nreqs )
+  results = {}
+  for name, stmt in BENCHMARKS.items():
+    t = min( timeit.repeat( stmt, number=number, repeat=repeat, globals=env ) )
+    results[ name ] = t / number / nreqs * 1e9
+  return results
+
+def main( argv ):
+  widths = [ int(x) for x in argv ] or [ 4, 16, 64 ]
+  for nbytes in widths:
+    results = run_benchmarks( nbytes )
+    print( f"\n{nbytes}-byte requests (ns/request)" )
+    for name in BENCHMARKS:
+      print( f"{name:20}{results[name]:10.1f}" )
+
+if __name__ == "__main__":
+  main( sys.argv[1:] )
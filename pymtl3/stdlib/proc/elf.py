@@ -34,6 +34,7 @@
 # Author : Christopher Batten, Shunning Jiang
 # Date   : Feb 26, 2020
 
+import mmap
 import struct
 
 from .SparseMemoryImage import SparseMemoryImage
@@ -411,9 +412,18 @@ class ElfSymTabEntry:
 #-------------------------------------------------------------------------
 # elf_reader
 #-------------------------------------------------------------------------
-# Opens and parses an ELF file into a sparse memory image object.
+# Opens and parses an ELF file into a sparse memory image object. With
+# use_mmap=True, the file is mapped into memory and the data of each
+# section is a read-only memoryview into the mapping instead of a copy,
+# so that loading the image into a SparseMemory-backed magic memory
+# doesn't copy the program at all. The file must not be modified while
+# the image is in use.
 
-def elf_reader( file_obj ):
+def elf_reader( file_obj, use_mmap=False ):
+
+  file_map = None
+  if use_mmap:
+    file_map = memoryview( mmap.mmap( file_obj.fileno(), 0, access=mmap.ACCESS_READ ) )
 
   # Read the data for the ELF header
 
@@ -481,8 +491,11 @@ def elf_reader( file_obj ):
     # Read the section data if it exists
 
     if section_name not in ['.sbss', '.bss']:
-      file_obj.seek( shdr.offset )
-      data = file_obj.read( shdr.size )
+      if file_map is not None:
+        data = file_map[ shdr.offset : shdr.offset + shdr.size ]
+      else:
+        file_obj.seek( shdr.offset )
+        data = file_obj.read( shdr.size )
 
     # NOTE: the .bss and .sbss sections don't actually contain any
     # data in the ELF.  These sections should be initialized to zero.
@@ -18,7 +18,7 @@ from pymtl3.extra import clone_deepcopy
 from pymtl3.stdlib.delays import DelayPipeDeqCL, DelayPipeSendCL, StallCL
 
 from pymtl3.stdlib.mem.MagicMemoryFL import MagicMemoryFL
-from pymtl3.stdlib.mem.MemMsg import MemMsgType, mk_mem_msg
+from pymtl3.stdlib.mem.MemMsg import mk_mem_msg
 from .ifcs import MinionIfcRTL, RecvIfcRTL, SendIfcRTL
 from .queues import NormalQueueRTL, PipeQueueRTL
 
@@ -164,37 +164,10 @@ class MagicMemoryRTL( Component ):
 
         if s.req_stalls[i].send.val:
 
-          # Dequeue memory request message
-
-          req = s.req_stalls[i].send.msg
-          len_ = int(req.len)
-          if len_ == 0: len_ = req_classes[i].data_nbits >> 3
-
-          if   req.type_ == MemMsgType.READ:
-            resp = resp_classes[i]( req.type_, req.opaque, 0, req.len,
-                                    zext( s.mem.read( req.addr, len_ ), req_classes[i].data_nbits ) )
-
-          elif  req.type_ == MemMsgType.WRITE:
-            s.mem.write( req.addr, len_, req.data[0:len_<<3] )
-            # FIXME do we really set len=0 in response when doing subword wr?
-            # resp = resp_classes[i]( req.type_, req.opaque, 0, req.len, 0 )
-            resp = resp_classes[i]( req.type_, req.opaque, 0, 0, 0 )
-
-          elif  req.type_ == MemMsgType.AMO_ADD   or \
-                req.type_ == MemMsgType.AMO_AND   or \
-                req.type_ == MemMsgType.AMO_MAX   or \
-                req.type_ == MemMsgType.AMO_MAXU  or \
-                req.type_ == MemMsgType.AMO_MIN   or \
-                req.type_ == MemMsgType.AMO_MINU  or \
-                req.type_ == MemMsgType.AMO_OR    or \
-                req.type_ == MemMsgType.AMO_SWAP  or \
-                req.type_ == MemMsgType.AMO_XOR:
-            resp = resp_classes[i]( req.type_, req.opaque, 0, req.len,
-               s.mem.amo( req.type_, req.addr, len_, req.data ) )
-
-          # Invalid type
-          else:
-            assert False
+          # Dequeue memory request message and serve it
+
+          req  = s.req_stalls[i].send.msg
+          resp = s.mem.handle_req( req, resp_classes[i] )
 
           s.resp_qs[i].recv.msg @= resp
 